@@ -0,0 +1,202 @@
+"""
+Confidence gating for AI skill extraction.
+
+Pattern matching handles clean, English, well-formatted documents well, while
+the AI call dominates upload latency and cost. Each parsed document is scored
+from its pattern results and text-quality signals (share of common English
+and Norwegian words, amount of Norwegian, PDF corruption indicators), and only
+documents the pattern engine is unsure about are sent to AI. Every decision is
+recorded in the document's ai_metadata under "gate".
+
+Configuration (environment variables):
+- AI_EXTRACTION_POLICY: always, never or gated (default gated)
+- AI_GATE_THRESHOLD: documents scoring below this confidence go to AI (default 0.6)
+"""
+
+import math
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from ai_skills import CHARS_PER_TOKEN, AI_CHUNK_TOKENS, AI_MAX_CHUNKS
+from fix_corrupted_extraction import create_corrupted_skill_mapper
+
+POLICY_ALWAYS = 'always'
+POLICY_NEVER = 'never'
+POLICY_GATED = 'gated'
+POLICIES = (POLICY_ALWAYS, POLICY_NEVER, POLICY_GATED)
+
+AI_EXTRACTION_POLICY = os.environ.get('AI_EXTRACTION_POLICY', POLICY_GATED).lower()
+AI_GATE_THRESHOLD = float(os.environ.get('AI_GATE_THRESHOLD', 0.6))
+
+# Frequent words of well-extracted text; broken extraction loses most of them
+ENGLISH_COMMON_WORDS = frozenset("""
+the and of to in a is for with on as by an be this that are from or have has was were it we you our your
+my will can experience work working team development skills knowledge years including using also such
+other all more new which their they not but about within across who must should would responsible
+""".split())
+NORWEGIAN_COMMON_WORDS = frozenset("""
+og jeg det en et til er som på med av ikke der så meg seg men ett har om vi mitt hadde hun nå ved fra
+du ut sin dem oss opp hvor eller hva skal selv alle vil ble blitt kunne inn når være noen noe ville dere
+deg mot hos erfaring kunnskap utvikling arbeid stilling søker gode innen både etter også vår våre norsk
+engelsk samarbeid ansvar løsninger kompetanse
+""".split())
+
+# Corrupted spellings from fix_corrupted_extraction.py that are not just a prefix of the real skill
+CORRUPTED_TOKENS = frozenset(
+    corrupted for corrupted, skill in create_corrupted_skill_mapper().items()
+    if len(corrupted) >= 3 and corrupted.isalpha()
+    and not skill.lower().replace(' ', '').startswith(corrupted)
+)
+
+# Ordinary lower-case tokens without vowels (URL schemes, file formats, tools)
+VOWELLESS_TERMS = frozenset("""
+http https html xhtml sftp ftps mssql pgsql nltk pptx xlsx pdfs
+""".split())
+
+_WORD = re.compile(r'[A-Za-zÆØÅæøå]+')
+_VOWELS = set('aeiouyæøå')
+# URLs and e-mail addresses are not prose; their pieces would count as corruption
+_LINKS = re.compile(r'\S+@\S+\.\w+|(?:https?://|www\.)\S+')
+
+
+class TextSignals:
+    """Word counts behind the text-quality signals, accumulated page by page.
+
+    Feeding the pages of a document gives the same counts as the joined text,
+    so a document can be scored without keeping all of its text.
+    """
+
+    def __init__(self, text: str = ''):
+        self.characters = 0
+        self.words = 0
+        self.english = 0
+        self.norwegian = 0
+        self.corrupted = 0
+        if text:
+            self.feed(text)
+
+    def feed(self, text: str) -> None:
+        """Count the words of the next page (pages are joined with a space)."""
+        self.characters += len(text) + (1 if self.characters else 0)
+        words = _WORD.findall(_LINKS.sub(' ', text))
+        lowered = [word.lower() for word in words]
+        self.words += len(words)
+        self.english += sum(1 for word in lowered if word in ENGLISH_COMMON_WORDS)
+        self.norwegian += sum(1 for word in lowered if word in NORWEGIAN_COMMON_WORDS)
+        # Lower-case tokens without vowels (acronyms are upper case) or known corrupted spellings
+        self.corrupted += sum(
+            1 for word, low in zip(words, lowered)
+            if word.islower() and (low in CORRUPTED_TOKENS or (
+                len(low) >= 4 and low not in VOWELLESS_TERMS and not _VOWELS.intersection(low)))
+        )
+
+
+def score_document(text: str, pattern_skills: List[str], signals: Optional[TextSignals] = None) -> Dict[str, Any]:
+    """Score how well pattern matching covers a document.
+
+    ``signals`` are the word counts of the whole document when ``text`` only
+    holds its start; by default they are counted from ``text``.
+
+    Returns the text-quality signals and a confidence between 0 and 1.
+    """
+    if signals is None:
+        signals = TextSignals(text)
+    english, norwegian = signals.english, signals.norwegian
+    total = max(signals.words, 1)
+    common_word_ratio = (english + norwegian) / total
+    norwegian_share = norwegian / max(english + norwegian, 1)
+    corrupted_ratio = signals.corrupted / total
+
+    confidence = 1.0
+    if common_word_ratio < 0.15:
+        confidence -= 0.4
+    confidence -= min(0.5, corrupted_ratio * 5)
+    # Mostly Norwegian text (share above about 0.45) falls below the default
+    # threshold on its own, since the multilingual AI prompt is meant for it
+    confidence -= min(0.5, 0.9 * norwegian_share)
+    if not pattern_skills:
+        confidence -= 0.5
+    elif len(pattern_skills) < 3:
+        confidence -= 0.2
+
+    return {
+        'confidence': round(max(0.0, confidence), 3),
+        'words': signals.words,
+        'pattern_skills': len(pattern_skills),
+        'common_word_ratio': round(common_word_ratio, 3),
+        'norwegian_share': round(norwegian_share, 3),
+        'corrupted_ratio': round(corrupted_ratio, 3),
+        # What an AI call would have cost, for reporting savings
+        'estimated_tokens': min(math.ceil(signals.characters / CHARS_PER_TOKEN), AI_CHUNK_TOKENS * AI_MAX_CHUNKS)
+    }
+
+
+def decide_ai_extraction(text: str, pattern_skills: List[str], policy: Optional[str] = None,
+                         threshold: Optional[float] = None, signals: Optional[TextSignals] = None) -> Dict[str, Any]:
+    """Decide whether a document should be sent to AI extraction.
+
+    Args:
+        text: Parsed document text
+        pattern_skills: Skills found by pattern matching
+        policy: always, never or gated (default AI_EXTRACTION_POLICY)
+        threshold: Confidence below which gated documents go to AI (default AI_GATE_THRESHOLD)
+        signals: Word counts of the whole document, when text only holds its start
+
+    Returns:
+        Decision dict with policy, route_to_ai, reason, confidence and signals
+    """
+    policy = policy or AI_EXTRACTION_POLICY
+    if policy not in POLICIES:
+        policy = POLICY_GATED
+    threshold = AI_GATE_THRESHOLD if threshold is None else threshold
+    signals = score_document(text, pattern_skills, signals)
+    confidence = signals.pop('confidence')
+
+    if policy == POLICY_ALWAYS:
+        route_to_ai, reason = True, 'policy always'
+    elif policy == POLICY_NEVER:
+        route_to_ai, reason = False, 'policy never'
+    elif confidence < threshold:
+        route_to_ai, reason = True, 'low pattern confidence'
+    else:
+        route_to_ai, reason = False, 'pattern results confident'
+
+    return {
+        'policy': policy,
+        'route_to_ai': route_to_ai,
+        'reason': reason,
+        'confidence': confidence,
+        'threshold': threshold,
+        'signals': signals
+    }
+
+
+def summarize_gate_decisions(documents: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Summarize the gate decisions stored in processed documents' ai_metadata."""
+    gated = sent = 0
+    tokens_saved = 0
+    for doc_data in documents:
+        decision = (doc_data.get('ai_metadata') or {}).get('gate')
+        if not decision:
+            continue
+        gated += 1
+        if decision.get('route_to_ai'):
+            sent += 1
+        else:
+            tokens_saved += decision.get('signals', {}).get('estimated_tokens', 0)
+    return summarize_gate_counts(gated, sent, tokens_saved)
+
+
+def summarize_gate_counts(gated: int, sent: int, tokens_saved: int) -> Dict[str, Any]:
+    """Summarize gate decisions already counted, e.g. by StatsStore.gate_counts()."""
+    skipped = gated - sent
+    return {
+        'policy': AI_EXTRACTION_POLICY,
+        'threshold': AI_GATE_THRESHOLD,
+        'documents_gated': gated,
+        'sent_to_ai': sent,
+        'ai_skipped': skipped,
+        'skip_rate': round(skipped / gated, 3) if gated else 0.0,
+        'estimated_tokens_saved': tokens_saved
+    }
@@ -2,49 +2,806 @@
 AI-based skill extraction module using OpenAI GPT models or Azure OpenAI.
 This module provides intelligent skill extraction as an alternative to pattern matching.
 Supports both OpenAI API and Azure OpenAI Service with secure Key Vault configuration.
+
+Raw AI responses are cached so repeated documents do not pay for another API
+call, and AsyncAISkillExtractor runs batches of extractions concurrently. A
+shared RateLimiter keeps all calls within the deployment's request and token
+quotas and pauses them when the service answers 429 with Retry-After. A
+CircuitBreaker skips AI calls while the service is failing; affected documents
+are marked ai_pending so their AI skills can be filled in later. Long documents
+are split into chunks at page or sentence boundaries, extracted concurrently
+and merged, so skills beyond the first pages are not lost. Short documents in
+a concurrent batch are packed several to a request to save round-trips.
+The global ai_extractor reads its Key Vault configuration and creates the
+clients on first use, so importing this module does no network I/O. The
+OpenAI and Azure Blob SDKs are likewise imported only when a client is built.
+
+Configuration (environment variables):
+- AI_MAX_CONCURRENCY: API calls in flight per concurrent batch (default 8)
+- AI_CHUNK_TOKENS: estimated document tokens per prompt chunk (default 1000)
+- AI_MAX_CHUNKS: chunks extracted per document; the rest is skipped (default 8)
+- AI_BATCH_MAX_TOKENS: document tokens packed into one multi-document request (default 3000, 0 disables)
+- AI_BATCH_DOC_MAX_TOKENS: largest document, in tokens, that is batched (default 400)
+- AI_RPM_LIMIT: requests per minute allowed by the deployment (0 disables)
+- AI_TPM_LIMIT: tokens per minute allowed by the deployment (0 disables)
+- AI_MAX_THROTTLE_RETRIES: retries of a throttled (429) call (default 6)
+- AI_BREAKER_FAILURE_THRESHOLD: consecutive failed calls that open the breaker (default 5)
+- AI_BREAKER_RESET_SECONDS: seconds before an open breaker lets a probe call through (default 60)
+- AI_CACHE_BACKEND: sqlite (default), blob or none
+- AI_CACHE_PATH: SQLite cache file (default ai_response_cache.db)
+- AI_CACHE_MAX_BYTES: cache size before least recently used entries are evicted
+- AI_CACHE_TTL_SECONDS: age after which cached responses are ignored
+- AI_CACHE_CONTAINER: blob container for the blob backend
 """
 
 import os
 import json
+import asyncio
+import email.utils
+import functools
+import hashlib
+import importlib.util
+import math
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from collections import Counter, defaultdict
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 import time
 import logging
 
 # Import Key Vault manager
-from keyvault_manager import get_application_config
+from keyvault_manager import add_config_listener, get_application_config
+from skill_postings import DocumentPostings
 
-# Support both OpenAI and Azure OpenAI
+# Support both OpenAI and Azure OpenAI; the SDK is imported in _create_clients()
+OPENAI_AVAILABLE = importlib.util.find_spec('openai') is not None
+
+# Azure Blob Storage is only needed for the optional blob cache backend
 try:
-    from openai import OpenAI, AzureOpenAI
-    OPENAI_AVAILABLE = True
+    BLOB_CACHE_AVAILABLE = importlib.util.find_spec('azure.storage.blob') is not None
 except ImportError:
-    OpenAI = None
-    AzureOpenAI = None
-    OPENAI_AVAILABLE = False
+    BLOB_CACHE_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Bump when the prompt templates change so cached responses are not reused
+PROMPT_TEMPLATE_VERSION = "1"
+
+# Rough characters per token for English/Norwegian text
+CHARS_PER_TOKEN = 4
+
+# Document text is sent in chunks of about AI_CHUNK_TOKENS tokens; documents
+# longer than AI_MAX_CHUNKS chunks only have their first chunks extracted
+AI_CHUNK_TOKENS = int(os.environ.get('AI_CHUNK_TOKENS', 1000))
+AI_MAX_CHUNKS = int(os.environ.get('AI_MAX_CHUNKS', 8))
+# Document text the extracted chunks can hold; callers need not keep more
+AI_MAX_TEXT_CHARS = AI_CHUNK_TOKENS * AI_MAX_CHUNKS * CHARS_PER_TOKEN
+
+# Short documents are packed into one request of at most AI_BATCH_MAX_TOKENS
+# document tokens (0 disables batching)
+AI_BATCH_MAX_TOKENS = int(os.environ.get('AI_BATCH_MAX_TOKENS', 3000))
+AI_BATCH_DOC_MAX_TOKENS = int(os.environ.get('AI_BATCH_DOC_MAX_TOKENS', 400))
+MAX_BATCH_DOCUMENTS = 10
+
+# Completion budget per document in a multi-document request
+BATCH_COMPLETION_TOKENS_PER_DOCUMENT = 300
+
+# Contact details carry no skills, so they are left out of the prompt
+_CONTACT_DETAILS = re.compile(r'\S+@\S+\.\w+|(?:https?://|www\.)\S+|\+\d[\d ()-]{6,}\d')
+
+# Maximum concurrent API calls made by AsyncAISkillExtractor
+AI_MAX_CONCURRENCY = int(os.environ.get('AI_MAX_CONCURRENCY', 8))
+
+# Completion budget per call; Azure OpenAI counts it against the TPM quota
+MAX_COMPLETION_TOKENS = 1000
+
+# Deployment quotas enforced client-side (0 disables the budget)
+AI_RPM_LIMIT = int(os.environ.get('AI_RPM_LIMIT', 0))
+AI_TPM_LIMIT = int(os.environ.get('AI_TPM_LIMIT', 0))
+AI_MAX_THROTTLE_RETRIES = int(os.environ.get('AI_MAX_THROTTLE_RETRIES', 6))
+
+# Circuit breaker around the AI service
+AI_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('AI_BREAKER_FAILURE_THRESHOLD', 5))
+AI_BREAKER_RESET_SECONDS = float(os.environ.get('AI_BREAKER_RESET_SECONDS', 60))
+
+# Circuit breaker states
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half_open'
+
+# Next step of an API call retry loop after a failed call
+RETRY_THROTTLED = 'throttled'
+RETRY_BACKOFF = 'backoff'
+
+
+class AIServiceUnavailable(Exception):
+    """Raised when an AI call is skipped by the circuit breaker or fails every attempt."""
+
+
+def estimate_request_tokens(params: Dict[str, Any]) -> int:
+    """Estimate the quota cost of a chat completion request.
+    
+    Uses roughly four characters per prompt token plus the completion budget,
+    which is how Azure OpenAI estimates usage for rate limiting.
+    """
+    characters = sum(len(message.get('content') or '') for message in params.get('messages', []))
+    return math.ceil(characters / CHARS_PER_TOKEN) + params.get('max_tokens', 0)
+
+
+def _record_usage(usage: Optional[Dict[str, int]], response, estimated_tokens: int) -> None:
+    """Add a completion's estimated and reported token usage to ``usage``."""
+    if usage is None:
+        return
+    usage['estimated_tokens'] = usage.get('estimated_tokens', 0) + estimated_tokens
+    reported = getattr(response, 'usage', None)
+    for name in ('prompt_tokens', 'completion_tokens', 'total_tokens'):
+        value = getattr(reported, name, None)
+        if isinstance(value, int):
+            usage[name] = usage.get(name, 0) + value
+
+
+def chunk_document(text: str, max_tokens: int = AI_CHUNK_TOKENS,
+                   page_offsets: Optional[List[int]] = None) -> List[str]:
+    """Split document text into chunks of at most ``max_tokens`` estimated tokens.
+    
+    A chunk ends at the last page start (from ``page_offsets``) that fits,
+    otherwise at the end of a sentence or a space, so skills are not cut in
+    half. Contact details are removed from each chunk.
+    """
+    max_chars = max(1, max_tokens) * CHARS_PER_TOKEN
+    pages = sorted(offset for offset in set(page_offsets or []) if 0 < offset < len(text))
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + max_chars
+        if end >= len(text):
+            end = len(text)
+        else:
+            # Only accept a boundary that keeps the chunk at least half full
+            floor = start + max_chars // 2
+            page_ends = [offset for offset in pages if floor <= offset <= end]
+            if page_ends:
+                end = page_ends[-1]
+            else:
+                sentence_end = max(text.rfind('. ', floor, end), text.rfind('\n', floor, end))
+                space = text.rfind(' ', floor, end)
+                if sentence_end >= floor:
+                    end = sentence_end + 1
+                elif space >= floor:
+                    end = space
+        chunk = _CONTACT_DETAILS.sub(' ', text[start:end]).strip()
+        if chunk:
+            chunks.append(chunk)
+        start = end
+    return chunks
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Return the server's Retry-After delay from an API error, if it sent one."""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        return max(0.0, float(headers.get('retry-after-ms')) / 1000)
+    except (TypeError, ValueError):
+        pass
+    retry_after = headers.get('retry-after')
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    retry_date = email.utils.parsedate_tz(retry_after)
+    if retry_date is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(retry_date) - time.time())
+
+
+def _throttle_pause(error: Exception, throttles: int) -> Optional[float]:
+    """Return how long to pause after a 429 response, or None for other errors."""
+    if getattr(error, 'status_code', None) != 429:
+        return None
+    retry_after = retry_after_seconds(error)
+    return retry_after if retry_after is not None else float(2 ** min(throttles, 5))
+
+
+def _is_outage(error: Exception) -> bool:
+    """Return True for failures that indicate the AI service is down rather than a bad request."""
+    status_code = getattr(error, 'status_code', None)
+    return status_code is None or status_code >= 500
+
+
+class CircuitBreaker:
+    """Stops calling the AI service after repeated failures.
+    
+    While closed, calls pass through. After ``failure_threshold`` consecutive
+    failures the breaker opens and calls are skipped until ``reset_seconds``
+    have passed. It then lets a single probe call through (half-open) and
+    closes again if the probe succeeds or reopens if it fails.
+    """
+    
+    def __init__(self, failure_threshold: int = AI_BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = AI_BREAKER_RESET_SECONDS):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        
+        # Metrics
+        self.times_opened = 0
+        self.rejected_calls = 0
+    
+    def allow(self) -> bool:
+        """Return True if a call may be made now."""
+        with self._lock:
+            if self.state == BREAKER_CLOSED:
+                return True
+            if self.state == BREAKER_OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = BREAKER_HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == BREAKER_HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected_calls += 1
+            return False
+    
+    def ready(self) -> bool:
+        """Return True if allow() could currently let a call through, without claiming it."""
+        with self._lock:
+            if self.state == BREAKER_OPEN:
+                return time.monotonic() - self._opened_at >= self.reset_seconds
+            return self.state == BREAKER_CLOSED or not self._probe_in_flight
+    
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != BREAKER_CLOSED:
+                logger.info("AI circuit breaker closed")
+            self.state = BREAKER_CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+    
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == BREAKER_HALF_OPEN or (
+                    self.state == BREAKER_CLOSED and self.consecutive_failures >= self.failure_threshold):
+                if self.state == BREAKER_CLOSED:
+                    self.times_opened += 1
+                logger.warning(f"AI circuit breaker open for {self.reset_seconds:.0f}s "
+                               f"after {self.consecutive_failures} consecutive failures")
+                self.state = BREAKER_OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_seconds': self.reset_seconds,
+                'times_opened': self.times_opened,
+                'rejected_calls': self.rejected_calls
+            }
+
+
+class RetryState:
+    """Retry bookkeeping shared by the sync and async API call loops.
+    
+    The loops only make the call and wait; this class decides whether another
+    attempt may be made and how long to wait first, and keeps the circuit
+    breaker informed. Throttled (429) calls are retried up to
+    AI_MAX_THROTTLE_RETRIES times without using up ``max_retries``.
+    """
+    
+    def __init__(self, circuit_breaker: CircuitBreaker, max_retries: int = 3):
+        self.circuit_breaker = circuit_breaker
+        self.max_retries = max_retries
+        self.attempt = 0
+        self.throttles = 0
+    
+    def next_attempt(self) -> bool:
+        """Return True if another call may be made.
+        
+        Raises AIServiceUnavailable when the circuit breaker is open.
+        """
+        if self.attempt >= self.max_retries:
+            return False
+        if not self.circuit_breaker.allow():
+            raise AIServiceUnavailable("AI circuit breaker is open")
+        return True
+    
+    def succeeded(self) -> None:
+        self.circuit_breaker.record_success()
+    
+    def failed(self, error: Exception) -> Tuple[Optional[str], float]:
+        """Record a failed call and return the next action and its delay in seconds.
+        
+        RETRY_THROTTLED means every caller should pause for the delay,
+        RETRY_BACKOFF that only this caller sleeps, and None that no attempts
+        are left. Raises AIServiceUnavailable when the last attempt failed
+        because the service is down.
+        """
+        outage = _is_outage(error)
+        if outage:
+            self.circuit_breaker.record_failure()
+        else:
+            # The service answered (for example with 429), so it is not down
+            self.circuit_breaker.record_success()
+        
+        pause = _throttle_pause(error, self.throttles)
+        if pause is not None and self.throttles < AI_MAX_THROTTLE_RETRIES:
+            self.throttles += 1
+            logger.warning(f"API call throttled, retrying in {pause:.1f}s")
+            return RETRY_THROTTLED, pause
+        
+        self.attempt += 1
+        logger.warning(f"API call attempt {self.attempt} failed: {error}")
+        if self.attempt < self.max_retries:
+            return RETRY_BACKOFF, float(2 ** (self.attempt - 1))  # Exponential backoff
+        logger.error(f"All API call attempts failed: {error}")
+        if outage:
+            raise AIServiceUnavailable(f"All API call attempts failed: {error}")
+        return None, 0.0
+
+
+class RateLimiter:
+    """Client-side token buckets for requests-per-minute and tokens-per-minute quotas.
+    
+    Callers reserve capacity in arrival order: the reservation is deducted at
+    once and the caller sleeps until its share has refilled, so waits are first
+    come, first served across threads and event loops. throttle() pauses every
+    caller, for example until a server Retry-After has passed.
+    """
+    
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.requests_per_minute = max(0, requests_per_minute)
+        self.tokens_per_minute = max(0, tokens_per_minute)
+        self._lock = threading.Lock()
+        self._request_level = float(self.requests_per_minute)
+        self._token_level = float(self.tokens_per_minute)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        
+        # Metrics
+        self.requests = 0
+        self.tokens = 0
+        self.delayed_requests = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.throttle_events = 0
+        self.throttle_seconds = 0.0
+        self.waiting = 0
+    
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._request_level = min(self.requests_per_minute,
+                                      self._request_level + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._token_level = min(self.tokens_per_minute,
+                                    self._token_level + elapsed * self.tokens_per_minute / 60)
+    
+    def _reserve(self, tokens: int) -> float:
+        """Reserve one request and ``tokens`` tokens; return the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            delay = max(0.0, self._paused_until - now)
+            if self.requests_per_minute:
+                self._request_level -= 1
+                if self._request_level < 0:
+                    delay = max(delay, -self._request_level * 60 / self.requests_per_minute)
+            if self.tokens_per_minute:
+                # A request larger than the whole budget waits for a full minute at most
+                self._token_level -= min(tokens, self.tokens_per_minute)
+                if self._token_level < 0:
+                    delay = max(delay, -self._token_level * 60 / self.tokens_per_minute)
+            self.requests += 1
+            self.tokens += tokens
+            if delay > 0:
+                self.waiting += 1
+            return delay
+    
+    def _pause_remaining(self) -> float:
+        with self._lock:
+            return max(0.0, self._paused_until - time.monotonic())
+    
+    def _record_wait(self, waited: float) -> None:
+        with self._lock:
+            self.waiting -= 1
+            self.delayed_requests += 1
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+    
+    def acquire(self, tokens: int) -> float:
+        """Block until a request of ``tokens`` tokens may be sent; return the wait."""
+        delay = self._reserve(tokens)
+        if delay <= 0:
+            return 0.0
+        start = time.monotonic()
+        # A throttle() during the wait pushes the start back further
+        while delay > 0:
+            time.sleep(delay)
+            delay = self._pause_remaining()
+        waited = time.monotonic() - start
+        self._record_wait(waited)
+        return waited
+    
+    async def acquire_async(self, tokens: int) -> float:
+        """Asynchronous acquire() that waits without blocking the event loop."""
+        delay = self._reserve(tokens)
+        if delay <= 0:
+            return 0.0
+        start = time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self._pause_remaining()
+        waited = time.monotonic() - start
+        self._record_wait(waited)
+        return waited
+    
+    def throttle(self, seconds: float) -> None:
+        """Record a throttled call and hold all callers for ``seconds``."""
+        with self._lock:
+            self.throttle_events += 1
+            self.throttle_seconds += seconds
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'requests_per_minute': self.requests_per_minute,
+                'tokens_per_minute': self.tokens_per_minute,
+                'requests': self.requests,
+                'estimated_tokens': self.tokens,
+                'delayed_requests': self.delayed_requests,
+                'waiting': self.waiting,
+                'avg_wait_ms': round(self.total_wait_seconds * 1000 / self.requests, 1) if self.requests else 0.0,
+                'max_wait_ms': round(self.max_wait_seconds * 1000, 1),
+                'total_wait_seconds': round(self.total_wait_seconds, 3),
+                'throttle_events': self.throttle_events,
+                'throttle_seconds': round(self.throttle_seconds, 3)
+            }
+
+# AI response cache configuration
+AI_CACHE_BACKEND = os.environ.get('AI_CACHE_BACKEND', 'sqlite')  # sqlite, blob or none
+AI_CACHE_PATH = os.environ.get('AI_CACHE_PATH', 'ai_response_cache.db')
+AI_CACHE_MAX_BYTES = int(os.environ.get('AI_CACHE_MAX_BYTES', 50 * 1024 * 1024))
+AI_CACHE_TTL_SECONDS = int(os.environ.get('AI_CACHE_TTL_SECONDS', 30 * 24 * 3600))
+AI_CACHE_CONTAINER = os.environ.get('AI_CACHE_CONTAINER', os.environ.get('AZURE_STORAGE_CONTAINER_NAME', 'uploads'))
+
+
+class SQLiteResponseStore:
+    """Local SQLite storage for cached AI responses with size-based LRU eviction."""
+    
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ai_responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ai_responses_last_access ON ai_responses (last_access)")
+    
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+    
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return (response, created_at) and mark the entry as recently used."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM ai_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE ai_responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        return (row[0], row[1]) if row else None
+    
+    def put(self, key: str, response: str) -> int:
+        """Store a response and return the number of entries evicted."""
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ai_responses (key, response, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now)
+            )
+            return self._evict(conn)
+    
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ai_responses").fetchone()[0]
+        evicted = 0
+        if total <= self.max_bytes:
+            return evicted
+        for key, size in conn.execute("SELECT key, size FROM ai_responses ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM ai_responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        return evicted
+    
+    def delete(self, key: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM ai_responses WHERE key = ?", (key,))
+    
+    def clear(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM ai_responses")
+    
+    def usage(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ai_responses"
+            ).fetchone()
+        return {'entries': entries, 'bytes': size}
+
+
+class BlobResponseStore:
+    """Azure Blob Storage backend for cached AI responses.
+    
+    Entries are JSON blobs under a prefix. Hits refresh the blob metadata, so
+    the blob's Last-Modified time tracks recent use for LRU eviction.
+    """
+    
+    def __init__(self, container_client, max_bytes: int, prefix: str = 'ai-cache/',
+                 evict_every: int = 50):
+        self.container_client = container_client
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self.evict_every = evict_every
+        self._puts = 0
+        self._lock = threading.Lock()
+    
+    def _blob_name(self, key: str) -> str:
+        return f"{self.prefix}{key}.json"
+    
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        from azure.core.exceptions import ResourceNotFoundError
+        blob_client = self.container_client.get_blob_client(self._blob_name(key))
+        try:
+            entry = json.loads(blob_client.download_blob().readall().decode('utf-8'))
+        except ResourceNotFoundError:
+            return None
+        blob_client.set_blob_metadata({'last_access': str(time.time())})
+        return entry['response'], entry['created_at']
+    
+    def put(self, key: str, response: str) -> int:
+        entry = json.dumps({'response': response, 'created_at': time.time()})
+        self.container_client.get_blob_client(self._blob_name(key)).upload_blob(
+            entry.encode('utf-8'), overwrite=True
+        )
+        # Listing the cache is expensive, so eviction only runs periodically
+        with self._lock:
+            self._puts += 1
+            if self._puts % self.evict_every:
+                return 0
+        return self._evict()
+    
+    def _evict(self) -> int:
+        blobs = sorted(self.container_client.list_blobs(name_starts_with=self.prefix),
+                       key=lambda blob: blob.last_modified)
+        total = sum(blob.size for blob in blobs)
+        evicted = 0
+        for blob in blobs:
+            if total <= self.max_bytes:
+                break
+            self.container_client.delete_blob(blob.name)
+            total -= blob.size
+            evicted += 1
+        return evicted
+    
+    def delete(self, key: str) -> None:
+        from azure.core.exceptions import ResourceNotFoundError
+        try:
+            self.container_client.delete_blob(self._blob_name(key))
+        except ResourceNotFoundError:
+            pass
+    
+    def clear(self) -> None:
+        for blob in self.container_client.list_blobs(name_starts_with=self.prefix):
+            self.container_client.delete_blob(blob.name)
+    
+    def usage(self) -> Dict[str, int]:
+        blobs = list(self.container_client.list_blobs(name_starts_with=self.prefix))
+        return {'entries': len(blobs), 'bytes': sum(blob.size for blob in blobs)}
+
+
+class AIResponseCache:
+    """Cache of raw AI responses keyed by service, model, prompt version and text hash.
+    
+    Cache failures are logged and treated as misses so extraction never breaks
+    because of the cache.
+    """
+    
+    def __init__(self, store, ttl_seconds: int = AI_CACHE_TTL_SECONDS):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.errors = 0
+    
+    @staticmethod
+    def make_key(service_type: str, model: str, document_type: str, text: str, batched: bool = False) -> str:
+        """Build the cache key for the text that is actually sent in the prompt.
+        
+        Answers taken from a multi-document prompt (batched=True) get their own
+        keys, so they are never served to the single-document prompt.
+        """
+        text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        key_source = f"{service_type}|{model}|{PROMPT_TEMPLATE_VERSION}|{document_type}|{text_hash}"
+        if batched:
+            key_source += "|batch"
+        return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+    
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+    
+    def get(self, key: str) -> Optional[str]:
+        try:
+            entry = self.store.get(key)
+        except Exception as e:
+            logger.warning(f"AI cache read failed: {e}")
+            self._count('errors')
+            entry = None
+        
+        if entry is not None:
+            response, created_at = entry
+            if time.time() - created_at <= self.ttl_seconds:
+                self._count('hits')
+                return response
+            try:
+                self.store.delete(key)
+            except Exception as e:
+                logger.warning(f"AI cache delete failed: {e}")
+        
+        self._count('misses')
+        return None
+    
+    def put(self, key: str, response: str) -> None:
+        try:
+            evicted = self.store.put(key, response)
+        except Exception as e:
+            logger.warning(f"AI cache write failed: {e}")
+            self._count('errors')
+            return
+        self._count('stores')
+        if evicted:
+            self._count('evictions', evicted)
+    
+    def clear(self) -> None:
+        self.store.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'backend': type(self.store).__name__,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'errors': self.errors,
+                'ttl_seconds': self.ttl_seconds,
+                'max_bytes': self.store.max_bytes
+            }
+        try:
+            stats.update(self.store.usage())
+        except Exception as e:
+            logger.warning(f"AI cache usage query failed: {e}")
+        return stats
+
+
+def create_response_cache(backend: str = AI_CACHE_BACKEND, config: Optional[Dict[str, Any]] = None) -> Optional[AIResponseCache]:
+    """Create the AI response cache for the configured backend, or None if disabled."""
+    backend = (backend or 'none').lower()
+    try:
+        if backend == 'sqlite':
+            return AIResponseCache(SQLiteResponseStore(AI_CACHE_PATH, AI_CACHE_MAX_BYTES))
+        
+        if backend == 'blob':
+            connection_string = (config or {}).get('azure_storage_connection_string')
+            if not BLOB_CACHE_AVAILABLE or not connection_string:
+                logger.warning("Blob AI cache requested but Azure Blob Storage is not configured; falling back to SQLite")
+                return AIResponseCache(SQLiteResponseStore(AI_CACHE_PATH, AI_CACHE_MAX_BYTES))
+            from azure.storage.blob import BlobServiceClient
+            container_client = BlobServiceClient.from_connection_string(
+                connection_string
+            ).get_container_client(AI_CACHE_CONTAINER)
+            return AIResponseCache(BlobResponseStore(container_client, AI_CACHE_MAX_BYTES))
+    except Exception as e:
+        logger.error(f"Failed to initialize AI response cache: {e}")
+    return None
+
+
 class AISkillExtractor:
     """AI-powered skill extraction using OpenAI GPT models or Azure OpenAI."""
     
+    # Set by _configure() on first use, so importing this module does no Key Vault I/O
+    _LAZY_ATTRIBUTES = frozenset({'client', 'model_name', 'service_type', 'async_client_factory', 'response_cache'})
+    # Configuration the clients are built from; a change rebuilds them on next use
+    _CONFIG_KEYS = ('azure_openai_endpoint', 'azure_openai_api_key', 'azure_openai_deployment_name',
+                    'openai_api_key', 'azure_storage_connection_string')
+    
     def __init__(self):
-        """Initialize the AI extractor with appropriate client using Key Vault configuration."""
-        self.client = None
-        self.model_name = "gpt-3.5-turbo"  # Default model
-        self.service_type = "None"
-        
+        """Initialize skill tracking; the AI client is configured from Key Vault on first use."""
         # Initialize skill tracking
         self.ai_skill_counter = Counter()
         self.ai_monthly_skill_data = defaultdict(lambda: defaultdict(int))
         self.ai_processed_documents = {}
-        self.ai_skill_documents = defaultdict(list)
+        self.ai_skill_documents = DocumentPostings()
         self.ai_stats_blob_name = "ai_skills_stats.json"
+        self.rate_limiter = RateLimiter(AI_RPM_LIMIT, AI_TPM_LIMIT)
+        self.circuit_breaker = CircuitBreaker()
+        self._configure_lock = threading.Lock()
+        self._follows_config = False
+    
+    def __getattr__(self, name):
+        # Only reached for attributes that are not set yet
+        if name not in AISkillExtractor._LAZY_ATTRIBUTES or '_configure_lock' not in self.__dict__:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        self._configure()
+        return self.__dict__[name]
+    
+    def _configure(self) -> None:
+        """Create the AI clients from the Key Vault configuration, once per extractor."""
+        with self._configure_lock:
+            if 'client' in self.__dict__:
+                return
+            settings = self._create_clients()
+            # client goes last: other threads treat its presence as "configured"
+            client = settings.pop('client')
+            self.__dict__.update(settings)
+            self.client = client
+            if not self._follows_config:
+                add_config_listener(self._on_config_change)
+                self._follows_config = True
+    
+    def _on_config_change(self, old_config: Dict[str, Any], new_config: Dict[str, Any]) -> None:
+        """Drop the clients when a setting they use changed, e.g. a rotated API key."""
+        if all(old_config.get(key) == new_config.get(key) for key in AISkillExtractor._CONFIG_KEYS):
+            return
+        with self._configure_lock:
+            # client first: other threads treat its presence as "configured"
+            self.__dict__.pop('client', None)
+            for name in AISkillExtractor._LAZY_ATTRIBUTES:
+                self.__dict__.pop(name, None)
+        logger.info("AI configuration changed; the clients are rebuilt on next use")
+    
+    def _create_clients(self) -> Dict[str, Any]:
+        """Build the client, async client factory, model and response cache settings."""
+        settings = {
+            'model_name': "gpt-3.5-turbo",  # Default model
+            'service_type': "None",
+            # Creates an async client for AsyncAISkillExtractor; each event loop needs its own
+            'async_client_factory': None,
+            'response_cache': None,
+            'client': None
+        }
         
         if not OPENAI_AVAILABLE:
             logger.error("OpenAI library not installed. AI extraction will be disabled.")
-            return
+            return settings
+        from openai import OpenAI, AzureOpenAI, AsyncOpenAI, AsyncAzureOpenAI
         
         # Get configuration from Key Vault
         config = get_application_config()
@@ -55,42 +812,65 @@ class AISkillExtractor:
         azure_deployment = config.get('azure_openai_deployment_name', 'gpt-35-turbo')
         openai_api_key = config.get('openai_api_key')
         
+        # Clients do not retry on their own: _make_api_call_with_retry handles
+        # retries and 429 responses through the shared rate limiter
         # Initialize Azure OpenAI if configured
         if azure_endpoint and azure_api_key:
             try:
-                self.client = AzureOpenAI(
+                settings['client'] = AzureOpenAI(
+                    azure_endpoint=azure_endpoint,
+                    api_key=azure_api_key,
+                    api_version="2024-02-15-preview",
+                    max_retries=0
+                )
+                settings['async_client_factory'] = functools.partial(
+                    AsyncAzureOpenAI,
                     azure_endpoint=azure_endpoint,
                     api_key=azure_api_key,
-                    api_version="2024-02-15-preview"
+                    api_version="2024-02-15-preview",
+                    max_retries=0
                 )
-                self.model_name = azure_deployment
-                self.service_type = "Azure OpenAI"
+                settings['model_name'] = azure_deployment
+                settings['service_type'] = "Azure OpenAI"
                 logger.info(f"Initialized Azure OpenAI with deployment: {azure_deployment}")
             except Exception as e:
                 logger.error(f"Failed to initialize Azure OpenAI: {e}")
-                self.client = None
+                settings['client'] = None
                 
         # Fall back to OpenAI if Azure not configured or failed
-        elif openai_api_key and not self.client:
+        elif openai_api_key:
             try:
-                self.client = OpenAI(api_key=openai_api_key)
-                self.service_type = "OpenAI"
+                settings['client'] = OpenAI(api_key=openai_api_key, max_retries=0)
+                settings['async_client_factory'] = functools.partial(AsyncOpenAI, api_key=openai_api_key, max_retries=0)
+                settings['service_type'] = "OpenAI"
                 logger.info("Initialized OpenAI client")
             except Exception as e:
                 logger.error(f"Failed to initialize OpenAI: {e}")
         
-        if not self.client:
+        if settings['client']:
+            settings['response_cache'] = create_response_cache(AI_CACHE_BACKEND, config)
+        else:
             logger.warning("No AI service configured. Check Key Vault secrets:")
             logger.warning("- Azure OpenAI: azure-openai-endpoint, azure-openai-api-key, azure-openai-deployment-name")
             logger.warning("- OpenAI: openai-api-key")
+        return settings
 
-    def extract_skills_from_text(self, text: str, document_type: str = "unknown") -> Tuple[List[str], Dict[str, Any]]:
+    def extract_skills_from_text(self, text: str, document_type: str = "unknown", track: bool = True,
+                                 use_cache: bool = True,
+                                 page_offsets: Optional[List[int]] = None) -> Tuple[List[str], Dict[str, Any]]:
         """
         Extract skills from text using AI.
         
+        Long texts are split with chunk_document; the chunks are extracted
+        concurrently and their skill lists merged.
+        
         Args:
             text: Text to extract skills from
             document_type: Type of document (resume, job_description, etc.)
+            track: Update the analytics counters; callers merging results
+                themselves pass False and call _track_extracted_skills later
+            use_cache: Reuse and store responses in the AI response cache
+            page_offsets: Offsets in ``text`` where pages start, preferred as chunk boundaries
             
         Returns:
             Tuple of (skill_list, metadata_dict)
@@ -99,35 +879,103 @@ class AISkillExtractor:
             logger.warning("No AI client configured. Skipping AI extraction.")
             return [], {}
             
+        started = time.perf_counter()
         try:
-            prompt = self._create_skill_extraction_prompt(text, document_type)
-            
-            # Make API call with retry logic
-            response = self._make_api_call_with_retry(prompt)
-            
-            if response:
-                skills = self._parse_ai_response(response)
-                
-                # Track skills for analytics
-                self._track_extracted_skills(skills)
-                
-                metadata = {
-                    "extraction_method": "ai",
-                    "ai_service": self.service_type,
-                    "model": self.model_name,
-                    "timestamp": datetime.now().isoformat(),
-                    "document_type": document_type,
-                    "skill_count": len(skills)
-                }
-                
-                return skills, metadata
+            chunks, total_chunks = self._prepare_chunks(text, page_offsets)
+            if len(chunks) > 1:
+                with ThreadPoolExecutor(max_workers=min(len(chunks), AI_MAX_CONCURRENCY)) as pool:
+                    outcomes = list(pool.map(
+                        lambda chunk: self._extract_chunk(chunk, document_type, use_cache), chunks))
             else:
-                return [], {}
+                outcomes = [self._extract_chunk(chunk, document_type, use_cache) for chunk in chunks]
+            
+            return self._build_extraction_result(outcomes, document_type, track, total_chunks, started)
+        
+        except AIServiceUnavailable as e:
+            logger.warning(f"AI extraction deferred: {e}")
+            return [], self._pending_metadata(document_type, str(e))
                 
         except Exception as e:
             logger.error(f"Error during AI skill extraction: {e}")
             return [], {}
     
+    def _prepare_chunks(self, text: str, page_offsets: Optional[List[int]] = None) -> Tuple[List[str], int]:
+        """Chunk ``text`` and apply the AI_MAX_CHUNKS cap; returns (chunks, total chunk count)."""
+        chunks = chunk_document(text, AI_CHUNK_TOKENS, page_offsets)
+        if len(chunks) > AI_MAX_CHUNKS:
+            logger.warning(f"Document has {len(chunks)} chunks; extracting the first {AI_MAX_CHUNKS}")
+        return chunks[:AI_MAX_CHUNKS], len(chunks)
+    
+    def _extract_chunk(self, chunk: str, document_type: str, use_cache: bool) -> Dict[str, Any]:
+        """Get the raw AI response for one chunk from the cache or the API."""
+        cache = self.response_cache if use_cache else None
+        cache_key = None
+        if cache:
+            cache_key = AIResponseCache.make_key(self.service_type, self.model_name, document_type, chunk)
+            response = cache.get(cache_key)
+            if response is not None:
+                return {'response': response, 'cached': True, 'usage': {}}
+        
+        usage = {}
+        prompt = self._create_skill_extraction_prompt(chunk, document_type)
+        response = self._make_api_call_with_retry(prompt, usage=usage)
+        if response and cache:
+            cache.put(cache_key, response)
+        return {'response': response, 'cached': False, 'usage': usage}
+    
+    def _pending_metadata(self, document_type: str, reason: str) -> Dict[str, Any]:
+        """Metadata for a document whose AI extraction must be retried later."""
+        return {
+            "extraction_method": "ai",
+            "ai_pending": True,
+            "pending_reason": reason,
+            "ai_service": self.service_type,
+            "model": self.model_name,
+            "timestamp": datetime.now().isoformat(),
+            "document_type": document_type
+        }
+    
+    def _build_extraction_result(self, outcomes: List[Dict[str, Any]], document_type: str, track: bool,
+                                 total_chunks: int, started: float) -> Tuple[List[str], Dict[str, Any]]:
+        """Merge per-chunk AI responses into (skill_list, metadata_dict)."""
+        answered = [outcome for outcome in outcomes if outcome['response']]
+        if not answered:
+            return [], {}
+        
+        skills = []
+        seen = set()
+        for outcome in answered:
+            for skill in self._parse_ai_response(outcome['response']):
+                if skill not in seen:
+                    seen.add(skill)
+                    skills.append(skill)
+        
+        # Track skills for analytics
+        if track:
+            self._track_extracted_skills(skills)
+        
+        token_usage = Counter()
+        for outcome in outcomes:
+            token_usage.update(outcome['usage'])
+        
+        metadata = {
+            "extraction_method": "ai",
+            "ai_service": self.service_type,
+            "model": self.model_name,
+            "timestamp": datetime.now().isoformat(),
+            "document_type": document_type,
+            "skill_count": len(skills),
+            "cached": all(outcome['cached'] for outcome in answered),
+            "chunks": len(outcomes),
+            "chunks_total": total_chunks,
+            "chunks_cached": sum(1 for outcome in outcomes if outcome['cached']),
+            "chunks_failed": len(outcomes) - len(answered),
+            "token_usage": dict(token_usage),
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+        
+        return skills, metadata
+    
     def _create_skill_extraction_prompt(self, text: str, document_type: str) -> str:
         """Create a well-structured prompt for skill extraction with multilingual support."""
         
@@ -204,32 +1052,110 @@ Rules:
         }
         
         template = prompt_templates.get(document_type, prompt_templates["default"])
-        return template.format(text=text[:4000])  # Limit text length to avoid token limits
+        return template.format(text=text)  # Callers pass one chunk from chunk_document
+    
+    def _create_batch_extraction_prompt(self, documents: List[Tuple[str, str]], document_type: str) -> str:
+        """Create one prompt asking for the skills of several (document_id, text) documents."""
+        labels = {"resume": "resumes/CVs", "job_description": "job descriptions"}
+        blocks = "\n\n".join(f'<document id="{doc_id}">\n{text}\n</document>' for doc_id, text in documents)
+        ids = ", ".join(f'"{doc_id}"' for doc_id, _ in documents)
+        return f"""
+Analyze each of the following {len(documents)} {labels.get(document_type, "documents")} and extract ALL technical and professional skills mentioned in it.
+The texts may be in Norwegian, English, or a combination of both languages, and may contain PDF extraction artifacts.
+Include programming languages, frameworks, tools, methodologies, certifications, and soft skills.
+
+{blocks}
+
+Return a JSON object that maps every document id ({ids}) to a JSON array of its skills, in this format:
+{{"{documents[0][0]}": ["Python", "React", "Agile"], ...}}
+
+Rules:
+- Extract skills for each document separately, using only that document's text
+- Standardize skill names in English (e.g., "JavaScript" not "JS", "Kommunikasjon" -> "Communication")
+- Don't include company names, job titles, or locations
+"""
+    
+    def _plan_batches(self, documents: List[Tuple[int, str, str]],
+                      max_tokens: int) -> List[List[Tuple[int, str, str]]]:
+        """Pack (index, text, document_type) documents into multi-document requests.
+        
+        Documents are grouped by type, in order, into batches of at most
+        ``max_tokens`` estimated text tokens and MAX_BATCH_DOCUMENTS documents.
+        """
+        batches = []
+        open_batches = {}
+        for document in documents:
+            tokens = math.ceil(len(document[1]) / CHARS_PER_TOKEN)
+            batch, batch_tokens = open_batches.get(document[2], (None, 0))
+            if batch is None or batch_tokens + tokens > max_tokens or len(batch) >= MAX_BATCH_DOCUMENTS:
+                batch, batch_tokens = [], 0
+                batches.append(batch)
+            batch.append(document)
+            open_batches[document[2]] = (batch, batch_tokens + tokens)
+        return batches
+    
+    def _parse_batch_response(self, response: str) -> Dict[str, List[Any]]:
+        """Parse a multi-document response into {document_id: raw skill list}.
+        
+        Ids that are missing or not mapped to a list are left out, so their
+        documents can be extracted one at a time.
+        """
+        start_idx = response.find('{')
+        end_idx = response.rfind('}') + 1
+        if start_idx == -1 or end_idx == 0:
+            logger.warning("No valid JSON object found in batched AI response")
+            return {}
+        try:
+            data = json.loads(response[start_idx:end_idx])
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse batched AI response as JSON: {e}")
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return {str(doc_id): skills for doc_id, skills in data.items() if isinstance(skills, list)}
+    
+    def _completion_params(self, prompt: str, max_tokens: int = MAX_COMPLETION_TOKENS) -> Dict[str, Any]:
+        """Chat completion request parameters shared by the sync and async clients."""
+        return {
+            "model": self.model_name,
+            "messages": [
+                {"role": "system", "content": "You are an expert at extracting professional skills from multilingual text (English/Norwegian). You can handle PDF extraction artifacts and corrupted text. Always return valid JSON arrays with standardized English skill names."},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": 0.1,  # Low temperature for consistent results
+            "timeout": 30
+        }
     
-    def _make_api_call_with_retry(self, prompt: str, max_retries: int = 3) -> str:
-        """Make API call with retry logic."""
+    def _make_api_call_with_retry(self, prompt: str, max_retries: int = 3,
+                                  usage: Optional[Dict[str, int]] = None) -> str:
+        """Make API call with rate limiting and retry logic.
         
-        for attempt in range(max_retries):
+        Throttled (429) calls pause all callers for the server's Retry-After
+        and are retried up to AI_MAX_THROTTLE_RETRIES times without using up
+        ``max_retries``. Raises AIServiceUnavailable when the circuit breaker
+        is open or every attempt failed because the service is down. Token
+        usage of the successful call is added to ``usage`` when given.
+        """
+        params = self._completion_params(prompt)
+        tokens = estimate_request_tokens(params)
+        retry = RetryState(self.circuit_breaker, max_retries)
+        
+        while retry.next_attempt():
+            self.rate_limiter.acquire(tokens)
             try:
-                response = self.client.chat.completions.create(
-                    model=self.model_name,
-                    messages=[
-                        {"role": "system", "content": "You are an expert at extracting professional skills from multilingual text (English/Norwegian). You can handle PDF extraction artifacts and corrupted text. Always return valid JSON arrays with standardized English skill names."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=1000,
-                    temperature=0.1,  # Low temperature for consistent results
-                    timeout=30
-                )
+                response = self.client.chat.completions.create(**params)
+                retry.succeeded()
+                _record_usage(usage, response, tokens)
                 
                 return response.choices[0].message.content.strip()
                 
             except Exception as e:
-                logger.warning(f"API call attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)  # Exponential backoff
-                else:
-                    logger.error(f"All API call attempts failed: {e}")
+                action, delay = retry.failed(e)
+                if action == RETRY_THROTTLED:
+                    self.rate_limiter.throttle(delay)
+                elif action == RETRY_BACKOFF:
+                    time.sleep(delay)
                     
         return None
     
@@ -307,7 +1233,10 @@ Rules:
             "total_extractions": sum(self.ai_skill_counter.values()),
             "top_skills": dict(self.ai_skill_counter.most_common(20)),
             "service_type": self.service_type,
-            "model": self.model_name
+            "model": self.model_name,
+            "response_cache": self.response_cache.get_stats() if self.response_cache else {"backend": "disabled"},
+            "rate_limiter": self.rate_limiter.get_stats(),
+            "circuit_breaker": self.circuit_breaker.get_stats()
         }
     
     def get_trending_skills_chart_data(self) -> Dict[str, Any]:
@@ -364,7 +1293,7 @@ Rules:
         """Get AI extraction statistics for saving."""
         return {
             'ai_skill_counter': dict(self.ai_skill_counter),
-            'ai_skill_documents': dict(self.ai_skill_documents),
+            'ai_skill_documents': self.ai_skill_documents.to_dict(),
             'ai_processed_documents': self.ai_processed_documents,
             'ai_monthly_skill_data': {
                 skill: dict(months) for skill, months in self.ai_monthly_skill_data.items()
@@ -378,11 +1307,8 @@ Rules:
         """Load AI extraction statistics."""
         self.ai_skill_counter = Counter(stats_data.get('ai_skill_counter', {}))
         
-        # Restore ai_skill_documents
-        skill_docs_data = stats_data.get('ai_skill_documents', {})
-        self.ai_skill_documents = defaultdict(list)
-        for skill, docs in skill_docs_data.items():
-            self.ai_skill_documents[skill] = docs
+        # Restore ai_skill_documents (compact postings, or the older per-skill lists)
+        self.ai_skill_documents = DocumentPostings.load(stats_data.get('ai_skill_documents'))
         
         self.ai_processed_documents = stats_data.get('ai_processed_documents', {})
         
@@ -449,9 +1375,279 @@ Rules:
             skills_list.append({
                 'skill': skill,
                 'count': count,
-                'documents': len(self.ai_skill_documents.get(skill, []))
+                'documents': self.ai_skill_documents.count(skill)
             })
         return skills_list
 
-# Global AI extractor instance
-ai_extractor = AISkillExtractor()
\ No newline at end of file
+
+class AsyncAISkillExtractor:
+    """Concurrent AI skill extraction using the async OpenAI/Azure OpenAI clients.
+    
+    Shares configuration, the response cache and analytics with a synchronous
+    AISkillExtractor. Calls run concurrently, bounded by a semaphore, and
+    retry backoff awaits instead of blocking a thread. Short documents are
+    packed into multi-document requests; any document missing from the
+    batched answer is extracted on its own.
+    """
+    
+    def __init__(self, extractor: AISkillExtractor, max_concurrency: Optional[int] = None,
+                 client_factory=None, batch_max_tokens: Optional[int] = None):
+        """
+        Args:
+            extractor: Synchronous extractor providing model, prompts, cache and tracking
+            max_concurrency: Maximum API calls in flight (default AI_MAX_CONCURRENCY)
+            client_factory: Callable returning an async client; defaults to the
+                extractor's configured client, resolved on first use
+            batch_max_tokens: Document tokens per multi-document request
+                (default AI_BATCH_MAX_TOKENS, 0 disables batching)
+        """
+        self.extractor = extractor
+        self.max_concurrency = max(1, max_concurrency or AI_MAX_CONCURRENCY)
+        self._client_factory = client_factory
+        self.batch_max_tokens = AI_BATCH_MAX_TOKENS if batch_max_tokens is None else batch_max_tokens
+        self.batch_stats = Counter()
+        self._batch_stats_lock = threading.Lock()
+    
+    @property
+    def client_factory(self):
+        """Async client factory; the extractor's is looked up lazily to defer Key Vault I/O."""
+        return self._client_factory or self.extractor.async_client_factory
+    
+    @client_factory.setter
+    def client_factory(self, client_factory):
+        self._client_factory = client_factory
+    
+    async def extract_skills_many(self, docs: List[Tuple], track: bool = True, use_cache: bool = True,
+                                  on_result=None) -> List[Tuple[List[str], Dict[str, Any]]]:
+        """
+        Extract skills from many documents concurrently.
+        
+        Args:
+            docs: List of (text, document_type) or (text, document_type, page_offsets) tuples
+            track: Update the analytics counters
+            use_cache: Reuse and store responses in the AI response cache
+            on_result: Optional callable (index, (skill_list, metadata_dict))
+                called as each document finishes
+            
+        Returns:
+            List of (skill_list, metadata_dict) in the same order as ``docs``
+        """
+        if not docs:
+            return []
+        if self.client_factory is None:
+            logger.warning("No AI client configured. Skipping AI extraction.")
+            return [([], {}) for _ in docs]
+        
+        # Shared by every chunk of every document, so long documents do not
+        # add calls beyond max_concurrency
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = [None] * len(docs)
+        
+        def finish(index, result):
+            results[index] = result
+            if on_result is not None:
+                try:
+                    on_result(index, result)
+                except Exception as e:
+                    logger.warning(f"AI result callback failed for document {index}: {e}")
+        
+        async def extract(index, text, document_type, page_offsets=None):
+            finish(index, await self.extract_skills_from_text(client, text, document_type, track, use_cache,
+                                                              page_offsets, semaphore))
+        
+        singles, short = self._split_short_documents(docs)
+        async with self.client_factory() as client:
+            await asyncio.gather(
+                self._extract_short_documents(client, short, track, use_cache, semaphore, finish),
+                *(extract(index, *doc) for index, doc in singles)
+            )
+        return results
+    
+    def _split_short_documents(self, docs: List[Tuple]) -> Tuple[List[Tuple[int, Tuple]], List[Tuple[int, str, str]]]:
+        """Split ``docs`` into (index, doc) pairs extracted alone and short (index, text, document_type) ones to batch."""
+        if self.batch_max_tokens <= 0:
+            return list(enumerate(docs)), []
+        singles, short = [], []
+        for index, doc in enumerate(docs):
+            chunks, _ = self.extractor._prepare_chunks(doc[0], doc[2] if len(doc) > 2 else None)
+            if len(chunks) == 1 and math.ceil(len(chunks[0]) / CHARS_PER_TOKEN) <= AI_BATCH_DOC_MAX_TOKENS:
+                short.append((index, chunks[0], doc[1]))
+            else:
+                singles.append((index, doc))
+        return singles, short
+    
+    async def _extract_short_documents(self, client, short: List[Tuple[int, str, str]], track: bool,
+                                       use_cache: bool, semaphore: asyncio.Semaphore, finish) -> None:
+        """Serve short documents from the cache and extract the rest in multi-document requests."""
+        extractor = self.extractor
+        cache = extractor.response_cache if use_cache else None
+        pending = []
+        for index, text, document_type in short:
+            started = time.perf_counter()
+            if cache:
+                # A single-document answer is as good as a batched one, so check both
+                response = None
+                for batched in (False, True):
+                    cache_key = AIResponseCache.make_key(extractor.service_type, extractor.model_name,
+                                                         document_type, text, batched=batched)
+                    response = await asyncio.to_thread(cache.get, cache_key)
+                    if response is not None:
+                        break
+                if response is not None:
+                    outcome = {'response': response, 'cached': True, 'usage': {}}
+                    finish(index, extractor._build_extraction_result([outcome], document_type, track, 1, started))
+                    continue
+            pending.append((index, text, document_type))
+        
+        await asyncio.gather(*(
+            self._extract_batch(client, batch, track, use_cache, semaphore, finish)
+            for batch in extractor._plan_batches(pending, self.batch_max_tokens)
+        ))
+    
+    async def _extract_batch(self, client, batch: List[Tuple[int, str, str]], track: bool, use_cache: bool,
+                             semaphore: asyncio.Semaphore, finish) -> None:
+        """Extract a batch of short documents of one type with a single request.
+        
+        Documents the response leaves out are extracted one at a time.
+        """
+        extractor = self.extractor
+        if len(batch) == 1:
+            index, text, document_type = batch[0]
+            finish(index, await self.extract_skills_from_text(client, text, document_type, track, use_cache,
+                                                              semaphore=semaphore))
+            return
+        
+        started = time.perf_counter()
+        document_type = batch[0][2]
+        doc_ids = [f"doc{number}" for number in range(1, len(batch) + 1)]
+        prompt = extractor._create_batch_extraction_prompt(
+            [(doc_id, text) for doc_id, (_, text, _) in zip(doc_ids, batch)], document_type)
+        usage = {}
+        try:
+            async with semaphore:
+                response = await self._make_api_call_with_retry(
+                    client, prompt, usage=usage,
+                    max_tokens=max(MAX_COMPLETION_TOKENS, BATCH_COMPLETION_TOKENS_PER_DOCUMENT * len(batch)))
+        except AIServiceUnavailable as e:
+            logger.warning(f"AI extraction deferred: {e}")
+            for index, _, _ in batch:
+                finish(index, ([], extractor._pending_metadata(document_type, str(e))))
+            return
+        
+        skills_by_id = extractor._parse_batch_response(response) if response else {}
+        cache = extractor.response_cache if use_cache else None
+        total_chars = sum(len(text) for _, text, _ in batch)
+        fallback = []
+        for doc_id, (index, text, _) in zip(doc_ids, batch):
+            if doc_id not in skills_by_id:
+                fallback.append((index, text))
+                continue
+            doc_response = json.dumps(skills_by_id[doc_id])
+            if cache:
+                cache_key = AIResponseCache.make_key(extractor.service_type, extractor.model_name,
+                                                     document_type, text, batched=True)
+                await asyncio.to_thread(cache.put, cache_key, doc_response)
+            # Attribute the request's tokens to its documents by length
+            share = len(text) / total_chars if total_chars else 1 / len(batch)
+            outcome = {'response': doc_response, 'cached': False,
+                       'usage': {name: round(value * share) for name, value in usage.items()}}
+            skills, metadata = extractor._build_extraction_result([outcome], document_type, track, 1, started)
+            metadata['batch_size'] = len(batch)
+            finish(index, (skills, metadata))
+        
+        answered = len(batch) - len(fallback)
+        with self._batch_stats_lock:
+            self.batch_stats.update(batch_calls=1, batched_documents=answered,
+                                    fallback_documents=len(fallback), calls_saved=max(0, answered - 1))
+        logger.info(f"Batched AI request answered {answered} of {len(batch)} documents")
+        
+        async def extract_alone(index, text):
+            finish(index, await self.extract_skills_from_text(client, text, document_type, track, use_cache,
+                                                              semaphore=semaphore))
+        
+        await asyncio.gather(*(extract_alone(index, text) for index, text in fallback))
+    
+    def get_batch_stats(self) -> Dict[str, Any]:
+        """Multi-document request counters, including API calls saved by batching."""
+        with self._batch_stats_lock:
+            stats = dict(self.batch_stats)
+        for name in ('batch_calls', 'batched_documents', 'fallback_documents', 'calls_saved'):
+            stats.setdefault(name, 0)
+        stats['batch_max_tokens'] = self.batch_max_tokens
+        return stats
+    
+    async def extract_skills_from_text(self, client, text: str, document_type: str = "unknown",
+                                       track: bool = True, use_cache: bool = True,
+                                       page_offsets: Optional[List[int]] = None,
+                                       semaphore: Optional[asyncio.Semaphore] = None) -> Tuple[List[str], Dict[str, Any]]:
+        """Async counterpart of AISkillExtractor.extract_skills_from_text using ``client``."""
+        extractor = self.extractor
+        semaphore = semaphore or asyncio.Semaphore(self.max_concurrency)
+        started = time.perf_counter()
+        try:
+            chunks, total_chunks = extractor._prepare_chunks(text, page_offsets)
+            outcomes = await asyncio.gather(*(
+                self._extract_chunk(client, chunk, document_type, use_cache, semaphore) for chunk in chunks
+            ))
+            return extractor._build_extraction_result(list(outcomes), document_type, track, total_chunks, started)
+        
+        except AIServiceUnavailable as e:
+            logger.warning(f"AI extraction deferred: {e}")
+            return [], extractor._pending_metadata(document_type, str(e))
+            
+        except Exception as e:
+            logger.error(f"Error during AI skill extraction: {e}")
+            return [], {}
+    
+    async def _extract_chunk(self, client, chunk: str, document_type: str, use_cache: bool,
+                             semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """Async counterpart of AISkillExtractor._extract_chunk."""
+        extractor = self.extractor
+        cache = extractor.response_cache if use_cache else None
+        cache_key = None
+        if cache:
+            # Cache backends do blocking I/O, so keep them off the event loop
+            cache_key = AIResponseCache.make_key(extractor.service_type, extractor.model_name, document_type, chunk)
+            response = await asyncio.to_thread(cache.get, cache_key)
+            if response is not None:
+                return {'response': response, 'cached': True, 'usage': {}}
+        
+        usage = {}
+        prompt = extractor._create_skill_extraction_prompt(chunk, document_type)
+        async with semaphore:
+            response = await self._make_api_call_with_retry(client, prompt, usage=usage)
+        if response and cache:
+            await asyncio.to_thread(cache.put, cache_key, response)
+        return {'response': response, 'cached': False, 'usage': usage}
+    
+    async def _make_api_call_with_retry(self, client, prompt: str, max_retries: int = 3,
+                                        usage: Optional[Dict[str, int]] = None,
+                                        max_tokens: int = MAX_COMPLETION_TOKENS) -> Optional[str]:
+        """Async counterpart of AISkillExtractor._make_api_call_with_retry."""
+        
+        params = self.extractor._completion_params(prompt, max_tokens)
+        tokens = estimate_request_tokens(params)
+        rate_limiter = self.extractor.rate_limiter
+        retry = RetryState(self.extractor.circuit_breaker, max_retries)
+        
+        while retry.next_attempt():
+            await rate_limiter.acquire_async(tokens)
+            try:
+                response = await client.chat.completions.create(**params)
+                retry.succeeded()
+                _record_usage(usage, response, tokens)
+                
+                return response.choices[0].message.content.strip()
+                
+            except Exception as e:
+                action, delay = retry.failed(e)
+                if action == RETRY_THROTTLED:
+                    rate_limiter.throttle(delay)
+                elif action == RETRY_BACKOFF:
+                    await asyncio.sleep(delay)
+                    
+        return None
+
+# Global AI extractor instances
+ai_extractor = AISkillExtractor()
+async_ai_extractor = AsyncAISkillExtractor(ai_extractor)
\ No newline at end of file
@@ -1,23 +1,27 @@
 from flask import Flask, request, render_template, redirect, url_for, flash, jsonify
 import os
 import re
-import PyPDF2
-import openpyxl
-import xlrd
-import pandas as pd
 from werkzeug.utils import secure_filename
-from collections import defaultdict, Counter
+from collections import Counter
+from itertools import groupby
 from datetime import datetime
-import io
-import tempfile
-from azure.storage.blob import BlobServiceClient
-from azure.identity import DefaultAzureCredential
-from skills import extract_skills, skill_counter, monthly_skill_data, skill_documents, processed_documents, tech_skills
-from ai_skills import ai_extractor
+from skills import extract_skills, tech_skills, alias_skill_matcher
+from document_parsing import extract_text_from_pdf, get_pdf_creation_date, extract_text_from_excel, get_excel_creation_date, get_file_type, parse_document
+from ingestion import IngestionResult, get_ingestion_pool, guess_document_type, document_hash
+from jobs import JobManager, FILE_FAILED, FILE_PERSISTED, FILE_DUPLICATE
+from ai_skills import ai_extractor, async_ai_extractor, AI_MAX_TEXT_CHARS
+from ai_gating import decide_ai_extraction, summarize_gate_counts
 from monthly_analysis import monthly_analyzer
-from keyvault_manager import get_application_config
+from blob_storage import get_blob_service_client, get_container_client
+from stats_log import create_stats_log
+from stats_backup import create_stats_backup
+from stats_store import StatsStore, AI, document_month
+from skill_search import SkillIndex, QueryError, document_skills
 import json
+import time
+import asyncio
 import logging
+import threading
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,70 +29,76 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-# Get configuration from Key Vault with environment fallbacks
-config = get_application_config()
-
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
 app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', 'uploads')
 app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
 
-# Azure Blob Storage configuration from Key Vault
-AZURE_STORAGE_CONNECTION_STRING = config.get('azure_storage_connection_string')
 AZURE_STORAGE_CONTAINER_NAME = os.environ.get('AZURE_STORAGE_CONTAINER_NAME', 'uploads')
 
-# Initialize Azure Blob Service Client with Managed Identity
-def get_blob_service_client():
-    """Initialize Azure Blob Service Client using Managed Identity or connection string."""
-    try:
-        if AZURE_STORAGE_CONNECTION_STRING:
-            return BlobServiceClient.from_connection_string(AZURE_STORAGE_CONNECTION_STRING)
-        else:
-            # Use Managed Identity for authentication
-            credential = DefaultAzureCredential()
-            account_url = f"https://{os.environ.get('AZURE_STORAGE_ACCOUNT_NAME')}.blob.core.windows.net"
-            return BlobServiceClient(account_url=account_url, credential=credential)
-    except Exception as e:
-        print(f"Error initializing blob service client: {e}")
-        return None
-
 # Ensure upload directory exists (fallback for local development)
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# Global skill tracker
-skill_counter = Counter()
+# Processed documents, their skills (indexed by skill and content hash) and the
+# monthly skill rollups, stored in SQLite (see stats_store.py)
+stats_store = StatsStore()
+
+# Documents shown per page of /documents
+DOCUMENTS_PAGE_SIZE = int(os.environ.get('DOCUMENTS_PAGE_SIZE', 100))
+
+# Inverted skill index behind /api/search (see skill_search.py), built from the
+# stats store on first use and updated as documents are merged
+SEARCH_PAGE_SIZE = int(os.environ.get('SEARCH_PAGE_SIZE', 50))
+SEARCH_MAX_PAGE_SIZE = int(os.environ.get('SEARCH_MAX_PAGE_SIZE', 500))
+skill_index = None
+skill_index_lock = threading.Lock()
+
+# Resume x skill matrix behind /api/match (see resume_matching.py), built from the
+# stats store on first use and updated as documents are merged
+MATCH_TOP_K = int(os.environ.get('MATCH_TOP_K', 10))
+MATCH_MAX_TOP_K = int(os.environ.get('MATCH_MAX_TOP_K', 100))
+resume_matcher = None
+resume_matcher_lock = threading.Lock()
 
-# Track skills by document with metadata
-# Structure: {skill: [{filename, upload_date, file_date}, ...]}
-skill_documents = defaultdict(list)
+# Skill co-occurrence (see stats_store.py): heatmap size on /comparison and
+# /api/skills/cooccurrence, and the default minimum shared documents for
+# /api/skills/<skill>/related
+COOCCURRENCE_TOP_N = int(os.environ.get('COOCCURRENCE_TOP_N', 15))
+COOCCURRENCE_MAX_TOP_N = int(os.environ.get('COOCCURRENCE_MAX_TOP_N', 50))
+RELATED_SKILLS_MIN_COUNT = int(os.environ.get('RELATED_SKILLS_MIN_COUNT', 2))
 
-# Track all processed documents
-# Structure: {filename: {upload_date, file_date, skills_found}}
-processed_documents = {}
+# Guards updates to the stats from concurrent uploads
+stats_lock = threading.Lock()
 
-# Track monthly skill data for charts
-# Structure: {skill: {'2025-01': 5, '2025-02': 3, ...}}
-monthly_skill_data = defaultdict(lambda: defaultdict(int))
+# Background re-drive of AI extraction deferred while the AI service was unavailable
+AI_REDRIVE_INTERVAL_SECONDS = int(os.environ.get('AI_REDRIVE_INTERVAL_SECONDS', 300))
+AI_REDRIVE_BATCH_SIZE = int(os.environ.get('AI_REDRIVE_BATCH_SIZE', 20))
+ai_redrive_lock = threading.Lock()
+ai_redrive_thread = None
+ai_redrive_thread_lock = threading.Lock()
 
 # Stats persistence configuration
 STATS_BLOB_NAME = 'app_stats.json'
 STATS_CONTAINER_NAME = os.environ.get('AZURE_STORAGE_CONTAINER_NAME', 'uploads')
 
+# Merged results are persisted as append-only events with periodic snapshots
+# (see stats_log.py); None falls back to rewriting the full stats JSON
+stats_log = None
+
+# Incremental backups: a delta per upload batch and a scheduled full snapshot,
+# written by a background thread (see stats_backup.py)
+stats_backup = None
+
 def save_stats_to_blob():
     """Save application statistics to Azure Blob Storage as JSON."""
     try:
-        blob_service_client = get_blob_service_client()
-        if not blob_service_client:
+        container_client = get_container_client(STATS_CONTAINER_NAME)
+        if not container_client:
             print("Warning: Azure Blob Storage not available for stats persistence")
             return False
         
-        # Prepare stats data for serialization
+        # Export the stats in the JSON format
         stats_data = {
-            'skill_counter': dict(skill_counter),
-            'skill_documents': dict(skill_documents),
-            'processed_documents': processed_documents,
-            'monthly_skill_data': {
-                skill: dict(months) for skill, months in monthly_skill_data.items()
-            },
+            **stats_store.export_stats(),
             'last_updated': datetime.now().isoformat(),
             'version': '1.0'  # For future compatibility
         }
@@ -97,10 +107,7 @@ def save_stats_to_blob():
         stats_json = json.dumps(stats_data, indent=2, default=str)
         
         # Upload to blob storage
-        blob_client = blob_service_client.get_blob_client(
-            container=STATS_CONTAINER_NAME,
-            blob=STATS_BLOB_NAME
-        )
+        blob_client = container_client.get_blob_client(STATS_BLOB_NAME)
         
         blob_client.upload_blob(stats_json, overwrite=True)
         print(f"Stats saved to blob storage successfully at {datetime.now()}")
@@ -117,8 +124,8 @@ def save_stats_to_blob():
 def save_ai_stats_to_blob():
     """Save AI extraction statistics to Azure Blob Storage."""
     try:
-        blob_service_client = get_blob_service_client()
-        if not blob_service_client:
+        container_client = get_container_client(STATS_CONTAINER_NAME)
+        if not container_client:
             print("Warning: No blob service client available for AI stats save")
             return False
         
@@ -127,10 +134,7 @@ def save_ai_stats_to_blob():
         ai_stats_json = json.dumps(ai_stats_data, indent=2, default=str)
         
         # Upload AI stats to blob storage
-        ai_blob_client = blob_service_client.get_blob_client(
-            container=STATS_CONTAINER_NAME,
-            blob=ai_extractor.ai_stats_blob_name
-        )
+        ai_blob_client = container_client.get_blob_client(ai_extractor.ai_stats_blob_name)
         
         ai_blob_client.upload_blob(ai_stats_json, overwrite=True)
         print(f"AI stats saved to blob storage successfully at {datetime.now()}")
@@ -142,18 +146,62 @@ def save_ai_stats_to_blob():
         traceback.print_exc()
         return False
 
+def restore_stats_data(stats_data):
+    """Replace the stored stats with saved stats data in the JSON export format."""
+    global skill_index, resume_matcher
+    stats_store.import_stats(stats_data)
+    # Rebuilt from the restored documents on the next search or match
+    skill_index = None
+    resume_matcher = None
+
+def get_skill_index():
+    """The skill search index, built from the stats store on first use."""
+    global skill_index
+    if skill_index is None:
+        with skill_index_lock:
+            if skill_index is None:
+                # Holding stats_lock keeps merges from landing between the read and the swap
+                with stats_lock:
+                    started = time.perf_counter()
+                    skill_index = SkillIndex.from_links(stats_store.skill_links())
+                    print(f"Skill index built for {len(skill_index.filenames)} documents in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return skill_index
+
+def get_resume_matcher():
+    """The resume matcher, built from the resumes in the stats store on first use."""
+    global resume_matcher
+    if resume_matcher is None:
+        with resume_matcher_lock:
+            if resume_matcher is None:
+                # Imported here so NumPy is only loaded once matching is used
+                from resume_matching import ResumeMatcher
+                with stats_lock:
+                    started = time.perf_counter()
+                    resumes = (
+                        (filename, [skill for _, _, skill in links if skill])
+                        for filename, links in groupby(stats_store.skill_links(), key=lambda link: link[0])
+                        if guess_document_type(filename) == 'resume'
+                    )
+                    resume_matcher = ResumeMatcher.from_documents(resumes)
+                    print(f"Resume matcher built for {len(resume_matcher)} resumes in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return resume_matcher
+
+def index_document(filename, doc_data):
+    """Update the skill index and resume matcher, if built, with a stored document. Callers must hold stats_lock."""
+    if skill_index is not None:
+        skill_index.add_document(filename, document_month(doc_data), document_skills(doc_data))
+    if resume_matcher is not None and guess_document_type(filename) == 'resume':
+        resume_matcher.add_document(filename, document_skills(doc_data))
+
 def load_stats_from_blob():
     """Load application statistics from Azure Blob Storage."""
     try:
-        blob_service_client = get_blob_service_client()
-        if not blob_service_client:
+        container_client = get_container_client(STATS_CONTAINER_NAME)
+        if not container_client:
             print("Info: Azure Blob Storage not available, starting with empty stats")
             return False
         
-        blob_client = blob_service_client.get_blob_client(
-            container=STATS_CONTAINER_NAME,
-            blob=STATS_BLOB_NAME
-        )
+        blob_client = container_client.get_blob_client(STATS_BLOB_NAME)
         
         # Check if stats file exists
         if not blob_client.exists():
@@ -163,25 +211,7 @@ def load_stats_from_blob():
         # Download and parse stats
         stats_content = blob_client.download_blob().readall()
         stats_data = json.loads(stats_content.decode('utf-8'))
-        
-        # Restore global variables
-        global skill_counter, skill_documents, processed_documents, monthly_skill_data
-        
-        skill_counter = Counter(stats_data.get('skill_counter', {}))
-        
-        # Restore skill_documents (convert back to defaultdict)
-        skill_documents_data = stats_data.get('skill_documents', {})
-        skill_documents = defaultdict(list)
-        for skill, docs in skill_documents_data.items():
-            skill_documents[skill] = docs
-        
-        processed_documents = stats_data.get('processed_documents', {})
-        
-        # Restore monthly_skill_data (convert back to nested defaultdict)
-        monthly_data = stats_data.get('monthly_skill_data', {})
-        monthly_skill_data = defaultdict(lambda: defaultdict(int))
-        for skill, months in monthly_data.items():
-            monthly_skill_data[skill] = defaultdict(int, months)
+        restore_stats_data(stats_data)
         
         last_updated = stats_data.get('last_updated', 'Unknown')
         version = stats_data.get('version', 'Unknown')
@@ -189,8 +219,8 @@ def load_stats_from_blob():
         print(f"Stats loaded from blob storage successfully")
         print(f"  Last updated: {last_updated}")
         print(f"  Version: {version}")
-        print(f"  Documents: {len(processed_documents)}")
-        print(f"  Skills: {len(skill_counter)}")
+        print(f"  Documents: {stats_store.document_count()}")
+        print(f"  Skills: {stats_store.distinct_skill_count()}")
         
         # Also load AI statistics
         load_ai_stats_from_blob()
@@ -225,14 +255,14 @@ def sync_ai_extractor_with_processed_documents():
         
         # Rebuild AI stats from processed documents
         rebuilt_count = 0
-        for filename, doc_data in processed_documents.items():
+        for filename, doc_data in stats_store.iter_documents():
             ai_skills = doc_data.get('ai_skills_found', [])
             if ai_skills:
                 rebuilt_count += 1
                 # Update AI skill counter
                 for skill in ai_skills:
                     ai_extractor.ai_skill_counter[skill] += 1
-                    ai_extractor.ai_skill_documents[skill].append(filename)
+                    ai_extractor.ai_skill_documents.add(skill, filename)
                 
                 # Update processed documents
                 ai_extractor.ai_processed_documents[filename] = {
@@ -274,14 +304,14 @@ def force_sync_ai_extractor_with_processed_documents():
         
         # Rebuild AI stats from processed documents
         rebuilt_count = 0
-        for filename, doc_data in processed_documents.items():
+        for filename, doc_data in stats_store.iter_documents():
             ai_skills = doc_data.get('ai_skills_found', [])
             if ai_skills:
                 rebuilt_count += 1
                 # Update AI skill counter
                 for skill in ai_skills:
                     ai_extractor.ai_skill_counter[skill] += 1
-                    ai_extractor.ai_skill_documents[skill].append(filename)
+                    ai_extractor.ai_skill_documents.add(skill, filename)
                 
                 # Update processed documents
                 ai_extractor.ai_processed_documents[filename] = {
@@ -315,15 +345,12 @@ def force_sync_ai_extractor_with_processed_documents():
 def load_ai_stats_from_blob():
     """Load AI extraction statistics from Azure Blob Storage."""
     try:
-        blob_service_client = get_blob_service_client()
-        if not blob_service_client:
+        container_client = get_container_client(STATS_CONTAINER_NAME)
+        if not container_client:
             print("Warning: No blob service client available for AI stats load")
             return False
         
-        ai_blob_client = blob_service_client.get_blob_client(
-            container=STATS_CONTAINER_NAME,
-            blob=ai_extractor.ai_stats_blob_name
-        )
+        ai_blob_client = container_client.get_blob_client(ai_extractor.ai_stats_blob_name)
         
         if not ai_blob_client.exists():
             print("Info: No existing AI stats found, starting with empty AI stats")
@@ -349,29 +376,6 @@ def load_ai_stats_from_blob():
         traceback.print_exc()
         return False
 
-# Load stats on application startup
-try:
-    stats_loaded = load_stats_from_blob()
-    if stats_loaded:
-        print("Application stats loaded successfully on startup")
-        # Sync AI extractor with processed documents data
-        sync_ai_extractor_with_processed_documents()
-        # Also try to load dedicated AI stats to fill any gaps
-        if len(ai_extractor.ai_skill_counter) == 0:
-            print("AI stats still empty after sync, attempting explicit AI stats load...")
-            load_ai_stats_from_blob()
-    else:
-        print("Failed to load main stats, attempting AI stats load only...")
-        load_ai_stats_from_blob()
-except Exception as e:
-    print(f"Failed to load stats on startup: {e}")
-    print("Starting with empty stats")
-    # Still try to load AI stats independently
-    try:
-        load_ai_stats_from_blob()
-    except Exception as ai_e:
-        print(f"Also failed to load AI stats: {ai_e}")
-
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'pdf', 'xlsx', 'xls'}
 
@@ -380,237 +384,10 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def extract_text_from_pdf(file_content):
-    """Extract text content from a PDF file (from bytes or file path)."""
-    try:
-        if isinstance(file_content, str):
-            # Legacy support for file paths
-            with open(file_content, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-        else:
-            # Handle bytes content from blob storage
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-        
-        text = ""
-        for page in pdf_reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-        
-        # Clean up common PDF extraction issues
-        # Remove excessive whitespace while preserving word boundaries
-        text = re.sub(r'\s+', ' ', text)  # Replace multiple spaces/newlines with single space
-        text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)  # Add space between camelCase
-        text = text.strip()
-        
-        return text
-    except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
-        return ""
-
-def get_pdf_creation_date(file_content):
-    """Extract creation date from PDF metadata (from bytes or file path)."""
-    try:
-        if isinstance(file_content, str):
-            # Legacy support for file paths
-            with open(file_content, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-        else:
-            # Handle bytes content from blob storage
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-        
-        if pdf_reader.metadata and '/CreationDate' in pdf_reader.metadata:
-            creation_date = pdf_reader.metadata.get('/CreationDate')
-            if creation_date:
-                # PDF dates are in format D:YYYYMMDDHHmmSSOHH'mm
-                date_str = str(creation_date)
-                if date_str.startswith('D:'):
-                    date_str = date_str[2:16]  # Extract YYYYMMDDHHMMSS
-                    try:
-                        return datetime.strptime(date_str[:8], '%Y%m%d').strftime('%Y-%m-%d')
-                    except:
-                        pass
-        return None
-    except Exception as e:
-        print(f"Error extracting PDF date: {e}")
-        return None
-
-def extract_text_from_excel(file_content, filename):
-    """Extract text content from an Excel file (from bytes)."""
-    try:
-        # Determine file type by extension
-        file_extension = filename.lower().split('.')[-1]
-        
-        # Create a BytesIO object from the file content
-        excel_file = io.BytesIO(file_content)
-        
-        # Read Excel file based on extension
-        if file_extension == 'xlsx':
-            # Use openpyxl for .xlsx files
-            workbook = openpyxl.load_workbook(excel_file, read_only=True, data_only=True)
-            text_content = []
-            
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-                for row in sheet.iter_rows(values_only=True):
-                    for cell in row:
-                        if cell is not None:
-                            text_content.append(str(cell))
-            
-            workbook.close()
-            
-        elif file_extension == 'xls':
-            # Use xlrd for .xls files
-            workbook = xlrd.open_workbook(file_contents=file_content)
-            text_content = []
-            
-            for sheet_index in range(workbook.nsheets):
-                sheet = workbook.sheet_by_index(sheet_index)
-                for row_index in range(sheet.nrows):
-                    for col_index in range(sheet.ncols):
-                        cell_value = sheet.cell_value(row_index, col_index)
-                        if cell_value:
-                            text_content.append(str(cell_value))
-        else:
-            return ""
-        
-        # Join all text with spaces and clean up
-        text = " ".join(text_content)
-        
-        # Clean up common Excel extraction issues
-        text = re.sub(r'\s+', ' ', text)  # Replace multiple spaces with single space
-        text = text.strip()
-        
-        return text
-        
-    except Exception as e:
-        print(f"Error extracting text from Excel file: {e}")
-        return ""
-
-def get_excel_creation_date(file_content, filename):
-    """Extract creation date from Excel metadata (from bytes)."""
-    try:
-        file_extension = filename.lower().split('.')[-1]
-        excel_file = io.BytesIO(file_content)
-        
-        if file_extension == 'xlsx':
-            # Use openpyxl for .xlsx files
-            workbook = openpyxl.load_workbook(excel_file, read_only=True)
-            
-            # Try to get creation date from document properties
-            if hasattr(workbook, 'properties') and workbook.properties:
-                if hasattr(workbook.properties, 'created') and workbook.properties.created:
-                    return workbook.properties.created.strftime('%Y-%m-%d')
-                elif hasattr(workbook.properties, 'modified') and workbook.properties.modified:
-                    return workbook.properties.modified.strftime('%Y-%m-%d')
-            
-            workbook.close()
-            
-        elif file_extension == 'xls':
-            # For .xls files, xlrd doesn't provide easy access to metadata
-            # We could use pandas as an alternative but it's less reliable for dates
-            pass
-            
-        return None
-        
-    except Exception as e:
-        print(f"Error extracting Excel date: {e}")
-        return None
-
-def get_file_type(filename):
-    """Determine file type based on extension."""
-    extension = filename.lower().split('.')[-1]
-    if extension == 'pdf':
-        return 'pdf'
-    elif extension in ['xlsx', 'xls']:
-        return 'excel'
-    else:
-        return 'unknown'
-
 def extract_skills(text):
     """Extract technology skills from text using improved pattern matching.
-    Handles PDF text fragmentation and skill variations."""
-    found_skills = set()  # Use set to ensure uniqueness
-    
-    # Normalize text: remove excessive whitespace and line breaks
-    normalized_text = ' '.join(text.split()).lower()
-    
-    # Also create a version without spaces for compound skills
-    no_spaces_text = re.sub(r'\s+', '', text.lower())
-    
-    for skill in tech_skills:
-        skill_lower = skill.lower()
-        skill_found = False
-        
-        # Method 1: Standard word boundary matching (for simple skills)
-        pattern = r'\b' + re.escape(skill_lower) + r'\b'
-        if re.search(pattern, normalized_text):
-            skill_found = True
-        
-        # Method 2: Flexible matching for compound skills (allows spaces/dots)
-        # Handle skills like "Node.js", "Vue.js", "C++", "C#", etc.
-        flexible_pattern = re.escape(skill_lower)
-        flexible_pattern = flexible_pattern.replace(r'\.', r'[\.\s]*')  # . or spaces
-        flexible_pattern = flexible_pattern.replace(r'\+', r'[\+\s]*')  # + or spaces  
-        flexible_pattern = flexible_pattern.replace(r'\#', r'[\#\s]*')  # # or spaces
-        flexible_pattern = flexible_pattern.replace(r'\s', r'\s*')      # flexible spaces
-        
-        if re.search(r'\b' + flexible_pattern + r'\b', normalized_text):
-            skill_found = True
-        
-        # Method 3: No-spaces matching for fragmented text
-        skill_no_spaces = re.sub(r'[\s\.\+\#-]', '', skill_lower)
-        if len(skill_no_spaces) > 2 and skill_no_spaces in no_spaces_text:
-            skill_found = True
-        
-        if skill_found:
-            found_skills.add(skill)
-    
-    # Additional skill variations and aliases
-    skill_aliases = {
-        'js': 'JavaScript',
-        'ts': 'TypeScript', 
-        'nodejs': 'Node.js',
-        'reactjs': 'React',
-        'vuejs': 'Vue.js',
-        'nextjs': 'Next.js',
-        'nuxtjs': 'Nuxt.js',
-        'dotnet': 'ASP.NET',
-        '.net': 'ASP.NET',
-        'csharp': 'C#',
-        'cplusplus': 'C++',
-        'ai': 'Artificial Intelligence',
-        'ml': 'Machine Learning',
-        'dl': 'Deep Learning',
-        'k8s': 'Kubernetes',
-        'aws': 'AWS',
-        'gcp': 'Google Cloud',
-        'azure': 'Azure',
-        'vscode': 'Visual Studio Code',
-        'vs code': 'Visual Studio Code',
-        'sql server': 'SQL Server',
-        'postgresql': 'PostgreSQL',
-        'mongo': 'MongoDB',
-        'redis': 'Redis',
-        'docker': 'Docker',
-        'git': 'Git',
-        'github': 'GitHub',
-        'gitlab': 'GitLab',
-        'rest': 'REST API',
-        'api': 'API Development',
-        'ci/cd': 'CI/CD',
-        'cicd': 'CI/CD'
-    }
-    
-    # Check for aliases in normalized text
-    for alias, skill_name in skill_aliases.items():
-        # Only add if the main skill wasn't already found
-        if skill_name not in found_skills:
-            alias_pattern = r'\b' + re.escape(alias) + r'\b'
-            if re.search(alias_pattern, normalized_text):
-                found_skills.add(skill_name)
-    
-    return list(found_skills)  # Convert back to list for consistency
+    Handles PDF text fragmentation, skill variations and common aliases."""
+    return list(alias_skill_matcher.find(text))
 
 def get_monthly_chart_data():
     """Generate chart data for top 10 skills over the past 12 months."""
@@ -628,8 +405,9 @@ def get_monthly_chart_data():
         month_label = date.strftime('%b %Y')
         months.append({'key': month_key, 'label': month_label})
     
-    # Get top 10 skills
-    top_skills = [skill for skill, count in skill_counter.most_common(10)]
+    # Get top 10 skills and their monthly occurrences
+    top_skills = [skill for skill, count in stats_store.skill_counts(10)]
+    monthly_counts = stats_store.monthly_counts(top_skills, [month['key'] for month in months])
     
     # Prepare chart data
     chart_data = {
@@ -650,7 +428,7 @@ def get_monthly_chart_data():
         
         for month in months:
             # Add monthly occurrences to cumulative count
-            monthly_occurrences = monthly_skill_data[skill].get(month['key'], 0)
+            monthly_occurrences = monthly_counts[skill].get(month['key'], 0)
             cumulative_count += monthly_occurrences
             skill_data.append(cumulative_count)
         
@@ -671,12 +449,12 @@ def get_monthly_chart_data():
 def index():
     """Main page with upload form and skill statistics."""
     # Get top 10 most common skills from pattern matching
-    top_skills = skill_counter.most_common(10)
+    top_skills = stats_store.skill_counts(10)
     
     # Get top 10 most common AI skills
     top_ai_skills = ai_extractor.ai_skill_counter.most_common(10)
     
-    total_documents = len(processed_documents)
+    total_documents = stats_store.document_count()
     total_ai_documents = len(ai_extractor.ai_processed_documents)
     
     # Get chart data for visualization (pattern matching)
@@ -690,185 +468,396 @@ def index():
                          top_ai_skills=top_ai_skills,
                          total_documents=total_documents,
                          total_ai_documents=total_ai_documents,
-                         total_skills=len(skill_counter),
+                         total_skills=stats_store.distinct_skill_count(),
                          total_ai_skills=len(ai_extractor.ai_skill_counter),
                          pattern_chart_data=pattern_chart_data,
                          ai_chart_data=ai_chart_data,
                          page_name='home')
 
-@app.route('/upload', methods=['POST'])
-def upload_file():
-    """Handle multiple PDF and Excel file upload and skill extraction."""
-    # Check if files are in request
-    if 'files' not in request.files:
-        return jsonify({'success': False, 'message': 'No files selected'})
+def extract_ai_skills_for_uploads(documents, on_result=None):
+    """Run AI extraction for uploaded (text, filename, page_offsets) documents concurrently."""
+    docs = [(text, guess_document_type(filename), page_offsets) for text, filename, page_offsets in documents]
+    results = asyncio.run(async_ai_extractor.extract_skills_many(docs, track=False, on_result=on_result))
+    for (_, filename, _), (ai_skills, _) in zip(documents, results):
+        print(f"AI extracted {len(ai_skills)} skills from {filename}: {ai_skills}")
+    return results
+
+def track_ai_skills(filename, ai_skills, month_key, upload_date, file_type):
+    """Add a document's AI skills to the AI extractor's counters. Callers must hold stats_lock."""
+    ai_extractor._track_extracted_skills(ai_skills)
+    if ai_skills:
+        for skill in ai_skills:
+            ai_extractor.ai_skill_counter[skill] += 1
+            ai_extractor.ai_skill_documents.add(skill, filename)
+            ai_extractor.ai_monthly_skill_data[skill][month_key] += 1
+        
+        ai_extractor.ai_processed_documents[filename] = {
+            'skills': ai_skills,
+            'processed_at': upload_date,
+            'skill_count': len(ai_skills),
+            'file_type': file_type
+        }
+
+def apply_ingestion_result(result, content_hash=None):
+    """Merge one ingestion result into the stats. Callers must hold stats_lock."""
+    filename = result.filename
+    upload_date = result.upload_date
+    file_date = result.file_date
+    file_type = result.file_type
+    found_skills = result.skills
+    ai_skills = result.ai_skills
     
-    files = request.files.getlist('files')
+    # Get month key for tracking
+    date_for_tracking = file_date if file_date else upload_date.split(' ')[0]
+    month_key = date_for_tracking[:7]  # Get YYYY-MM format
     
-    if not files or all(file.filename == '' for file in files):
-        return jsonify({'success': False, 'message': 'No files selected'})
+    # Update AI extractor's internal state
+    track_ai_skills(filename, ai_skills, month_key, upload_date, file_type)
+    
+    # Store the processed document; its pattern skills are added to the monthly rollups
+    doc_data = {
+        'upload_date': upload_date,
+        'file_date': file_date or upload_date.split(' ')[0],
+        'skills_found': found_skills,
+        'ai_skills_found': ai_skills,
+        'ai_metadata': result.ai_metadata,
+        'storage_type': 'blob' if result.is_blob else 'local',
+        'file_type': file_type,
+        'content_hash': content_hash
+    }
+    stats_store.add_document(filename, doc_data)
+    index_document(filename, doc_data)
+
+def ingestion_event(result, content_hash=None):
+    """Stats log event that replays apply_ingestion_result() for one document."""
+    return ('document', {
+        'filename': result.filename,
+        'file_type': result.file_type,
+        'file_date': result.file_date,
+        'upload_date': result.upload_date,
+        'skills': result.skills,
+        'ai_skills': result.ai_skills,
+        'ai_metadata': result.ai_metadata,
+        'is_blob': result.is_blob,
+        'content_hash': content_hash
+    })
+
+def apply_ai_result(filename, content_hash, ai_skills, ai_metadata):
+    """
+    Fill in the AI skills of a document that was left ai_pending. Callers must hold stats_lock.
+    
+    Returns:
+        False if the document was replaced or completed in the meantime
+    """
+    doc_data = stats_store.get_document(filename)
+    if doc_data is None or doc_data.get('content_hash') != content_hash:
+        return False
+    if not doc_data.get('ai_metadata', {}).get('ai_pending'):
+        return False
+    
+    date_for_tracking = doc_data.get('file_date') or doc_data['upload_date'].split(' ')[0]
+    track_ai_skills(filename, ai_skills, date_for_tracking[:7], doc_data['upload_date'],
+                    doc_data.get('file_type', 'unknown'))
+    doc_data['ai_skills_found'] = ai_skills
+    gate = doc_data['ai_metadata'].get('gate')
+    doc_data['ai_metadata'] = {**ai_metadata, 'gate': gate} if gate else ai_metadata
+    stats_store.update_document(filename, doc_data)
+    index_document(filename, doc_data)
+    return True
+
+def apply_stats_event(event):
+    """Re-apply one stats log event during replay. Callers must hold stats_lock."""
+    data = dict(event['data'])
+    if event['type'] == 'document':
+        content_hash = data.pop('content_hash', None)
+        apply_ingestion_result(IngestionResult(**data), content_hash)
+    elif event['type'] == 'ai_result':
+        apply_ai_result(**data)
+    else:
+        print(f"Warning: skipping unknown stats log event type {event['type']!r}")
+
+def stats_snapshot():
+    """Full stats state written when the stats log is compacted. Callers must hold stats_lock."""
+    return {
+        **stats_store.export_stats(),
+        'ai_stats': ai_extractor.get_ai_stats_data(),
+        'last_updated': datetime.now().isoformat(),
+        'version': '2.0'
+    }
+
+def compact_stats_log():
+    """Write a stats snapshot and drop the log segments it covers. Callers must hold stats_lock."""
+    if stats_log is None:
+        return False
+    started = time.perf_counter()
+    compacted = stats_log.compact(stats_snapshot())
+    if compacted:
+        print(f"Stats log compacted at event {stats_log.seq} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return compacted
+
+def persist_stats_events(events):
+    """
+    Persist merged stats changes. Callers must hold stats_lock.
+    
+    The events are appended to the stats log in one write, and the log is
+    compacted into a snapshot every STATS_LOG_COMPACT_EVERY events or when the
+    append fails. Without a stats log the full stats JSON is rewritten. The
+    events are also queued as an incremental backup.
+    """
+    if stats_log is None:
+        save_stats_to_blob()
+        save_ai_stats_to_blob()
+    elif not stats_log.append(events) or stats_log.needs_compaction():
+        compact_stats_log()
+    if stats_backup is not None:
+        stats_backup.record(events)
+
+def restore_stats_snapshot(snapshot):
+    """Replace the global stats and AI stats with a snapshot. Callers must hold stats_lock."""
+    restore_stats_data(snapshot)
+    ai_extractor.load_ai_stats_data(snapshot.get('ai_stats', {}))
+
+def load_stats_from_log():
+    """
+    Load the stats snapshot and replay the events logged after it.
+    
+    Returns:
+        False if there is no stats log or it has no snapshot yet
+    """
+    if stats_log is None:
+        return False
+    try:
+        with stats_lock:
+            snapshot = stats_log.read_snapshot()
+            if snapshot is None:
+                return False
+            restore_stats_snapshot(snapshot)
+            replayed = stats_log.replay(apply_stats_event)
+        print(f"Stats loaded from snapshot at event {snapshot.get('log_seq', 0)} and {replayed} logged event(s)")
+        print(f"  Documents: {stats_store.document_count()}")
+        print(f"  Skills: {stats_store.distinct_skill_count()}")
+        return True
+    except Exception as e:
+        print(f"Error loading stats from the stats log: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def replay_stats_log_over_legacy():
+    """
+    Apply a stats log without a snapshot on top of the legacy stats and compact it.
+    
+    Until the first compaction the logged events are the only record of the
+    uploads since the stats log was turned on; the snapshot written here makes
+    the stats log self-contained, and the log continues after its last event.
+    
+    Returns:
+        False if there is no stats log or it could not be read
+    """
+    if stats_log is None:
+        return False
+    try:
+        with stats_lock:
+            replayed = stats_log.replay(apply_stats_event)
+            compact_stats_log()
+        print(f"Stats log replayed {replayed} event(s) over the legacy stats")
+        print(f"  Documents: {stats_store.document_count()}")
+        return True
+    except Exception as e:
+        print(f"Error replaying the stats log: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def init_stats_persistence():
+    """Create the stats log and the backup manager; both look up their storage, so this runs at startup, not import."""
+    global stats_log, stats_backup
+    stats_log = create_stats_log(STATS_CONTAINER_NAME)
+    stats_backup = create_stats_backup(STATS_CONTAINER_NAME, stats_snapshot, stats_lock)
+
+def resume_stats_log():
+    """
+    Continue the stats log after the events already in it, without replaying them.
+    
+    For a start with the stats already in the stats store: events appended
+    from here on must be numbered after the snapshot and every logged event,
+    or an instance restoring from the log would skip them as compacted.
+    """
+    if stats_log is None:
+        return
+    try:
+        with stats_lock:
+            stats_log.seek_end()
+        print(f"Stats log continues after event {stats_log.seq}")
+    except Exception as e:
+        print(f"Error reading the stats log position: {e}")
+
+def restore_stats_from_backup(until=None, persist=True):
+    """
+    Rebuild the stats from the incremental backups and make them the current stats.
+    
+    Args:
+        until: Restore point as a datetime (default: the latest backup)
+        persist: Write the restored stats to the stats log (or the stats JSON)
+    
+    Returns:
+        The snapshot restored from and the number of deltas and events replayed
+    """
+    if stats_backup is None:
+        raise RuntimeError("Stats backups are not configured")
+    with stats_lock:
+        summary = stats_backup.restore(restore_stats_snapshot, apply_stats_event, until)
+        if persist:
+            if not compact_stats_log():
+                save_stats_to_blob()
+                save_ai_stats_to_blob()
+    if persist:
+        # Later deltas build on the restored state, not the one the old snapshots describe
+        stats_backup.request_snapshot()
+    print(f"Stats restored from backup snapshot {summary['snapshot']} and {summary['deltas']} delta(s)")
+    print(f"  Documents: {stats_store.document_count()}")
+    print(f"  Skills: {stats_store.distinct_skill_count()}")
+    return summary
+
+def ingest_uploads(entries, on_progress=None, force=False):
+    """
+    Process collected upload entries and merge the results into the global stats.
+    
+    Documents whose content (SHA-256 of the file bytes) was already processed
+    are not parsed or sent to AI again; the stored result is reused and the
+    counters are left unchanged.
+    
+    Args:
+        entries: List of (filename, file_content) tuples for accepted files and
+            {'filename', 'error'} dicts for rejected ones, in upload order
+        on_progress: Optional callable (position, stage, error=None) reporting
+            per-file progress by position in ``entries``
+        force: Reprocess documents even if their content was seen before
+    
+    Returns:
+        The upload summary returned by the /upload route
+    """
+    def report(position, stage, error=None):
+        if on_progress is not None:
+            on_progress(position, stage, error)
     
     processed_files = []
     failed_files = []
     total_skills = set()
     total_ai_skills = set()
     
-    # Process each file
-    for file in files:
-        if not file or file.filename == '':
+    # Hash accepted files; known content (or a repeat within this upload) is not reprocessed
+    hashes = {}
+    positions = []
+    seen_hashes = set()
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, tuple):
             continue
-            
-        if not allowed_file(file.filename):
-            failed_files.append({
-                'filename': file.filename,
-                'error': 'Unsupported file type. Please upload PDF or Excel files.'
-            })
+        content_hash = hashes[position] = document_hash(entry[1])
+        if not force and (content_hash in seen_hashes or stats_store.find_by_hash(content_hash) is not None):
             continue
+        seen_hashes.add(content_hash)
+        positions.append(position)
+    
+    # Parse, store and run AI extraction for all new files concurrently
+    uploads = [entries[position] for position in positions]
+    results = dict(zip(positions, get_ingestion_pool().process_files(
+        uploads,
+        store_file=save_content_safely,
+        extract_ai_many=extract_ai_skills_for_uploads,
+        on_progress=lambda index, stage: report(positions[index], stage),
+        ai_gate=decide_ai_extraction
+    )))
+    
+    # Merge all results into the global counters in one synchronized step
+    merged_positions = []
+    stats_events = []
+    failed_hashes = {}
+    duplicate_count = 0
+    ai_pending_count = 0
+    ai_skipped_count = 0
+    with stats_lock:
+        for position, entry in enumerate(entries):
+            if isinstance(entry, dict):
+                failed_files.append(entry)
+                continue
             
-        filename = secure_filename(file.filename)
-        
-        try:
-            # Save file to Azure Blob Storage or local storage
-            file_content, is_blob = save_file_safely(file, filename)
-            
-            # Get upload date
-            upload_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Determine file type and extract content accordingly
-            file_type = get_file_type(filename)
+            content_hash = hashes[position]
+            result = results.get(position)
             
-            if file_type == 'pdf':
-                # Extract text and metadata from PDF
-                text = extract_text_from_pdf(file_content)
-                file_date = get_pdf_creation_date(file_content)
-            elif file_type == 'excel':
-                # Extract text and metadata from Excel
-                text = extract_text_from_excel(file_content, filename)
-                file_date = get_excel_creation_date(file_content, filename)
-            else:
-                failed_files.append({
-                    'filename': filename,
-                    'error': 'Unsupported file type'
-                })
-                continue
+            # Also catches content merged by a concurrent upload since hashing
+            known = stats_store.find_by_hash(content_hash) if result is None or not force else None
+            if result is None or known is not None:
+                if known is not None:
+                    original, stored = known
+                    duplicate_count += 1
+                    processed_files.append({
+                        'filename': entry[0],
+                        'file_type': stored.get('file_type', get_file_type(entry[0])),
+                        'pattern_skills': len(stored.get('skills_found', [])),
+                        'ai_skills': len(stored.get('ai_skills_found', [])),
+                        'storage': 'not stored (duplicate)',
+                        'duplicate_of': original
+                    })
+                    total_skills.update(stored.get('skills_found', []))
+                    total_ai_skills.update(stored.get('ai_skills_found', []))
+                    report(position, FILE_DUPLICATE)
+                    continue
+                if result is None:
+                    # The earlier copy in this upload failed
+                    error = failed_hashes.get(content_hash, 'Duplicate of a file that could not be processed')
+                    failed_files.append({'filename': entry[0], 'error': error})
+                    report(position, FILE_FAILED, error)
+                    continue
             
-            if not text:
+            if result.error:
                 failed_files.append({
-                    'filename': filename,
-                    'error': f'Could not extract text from {file_type.upper()} file'
+                    'filename': result.filename,
+                    'error': result.error
                 })
+                failed_hashes[content_hash] = result.error
+                report(position, FILE_FAILED, result.error)
                 continue
             
-            # Extract skills from text using pattern matching
-            found_skills = extract_skills(text)
-            
-            # Extract skills using AI
-            ai_skills = []
-            ai_metadata = {}
-            try:
-                # Determine document type from filename
-                doc_type = "resume" if any(term in filename.lower() for term in ["cv", "resume"]) else "job_description"
-                ai_skills, ai_metadata = ai_extractor.extract_skills_from_text(text, doc_type)
-                print(f"AI extracted {len(ai_skills)} skills from {filename}: {ai_skills}")
-                
-                # Update AI extractor's internal state immediately
-                if ai_skills:
-                    for skill in ai_skills:
-                        ai_extractor.ai_skill_counter[skill] += 1
-                        ai_extractor.ai_skill_documents[skill].append(filename)
-                        # Update monthly data 
-                        date_for_tracking = file_date if file_date else upload_date.split(' ')[0]
-                        month_key = date_for_tracking[:7]  # Get YYYY-MM format
-                        ai_extractor.ai_monthly_skill_data[skill][month_key] += 1
-                    
-                    # Update AI processed documents
-                    ai_extractor.ai_processed_documents[filename] = {
-                        'skills': ai_skills,
-                        'processed_at': upload_date,
-                        'skill_count': len(ai_skills),
-                        'file_type': file_type
-                    }
-                    
-            except Exception as e:
-                print(f"AI extraction failed for {filename}: {e}")
-                ai_metadata = {'error': str(e)}
-            
-            # Get month key for tracking
-            date_for_tracking = file_date if file_date else upload_date.split(' ')[0]
-            month_key = date_for_tracking[:7]  # Get YYYY-MM format
-            
-            # Update global skill counter (pattern matching)
-            for skill in found_skills:
-                skill_counter[skill] += 1
-                # Track monthly data
-                monthly_skill_data[skill][month_key] += 1
-                # Track which document contains this skill
-                skill_documents[skill].append({
-                    'filename': filename,
-                    'upload_date': upload_date,
-                    'file_date': file_date or upload_date.split(' ')[0],
-                    'file_type': file_type
-                })
-            
-            # Track processed document
-            processed_documents[filename] = {
-                'upload_date': upload_date,
-                'file_date': file_date or upload_date.split(' ')[0],
-                'skills_found': found_skills,
-                'ai_skills_found': ai_skills,
-                'ai_metadata': ai_metadata,
-                'storage_type': 'blob' if is_blob else 'local',
-                'file_type': file_type
-            }
+            apply_ingestion_result(result, content_hash)
+            stats_events.append(ingestion_event(result, content_hash))
+            merged_positions.append(position)
             
             # Add to processed files list
             processed_files.append({
-                'filename': filename,
-                'file_type': file_type,
-                'pattern_skills': len(found_skills),
-                'ai_skills': len(ai_skills),
-                'storage': 'Azure Blob Storage' if is_blob else 'local storage'
+                'filename': result.filename,
+                'file_type': result.file_type,
+                'pattern_skills': len(result.skills),
+                'ai_skills': len(result.ai_skills),
+                'storage': 'Azure Blob Storage' if result.is_blob else 'local storage'
             })
+            if result.ai_metadata.get('ai_pending'):
+                # AI extraction was skipped; the re-drive worker fills it in later
+                processed_files[-1]['ai_pending'] = True
+                ai_pending_count += 1
+            elif result.ai_metadata.get('ai_skipped'):
+                # The confidence gate kept this document away from AI
+                processed_files[-1]['ai_skipped'] = True
+                ai_skipped_count += 1
             
             # Add skills to totals
-            total_skills.update(found_skills)
-            total_ai_skills.update(ai_skills)
-            
-        except Exception as e:
-            failed_files.append({
-                'filename': filename,
-                'error': f'Error processing file: {str(e)}'
-            })
+            total_skills.update(result.skills)
+            total_ai_skills.update(result.ai_skills)
     
-    # Save stats to blob storage after processing all files
-    if processed_files:
-        save_stats_to_blob()
+    # Persist the merged results after processing all files
+    if merged_positions:
+        with stats_lock:
+            persist_stats_events(stats_events)
         
-        # Create backup
-        try:
-            backup_blob_name = f'backups/stats_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
-            blob_service_client = get_blob_service_client()
-            if blob_service_client:
-                backup_stats = {
-                    'skill_counter': dict(skill_counter),
-                    'processed_documents': processed_documents,
-                    'backup_timestamp': datetime.now().isoformat()
-                }
-                backup_blob_client = blob_service_client.get_blob_client(
-                    container=STATS_CONTAINER_NAME,
-                    blob=backup_blob_name
-                )
-                backup_blob_client.upload_blob(
-                    json.dumps(backup_stats, indent=2).encode('utf-8'), 
-                    overwrite=True
-                )
-                print(f"Backup created: {backup_blob_name}")
-        except Exception as backup_error:
-            print(f"Warning: Failed to create backup: {backup_error}")
+        for position in merged_positions:
+            report(position, FILE_PERSISTED)
+    
+    if ai_pending_count:
+        ensure_ai_redrive_worker()
     
     # Create response message
     if not processed_files and not failed_files:
-        return jsonify({'success': False, 'message': 'No valid files to process'})
+        return {'success': False, 'message': 'No valid files to process'}
     
     # Build response message
     message_parts = []
@@ -876,7 +865,14 @@ def upload_file():
     if processed_files:
         message_parts.append(f"Successfully processed {len(processed_files)} file(s):")
         for file_info in processed_files:
-            message_parts.append(f"• {file_info['filename']}: {file_info['pattern_skills']} pattern skills, {file_info['ai_skills']} AI skills")
+            if file_info.get('duplicate_of'):
+                message_parts.append(f"• {file_info['filename']}: duplicate of {file_info['duplicate_of']}, reused stored result")
+            elif file_info.get('ai_pending'):
+                message_parts.append(f"• {file_info['filename']}: {file_info['pattern_skills']} pattern skills, AI extraction pending (AI service unavailable)")
+            elif file_info.get('ai_skipped'):
+                message_parts.append(f"• {file_info['filename']}: {file_info['pattern_skills']} pattern skills, AI skipped (pattern results confident)")
+            else:
+                message_parts.append(f"• {file_info['filename']}: {file_info['pattern_skills']} pattern skills, {file_info['ai_skills']} AI skills")
         
         message_parts.append(f"\nTotal unique skills found:")
         message_parts.append(f"• Pattern Matching: {len(total_skills)} skills")
@@ -887,28 +883,257 @@ def upload_file():
         for file_info in failed_files:
             message_parts.append(f"• {file_info['filename']}: {file_info['error']}")
     
-    return jsonify({
+    return {
         'success': len(processed_files) > 0,
         'message': '\n'.join(message_parts),
         'summary': {
             'processed_files': len(processed_files),
             'failed_files': len(failed_files),
             'total_pattern_skills': len(total_skills),
-            'total_ai_skills': len(total_ai_skills)
+            'total_ai_skills': len(total_ai_skills),
+            'duplicate_files': duplicate_count,
+            'dedup_hit_rate': round(duplicate_count / len(hashes), 3) if hashes else 0.0,
+            'ai_pending_files': ai_pending_count,
+            'ai_skipped_files': ai_skipped_count
         },
         'processed_files': processed_files,
         'failed_files': failed_files
-    })
+    }
+
+def find_ai_pending_documents():
+    """Return the filenames of documents whose AI extraction was deferred."""
+    return [filename for filename, _ in stats_store.pending_ai_documents()]
+
+def redrive_pending_ai_extraction(max_documents=None):
+    """
+    Fill in AI skills for documents marked ai_pending while the AI service was unavailable.
+    
+    The stored files are re-read and parsed, sent to AI extraction as one
+    concurrent batch, and the results are merged into the AI counters.
+    
+    Returns:
+        Number of documents that now have AI skills
+    """
+    if max_documents is None:
+        max_documents = AI_REDRIVE_BATCH_SIZE
+    
+    with ai_redrive_lock:
+        # Skip the storage reads while the breaker would reject the calls anyway
+        if not ai_extractor.circuit_breaker.ready():
+            return 0
+        
+        with stats_lock:
+            pending = [
+                (filename, doc_data.get('storage_type') == 'blob', doc_data.get('content_hash'))
+                for filename, doc_data in stats_store.pending_ai_documents(max_documents)
+            ]
+        
+        documents = []
+        for filename, is_blob, content_hash in pending:
+            file_content = get_file_content(filename, is_blob)
+            if not file_content:
+                print(f"AI re-drive: could not read stored file {filename}")
+                continue
+            document = parse_document(file_content, filename, max_text_chars=AI_MAX_TEXT_CHARS)
+            if document.text:
+                documents.append((document.text, filename, document.page_offsets, content_hash))
+        if not documents:
+            return 0
+        
+        results = extract_ai_skills_for_uploads([document[:3] for document in documents])
+        
+        stats_events = []
+        with stats_lock:
+            for (_, filename, _, content_hash), (ai_skills, ai_metadata) in zip(documents, results):
+                if ai_metadata.get('ai_pending'):
+                    continue
+                # Skipped if the document was replaced or completed while this batch ran
+                if apply_ai_result(filename, content_hash, ai_skills, ai_metadata):
+                    stats_events.append(('ai_result', {
+                        'filename': filename,
+                        'content_hash': content_hash,
+                        'ai_skills': ai_skills,
+                        'ai_metadata': ai_metadata
+                    }))
+            
+            if stats_events:
+                persist_stats_events(stats_events)
+        completed = len(stats_events)
+        
+        print(f"AI re-drive completed {completed} of {len(pending)} pending document(s)")
+        return completed
+
+def _ai_redrive_worker():
+    """Periodically re-drive pending AI extraction until no document is pending."""
+    global ai_redrive_thread
+    while True:
+        time.sleep(AI_REDRIVE_INTERVAL_SECONDS)
+        try:
+            redrive_pending_ai_extraction()
+        except Exception as e:
+            print(f"AI re-drive failed: {e}")
+        
+        with ai_redrive_thread_lock:
+            with stats_lock:
+                remaining = bool(find_ai_pending_documents())
+            if not remaining:
+                ai_redrive_thread = None
+                return
+
+def ensure_ai_redrive_worker():
+    """Start the background AI re-drive worker if it is not running."""
+    global ai_redrive_thread
+    with ai_redrive_thread_lock:
+        if ai_redrive_thread is None:
+            ai_redrive_thread = threading.Thread(target=_ai_redrive_worker, name='ai-redrive', daemon=True)
+            ai_redrive_thread.start()
+
+init_stats_persistence()
+
+# The stats store keeps the stats across restarts. An empty store (first start,
+# or a new instance) imports them from the stats log snapshot and the events
+# logged after it, or from the legacy stats JSON until the log has a snapshot
+stats_store_loaded = stats_store.document_count() > 0
+if stats_store_loaded:
+    print(f"Stats store has {stats_store.document_count()} documents")
+    # The AI counters are kept in memory; rebuild them from the stored documents
+    sync_ai_extractor_with_processed_documents()
+    resume_stats_log()
+stats_log_loaded = stats_store_loaded or load_stats_from_log()
+if not stats_log_loaded:
+    try:
+        stats_loaded = load_stats_from_blob()
+        if stats_loaded:
+            print("Application stats loaded successfully on startup")
+            # Sync AI extractor with processed documents data
+            sync_ai_extractor_with_processed_documents()
+            # Also try to load dedicated AI stats to fill any gaps
+            if len(ai_extractor.ai_skill_counter) == 0:
+                print("AI stats still empty after sync, attempting explicit AI stats load...")
+                load_ai_stats_from_blob()
+        else:
+            print("Failed to load main stats, attempting AI stats load only...")
+            load_ai_stats_from_blob()
+    except Exception as e:
+        print(f"Failed to load stats on startup: {e}")
+        print("Starting with empty stats")
+        # Still try to load AI stats independently
+        try:
+            load_ai_stats_from_blob()
+        except Exception as ai_e:
+            print(f"Also failed to load AI stats: {ai_e}")
+    # Events logged before the first snapshot apply on top of the legacy stats,
+    # before recovered jobs append new ones
+    stats_log_loaded = replay_stats_log_over_legacy()
+
+# Background ingestion jobs for /upload?async=1; workers sharing JOBS_DB_PATH
+# only re-queue jobs whose owning process has stopped renewing its lease
+job_manager = JobManager(ingest_uploads)
+job_manager.recover()
+
+# Re-drive AI extraction for documents left pending by a previous process
+if find_ai_pending_documents():
+    ensure_ai_redrive_worker()
+
+@app.route('/upload', methods=['POST'])
+def upload_file():
+    """Handle multiple PDF and Excel file upload and skill extraction.
+    
+    With ?async=1 the files are queued as a background job and the response
+    contains a job id to poll at /api/jobs/<job_id>. Documents already
+    processed (by content) are skipped unless ?force=1 is given.
+    """
+    # Check if files are in request
+    if 'files' not in request.files:
+        return jsonify({'success': False, 'message': 'No files selected'})
+    
+    files = request.files.getlist('files')
+    
+    if not files or all(file.filename == '' for file in files):
+        return jsonify({'success': False, 'message': 'No files selected'})
+    
+    # Read accepted files up front; rejected ones keep their place in the response order
+    entries = []
+    for file in files:
+        if not file or file.filename == '':
+            continue
+            
+        if not allowed_file(file.filename):
+            entries.append({
+                'filename': file.filename,
+                'error': 'Unsupported file type. Please upload PDF or Excel files.'
+            })
+            continue
+            
+        filename = secure_filename(file.filename)
+        entries.append((filename, file.read()))
+    
+    force = request.values.get('force', '').lower() in ('1', 'true', 'yes')
+    
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        job_id = job_manager.submit(entries, {'force': force})
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': url_for('api_job_status', job_id=job_id),
+            'message': f'Queued {len(entries)} file(s) for processing'
+        }), 202
+    
+    return jsonify(ingest_uploads(entries, force=force))
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """API endpoint reporting per-file progress and the final summary of an upload job."""
+    job = job_manager.get_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    
+    stages = Counter(file_state['stage'] for file_state in job['files'])
+    job['progress'] = {
+        'total_files': len(job['files']),
+        'done_files': stages[FILE_PERSISTED] + stages[FILE_DUPLICATE] + stages[FILE_FAILED],
+        'stages': dict(stages)
+    }
+    job['success'] = True
+    return jsonify(job)
 
 @app.route('/api/skills')
 def api_skills():
     """API endpoint to get skill statistics as JSON."""
+    skill_counts = stats_store.skill_counts()
     return jsonify({
-        'total_skills': len(skill_counter),
-        'skills': dict(skill_counter),
-        'top_skills': skill_counter.most_common(20)
+        'total_skills': len(skill_counts),
+        'skills': dict(skill_counts),
+        'top_skills': skill_counts[:20]
     })
 
+@app.route('/api/skills/<path:skill>/related')
+def api_related_skills(skill):
+    """
+    Skills found in the same documents as skill, with lift and PMI.
+    
+    Query parameters:
+        limit: Number of related skills (default 20, at most 200)
+        min_count: Leave out skills found together in fewer documents (default RELATED_SKILLS_MIN_COUNT)
+        sort: lift (default), pmi (same order as lift) or count
+    """
+    sort = request.args.get('sort', 'lift')
+    if sort not in ('lift', 'pmi', 'count'):
+        return jsonify({'success': False, 'message': 'Invalid sort. Use lift, pmi or count'}), 400
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+    min_count = max(request.args.get('min_count', RELATED_SKILLS_MIN_COUNT, type=int), 1)
+    
+    related = stats_store.related_skills(skill, limit, min_count, 'count' if sort == 'count' else 'lift')
+    if related is None:
+        return jsonify({'success': False, 'message': f'No documents with skill {skill}'}), 404
+    return jsonify({'success': True, **related})
+
+@app.route('/api/skills/cooccurrence')
+def api_skill_cooccurrence():
+    """Skill co-occurrence heatmap: counts and lift among the top skills by number of documents."""
+    top_n = min(max(request.args.get('top', COOCCURRENCE_TOP_N, type=int), 1), COOCCURRENCE_MAX_TOP_N)
+    return jsonify({'success': True, **stats_store.cooccurrence_matrix(top_n)})
+
 @app.route('/api/ai-skills')
 def api_ai_skills():
     """API endpoint to get AI-extracted skill statistics as JSON."""
@@ -916,20 +1141,35 @@ def api_ai_skills():
         'total_ai_skills': len(ai_extractor.ai_skill_counter),
         'ai_skills': dict(ai_extractor.ai_skill_counter),
         'top_ai_skills': ai_extractor.ai_skill_counter.most_common(20),
-        'extraction_method': 'AI (OpenAI GPT)'
+        'extraction_method': 'AI (OpenAI GPT)',
+        'batching': async_ai_extractor.get_batch_stats()
+    })
+
+@app.route('/api/ai-redrive', methods=['POST'])
+def api_ai_redrive():
+    """Re-run AI extraction now for documents left pending while the AI service was unavailable."""
+    completed = redrive_pending_ai_extraction()
+    with stats_lock:
+        pending = len(find_ai_pending_documents())
+    return jsonify({
+        'success': True,
+        'completed': completed,
+        'pending': pending,
+        'circuit_breaker': ai_extractor.circuit_breaker.get_stats()
     })
 
 @app.route('/api/comparison')
 def api_comparison():
     """API endpoint to compare pattern matching vs AI extraction results."""
-    pattern_skills = set(skill_counter.keys())
+    pattern_counts = stats_store.skill_counts()
+    pattern_skills = {skill for skill, count in pattern_counts}
     ai_skills = set(ai_extractor.ai_skill_counter.keys())
     
     return jsonify({
         'pattern_matching': {
             'total_skills': len(pattern_skills),
-            'top_skills': skill_counter.most_common(10),
-            'total_documents': len(processed_documents)
+            'top_skills': pattern_counts[:10],
+            'total_documents': stats_store.document_count()
         },
         'ai_extraction': {
             'total_skills': len(ai_skills),
@@ -948,34 +1188,119 @@ def api_comparison():
             'pattern_only': len(pattern_skills - ai_skills),
             'ai_only': len(ai_skills - pattern_skills),
             'overlap_percentage': round(len(pattern_skills.intersection(ai_skills)) / max(len(pattern_skills.union(ai_skills)), 1) * 100, 2)
+        },
+        'ai_gating': summarize_gate_counts(*stats_store.gate_counts())
+    })
+
+@app.route('/api/search')
+def api_search():
+    """
+    Boolean skill search over the processed documents, most recently stored first.
+    
+    Query parameters:
+        q: Skill query, e.g. Kubernetes AND (Go OR Rust) NOT Java (syntax in skill_search.py)
+        from, to: Optional inclusive YYYY-MM range on the document's file date
+        page, per_page: Page of results (per_page defaults to SEARCH_PAGE_SIZE)
+    """
+    query = request.args.get('q', '')
+    month_from = request.args.get('from') or None
+    month_to = request.args.get('to') or None
+    for month in (month_from, month_to):
+        if month and not re.fullmatch(r'\d{4}-\d{2}', month):
+            return jsonify({
+                'success': False,
+                'message': 'Invalid month format. Use YYYY-MM format (e.g., 2025-09)'
+            }), 400
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', SEARCH_PAGE_SIZE, type=int), 1), SEARCH_MAX_PAGE_SIZE)
+    
+    index = get_skill_index()
+    started = time.perf_counter()
+    try:
+        result = index.search(query, month_from, month_to, (page - 1) * per_page, per_page)
+    except QueryError as e:
+        return jsonify({'success': False, 'message': f'Invalid query: {e}'}), 400
+    query_ms = (time.perf_counter() - started) * 1000
+    
+    records = stats_store.get_documents(result['filenames'])
+    documents = [
+        {
+            'filename': filename,
+            'upload_date': records[filename].get('upload_date'),
+            'file_date': records[filename].get('file_date'),
+            'file_type': records[filename].get('file_type'),
+            'skills_found': records[filename].get('skills_found', []),
+            'ai_skills_found': records[filename].get('ai_skills_found', [])
         }
+        for filename in result['filenames'] if filename in records
+    ]
+    return jsonify({
+        'success': True,
+        'query': query,
+        'total': result['total'],
+        'page': page,
+        'per_page': per_page,
+        'total_pages': max((result['total'] + per_page - 1) // per_page, 1),
+        'documents': documents,
+        'unknown_skills': result['unknown_skills'],
+        'query_ms': round(query_ms, 3)
+    })
+
+@app.route('/api/match/<path:job_document>')
+def api_match(job_document):
+    """
+    Rank all resumes against a processed job description by IDF-weighted skill overlap.
+    
+    Query parameters:
+        k: Number of resumes to return (default MATCH_TOP_K, at most MATCH_MAX_TOP_K)
+    """
+    doc_data = stats_store.get_document(job_document)
+    if doc_data is None:
+        return jsonify({'success': False, 'message': f'Document {job_document} not found'}), 404
+    top_k = min(max(request.args.get('k', MATCH_TOP_K, type=int), 1), MATCH_MAX_TOP_K)
+    
+    matcher = get_resume_matcher()
+    started = time.perf_counter()
+    result = matcher.match(document_skills(doc_data), top_k, exclude=job_document)
+    return jsonify({
+        'success': True,
+        'job_document': job_document,
+        'document_type': guess_document_type(job_document),
+        **result,
+        'query_ms': round((time.perf_counter() - started) * 1000, 3)
     })
 
 @app.route('/api/health')
 def health_check():
     """Health check endpoint with stats information."""
-    stats_loaded = len(skill_counter) > 0 or len(processed_documents) > 0
+    store_stats = stats_store.get_stats()
+    stats_loaded = store_stats['documents'] > 0 or store_stats['skills'] > 0
     
     return jsonify({
         'status': 'healthy',
         'stats_loaded': stats_loaded,
-        'total_documents': len(processed_documents),
-        'total_skills': len(skill_counter),
+        'total_documents': store_stats['documents'],
+        'total_skills': store_stats['skills'],
+        'stats_store': store_stats,
         'azure_blob_available': get_blob_service_client() is not None,
+        'stats_log': stats_log.get_stats() if stats_log is not None else None,
+        'stats_backup': stats_backup.get_stats() if stats_backup is not None else None,
+        'skill_index': skill_index.get_stats() if skill_index is not None else None,
+        'resume_matcher': resume_matcher.get_stats() if resume_matcher is not None else None,
         'timestamp': datetime.now().isoformat()
     })
 
 @app.route('/api/reload-stats', methods=['POST'])
 def reload_stats():
-    """Manually reload stats from Azure Blob Storage."""
+    """Manually reload stats from the stats log, or Azure Blob Storage without one."""
     try:
-        success = load_stats_from_blob()
+        success = load_stats_from_log() or load_stats_from_blob()
         if success:
             return jsonify({
                 'success': True,
                 'message': 'Stats reloaded successfully',
-                'total_documents': len(processed_documents),
-                'total_skills': len(skill_counter)
+                'total_documents': stats_store.document_count(),
+                'total_skills': stats_store.distinct_skill_count()
             })
         else:
             return jsonify({
@@ -991,7 +1316,7 @@ def reload_stats():
 @app.route('/skills')
 def skills_page():
     """Page showing all skill statistics."""
-    all_skills = skill_counter.most_common()
+    all_skills = stats_store.skill_counts()
     all_ai_skills = ai_extractor.ai_skill_counter.most_common()
     
     # Create combined skill data with both pattern and AI counts
@@ -1026,14 +1351,20 @@ def ai_skills_page():
 
 @app.route('/documents')
 def documents_page():
-    """Page showing all processed documents."""
-    return render_template('documents.html', documents=processed_documents, page_name='documents')
+    """Page showing the processed documents, most recently uploaded first, DOCUMENTS_PAGE_SIZE per page."""
+    page = max(request.args.get('page', 1, type=int), 1)
+    total_documents = stats_store.document_count()
+    total_pages = max((total_documents + DOCUMENTS_PAGE_SIZE - 1) // DOCUMENTS_PAGE_SIZE, 1)
+    documents = dict(stats_store.list_documents(DOCUMENTS_PAGE_SIZE, (page - 1) * DOCUMENTS_PAGE_SIZE))
+    return render_template('documents.html', documents=documents, total_documents=total_documents,
+                           page=page, total_pages=total_pages, page_name='documents')
 
 @app.route('/comparison')
 def comparison_page():
     """Page comparing pattern matching vs AI extraction results."""
     # Get data for comparison
-    pattern_skills = skill_counter.most_common(20)
+    all_pattern_counts = stats_store.skill_counts()
+    pattern_skills = all_pattern_counts[:20]
     ai_skills = ai_extractor.ai_skill_counter.most_common(20)
     
     # Get chart data for both methods
@@ -1045,7 +1376,7 @@ def comparison_page():
     ai_skill_names = set([skill for skill, count in ai_skills])
     
     # Get all skills from both methods (not just top 20)
-    all_pattern_skills = set([skill for skill, count in skill_counter.most_common()])
+    all_pattern_skills = set([skill for skill, count in all_pattern_counts])
     all_ai_skills = set([skill for skill, count in ai_extractor.ai_skill_counter.most_common()])
     
     # Calculate overlap and unique skills
@@ -1054,6 +1385,8 @@ def comparison_page():
     unique_ai_skills = list(all_ai_skills - all_pattern_skills)
     total_unique = len(all_pattern_skills | all_ai_skills)
     overlap_count = len(common_skills)
+    ai_gating = summarize_gate_counts(*stats_store.gate_counts())
+    cooccurrence = stats_store.cooccurrence_matrix(COOCCURRENCE_TOP_N)
     
     return render_template('comparison.html', 
                          pattern_skills=pattern_skills,
@@ -1064,6 +1397,8 @@ def comparison_page():
                          total_unique=total_unique,
                          unique_pattern_skills=unique_pattern_skills,
                          unique_ai_skills=unique_ai_skills,
+                         ai_gating=ai_gating,
+                         cooccurrence=cooccurrence,
                          page_name='comparison')
 
 @app.route('/about')
@@ -1071,9 +1406,9 @@ def about_page():
     """About page with application information."""
     # Calculate dynamic statistics
     total_skills_in_db = len(tech_skills)
-    unique_skills_found = len(skill_counter)
-    total_documents = len(processed_documents)
-    total_skill_occurrences = sum(skill_counter.values())
+    unique_skills_found = stats_store.distinct_skill_count()
+    total_documents = stats_store.document_count()
+    total_skill_occurrences = stats_store.total_skill_occurrences()
     
     # Calculate categories (this is an approximation based on the skills.py structure)
     categories = [
@@ -1103,7 +1438,7 @@ def debug_sync_ai():
             'sync_success': success,
             'ai_skills_count': len(ai_extractor.ai_skill_counter),
             'ai_documents_count': len(ai_extractor.ai_processed_documents),
-            'processed_docs_with_ai': len([d for d in processed_documents.values() if d.get('ai_skills_found')]),
+            'processed_docs_with_ai': stats_store.documents_with_skills(AI),
             'top_ai_skills': ai_extractor.ai_skill_counter.most_common(10) if ai_extractor.ai_skill_counter else []
         }
         
@@ -1117,23 +1452,17 @@ def debug_sync_ai():
 def save_stats_to_blob():
     """Save all statistics to Azure Blob Storage as JSON files."""
     try:
-        blob_service_client = get_blob_service_client()
-        if not blob_service_client:
+        container_client = get_container_client(AZURE_STORAGE_CONTAINER_NAME)
+        if not container_client:
             return False
         
         stats_data = {
-            'skill_counter': dict(skill_counter),
-            'skill_documents': dict(skill_documents),
-            'processed_documents': dict(processed_documents),
-            'monthly_skill_data': {k: dict(v) for k, v in monthly_skill_data.items()},
+            **stats_store.export_stats(),
             'last_updated': datetime.now().isoformat()
         }
         
         # Upload stats as JSON
-        blob_client = blob_service_client.get_blob_client(
-            container=AZURE_STORAGE_CONTAINER_NAME,
-            blob='stats/app_statistics.json'
-        )
+        blob_client = container_client.get_blob_client('stats/app_statistics.json')
         
         blob_client.upload_blob(
             json.dumps(stats_data, indent=2).encode('utf-8'),
@@ -1147,30 +1476,17 @@ def save_stats_to_blob():
 def load_stats_from_blob():
     """Load statistics from Azure Blob Storage JSON files."""
     try:
-        blob_service_client = get_blob_service_client()
-        if not blob_service_client:
+        container_client = get_container_client(AZURE_STORAGE_CONTAINER_NAME)
+        if not container_client:
             return False
         
-        blob_client = blob_service_client.get_blob_client(
-            container=AZURE_STORAGE_CONTAINER_NAME,
-            blob='stats/app_statistics.json'
-        )
+        blob_client = container_client.get_blob_client('stats/app_statistics.json')
         
         stats_json = blob_client.download_blob().readall().decode('utf-8')
         stats_data = json.loads(stats_json)
         
-        # Restore global variables
-        global skill_counter, skill_documents, processed_documents, monthly_skill_data
-        
-        skill_counter = Counter(stats_data.get('skill_counter', {}))
-        skill_documents = defaultdict(list, stats_data.get('skill_documents', {}))
-        processed_documents = stats_data.get('processed_documents', {})
-        monthly_skill_data = defaultdict(lambda: defaultdict(int))
-        
-        # Restore monthly data structure
-        for skill, months in stats_data.get('monthly_skill_data', {}).items():
-            for month, count in months.items():
-                monthly_skill_data[skill][month] = count
+        # Import into the stats store
+        restore_stats_data(stats_data)
         
         print(f"Stats loaded successfully. Last updated: {stats_data.get('last_updated', 'Unknown')}")
         return True
@@ -1180,24 +1496,22 @@ def load_stats_from_blob():
 
 # Load stats on application startup
 # Try to load stats when the application starts
-try:
-    load_stats_from_blob()
-    print("Application stats loaded successfully on startup")
-except Exception as e:
-    print(f"Failed to load stats on startup: {e}")
-    print("Starting with empty stats")
+if not stats_log_loaded:
+    try:
+        load_stats_from_blob()
+        print("Application stats loaded successfully on startup")
+    except Exception as e:
+        print(f"Failed to load stats on startup: {e}")
+        print("Starting with empty stats")
 
 def upload_file_to_blob(file_content, filename):
     """Upload file to Azure Blob Storage."""
     try:
-        blob_service_client = get_blob_service_client()
-        if not blob_service_client:
+        container_client = get_container_client(AZURE_STORAGE_CONTAINER_NAME)
+        if not container_client:
             return False, "Azure Blob Storage not configured"
         
-        blob_client = blob_service_client.get_blob_client(
-            container=AZURE_STORAGE_CONTAINER_NAME,
-            blob=filename
-        )
+        blob_client = container_client.get_blob_client(filename)
         
         blob_client.upload_blob(file_content, overwrite=True)
         return True, "File uploaded successfully"
@@ -1208,14 +1522,11 @@ def upload_file_to_blob(file_content, filename):
 def download_file_from_blob(filename):
     """Download file from Azure Blob Storage."""
     try:
-        blob_service_client = get_blob_service_client()
-        if not blob_service_client:
+        container_client = get_container_client(AZURE_STORAGE_CONTAINER_NAME)
+        if not container_client:
             return None
         
-        blob_client = blob_service_client.get_blob_client(
-            container=AZURE_STORAGE_CONTAINER_NAME,
-            blob=filename
-        )
+        blob_client = container_client.get_blob_client(filename)
         
         return blob_client.download_blob().readall()
     except Exception as e:
@@ -1225,20 +1536,25 @@ def download_file_from_blob(filename):
 def save_file_safely(file, filename):
     """Save file to Azure Blob Storage or local storage (fallback)."""
     file_content = file.read()
-    
+    is_blob = save_content_safely(file_content, filename)
+    return file_content, is_blob  # Return content and blob flag (False = local)
+
+def save_content_safely(file_content, filename):
+    """Save file content to Azure Blob Storage or local storage (fallback).
+    Returns True if the content was stored in blob storage."""
     # Try Azure Blob Storage first
     blob_service_client = get_blob_service_client()
     if blob_service_client:
         success, message = upload_file_to_blob(file_content, filename)
         if success:
-            return file_content, True  # Return content and success flag
+            return True
     
     # Fallback to local storage
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     with open(filepath, 'wb') as f:
         f.write(file_content)
     
-    return file_content, False  # Return content and blob flag (False = local)
+    return False
 
 def get_file_content(filename, is_blob=True):
     """Get file content from Azure Blob Storage or local storage."""
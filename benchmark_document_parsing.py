@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark single-pass document parsing against the separate text and date
+helpers, which open each PDF or workbook twice.
+
+Usage:
+    python benchmark_document_parsing.py [--repeat N] [--pages N ...]
+"""
+
+import argparse
+import io
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import openpyxl
+
+from document_parsing import (
+    parse_document, extract_text_from_pdf, get_pdf_creation_date,
+    extract_text_from_excel, get_excel_creation_date
+)
+from benchmark_skill_matching import generate_resume
+
+LINES_PER_PAGE = 45
+CHARS_PER_LINE = 70
+
+
+def _pdf_string(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def build_pdf(pages, seed=42, creation_date='20250314120000'):
+    """Build a text PDF with ``pages`` pages of synthetic resume text."""
+    text = ' '.join(generate_resume(pages, seed=seed).split())
+    lines = [text[i:i + CHARS_PER_LINE] for i in range(0, len(text), CHARS_PER_LINE)]
+
+    objects = []
+    page_ids = []
+    font_id = 3
+    next_id = 4
+    page_objects = []
+    for page in range(pages):
+        page_lines = lines[page * LINES_PER_PAGE:(page + 1) * LINES_PER_PAGE]
+        stream = 'BT /F1 10 Tf 12 TL 50 780 Td ' + ' '.join(
+            f'({_pdf_string(line)}) Tj T*' for line in page_lines
+        ) + ' ET'
+        content_id, page_id = next_id, next_id + 1
+        next_id += 2
+        page_ids.append(page_id)
+        page_objects.append((content_id, f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream'))
+        page_objects.append((page_id, f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] '
+                                      f'/Contents {content_id} 0 R /Resources << /Font << /F1 {font_id} 0 R >> >> >>'))
+
+    info_id = next_id
+    kids = ' '.join(f'{page_id} 0 R' for page_id in page_ids)
+    objects.append((1, '<< /Type /Catalog /Pages 2 0 R >>'))
+    objects.append((2, f'<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>'))
+    objects.append((font_id, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>'))
+    objects.extend(page_objects)
+    objects.append((info_id, f"<< /Producer (benchmark) /CreationDate (D:{creation_date}+01'00') >>"))
+    objects.sort()
+
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = {}
+    for obj_id, body in objects:
+        offsets[obj_id] = out.tell()
+        out.write(f'{obj_id} 0 obj\n{body}\nendobj\n'.encode('latin-1'))
+    xref_offset = out.tell()
+    out.write(f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode('latin-1'))
+    for obj_id, _ in objects:
+        out.write(f'{offsets[obj_id]:010d} 00000 n \n'.encode('latin-1'))
+    out.write(f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R /Info {info_id} 0 R >>\n'
+              f'startxref\n{xref_offset}\n%%EOF\n'.encode('latin-1'))
+    return out.getvalue()
+
+
+def build_xlsx(sheets, rows_per_sheet=200, seed=42):
+    """Build an .xlsx workbook with synthetic resume text in every sheet."""
+    words = generate_resume(sheets * 2, seed=seed).split()
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    for index in range(sheets):
+        sheet = workbook.create_sheet(f'Sheet{index + 1}')
+        for row in range(rows_per_sheet):
+            start = (index * rows_per_sheet + row) * 4 % max(1, len(words) - 4)
+            sheet.append(words[start:start + 4])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def best_ms(func, repeat):
+    """Return the best wall time in milliseconds over ``repeat`` runs."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement (best is reported)')
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 50], help='PDF page counts / Excel sheet counts')
+    args = parser.parse_args()
+
+    print(f"{'document':<18}{'bytes':>10}{'two-pass ms':>13}{'one-pass ms':>13}{'speedup':>9}   stages (one-pass)")
+    for pages in args.pages:
+        cases = [
+            (f'pdf {pages}p', build_pdf(pages), 'resume.pdf',
+             lambda content, name: (extract_text_from_pdf(content), get_pdf_creation_date(content))),
+            (f'xlsx {pages} sheets', build_xlsx(pages), 'resume.xlsx',
+             lambda content, name: (extract_text_from_excel(content, name), get_excel_creation_date(content, name))),
+        ]
+        for label, content, filename, two_pass in cases:
+            document = parse_document(content, filename)
+            if (document.text, document.creation_date) != two_pass(content, filename):
+                print(f"Result mismatch for {label}")
+                return 1
+
+            two_pass_ms = best_ms(lambda: two_pass(content, filename), args.repeat)
+            one_pass_ms = best_ms(lambda: parse_document(content, filename), args.repeat)
+            document = parse_document(content, filename)
+            stages = ', '.join(f'{stage} {ms:.1f}' for stage, ms in document.timings.items() if stage != 'total')
+            print(f"{label:<18}{len(content):>10}{two_pass_ms:>13.2f}{one_pass_ms:>13.2f}"
+                  f"{two_pass_ms / one_pass_ms:>8.2f}x   {stages}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
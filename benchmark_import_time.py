@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark module import time against a per-module budget.
+
+Each module is imported in a fresh interpreter with ``python -X importtime``
+and the best cumulative time over several runs is compared with
+IMPORT_BUDGETS_MS. The script also checks that none of the slow optional
+dependencies (parsers, OpenAI and Azure SDKs) are loaded at import time; they
+are meant to be imported on first use. Exits non-zero when a module is over
+budget or loads a deferred dependency, so it can run in CI and the numbers can
+be compared release to release with --json.
+
+app is not budgeted by default: importing it also loads the configuration
+and the stored statistics, which depends on the environment rather than the
+imports. It can still be measured with --modules app.
+
+Usage:
+    python benchmark_import_time.py [--repeat N] [--modules NAME ...] [--top N] [--json PATH]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import os
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cumulative import time budgets in milliseconds; raise them deliberately
+IMPORT_BUDGETS_MS = {
+    'skills': 50,
+    'document_parsing': 50,
+    'keyvault_manager': 100,
+    'ingestion': 200,
+    'ai_skills': 250,
+    'ai_gating': 300,
+    'monthly_analysis': 300,
+}
+
+# Dependencies that must only be imported by the code paths that use them
+DEFERRED_MODULES = (
+    'pandas', 'PyPDF2', 'openpyxl', 'xlrd', 'openai',
+    'azure.storage.blob', 'azure.identity', 'azure.keyvault.secrets',
+)
+
+_REPORT_LOADED = (
+    "import json, sys\n"
+    "print(json.dumps([name for name in {deferred!r} if name in sys.modules]))\n"
+)
+
+
+def parse_importtime(stderr):
+    """Parse ``-X importtime`` output into (self_us, cumulative_us, depth, name) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, package = line[len('import time:'):].split('|', 2)
+        name = package.rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def measure_import(module, deferred=DEFERRED_MODULES):
+    """Import ``module`` in a fresh interpreter.
+
+    Returns (cumulative_ms, import rows, deferred modules that were loaded).
+    """
+    code = f"import {module}\n" + _REPORT_LOADED.format(deferred=tuple(deferred))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=REPO_DIR,
+                            capture_output=True, text=True, timeout=300)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = parse_importtime(result.stderr)
+    cumulative_us = next(cumulative for _, cumulative, depth, name in rows if depth == 0 and name == module)
+    return cumulative_us / 1000, rows, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def top_imports(rows, module, count):
+    """Return the ``count`` slowest direct dependencies of ``module`` as (name, ms)."""
+    # importtime lists children before their parent, so the module's direct
+    # dependencies are the depth-1 rows since the previous top-level import
+    children = []
+    for _, cumulative, depth, name in rows:
+        if depth == 0:
+            if name == module:
+                break
+            children = []
+        elif depth == 1:
+            children.append((name, cumulative / 1000))
+    return sorted(children, key=lambda item: item[1], reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='imports per module (best is reported)')
+    parser.add_argument('--modules', nargs='+', default=list(IMPORT_BUDGETS_MS), help='modules to import')
+    parser.add_argument('--top', type=int, default=3, help='slowest direct dependencies shown per module')
+    parser.add_argument('--json', help='write the measurements to this file')
+    args = parser.parse_args()
+
+    failures = 0
+    results = {}
+    print(f"{'module':<20}{'import ms':>11}{'budget ms':>11}   slowest dependencies")
+    for module in args.modules:
+        best = None
+        for _ in range(args.repeat):
+            measurement = measure_import(module)
+            if best is None or measurement[0] < best[0]:
+                best = measurement
+        import_ms, rows, loaded = best
+        budget_ms = IMPORT_BUDGETS_MS.get(module)
+        over_budget = budget_ms is not None and import_ms > budget_ms
+        slowest = ', '.join(f'{name} {ms:.1f}' for name, ms in top_imports(rows, module, args.top))
+        print(f"{module:<20}{import_ms:>11.1f}{budget_ms if budget_ms is not None else '-':>11}   {slowest}")
+        if over_budget:
+            print(f"  over budget by {import_ms - budget_ms:.1f} ms")
+        if loaded:
+            print(f"  loads deferred dependencies: {', '.join(loaded)}")
+        failures += over_budget or bool(loaded)
+        results[module] = {'import_ms': round(import_ms, 1), 'budget_ms': budget_ms, 'deferred_loaded': loaded}
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'modules': results}, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
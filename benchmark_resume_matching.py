@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark ranking resumes against a job description with the sparse
+resume x skill matrix against scoring every resume in a Python loop.
+
+Usage:
+    python benchmark_resume_matching.py [--resumes N] [--skills-per-document N] [--repeat N]
+"""
+
+import argparse
+import math
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_skill_postings import generate_documents
+from resume_matching import ResumeMatcher
+from skills import tech_skills
+
+
+def loop_scores(resumes, job_skills):
+    """IDF-weighted overlap of every resume, one resume at a time."""
+    document_frequency = {}
+    for skills in resumes.values():
+        for skill in skills:
+            document_frequency[skill] = document_frequency.get(skill, 0) + 1
+    idf = {skill: math.log((1 + len(resumes)) / (1 + document_frequency.get(skill, 0))) + 1 for skill in job_skills}
+    total = sum(idf.values())
+    return {
+        filename: sum(idf[skill] for skill in job_skills if skill in skills) / total
+        for filename, skills in resumes.items()
+    }
+
+
+def best_ms(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--resumes', type=int, default=50000, help='number of synthetic resumes')
+    parser.add_argument('--skills-per-document', type=int, default=20, help='skills drawn per resume')
+    parser.add_argument('--repeat', type=int, default=10, help='runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    resumes = {
+        filename: set(doc_data['skills_found'])
+        for filename, doc_data in generate_documents(args.resumes, args.skills_per_document).items()
+    }
+    start = time.perf_counter()
+    matcher = ResumeMatcher.from_documents(resumes.items())
+    build_seconds = time.perf_counter() - start
+    stats = matcher.get_stats()
+    print(f"Resumes: {stats['resumes']}, skills: {stats['skills']}, links: {stats['links']}")
+    print(f"Matrix build: {build_seconds:.2f} s")
+
+    rng = random.Random(7)
+    print(f"\n{'job skills':>10}{'matches':>9}{'matrix ms':>11}{'loop ms':>10}")
+    for size in (5, 15, 40):
+        job_skills = rng.sample(tech_skills, size)
+        result = matcher.match(job_skills, top_k=10)
+        expected = loop_scores(resumes, set(job_skills))
+        for match in result['matches']:
+            if abs(expected[match['filename']] - match['score']) > 1e-4:
+                print(f"Score mismatch for {match['filename']}")
+                return 1
+        if result['matches'][0]['score'] < max(expected.values()) - 1e-4:
+            print("Best match mismatch")
+            return 1
+        matrix_ms = best_ms(lambda: matcher.match(job_skills, top_k=10), args.repeat)
+        loop_ms = best_ms(lambda: loop_scores(resumes, set(job_skills)), 1)
+        print(f"{size:>10}{sum(1 for score in expected.values() if score):>9}{matrix_ms:>11.2f}{loop_ms:>10.1f}")
+
+    updates = [(f'new_resume_{i}.pdf', rng.sample(tech_skills, args.skills_per_document)) for i in range(1000)]
+    start = time.perf_counter()
+    for filename, skills in updates:
+        matcher.add_document(filename, skills)
+    print(f"\nIncremental add: {(time.perf_counter() - start) * 1e6 / len(updates):.0f} us per resume")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
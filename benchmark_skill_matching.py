@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass skill matcher against the original regex-per-skill
+extraction on synthetic 5-page and 50-page resumes.
+
+Usage:
+    python benchmark_skill_matching.py [--repeat N] [--batch-size N]
+"""
+
+import argparse
+import random
+import re
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from skills import tech_skills, skill_aliases, skill_matcher, alias_skill_matcher, extract_skills_many
+
+# Roughly one page of resume text per 3000 characters
+CHARS_PER_PAGE = 3000
+
+FILLER_WORDS = [
+    "responsible", "for", "designing", "and", "delivering", "solutions", "team",
+    "worked", "with", "stakeholders", "to", "improve", "the", "platform",
+    "experience", "erfaring", "med", "utvikling", "prosjekt", "customers",
+    "migrated", "services", "built", "pipelines", "reduced", "costs", "by",
+]
+
+
+def legacy_extract_skills(text):
+    """Original regex-per-skill implementation of skills.extract_skills."""
+    found_skills = set()
+    normalized_text = ' '.join(text.split()).lower()
+    no_spaces_text = re.sub(r'\s+', '', text.lower())
+
+    for skill in tech_skills:
+        skill_lower = skill.lower()
+        skill_found = False
+
+        pattern = r'\b' + re.escape(skill_lower) + r'\b'
+        if re.search(pattern, normalized_text):
+            skill_found = True
+
+        flexible_pattern = re.escape(skill_lower)
+        flexible_pattern = flexible_pattern.replace(r'\.', r'[\.\s]*')
+        flexible_pattern = flexible_pattern.replace(r'\+', r'[\+\s]*')
+        flexible_pattern = flexible_pattern.replace(r'\#', r'[\#\s]*')
+        flexible_pattern = flexible_pattern.replace(r'\s', r'\s*')
+        if re.search(r'\b' + flexible_pattern + r'\b', normalized_text):
+            skill_found = True
+
+        skill_no_spaces = re.sub(r'[\s\.\+\#-]', '', skill_lower)
+        if len(skill_no_spaces) > 2 and skill_no_spaces in no_spaces_text:
+            skill_found = True
+
+        if len(skill_lower) > 4:
+            words = skill_lower.split()
+            if len(words) > 1:
+                all_words_found = True
+                for word in words:
+                    if len(word) > 2 and word not in normalized_text:
+                        all_words_found = False
+                        break
+                if all_words_found:
+                    skill_found = True
+
+        if skill_found:
+            found_skills.add(skill)
+
+    return list(found_skills)
+
+
+def legacy_extract_skills_with_aliases(text):
+    """Original regex-per-skill implementation of app.extract_skills."""
+    found_skills = set()
+    normalized_text = ' '.join(text.split()).lower()
+    no_spaces_text = re.sub(r'\s+', '', text.lower())
+
+    for skill in tech_skills:
+        skill_lower = skill.lower()
+        skill_found = False
+
+        pattern = r'\b' + re.escape(skill_lower) + r'\b'
+        if re.search(pattern, normalized_text):
+            skill_found = True
+
+        flexible_pattern = re.escape(skill_lower)
+        flexible_pattern = flexible_pattern.replace(r'\.', r'[\.\s]*')
+        flexible_pattern = flexible_pattern.replace(r'\+', r'[\+\s]*')
+        flexible_pattern = flexible_pattern.replace(r'\#', r'[\#\s]*')
+        flexible_pattern = flexible_pattern.replace(r'\s', r'\s*')
+        if re.search(r'\b' + flexible_pattern + r'\b', normalized_text):
+            skill_found = True
+
+        skill_no_spaces = re.sub(r'[\s\.\+\#-]', '', skill_lower)
+        if len(skill_no_spaces) > 2 and skill_no_spaces in no_spaces_text:
+            skill_found = True
+
+        if skill_found:
+            found_skills.add(skill)
+
+    for alias, skill_name in skill_aliases.items():
+        if skill_name not in found_skills:
+            alias_pattern = r'\b' + re.escape(alias) + r'\b'
+            if re.search(alias_pattern, normalized_text):
+                found_skills.add(skill_name)
+
+    return list(found_skills)
+
+
+def generate_resume(pages, seed=42):
+    """Generate a synthetic resume with skills scattered through filler text."""
+    rng = random.Random(seed)
+    vocabulary = FILLER_WORDS + tech_skills + list(skill_aliases)
+    parts = []
+    length = 0
+    while length < pages * CHARS_PER_PAGE:
+        if rng.random() < 0.15:
+            word = rng.choice(vocabulary)
+        else:
+            word = rng.choice(FILLER_WORDS)
+        separator = rng.choice([' ', ' ', ' ', ', ', '. ', '\n', ' - '])
+        parts.append(word + separator)
+        length += len(word) + len(separator)
+    return ''.join(parts)
+
+
+def time_call(func, text, repeat):
+    """Return the best wall time in milliseconds over ``repeat`` runs."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def time_batch(texts, repeat):
+    """Compare a per-document loop with extract_skills_many on a batch."""
+    loop_best = batch_best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        [legacy_extract_skills(text) for text in texts]
+        loop_best = min(loop_best, time.perf_counter() - start)
+        start = time.perf_counter()
+        extract_skills_many(texts, return_matrix=True)
+        batch_best = min(batch_best, time.perf_counter() - start)
+    return loop_best * 1000, batch_best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement (best is reported)')
+    parser.add_argument('--batch-size', type=int, default=500, help='documents in the batch benchmark')
+    args = parser.parse_args()
+
+    cases = [
+        ('extract_skills', legacy_extract_skills, skill_matcher.find),
+        ('extract_skills + aliases', legacy_extract_skills_with_aliases, alias_skill_matcher.find),
+    ]
+
+    print(f"Skills in dictionary: {len(tech_skills)}, aliases: {len(skill_aliases)}")
+    print(f"{'case':<28}{'pages':>6}{'chars':>9}{'regex ms':>11}{'matcher ms':>12}{'speedup':>9}")
+    for pages in (5, 50):
+        text = generate_resume(pages)
+        for name, legacy, matcher in cases:
+            if set(legacy(text)) != matcher(text):
+                print(f"Result mismatch for {name} on {pages} pages")
+                return 1
+            legacy_ms = time_call(legacy, text, args.repeat)
+            matcher_ms = time_call(matcher, text, args.repeat)
+            print(f"{name:<28}{pages:>6}{len(text):>9}{legacy_ms:>11.2f}{matcher_ms:>12.2f}{legacy_ms / matcher_ms:>8.1f}x")
+
+    batch = [generate_resume(1, seed=i % 200) for i in range(args.batch_size)]
+    loop_ms, batch_ms = time_batch(batch, max(1, args.repeat // 2))
+    print(f"\nBatch of {len(batch)} one-page documents ({len(set(batch))} distinct):")
+    print(f"  regex loop:             {loop_ms:>10.1f} ms")
+    print(f"  extract_skills_many:    {batch_ms:>10.1f} ms (incl. incidence matrix)")
+    print(f"  speedup:                {loop_ms / batch_ms:>10.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
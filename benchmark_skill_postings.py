@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark memory and serialized size of the skill -> document links: the
+legacy per-skill document dicts against interned DocumentPostings.
+
+Usage:
+    python benchmark_skill_postings.py [--documents N] [--skills-per-document N]
+"""
+
+import argparse
+import json
+import random
+import sys
+import os
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from skills import tech_skills
+from skill_postings import DocumentPostings
+
+
+def generate_documents(count, skills_per_document, seed=42):
+    """Synthetic processed_documents with a skewed skill distribution."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(tech_skills))]
+    documents = {}
+    for i in range(count):
+        found = set(rng.choices(tech_skills, weights=weights, k=skills_per_document))
+        documents[f'resume_{i:06d}.pdf'] = {
+            'upload_date': f'2025-{i % 12 + 1:02d}-{i % 28 + 1:02d} 14:30:00',
+            'file_date': f'2025-{i % 12 + 1:02d}-01',
+            'skills_found': sorted(found),
+            'file_type': 'pdf'
+        }
+    return documents
+
+
+def build_legacy(documents):
+    """The per-skill document dicts the stats used to keep."""
+    skill_documents = {}
+    for filename, doc_data in documents.items():
+        for skill in doc_data['skills_found']:
+            skill_documents.setdefault(skill, []).append({
+                'filename': filename,
+                'upload_date': doc_data['upload_date'],
+                'file_date': doc_data['file_date'],
+                'file_type': doc_data['file_type']
+            })
+    return skill_documents
+
+
+def build_postings(documents):
+    postings = DocumentPostings()
+    for filename, doc_data in documents.items():
+        postings.add_document(filename, doc_data['skills_found'])
+    return postings
+
+
+def measure(build, documents):
+    """(object, bytes allocated by build, seconds)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(documents)
+    elapsed = time.perf_counter() - start
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, allocated, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--documents', type=int, default=100000, help='number of synthetic documents')
+    parser.add_argument('--skills-per-document', type=int, default=20, help='skills drawn per document')
+    args = parser.parse_args()
+
+    documents = generate_documents(args.documents, args.skills_per_document)
+    links = sum(len(doc_data['skills_found']) for doc_data in documents.values())
+    print(f"Documents: {len(documents)}, skill links: {links} ({links / len(documents):.1f} per document)")
+
+    legacy, legacy_bytes, legacy_seconds = measure(build_legacy, documents)
+    postings, postings_bytes, postings_seconds = measure(build_postings, documents)
+    if {skill: [entry['filename'] for entry in entries] for skill, entries in legacy.items()} != {
+        skill: postings.documents(skill) for skill in postings.skills()
+    }:
+        print("Result mismatch between legacy lists and postings")
+        return 1
+
+    legacy_json = len(json.dumps(legacy))
+    start = time.perf_counter()
+    postings_json = len(json.dumps(postings.to_dict()))
+    dump_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    DocumentPostings.load(json.loads(json.dumps(postings.to_dict())))
+    load_seconds = time.perf_counter() - start
+
+    print(f"{'layout':<22}{'memory MB':>11}{'JSON MB':>10}{'build s':>10}")
+    print(f"{'per-skill dicts':<22}{legacy_bytes / 1e6:>11.1f}{legacy_json / 1e6:>10.1f}{legacy_seconds:>10.2f}")
+    print(f"{'interned postings':<22}{postings_bytes / 1e6:>11.1f}{postings_json / 1e6:>10.1f}{postings_seconds:>10.2f}")
+    print(f"\nMemory: {legacy_bytes / postings_bytes:.1f}x smaller, JSON: {legacy_json / postings_json:.1f}x smaller")
+    print(f"Postings dump: {dump_seconds * 1000:.0f} ms, JSON round trip + load: {load_seconds * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
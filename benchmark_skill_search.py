@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark boolean skill search on the bitmap index against scanning every
+processed document.
+
+Usage:
+    python benchmark_skill_search.py [--documents N] [--skills-per-document N] [--repeat N]
+"""
+
+import argparse
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_skill_postings import generate_documents
+from skill_search import SkillIndex, parse_query, AND, OR, NOT
+from stats_store import document_month
+
+QUERIES = [
+    'Python',
+    'Kubernetes AND (Go OR Rust) NOT Java',
+    '"Power BI" OR Tableau OR Excel',
+    'NOT Java',
+    '(Docker OR Kubernetes) AND (AWS OR Azure OR "Google Cloud") AND NOT PHP',
+]
+
+
+def scan_matches(documents, tree):
+    """Filenames matching the query tree by testing every document, newest first."""
+
+    def matches(skills, node):
+        if node[0] == NOT:
+            return not matches(skills, node[1])
+        if node[0] == AND:
+            return matches(skills, node[1]) and matches(skills, node[2])
+        if node[0] == OR:
+            return matches(skills, node[1]) or matches(skills, node[2])
+        return node[1].lower() in skills
+
+    found = [
+        filename for filename, doc_data in documents.items()
+        if matches({skill.lower() for skill in doc_data['skills_found']}, tree)
+    ]
+    return found[::-1]
+
+
+def best_ms(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--documents', type=int, default=100000, help='number of synthetic documents')
+    parser.add_argument('--skills-per-document', type=int, default=20, help='skills drawn per document')
+    parser.add_argument('--repeat', type=int, default=20, help='runs per query (best is reported)')
+    args = parser.parse_args()
+
+    documents = generate_documents(args.documents, args.skills_per_document)
+    links = [
+        (filename, document_month(doc_data), skill)
+        for filename, doc_data in documents.items() for skill in doc_data['skills_found']
+    ]
+    start = time.perf_counter()
+    index = SkillIndex.from_links(links)
+    build_seconds = time.perf_counter() - start
+    stats = index.get_stats()
+    print(f"Documents: {stats['documents']}, skills: {stats['skills']}, months: {stats['months']}")
+    print(f"Index build: {build_seconds:.2f} s, bitmaps: {stats['bitmap_bytes'] / 1e6:.1f} MB")
+
+    print(f"\n{'query':<72}{'total':>8}{'index ms':>10}{'scan ms':>10}")
+    for query in QUERIES:
+        result = index.search(query, limit=50)
+        expected = scan_matches(documents, parse_query(query))
+        if result['total'] != len(expected) or result['filenames'] != expected[:50]:
+            print(f"Result mismatch for {query!r}")
+            return 1
+        index_ms = best_ms(lambda: index.search(query, limit=50), args.repeat)
+        scan_ms = best_ms(lambda: scan_matches(documents, parse_query(query)), 1)
+        print(f"{query:<72}{result['total']:>8}{index_ms:>10.3f}{scan_ms:>10.1f}")
+
+    query = QUERIES[1]
+    ranged_ms = best_ms(lambda: index.search(query, '2025-03', '2025-06', limit=50), args.repeat)
+    deep_ms = best_ms(lambda: index.search('NOT Java', offset=50000, limit=50), args.repeat)
+    print(f"\nWith a 4-month range: {ranged_ms:.3f} ms, page at offset 50000: {deep_ms:.3f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Shared Azure Blob Storage client for the application and the monthly analysis.
+
+One BlobServiceClient is created per process on first use and reused by every
+save/load helper, so connections are kept alive in a pooled HTTP session and
+the managed identity credential acquires a token once and caches it until it
+expires, instead of a new TLS handshake and token request per operation.
+Container clients are cached by name and share the same pipeline.
+
+The connection string comes from the application configuration (Key Vault
+secret azure-storage-connection-string, falling back to the environment). When
+a re-read of the configuration finds a new connection string, the shared
+clients are dropped and the next call creates them with the new one. The Azure
+SDK is imported when the client is first created.
+
+Configuration (environment variables):
+- AZURE_STORAGE_CONNECTION_STRING: storage connection string (Key Vault fallback)
+- AZURE_STORAGE_ACCOUNT_NAME: account used with managed identity when there is no connection string
+- BLOB_POOL_MAXSIZE: pooled HTTP connections kept open to the storage account (default 20)
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from keyvault_manager import add_config_listener, get_application_config
+
+logger = logging.getLogger(__name__)
+
+BLOB_POOL_MAXSIZE = int(os.environ.get('BLOB_POOL_MAXSIZE', 20))
+
+_blob_service_client = None
+_blob_service_client_lock = threading.Lock()
+_container_clients: Dict[str, Any] = {}
+_created_containers = set()
+_container_clients_lock = threading.Lock()
+_follows_config = False
+
+
+def _create_pooled_transport(pool_maxsize: int):
+    """Create a requests transport whose session keeps up to pool_maxsize connections per host."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    from azure.core.pipeline.transport import RequestsTransport
+    
+    session = requests.Session()
+    # The Azure pipeline retries on its own, so the adapter must not
+    adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize,
+                          max_retries=Retry(total=False, redirect=False, raise_on_status=False))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return RequestsTransport(session=session)
+
+
+def create_blob_service_client(connection_string: Optional[str] = None, account_name: Optional[str] = None,
+                               pool_maxsize: Optional[int] = None):
+    """Create a BlobServiceClient with a pooled transport, or None if storage is not configured.
+    
+    Args:
+        connection_string: Storage connection string; managed identity is used without one
+        account_name: Storage account for managed identity (default AZURE_STORAGE_ACCOUNT_NAME)
+        pool_maxsize: Pooled connections (default BLOB_POOL_MAXSIZE)
+    """
+    try:
+        from azure.storage.blob import BlobServiceClient
+        
+        transport = _create_pooled_transport(pool_maxsize or BLOB_POOL_MAXSIZE)
+        if connection_string:
+            return BlobServiceClient.from_connection_string(connection_string, transport=transport)
+        
+        account_name = account_name or os.environ.get('AZURE_STORAGE_ACCOUNT_NAME')
+        if not account_name:
+            logger.warning("Azure Blob Storage not configured: no connection string or storage account name")
+            return None
+        
+        # Use Managed Identity; the credential caches its token until it expires
+        from azure.identity import DefaultAzureCredential
+        account_url = f"https://{account_name}.blob.core.windows.net"
+        return BlobServiceClient(account_url=account_url, credential=DefaultAzureCredential(), transport=transport)
+    except Exception as e:
+        logger.error(f"Error initializing blob service client: {e}")
+        return None
+
+
+def get_blob_service_client():
+    """Get the process-wide BlobServiceClient, creating it on first use.
+    
+    Returns None while storage is not available; creation is retried on the next call.
+    """
+    global _blob_service_client, _follows_config
+    if _blob_service_client is None:
+        with _blob_service_client_lock:
+            if _blob_service_client is None:
+                config = get_application_config()
+                _blob_service_client = create_blob_service_client(config.get('azure_storage_connection_string'))
+                if not _follows_config:
+                    add_config_listener(_on_config_change)
+                    _follows_config = True
+    return _blob_service_client
+
+
+def _on_config_change(old_config: Dict[str, Any], new_config: Dict[str, Any]) -> None:
+    if old_config.get('azure_storage_connection_string') != new_config.get('azure_storage_connection_string'):
+        logger.info("Storage connection string changed; recreating the blob clients")
+        reset_blob_clients()
+
+
+def get_container_client(container_name: str, create: bool = False):
+    """Get the cached container client for container_name, or None if storage is not available.
+    
+    With create=True the container is created if missing, once per process.
+    """
+    container_client = _container_clients.get(container_name)
+    if container_client is None:
+        blob_service_client = get_blob_service_client()
+        if blob_service_client is None:
+            return None
+        with _container_clients_lock:
+            container_client = _container_clients.setdefault(
+                container_name, blob_service_client.get_container_client(container_name)
+            )
+    
+    if create and container_name not in _created_containers:
+        from azure.core.exceptions import ResourceExistsError
+        try:
+            container_client.create_container()
+            logger.info(f"Created blob container '{container_name}'")
+        except ResourceExistsError:
+            pass
+        _created_containers.add(container_name)
+    return container_client
+
+
+def reset_blob_clients() -> None:
+    """Drop the shared clients, e.g. after the storage configuration changed."""
+    global _blob_service_client
+    with _blob_service_client_lock, _container_clients_lock:
+        if _blob_service_client is not None:
+            _blob_service_client.close()
+        _blob_service_client = None
+        _container_clients.clear()
+        _created_containers.clear()
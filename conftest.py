@@ -0,0 +1,57 @@
+"""
+Shared pytest fixtures.
+
+Tests that post uploads through app.test_client() take the app_module
+fixture: the app with its upload folder, stats store, stats log and backups
+redirected to a temporary directory, so uploads neither land in the
+repository nor leak into other tests. Run directly, the test modules use
+isolated_app() for the same setup.
+"""
+
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Module globals of app.py that hold persistent state or are derived from it
+APP_STATE = ('stats_store', 'stats_log', 'stats_backup', 'skill_index', 'resume_matcher')
+
+
+@contextmanager
+def isolated_app(directory=None):
+    """Yield the app module with its uploads and stats under directory (a new temporary one by default)."""
+    if directory is None:
+        with tempfile.TemporaryDirectory() as tmp, isolated_app(tmp) as app_module:
+            yield app_module
+        return
+
+    import app as app_module
+    from stats_store import StatsStore
+
+    saved = {name: getattr(app_module, name) for name in APP_STATE}
+    saved_upload_folder = app_module.app.config['UPLOAD_FOLDER']
+    upload_folder = os.path.join(directory, 'uploads')
+    os.makedirs(upload_folder, exist_ok=True)
+    app_module.app.config['UPLOAD_FOLDER'] = upload_folder
+    app_module.stats_store = StatsStore(os.path.join(directory, 'stats.db'))
+    # Tests of the stats log or the backups install their own under directory
+    app_module.stats_log = None
+    app_module.stats_backup = None
+    app_module.skill_index = None
+    app_module.resume_matcher = None
+    try:
+        yield app_module
+    finally:
+        app_module.app.config['UPLOAD_FOLDER'] = saved_upload_folder
+        for name, value in saved.items():
+            setattr(app_module, name, value)
+
+
+@pytest.fixture
+def app_module(tmp_path):
+    with isolated_app(str(tmp_path)) as module:
+        yield module
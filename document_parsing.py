@@ -0,0 +1,380 @@
+"""
+Document parsing helpers for PDF and Excel uploads.
+
+These functions only depend on the parser libraries and are safe to import in
+worker processes without pulling in the Flask app or Azure clients.
+
+parse_document() opens each file once and extracts text, page count and
+creation date from the same reader. The older single-purpose helpers are kept
+for existing callers.
+
+PDF text is produced page by page by iter_pdf_page_text(), and
+parse_document() hands each page to its on_text callback as it is read, so
+incremental skill matching and text scoring run while the file is parsed.
+With max_text_chars, parse_document() keeps only the start of the text (the
+ingestion path keeps what AI extraction can use), so its peak memory is
+bounded by that budget plus one page rather than by the document. The number
+of pages read is capped by PDF_MAX_PAGES (0 disables the cap), which bounds
+the parse latency for very large uploads; the older helpers read every page.
+
+The parser libraries (PyPDF2, openpyxl, xlrd) are imported by the _open_*
+helpers on first use, so importing this module stays cheap for callers that
+never parse a file.
+"""
+
+import io
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Maximum number of PDF pages read per document (0 = no limit)
+PDF_MAX_PAGES = int(os.environ.get('PDF_MAX_PAGES', 200))
+
+
+@dataclass
+class ParsedDocument:
+    """Result of parsing a document once."""
+    file_type: str
+    text: str = ''
+    page_count: int = 0
+    # Pages actually read; fewer than page_count when the page cap applies
+    pages_parsed: int = 0
+    truncated: bool = False
+    # Characters of text extracted; more than len(text) when max_text_chars applies
+    text_chars: int = 0
+    creation_date: Optional[str] = None
+    # Offset in text where each PDF page starts; preferred AI chunk boundaries
+    page_offsets: List[int] = field(default_factory=list)
+    # Milliseconds spent per stage: open, text, metadata and total
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+class _Timer:
+    """Collect elapsed milliseconds per parsing stage."""
+
+    def __init__(self):
+        self.timings = {}
+        self._start = self._last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.timings[stage] = (now - self._last) * 1000
+        self._last = now
+
+    def finish(self):
+        self.timings['total'] = (time.perf_counter() - self._start) * 1000
+        return self.timings
+
+
+def _open_pdf(file_content):
+    """Create a PdfReader from bytes or a file path."""
+    import PyPDF2
+    if isinstance(file_content, str):
+        # Legacy support for file paths
+        with open(file_content, 'rb') as file:
+            return PyPDF2.PdfReader(io.BytesIO(file.read()))
+    # Handle bytes content from blob storage
+    return PyPDF2.PdfReader(io.BytesIO(file_content))
+
+def _open_xlsx(file_content, data_only=True):
+    """Open an .xlsx workbook from bytes in read-only mode."""
+    import openpyxl
+    return openpyxl.load_workbook(io.BytesIO(file_content), read_only=True, data_only=data_only)
+
+def _open_xls(file_content):
+    """Open a legacy .xls workbook from bytes."""
+    import xlrd
+    return xlrd.open_workbook(file_contents=file_content)
+
+def _page_limit(max_pages):
+    """Resolve a page cap argument; None uses PDF_MAX_PAGES and 0 means no limit."""
+    if max_pages is None:
+        max_pages = PDF_MAX_PAGES
+    return max_pages if max_pages > 0 else None
+
+def _clean_page_text(page_text):
+    """Normalize the text of one PDF page."""
+    # Remove excessive whitespace while preserving word boundaries
+    text = re.sub(r'\s+', ' ', page_text)  # Replace multiple spaces/newlines with single space
+    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)  # Add space between camelCase
+    return text.strip()
+
+def _iter_pages(pdf_reader, max_pages=None):
+    """Yield the cleaned, non-empty text of each page of an open PDF."""
+    limit = _page_limit(max_pages)
+    for index, page in enumerate(pdf_reader.pages):
+        if limit is not None and index >= limit:
+            break
+        page_text = page.extract_text()
+        if page_text:
+            page_text = _clean_page_text(page_text)
+            if page_text:
+                yield page_text
+
+def _pdf_text(pdf_reader, max_pages=None):
+    """Extract and clean the text of an open PDF.
+    
+    Pages are joined with single spaces, which gives the same text as
+    cleaning the whole document at once.
+    """
+    return ' '.join(_iter_pages(pdf_reader, max_pages))
+
+def iter_pdf_page_text(file_content, max_pages=None):
+    """
+    Yield the cleaned text of each PDF page without building the whole document.
+    
+    Args:
+        file_content: PDF bytes or a file path
+        max_pages: Page cap (None uses PDF_MAX_PAGES, 0 reads every page)
+    """
+    yield from _iter_pages(_open_pdf(file_content), max_pages)
+
+def _pdf_creation_date(pdf_reader):
+    """Read the creation date from the metadata of an open PDF."""
+    if pdf_reader.metadata and '/CreationDate' in pdf_reader.metadata:
+        creation_date = pdf_reader.metadata.get('/CreationDate')
+        if creation_date:
+            # PDF dates are in format D:YYYYMMDDHHmmSSOHH'mm
+            date_str = str(creation_date)
+            if date_str.startswith('D:'):
+                date_str = date_str[2:16]  # Extract YYYYMMDDHHMMSS
+                try:
+                    return datetime.strptime(date_str[:8], '%Y%m%d').strftime('%Y-%m-%d')
+                except:
+                    pass
+    return None
+
+def _xlsx_text(workbook):
+    """Collect the cell values of every sheet of an open .xlsx workbook."""
+    text_content = []
+    for sheet_name in workbook.sheetnames:
+        sheet = workbook[sheet_name]
+        for row in sheet.iter_rows(values_only=True):
+            for cell in row:
+                if cell is not None:
+                    text_content.append(str(cell))
+    return text_content
+
+def _xls_text(workbook):
+    """Collect the cell values of every sheet of an open .xls workbook."""
+    text_content = []
+    for sheet_index in range(workbook.nsheets):
+        sheet = workbook.sheet_by_index(sheet_index)
+        for row_index in range(sheet.nrows):
+            for col_index in range(sheet.ncols):
+                cell_value = sheet.cell_value(row_index, col_index)
+                if cell_value:
+                    text_content.append(str(cell_value))
+    return text_content
+
+def _clean_excel_text(text_content):
+    # Join all text with spaces and clean up
+    text = " ".join(text_content)
+    
+    # Clean up common Excel extraction issues
+    text = re.sub(r'\s+', ' ', text)  # Replace multiple spaces with single space
+    return text.strip()
+
+def _xlsx_creation_date(workbook):
+    """Read the creation (or modification) date from an open .xlsx workbook."""
+    # Try to get creation date from document properties
+    if hasattr(workbook, 'properties') and workbook.properties:
+        if hasattr(workbook.properties, 'created') and workbook.properties.created:
+            return workbook.properties.created.strftime('%Y-%m-%d')
+        elif hasattr(workbook.properties, 'modified') and workbook.properties.modified:
+            return workbook.properties.modified.strftime('%Y-%m-%d')
+    return None
+
+def _parse_pdf(file_content, timer, max_pages=None, on_text=None, max_text_chars=None):
+    document = ParsedDocument('pdf')
+    try:
+        pdf_reader = _open_pdf(file_content)
+        document.page_count = len(pdf_reader.pages)
+    except Exception as e:
+        print(f"Error opening PDF: {e}")
+        return document
+    timer.lap('open')
+    
+    limit = _page_limit(max_pages)
+    document.pages_parsed = min(document.page_count, limit) if limit else document.page_count
+    document.truncated = document.pages_parsed < document.page_count
+    if document.truncated:
+        print(f"PDF has {document.page_count} pages, reading the first {document.pages_parsed}")
+    
+    try:
+        page_texts = []
+        offset = 0
+        for page_text in _iter_pages(pdf_reader, max_pages):
+            document.text_chars += len(page_text) + (1 if document.text_chars else 0)
+            if on_text is not None:
+                on_text(page_text)
+            # Past the budget pages are still read for on_text but not kept
+            if max_text_chars is None or offset < max_text_chars:
+                if max_text_chars is not None:
+                    page_text = page_text[:max_text_chars - offset]
+                page_texts.append(page_text)
+                document.page_offsets.append(offset)
+                offset += len(page_text) + 1
+        document.text = ' '.join(page_texts)
+    except Exception as e:
+        print(f"Error extracting text from PDF: {e}")
+    timer.lap('text')
+    
+    try:
+        document.creation_date = _pdf_creation_date(pdf_reader)
+    except Exception as e:
+        print(f"Error extracting PDF date: {e}")
+    timer.lap('metadata')
+    return document
+
+def _parse_excel(file_content, filename, timer):
+    document = ParsedDocument('excel')
+    file_extension = filename.lower().split('.')[-1]
+    
+    if file_extension == 'xlsx':
+        try:
+            workbook = _open_xlsx(file_content)
+        except Exception as e:
+            print(f"Error opening Excel file: {e}")
+            return document
+        timer.lap('open')
+        
+        try:
+            document.page_count = document.pages_parsed = len(workbook.sheetnames)
+            document.text = _clean_excel_text(_xlsx_text(workbook))
+        except Exception as e:
+            print(f"Error extracting text from Excel file: {e}")
+        timer.lap('text')
+        
+        try:
+            document.creation_date = _xlsx_creation_date(workbook)
+        except Exception as e:
+            print(f"Error extracting Excel date: {e}")
+        timer.lap('metadata')
+        workbook.close()
+        
+    elif file_extension == 'xls':
+        try:
+            workbook = _open_xls(file_content)
+        except Exception as e:
+            print(f"Error opening Excel file: {e}")
+            return document
+        timer.lap('open')
+        
+        try:
+            document.page_count = document.pages_parsed = workbook.nsheets
+            document.text = _clean_excel_text(_xls_text(workbook))
+        except Exception as e:
+            print(f"Error extracting text from Excel file: {e}")
+        timer.lap('text')
+        # xlrd doesn't provide easy access to .xls metadata
+    
+    return document
+
+def parse_document(file_content, filename, max_pages=None, on_text=None, max_text_chars=None):
+    """
+    Parse a PDF or Excel document in a single pass.
+    
+    Args:
+        file_content: Raw file bytes (PDFs also accept a file path)
+        filename: Original filename, used to pick the parser
+        max_pages: PDF page cap (None uses PDF_MAX_PAGES, 0 reads every page)
+        on_text: Optional callable receiving each PDF page's text as it is
+            extracted (the whole text for Excel files), including text beyond
+            max_text_chars
+        max_text_chars: Keep at most this many characters of text in the
+            returned document (None keeps all of it)
+        
+    Returns:
+        ParsedDocument with text, page count, creation date and stage timings
+    """
+    timer = _Timer()
+    file_type = get_file_type(filename)
+    
+    if file_type == 'pdf':
+        document = _parse_pdf(file_content, timer, max_pages, on_text, max_text_chars)
+    elif file_type == 'excel':
+        document = _parse_excel(file_content, filename, timer)
+        document.text_chars = len(document.text)
+        if on_text is not None and document.text:
+            on_text(document.text)
+        if max_text_chars is not None:
+            document.text = document.text[:max_text_chars]
+    else:
+        document = ParsedDocument(file_type)
+    
+    document.timings = timer.finish()
+    return document
+
+def extract_text_from_pdf(file_content):
+    """Extract text content from a PDF file (from bytes or file path)."""
+    try:
+        # Existing callers get every page; only parse_document() applies PDF_MAX_PAGES
+        return _pdf_text(_open_pdf(file_content), max_pages=0)
+    except Exception as e:
+        print(f"Error extracting text from PDF: {e}")
+        return ""
+
+def get_pdf_creation_date(file_content):
+    """Extract creation date from PDF metadata (from bytes or file path)."""
+    try:
+        return _pdf_creation_date(_open_pdf(file_content))
+    except Exception as e:
+        print(f"Error extracting PDF date: {e}")
+        return None
+
+def extract_text_from_excel(file_content, filename):
+    """Extract text content from an Excel file (from bytes)."""
+    try:
+        # Determine file type by extension
+        file_extension = filename.lower().split('.')[-1]
+        
+        # Read Excel file based on extension
+        if file_extension == 'xlsx':
+            # Use openpyxl for .xlsx files
+            workbook = _open_xlsx(file_content)
+            text_content = _xlsx_text(workbook)
+            workbook.close()
+        elif file_extension == 'xls':
+            # Use xlrd for .xls files
+            text_content = _xls_text(_open_xls(file_content))
+        else:
+            return ""
+        
+        return _clean_excel_text(text_content)
+        
+    except Exception as e:
+        print(f"Error extracting text from Excel file: {e}")
+        return ""
+
+def get_excel_creation_date(file_content, filename):
+    """Extract creation date from Excel metadata (from bytes)."""
+    try:
+        file_extension = filename.lower().split('.')[-1]
+        
+        if file_extension == 'xlsx':
+            # Use openpyxl for .xlsx files
+            workbook = _open_xlsx(file_content, data_only=False)
+            creation_date = _xlsx_creation_date(workbook)
+            workbook.close()
+            return creation_date
+            
+        # For .xls files, xlrd doesn't provide easy access to metadata
+        return None
+        
+    except Exception as e:
+        print(f"Error extracting Excel date: {e}")
+        return None
+
+def get_file_type(filename):
+    """Determine file type based on extension."""
+    extension = filename.lower().split('.')[-1]
+    if extension == 'pdf':
+        return 'pdf'
+    elif extension in ['xlsx', 'xls']:
+        return 'excel'
+    else:
+        return 'unknown'
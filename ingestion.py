@@ -0,0 +1,365 @@
+"""
+Concurrent ingestion pipeline for multi-file uploads.
+
+CPU-bound work (PDF/Excel parsing and pattern matching) runs in a process pool,
+while blob uploads and AI calls run in a thread pool. AI extraction can instead
+run as one concurrent batch once every file is parsed (``extract_ai_many``).
+An optional ``ai_gate`` decides per document whether AI extraction is worth
+running at all.
+Pages are matched and scored for the gate as they are parsed, and only the
+text AI extraction can use (AI_MAX_TEXT_CHARS) is kept, so memory per file
+does not grow with the document.
+Each file is processed independently so a failing document does not affect the
+others, and callers merge the returned results into shared state in one
+synchronized step.
+
+Configuration (environment variables):
+- INGEST_PROCESS_WORKERS: worker processes for parsing (0 parses in the I/O threads)
+- INGEST_IO_WORKERS: threads for storage and AI calls
+- INGEST_START_METHOD: multiprocessing start method (default forkserver, or spawn where
+  forkserver is unavailable; fork is unsafe in the multithreaded web process)
+"""
+
+import atexit
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ai_gating import TextSignals
+from ai_skills import AI_MAX_TEXT_CHARS
+from document_parsing import parse_document
+from skills import alias_skill_matcher
+
+logger = logging.getLogger(__name__)
+
+# Forking the multithreaded Flask process can copy a lock held by another thread
+# into the worker, which then deadlocks; forkserver and spawn start clean workers
+DEFAULT_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+AIResult = Tuple[List[str], Dict[str, Any]]
+AIGate = Callable[..., Dict[str, Any]]
+
+# Pipeline stages reported through the on_progress callback
+STAGE_PARSED = 'parsed'
+STAGE_PATTERN_EXTRACTED = 'pattern_extracted'
+STAGE_AI_EXTRACTED = 'ai_extracted'
+
+
+@dataclass
+class ParseResult:
+    """Output of the CPU-bound parse and match stage."""
+    file_type: str
+    text: str
+    file_date: Optional[str]
+    skills: List[str]
+    page_offsets: List[int] = field(default_factory=list)
+    # Text-quality counts of the whole document; text may only hold its start
+    signals: Optional[TextSignals] = None
+
+
+@dataclass
+class IngestionResult:
+    """Per-file result of the ingestion pipeline."""
+    filename: str
+    file_type: str = 'unknown'
+    text: str = ''
+    file_date: Optional[str] = None
+    upload_date: str = ''
+    skills: List[str] = field(default_factory=list)
+    ai_skills: List[str] = field(default_factory=list)
+    ai_metadata: Dict[str, Any] = field(default_factory=dict)
+    # Offsets in text where PDF pages start, used to chunk text for AI extraction
+    page_offsets: List[int] = field(default_factory=list)
+    text_signals: Optional[TextSignals] = None
+    is_blob: bool = False
+    error: Optional[str] = None
+
+
+def document_hash(file_content: bytes) -> str:
+    """Return the SHA-256 hex digest identifying a document's content."""
+    return hashlib.sha256(file_content).hexdigest()
+
+
+def guess_document_type(filename: str) -> str:
+    """Guess the document type used for AI prompts from the filename."""
+    return "resume" if any(term in filename.lower() for term in ["cv", "resume"]) else "job_description"
+
+
+def parse_and_match(filename: str, file_content: bytes, max_text_chars: Optional[int] = AI_MAX_TEXT_CHARS) -> ParseResult:
+    """Extract text and metadata from a document and run pattern matching.
+
+    Only the first ``max_text_chars`` characters of text are kept (None keeps
+    all of it); skills and gate signals cover the whole document.
+
+    This is a module-level function so it can run in a worker process.
+    """
+    # Match and score each page as it is extracted instead of rescanning the joined text
+    skill_stream = alias_skill_matcher.stream()
+    signals = TextSignals()
+
+    def on_text(text):
+        skill_stream.feed(text)
+        signals.feed(text)
+
+    document = parse_document(file_content, filename, on_text=on_text, max_text_chars=max_text_chars)
+    logger.debug(f"Parsed {filename} ({document.pages_parsed}/{document.page_count} pages, "
+                 f"kept {len(document.text)}/{document.text_chars} characters) "
+                 f"in {document.timings.get('total', 0):.1f} ms")
+
+    skills = list(skill_stream.finish()) if document.text else []
+    return ParseResult(document.file_type, document.text, document.creation_date, skills, document.page_offsets,
+                       signals)
+
+
+def _progress_reporter(on_progress: Optional[Callable[[int, str], None]], index: int) -> Callable[[str], None]:
+    """Bind a file index to the progress callback; callback errors never fail the file."""
+    def report(stage: str) -> None:
+        if on_progress is None:
+            return
+        try:
+            on_progress(index, stage)
+        except Exception as e:
+            logger.warning(f"Progress callback failed for file {index} at stage {stage}: {e}")
+    return report
+
+
+class IngestionPool:
+    """Process pool for parsing plus thread pool for storage and AI I/O."""
+
+    def __init__(self, process_workers: Optional[int] = None, io_workers: Optional[int] = None,
+                 start_method: Optional[str] = None):
+        if process_workers is None:
+            process_workers = int(os.environ.get('INGEST_PROCESS_WORKERS', min(4, os.cpu_count() or 1)))
+        if io_workers is None:
+            io_workers = int(os.environ.get('INGEST_IO_WORKERS', 8))
+
+        self.process_workers = max(0, process_workers)
+        self.io_workers = max(1, io_workers)
+        self.start_method = start_method or os.environ.get('INGEST_START_METHOD') or DEFAULT_START_METHOD
+
+        self._lock = threading.Lock()
+        self._process_pool = None
+        self._thread_pool = None
+
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=self.io_workers, thread_name_prefix='ingest-io'
+                )
+            return self._thread_pool
+
+    def _get_process_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.process_workers == 0:
+            return None
+        with self._lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.process_workers,
+                    mp_context=multiprocessing.get_context(self.start_method)
+                )
+            return self._process_pool
+
+    def _reset_process_pool(self) -> None:
+        with self._lock:
+            pool, self._process_pool = self._process_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit_parse(self, filename: str, file_content: bytes):
+        """Start parsing in the process pool, or return None to parse inline."""
+        pool = self._get_process_pool()
+        if pool is None:
+            return None
+        try:
+            return pool.submit(parse_and_match, filename, file_content)
+        except (BrokenProcessPool, RuntimeError) as e:
+            logger.warning(f"Process pool unavailable, parsing {filename} in-thread: {e}")
+            self._reset_process_pool()
+            return None
+
+    def _parse_result(self, future, filename: str, file_content: bytes) -> ParseResult:
+        if future is None:
+            return parse_and_match(filename, file_content)
+        try:
+            return future.result()
+        except BrokenProcessPool as e:
+            logger.warning(f"Parser process died, parsing {filename} in-thread: {e}")
+            self._reset_process_pool()
+            return parse_and_match(filename, file_content)
+
+    def _process_file(self, filename: str, file_content: bytes,
+                      store_file: Callable[[bytes, str], bool],
+                      extract_ai: Optional[Callable[[str, str], AIResult]],
+                      report: Callable[[str], None],
+                      ai_gate: Optional[AIGate] = None) -> IngestionResult:
+        """Run the full pipeline for one file, capturing any error in the result."""
+        result = IngestionResult(filename=filename)
+        try:
+            # Parse in a worker process while this thread stores the file
+            parse_future = self._submit_parse(filename, file_content)
+            result.is_blob = store_file(file_content, filename)
+            result.upload_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+            parsed = self._parse_result(parse_future, filename, file_content)
+            result.file_type = parsed.file_type
+            result.text = parsed.text
+            result.file_date = parsed.file_date
+            result.skills = parsed.skills
+            result.page_offsets = parsed.page_offsets
+            result.text_signals = parsed.signals
+
+            if parsed.file_type not in ('pdf', 'excel'):
+                result.error = 'Unsupported file type'
+                return result
+
+            if not parsed.text:
+                result.error = f'Could not extract text from {parsed.file_type.upper()} file'
+                return result
+
+            report(STAGE_PARSED)
+            report(STAGE_PATTERN_EXTRACTED)
+
+            if extract_ai is not None and not _gate_allows_ai(result, ai_gate):
+                report(STAGE_AI_EXTRACTED)
+            elif extract_ai is not None:
+                try:
+                    result.ai_skills, ai_metadata = extract_ai(parsed.text, filename)
+                    result.ai_metadata = _with_gate(ai_metadata, result.ai_metadata)
+                except Exception as e:
+                    logger.error(f"AI extraction failed for {filename}: {e}")
+                    result.ai_metadata = _with_gate({'error': str(e)}, result.ai_metadata)
+                report(STAGE_AI_EXTRACTED)
+
+        except Exception as e:
+            result.error = f'Error processing file: {str(e)}'
+
+        return result
+
+    def process_files(self, uploads: List[Tuple[str, bytes]],
+                      store_file: Callable[[bytes, str], bool],
+                      extract_ai: Optional[Callable[[str, str], AIResult]] = None,
+                      on_progress: Optional[Callable[[int, str], None]] = None,
+                      extract_ai_many: Optional[Callable[..., List[AIResult]]] = None,
+                      ai_gate: Optional[AIGate] = None) -> List[IngestionResult]:
+        """
+        Process uploaded files concurrently.
+
+        Args:
+            uploads: List of (filename, file_content) tuples
+            store_file: Callable persisting the content, returning True for blob storage
+            extract_ai: Optional callable (text, filename) -> (ai_skills, ai_metadata)
+            on_progress: Optional callable (index, stage) called from worker threads
+                as each file completes a pipeline stage
+            extract_ai_many: Optional callable (documents, on_result) taking a list
+                of (text, filename, page_offsets) tuples and returning (ai_skills, ai_metadata)
+                in the same order, calling on_result(index, result) as each
+                finishes. Used instead of ``extract_ai`` to batch AI calls.
+            ai_gate: Optional callable (text, pattern_skills, signals=...) returning a decision
+                dict; documents whose decision has a false ``route_to_ai`` skip
+                AI extraction. The decision is kept in ai_metadata['gate'].
+
+        Returns:
+            List of IngestionResult in the same order as ``uploads``
+        """
+        if not uploads:
+            return []
+        pool = self._get_thread_pool()
+        per_file_ai = None if extract_ai_many is not None else extract_ai
+        futures = [
+            pool.submit(self._process_file, filename, file_content, store_file, per_file_ai,
+                        _progress_reporter(on_progress, index), ai_gate)
+            for index, (filename, file_content) in enumerate(uploads)
+        ]
+        results = [future.result() for future in futures]
+        if extract_ai_many is not None:
+            self._extract_ai_batch(results, extract_ai_many, on_progress, ai_gate)
+        return results
+
+    def _extract_ai_batch(self, results: List[IngestionResult],
+                          extract_ai_many: Callable[..., List[AIResult]],
+                          on_progress: Optional[Callable[[int, str], None]],
+                          ai_gate: Optional[AIGate] = None) -> None:
+        """Run AI extraction for every successfully parsed file the gate allows in one batch."""
+        indexes = []
+        for index, result in enumerate(results):
+            if result.error:
+                continue
+            if _gate_allows_ai(result, ai_gate):
+                indexes.append(index)
+            else:
+                _progress_reporter(on_progress, index)(STAGE_AI_EXTRACTED)
+        if not indexes:
+            return
+
+        def on_result(batch_index, ai_result):
+            _progress_reporter(on_progress, indexes[batch_index])(STAGE_AI_EXTRACTED)
+
+        documents = [(results[index].text, results[index].filename, results[index].page_offsets)
+                     for index in indexes]
+        try:
+            ai_results = extract_ai_many(documents, on_result)
+        except Exception as e:
+            logger.error(f"AI extraction failed for {len(indexes)} file(s): {e}")
+            for index in indexes:
+                results[index].ai_metadata = _with_gate({'error': str(e)}, results[index].ai_metadata)
+                _progress_reporter(on_progress, index)(STAGE_AI_EXTRACTED)
+            return
+
+        for index, (ai_skills, ai_metadata) in zip(indexes, ai_results):
+            results[index].ai_skills = ai_skills
+            results[index].ai_metadata = _with_gate(ai_metadata, results[index].ai_metadata)
+
+    def shutdown(self) -> None:
+        """Shut down both executors."""
+        with self._lock:
+            process_pool, self._process_pool = self._process_pool, None
+            thread_pool, self._thread_pool = self._thread_pool, None
+        if process_pool is not None:
+            process_pool.shutdown(wait=False, cancel_futures=True)
+        if thread_pool is not None:
+            thread_pool.shutdown(wait=False)
+
+
+def _gate_allows_ai(result: IngestionResult, ai_gate: Optional[AIGate]) -> bool:
+    """Apply ``ai_gate`` to a parsed result, recording the decision in its ai_metadata."""
+    if ai_gate is None:
+        return True
+    try:
+        decision = ai_gate(result.text, result.skills, signals=result.text_signals)
+    except Exception as e:
+        logger.warning(f"AI gate failed for {result.filename}, sending it to AI: {e}")
+        return True
+    if decision.get('route_to_ai', True):
+        result.ai_metadata = {'gate': decision}
+        return True
+    result.ai_metadata = {'extraction_method': 'pattern', 'ai_skipped': True, 'gate': decision}
+    return False
+
+
+def _with_gate(ai_metadata: Dict[str, Any], gated_metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Carry the gate decision recorded before AI extraction over to its metadata."""
+    if 'gate' not in gated_metadata:
+        return ai_metadata
+    return {**ai_metadata, 'gate': gated_metadata['gate']}
+
+
+# Global ingestion pool instance
+_ingestion_pool = None
+_ingestion_pool_lock = threading.Lock()
+
+def get_ingestion_pool() -> IngestionPool:
+    """Get the global ingestion pool, creating it on first use."""
+    global _ingestion_pool
+    with _ingestion_pool_lock:
+        if _ingestion_pool is None:
+            _ingestion_pool = IngestionPool()
+            atexit.register(_ingestion_pool.shutdown)
+        return _ingestion_pool
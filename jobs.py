@@ -0,0 +1,418 @@
+"""
+Background ingestion jobs for asynchronous uploads.
+
+Uploads submitted with ``/upload?async=1`` are queued here and processed by
+in-process worker threads, so the request returns immediately with a job id.
+Each job tracks per-file progress through the ingestion stages and keeps the
+final upload summary for the status endpoint.
+
+When JOBS_DB_PATH is set, jobs and their file contents are also written to a
+local SQLite database, and unfinished jobs are re-queued after a restart.
+Several processes may share the database: each job is owned by the manager
+that submitted or claimed it, which renews a lease on it while it is
+unfinished. Only jobs whose lease has lapsed (their process is gone) are
+re-queued, and a conditional UPDATE makes sure exactly one process claims
+each of them.
+
+Configuration (environment variables):
+- JOBS_WORKERS: worker threads running jobs (default 2)
+- JOBS_DB_PATH: SQLite file for the durable queue (unset keeps jobs in memory)
+- JOBS_MAX_RETAINED: finished jobs kept for status queries (default 200)
+- JOBS_LEASE_SECONDS: seconds without renewal after which another process
+  may claim a job (default 60)
+"""
+
+import copy
+import json
+import logging
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Job statuses
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+# File stages besides the ingestion pipeline stages
+FILE_QUEUED = 'queued'
+FILE_PERSISTED = 'persisted'
+FILE_DUPLICATE = 'duplicate'
+FILE_FAILED = 'failed'
+
+# An upload entry is either (filename, file_content) or a rejected file
+# {'filename': ..., 'error': ...}, matching what the upload route collects
+UploadEntry = Union[Tuple[str, bytes], Dict[str, str]]
+ProgressCallback = Callable[..., None]
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class JobStore:
+    """SQLite persistence for queued jobs and their uploaded files."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+                "created_at TEXT NOT NULL, state TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_files ("
+                "job_id TEXT NOT NULL, position INTEGER NOT NULL, "
+                "filename TEXT NOT NULL, content BLOB NOT NULL, "
+                "PRIMARY KEY (job_id, position))"
+            )
+            # Databases created before jobs had owners lack the lease columns
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if 'owner' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            if 'heartbeat' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat REAL")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def add_job(self, state: Dict[str, Any], entries: List[UploadEntry], owner: Optional[str] = None) -> None:
+        """Persist a new job owned by ``owner`` together with the content of its accepted files."""
+        files = [
+            (state['job_id'], position, entry[0], entry[1])
+            for position, entry in enumerate(entries)
+            if isinstance(entry, tuple)
+        ]
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, status, created_at, state, owner, heartbeat) VALUES (?, ?, ?, ?, ?, ?)",
+                (state['job_id'], state['status'], state['created_at'], json.dumps(state), owner, time.time())
+            )
+            conn.executemany(
+                "INSERT INTO job_files (job_id, position, filename, content) VALUES (?, ?, ?, ?)",
+                files
+            )
+
+    def update_job(self, state: Dict[str, Any]) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, state = ? WHERE job_id = ?",
+                (state['status'], json.dumps(state), state['job_id'])
+            )
+
+    def finish_job(self, state: Dict[str, Any]) -> None:
+        """Store the final state and drop the uploaded file contents."""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, state = ? WHERE job_id = ?",
+                (state['status'], json.dumps(state), state['job_id'])
+            )
+            conn.execute("DELETE FROM job_files WHERE job_id = ?", (state['job_id'],))
+
+    def delete_job(self, job_id: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM job_files WHERE job_id = ?", (job_id,))
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT state FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load_entries(self, state: Dict[str, Any]) -> List[UploadEntry]:
+        """Rebuild the upload entries of a job from its state and stored files."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT position, filename, content FROM job_files WHERE job_id = ?",
+                (state['job_id'],)
+            ).fetchall()
+        contents = {position: (filename, bytes(content)) for position, filename, content in rows}
+        entries = []
+        for position, file_state in enumerate(state['files']):
+            if position in contents:
+                entries.append(contents[position])
+            else:
+                entries.append({
+                    'filename': file_state['filename'],
+                    'error': file_state.get('error') or 'File content was not persisted'
+                })
+        return entries
+
+    def unfinished_jobs(self) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT state FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (JOB_QUEUED, JOB_RUNNING)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def claim_job(self, job_id: str, owner: str, stale_before: float) -> bool:
+        """Take over an unfinished job whose lease was last renewed before ``stale_before``.
+        
+        The check and the takeover are one UPDATE, so of several processes
+        claiming the same job only one succeeds.
+        """
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET owner = ?, heartbeat = ? WHERE job_id = ? AND status IN (?, ?) "
+                "AND (owner IS NULL OR heartbeat IS NULL OR heartbeat < ?)",
+                (owner, time.time(), job_id, JOB_QUEUED, JOB_RUNNING, stale_before)
+            )
+            return cursor.rowcount == 1
+
+    def renew_leases(self, owner: str) -> None:
+        """Renew the lease on every unfinished job of ``owner``."""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status IN (?, ?)",
+                (time.time(), owner, JOB_QUEUED, JOB_RUNNING)
+            )
+
+    def finished_job_ids(self) -> List[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job_id FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (JOB_COMPLETED, JOB_FAILED)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+class JobManager:
+    """In-process job queue with worker threads and optional SQLite durability."""
+
+    def __init__(self, handler: Callable[[List[UploadEntry], ProgressCallback], Dict[str, Any]],
+                 workers: Optional[int] = None, db_path: Optional[str] = None,
+                 max_retained: Optional[int] = None, lease_seconds: Optional[float] = None):
+        """
+        Args:
+            handler: Callable (entries, on_progress, **options) -> summary dict.
+                It calls on_progress(position, stage, error=None) as files advance.
+            workers: Number of worker threads
+            db_path: SQLite file for the durable queue, or None for memory only
+            max_retained: Finished jobs kept for status queries
+            lease_seconds: Seconds without renewal after which another
+                process may claim an unfinished job
+        """
+        if workers is None:
+            workers = int(os.environ.get('JOBS_WORKERS', 2))
+        if db_path is None:
+            db_path = os.environ.get('JOBS_DB_PATH') or None
+        if max_retained is None:
+            max_retained = int(os.environ.get('JOBS_MAX_RETAINED', 200))
+        if lease_seconds is None:
+            lease_seconds = float(os.environ.get('JOBS_LEASE_SECONDS', 60))
+
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_retained = max(1, max_retained)
+        self.store = JobStore(db_path) if db_path else None
+        self.lease_seconds = max(1.0, lease_seconds)
+        # Identifies this manager as the owner of its jobs in the shared database
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._entries: Dict[str, List[UploadEntry]] = {}
+        self._finished = deque()
+        self._queue = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lease_thread: Optional[threading.Thread] = None
+
+        if self.store:
+            self._finished.extend(self.store.finished_job_ids())
+
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f'ingest-job-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _ensure_lease_thread(self) -> None:
+        with self._lock:
+            if self._lease_thread is not None or not self.store:
+                return
+            self._lease_thread = threading.Thread(target=self._keep_leases, name='ingest-job-lease', daemon=True)
+            self._lease_thread.start()
+
+    def _keep_leases(self) -> None:
+        """Renew this manager's leases and pick up jobs left by stopped processes."""
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            try:
+                self.store.renew_leases(self.owner)
+                self.recover()
+            except Exception as e:
+                logger.warning(f"Could not renew ingestion job leases: {e}")
+
+    def submit(self, entries: List[UploadEntry], options: Optional[Dict[str, Any]] = None) -> str:
+        """Queue an upload for background processing and return its job id.
+
+        ``options`` are passed to the handler as keyword arguments.
+        """
+        job_id = uuid.uuid4().hex
+        files = []
+        for entry in entries:
+            if isinstance(entry, tuple):
+                files.append({'filename': entry[0], 'stage': FILE_QUEUED, 'error': None})
+            else:
+                files.append({'filename': entry['filename'], 'stage': FILE_FAILED, 'error': entry['error']})
+
+        state = {
+            'job_id': job_id,
+            'status': JOB_QUEUED,
+            'created_at': _now(),
+            'started_at': None,
+            'finished_at': None,
+            'files': files,
+            'options': dict(options or {}),
+            'result': None,
+            'error': None
+        }
+
+        if self.store:
+            self.store.add_job(state, entries, owner=self.owner)
+            self._ensure_lease_thread()
+        with self._lock:
+            self._jobs[job_id] = state
+            self._entries[job_id] = entries
+
+        self._ensure_workers()
+        self._queue.put(job_id)
+        return job_id
+
+    def recover(self) -> int:
+        """Claim and re-queue unfinished jobs whose owner is gone. Returns the count.
+
+        Jobs of a live manager, in this process or another one sharing the
+        database, keep a fresh lease and are left alone. After this call the
+        lease thread repeats the recovery, so jobs of a process that stopped
+        only recently are picked up once their lease lapses.
+        """
+        if not self.store:
+            return 0
+        self._ensure_lease_thread()
+
+        recovered = 0
+        stale_before = time.time() - self.lease_seconds
+        for state in self.store.unfinished_jobs():
+            job_id = state['job_id']
+            with self._lock:
+                if job_id in self._jobs:
+                    continue
+            if not self.store.claim_job(job_id, self.owner, stale_before):
+                continue
+            entries = self.store.load_entries(state)
+            state['status'] = JOB_QUEUED
+            state['started_at'] = None
+            for file_state, entry in zip(state['files'], entries):
+                if isinstance(entry, tuple):
+                    file_state['stage'] = FILE_QUEUED
+                    file_state['error'] = None
+            self.store.update_job(state)
+            with self._lock:
+                self._jobs[job_id] = state
+                self._entries[job_id] = entries
+            self._queue.put(job_id)
+            recovered += 1
+
+        if recovered:
+            print(f"Recovered {recovered} unfinished ingestion job(s)")
+            self._ensure_workers()
+        return recovered
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a snapshot of a job's state, or None if it is unknown."""
+        with self._lock:
+            state = self._jobs.get(job_id)
+            if state is not None:
+                return copy.deepcopy(state)
+        if self.store:
+            return self.store.get_job(job_id)
+        return None
+
+    def _update_file(self, job_id: str, position: int, stage: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            state = self._jobs[job_id]
+            file_state = state['files'][position]
+            file_state['stage'] = stage
+            if error is not None:
+                file_state['error'] = error
+            snapshot = copy.deepcopy(state) if self.store else None
+        if snapshot:
+            self.store.update_job(snapshot)
+
+    def _set_status(self, job_id: str, **changes) -> Dict[str, Any]:
+        with self._lock:
+            state = self._jobs[job_id]
+            state.update(changes)
+            return copy.deepcopy(state)
+
+    def _worker(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run_job(job_id)
+            except Exception as e:
+                logger.error(f"Ingestion job {job_id} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _run_job(self, job_id: str) -> None:
+        with self._lock:
+            entries = self._entries.get(job_id)
+        if entries is None:
+            return
+
+        snapshot = self._set_status(job_id, status=JOB_RUNNING, started_at=_now())
+        if self.store:
+            self.store.update_job(snapshot)
+        options = snapshot.get('options') or {}
+
+        def on_progress(position, stage, error=None):
+            self._update_file(job_id, position, stage, error)
+
+        try:
+            result = self.handler(entries, on_progress, **options)
+            snapshot = self._set_status(job_id, status=JOB_COMPLETED, finished_at=_now(), result=result)
+        except Exception as e:
+            print(f"Ingestion job {job_id} failed: {e}")
+            snapshot = self._set_status(job_id, status=JOB_FAILED, finished_at=_now(), error=str(e))
+
+        if self.store:
+            self.store.finish_job(snapshot)
+        self._retire(job_id)
+
+    def _retire(self, job_id: str) -> None:
+        """Release a finished job's files and evict the oldest finished jobs."""
+        evicted = []
+        with self._lock:
+            self._entries.pop(job_id, None)
+            self._finished.append(job_id)
+            while len(self._finished) > self.max_retained:
+                old_job_id = self._finished.popleft()
+                self._jobs.pop(old_job_id, None)
+                evicted.append(old_job_id)
+        if self.store:
+            for old_job_id in evicted:
+                self.store.delete_job(old_job_id)
+
+    def wait(self) -> None:
+        """Block until every queued job has finished."""
+        self._queue.join()
@@ -1,35 +1,110 @@
 """
 Azure Key Vault integration module for GET-SKILLS application.
 Securely retrieves configuration values from Azure Key Vault.
+
+The Key Vault client and the application configuration are created on first
+use and shared process-wide, so importing modules that depend on them does no
+network I/O. The Azure SDK itself is imported when the client is created.
+
+Secrets are fetched concurrently and cached for a TTL. A cached secret close
+to expiry is refreshed in the background while the cached value is still
+served. The cache can also be written to an encrypted local snapshot, which
+serves secrets right away on a warm restart.
+
+Once a consumer registers with add_config_listener(), a background thread
+re-reads the application configuration through the secret cache every
+KEYVAULT_CONFIG_REFRESH_SECONDS. When a value changed, the listeners (the AI
+extractor and the shared blob clients) rebuild their clients, so rotated keys
+are picked up without a restart, at the latest a TTL plus one check later.
+
+Configuration (environment variables):
+- AZURE_KEY_VAULT_URL: Key Vault URL
+- KEYVAULT_SECRET_TTL_SECONDS: how long a fetched secret is used (default 3600)
+- KEYVAULT_REFRESH_AHEAD_SECONDS: refresh secrets in the background this long before they expire (default 300)
+- KEYVAULT_MAX_WORKERS: concurrent secret fetches (default 8)
+- KEYVAULT_CONFIG_REFRESH_SECONDS: how often the application configuration is re-read for listeners (default 300, 0 disables)
+- KEYVAULT_SNAPSHOT_PATH: encrypted snapshot file of the secret cache (unset disables)
+- KEYVAULT_SNAPSHOT_KEY: Fernet key used to encrypt the snapshot
 """
 
 import os
+import json
 import logging
-from typing import Optional, Dict, Any
-from azure.keyvault.secrets import SecretClient
-from azure.identity import DefaultAzureCredential, ChainedTokenCredential, AzureCliCredential, ManagedIdentityCredential
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional, Dict, Any, Callable, List, Tuple
+
+if TYPE_CHECKING:
+    from azure.keyvault.secrets import SecretClient
+
+# The snapshot is only written when it can be encrypted
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+    SNAPSHOT_ENCRYPTION_AVAILABLE = True
+except ImportError:
+    Fernet = None
+    InvalidToken = None
+    SNAPSHOT_ENCRYPTION_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+KEYVAULT_SECRET_TTL_SECONDS = float(os.environ.get('KEYVAULT_SECRET_TTL_SECONDS', 3600))
+KEYVAULT_REFRESH_AHEAD_SECONDS = float(os.environ.get('KEYVAULT_REFRESH_AHEAD_SECONDS', 300))
+KEYVAULT_MAX_WORKERS = int(os.environ.get('KEYVAULT_MAX_WORKERS', 8))
+KEYVAULT_CONFIG_REFRESH_SECONDS = float(os.environ.get('KEYVAULT_CONFIG_REFRESH_SECONDS', 300))
+KEYVAULT_SNAPSHOT_PATH = os.environ.get('KEYVAULT_SNAPSHOT_PATH')
+KEYVAULT_SNAPSHOT_KEY = os.environ.get('KEYVAULT_SNAPSHOT_KEY')
+
+# Token scope for Key Vault data-plane access
+KEY_VAULT_SCOPE = 'https://vault.azure.net/.default'
+
 class KeyVaultManager:
     """Manages secure access to Azure Key Vault secrets."""
     
-    def __init__(self, vault_url: Optional[str] = None):
+    def __init__(self, vault_url: Optional[str] = None, ttl_seconds: Optional[float] = None,
+                 refresh_ahead_seconds: Optional[float] = None, max_workers: Optional[int] = None,
+                 snapshot_path: Optional[str] = None, snapshot_key: Optional[str] = None,
+                 client: Optional['SecretClient'] = None):
         """
         Initialize Key Vault client.
         
         Args:
             vault_url: Azure Key Vault URL. If not provided, uses environment variable.
+            ttl_seconds: Secret cache lifetime (default KEYVAULT_SECRET_TTL_SECONDS)
+            refresh_ahead_seconds: Background refresh window before expiry
+                (default KEYVAULT_REFRESH_AHEAD_SECONDS)
+            max_workers: Concurrent secret fetches (default KEYVAULT_MAX_WORKERS)
+            snapshot_path: Encrypted snapshot file (default KEYVAULT_SNAPSHOT_PATH)
+            snapshot_key: Fernet key for the snapshot (default KEYVAULT_SNAPSHOT_KEY)
+            client: Ready SecretClient to use instead of creating one
         """
         self.vault_url = vault_url or os.environ.get('AZURE_KEY_VAULT_URL', 'https://kv-tedu5upjp2nl6.vault.azure.net/')
         self.client = None
-        self._secrets_cache = {}
+        self.ttl_seconds = KEYVAULT_SECRET_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.refresh_ahead_seconds = KEYVAULT_REFRESH_AHEAD_SECONDS if refresh_ahead_seconds is None else refresh_ahead_seconds
+        self.max_workers = max(1, max_workers or KEYVAULT_MAX_WORKERS)
+        # secret name -> (value, fetched_at epoch seconds)
+        self._secrets_cache: Dict[str, Tuple[str, float]] = {}
+        self._cache_lock = threading.Lock()
+        self._refreshing = set()
+        self._executor = None
+        self._snapshot_path = snapshot_path or KEYVAULT_SNAPSHOT_PATH
+        self._snapshot_cipher = self._create_snapshot_cipher(snapshot_key or KEYVAULT_SNAPSHOT_KEY)
         
-        self._initialize_client()
+        self._load_snapshot()
+        if client is not None:
+            self.client = client
+        else:
+            self._initialize_client()
     
     def _initialize_client(self) -> None:
         """Initialize the Key Vault client with appropriate credentials."""
         try:
+            from azure.keyvault.secrets import SecretClient
+            from azure.identity import ChainedTokenCredential, AzureCliCredential, ManagedIdentityCredential
+            
             # Create a credential chain for different authentication methods
             credential_chain = ChainedTokenCredential(
                 ManagedIdentityCredential(),  # For Azure App Service
@@ -42,73 +117,191 @@ class KeyVaultManager:
             )
             
             # Test the connection
-            self._test_connection()
+            self._test_connection(credential_chain)
             logger.info(f"Successfully connected to Key Vault: {self.vault_url}")
-            
+        
         except Exception as e:
             logger.error(f"Failed to initialize Key Vault client: {e}")
             self.client = None
     
-    def _test_connection(self) -> None:
-        """Test Key Vault connection by listing secrets."""
-        if self.client:
-            try:
-                # Just list secrets to test connection (doesn't fetch values)
-                list(self.client.list_properties_of_secrets())
-            except Exception as e:
-                logger.warning(f"Key Vault connection test failed: {e}")
-                raise
+    def _test_connection(self, credential) -> None:
+        """Test Key Vault access by acquiring a token; the SecretClient reuses it for the first fetch."""
+        try:
+            credential.get_token(KEY_VAULT_SCOPE)
+        except Exception as e:
+            logger.warning(f"Key Vault connection test failed: {e}")
+            raise
     
-    def get_secret(self, secret_name: str, use_cache: bool = True) -> Optional[str]:
-        """
-        Retrieve a secret from Key Vault.
-        
-        Args:
-            secret_name: Name of the secret to retrieve
-            use_cache: Whether to use cached values
-            
-        Returns:
-            Secret value or None if not found/error
-        """
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._cache_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='keyvault')
+            return self._executor
+    
+    def _lookup(self, secret_name: str) -> Tuple[bool, Optional[str]]:
+        """Return (hit, value) from the cache, scheduling a refresh when the entry is about to expire."""
+        with self._cache_lock:
+            entry = self._secrets_cache.get(secret_name)
+        if entry is None:
+            return False, None
+        value, fetched_at = entry
+        age = time.time() - fetched_at
+        if age >= self.ttl_seconds:
+            return False, None
+        if age >= self.ttl_seconds - self.refresh_ahead_seconds:
+            self._schedule_refresh(secret_name)
+        logger.debug(f"Using cached value for secret: {secret_name}")
+        return True, value
+    
+    def _fetch(self, secret_name: str, use_cache: bool = True) -> Optional[str]:
+        """Fetch a secret from Key Vault, falling back to an expired cached value on errors."""
+        with self._cache_lock:
+            stale = self._secrets_cache.get(secret_name)
         if not self.client:
             logger.warning("Key Vault client not initialized")
             return None
         
-        # Check cache first
-        if use_cache and secret_name in self._secrets_cache:
-            logger.debug(f"Using cached value for secret: {secret_name}")
-            return self._secrets_cache[secret_name]
-        
         try:
             secret = self.client.get_secret(secret_name)
             value = secret.value
             
             # Cache the value
             if use_cache:
-                self._secrets_cache[secret_name] = value
+                with self._cache_lock:
+                    self._secrets_cache[secret_name] = (value, time.time())
             
             logger.debug(f"Successfully retrieved secret: {secret_name}")
             return value
-            
+        
         except Exception as e:
+            if stale is not None:
+                logger.warning(f"Failed to refresh secret '{secret_name}', using the cached value: {e}")
+                return stale[0]
             logger.error(f"Failed to retrieve secret '{secret_name}': {e}")
             return None
     
-    def get_multiple_secrets(self, secret_names: list, use_cache: bool = True) -> Dict[str, Optional[str]]:
+    def _schedule_refresh(self, secret_name: str) -> None:
+        """Refetch a secret in the background, at most once at a time per secret."""
+        with self._cache_lock:
+            if secret_name in self._refreshing:
+                return
+            self._refreshing.add(secret_name)
+        try:
+            self._get_executor().submit(self._refresh, secret_name)
+        except RuntimeError:
+            # Interpreter shutdown; the next lookup fetches synchronously
+            with self._cache_lock:
+                self._refreshing.discard(secret_name)
+    
+    def _refresh(self, secret_name: str) -> None:
+        try:
+            self._fetch(secret_name)
+            self._save_snapshot()
+        finally:
+            with self._cache_lock:
+                self._refreshing.discard(secret_name)
+    
+    def get_secret(self, secret_name: str, use_cache: bool = True) -> Optional[str]:
+        """
+        Retrieve a secret from Key Vault.
+        
+        Args:
+            secret_name: Name of the secret to retrieve
+            use_cache: Whether to use cached values
+        
+        Returns:
+            Secret value or None if not found/error
+        """
+        # Check cache first
+        if use_cache:
+            hit, value = self._lookup(secret_name)
+            if hit:
+                return value
+        
+        value = self._fetch(secret_name, use_cache)
+        if use_cache:
+            self._save_snapshot()
+        return value
+    
+    def get_multiple_secrets(self, secret_names: List[str], use_cache: bool = True) -> Dict[str, Optional[str]]:
         """
-        Retrieve multiple secrets from Key Vault.
+        Retrieve multiple secrets from Key Vault, fetching uncached ones concurrently.
         
         Args:
             secret_names: List of secret names to retrieve
             use_cache: Whether to use cached values
-            
+        
         Returns:
             Dictionary mapping secret names to their values
         """
         results = {}
-        for secret_name in secret_names:
-            results[secret_name] = self.get_secret(secret_name, use_cache)
-        return results
+        missing = []
+        for secret_name in dict.fromkeys(secret_names):
+            hit, value = self._lookup(secret_name) if use_cache else (False, None)
+            if hit:
+                results[secret_name] = value
+            else:
+                missing.append(secret_name)
+        
+        if len(missing) == 1:
+            results[missing[0]] = self._fetch(missing[0], use_cache)
+        elif missing:
+            values = self._get_executor().map(lambda name: self._fetch(name, use_cache), missing)
+            results.update(zip(missing, values))
+        
+        if missing and use_cache:
+            self._save_snapshot()
+        return {secret_name: results[secret_name] for secret_name in secret_names}
+    
+    def _create_snapshot_cipher(self, snapshot_key: Optional[str]):
+        if not self._snapshot_path:
+            return None
+        if not snapshot_key:
+            logger.warning("KEYVAULT_SNAPSHOT_PATH is set without KEYVAULT_SNAPSHOT_KEY; snapshot disabled")
+            return None
+        if not SNAPSHOT_ENCRYPTION_AVAILABLE:
+            logger.warning("cryptography is not installed; Key Vault snapshot disabled")
+            return None
+        try:
+            return Fernet(snapshot_key.encode('utf-8') if isinstance(snapshot_key, str) else snapshot_key)
+        except Exception as e:
+            logger.warning(f"Invalid Key Vault snapshot key; snapshot disabled: {e}")
+            return None
+    
+    def _load_snapshot(self) -> None:
+        """Seed the cache from the encrypted snapshot written by an earlier process."""
+        if self._snapshot_cipher is None or not os.path.exists(self._snapshot_path):
+            return
+        try:
+            with open(self._snapshot_path, 'rb') as f:
+                data = json.loads(self._snapshot_cipher.decrypt(f.read()))
+            if data.get('vault_url') != self.vault_url:
+                return
+            with self._cache_lock:
+                for secret_name, (value, fetched_at) in data.get('secrets', {}).items():
+                    self._secrets_cache[secret_name] = (value, float(fetched_at))
+            logger.info(f"Loaded {len(data.get('secrets', {}))} secrets from the Key Vault snapshot")
+        except InvalidToken:
+            logger.warning("Key Vault snapshot could not be decrypted; ignoring it")
+        except Exception as e:
+            logger.warning(f"Failed to load Key Vault snapshot: {e}")
+    
+    def _save_snapshot(self) -> None:
+        """Write the secret cache to the encrypted snapshot, replacing it atomically."""
+        if self._snapshot_cipher is None:
+            return
+        with self._cache_lock:
+            data = {'vault_url': self.vault_url, 'secrets': dict(self._secrets_cache)}
+        try:
+            token = self._snapshot_cipher.encrypt(json.dumps(data).encode('utf-8'))
+            temp_path = f"{self._snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(token)
+            os.replace(temp_path, self._snapshot_path)
+        except Exception as e:
+            logger.warning(f"Failed to write Key Vault snapshot: {e}")
     
     def is_available(self) -> bool:
         """Check if Key Vault is available and accessible."""
@@ -116,14 +309,61 @@ class KeyVaultManager:
 
 # Global Key Vault manager instance
 _kv_manager = None
+_kv_manager_lock = threading.Lock()
+
+# Application configuration, loaded once per process and re-read for the listeners
+_application_config = None
+_application_config_lock = threading.Lock()
+_config_listeners: List[Callable[[], Optional[Callable]]] = []
+_config_watcher = None
+
+# Called with (old config, new config) when a re-read finds a change
+ConfigListener = Callable[[Dict[str, Any], Dict[str, Any]], None]
+
+# Configuration key -> (Key Vault secret name, fallback environment variable)
+APPLICATION_SECRETS = {
+    # Azure OpenAI Configuration
+    'azure_openai_endpoint': ('azure-openai-endpoint', 'AZURE_OPENAI_ENDPOINT'),
+    'azure_openai_api_key': ('azure-openai-api-key', 'AZURE_OPENAI_API_KEY'),
+    'azure_openai_deployment_name': ('azure-openai-deployment-name', 'AZURE_OPENAI_DEPLOYMENT_NAME'),
+    
+    # Azure Storage Configuration (if needed)
+    'azure_storage_connection_string': ('azure-storage-connection-string', 'AZURE_STORAGE_CONNECTION_STRING'),
+    
+    # Application Insights (if needed)
+    'azure_application_insights_connection_string': ('azure-application-insights-connection-string', 'AZURE_APPLICATION_INSIGHTS_CONNECTION_STRING'),
+    
+    # OpenAI Fallback
+    'openai_api_key': ('openai-api-key', 'OPENAI_API_KEY'),
+}
 
 def get_key_vault_manager() -> KeyVaultManager:
-    """Get the global Key Vault manager instance."""
+    """Get the global Key Vault manager instance, creating it on first use."""
     global _kv_manager
     if _kv_manager is None:
-        _kv_manager = KeyVaultManager()
+        with _kv_manager_lock:
+            if _kv_manager is None:
+                _kv_manager = KeyVaultManager()
     return _kv_manager
 
+def _with_env_fallback(secret_name: str, value: Optional[str], fallback_env_var: Optional[str],
+                       warn_missing: bool = True) -> Optional[str]:
+    """Return the Key Vault value, or the fallback environment variable when it is missing."""
+    if value:
+        logger.debug(f"Retrieved {secret_name} from Key Vault")
+        return value
+    
+    # Fallback to environment variable
+    if fallback_env_var:
+        value = os.environ.get(fallback_env_var)
+        if value:
+            logger.debug(f"Retrieved {secret_name} from environment variable {fallback_env_var}")
+            return value
+    
+    if warn_missing:
+        logger.warning(f"Could not retrieve secret: {secret_name}")
+    return None
+
 def get_secret(secret_name: str, fallback_env_var: Optional[str] = None) -> Optional[str]:
     """
     Get a secret with fallback to environment variable.
@@ -131,51 +371,115 @@ def get_secret(secret_name: str, fallback_env_var: Optional[str] = None) -> Opti
     Args:
         secret_name: Name of the secret in Key Vault
         fallback_env_var: Environment variable name to use as fallback
-        
+    
     Returns:
         Secret value from Key Vault or environment variable
     """
     kv_manager = get_key_vault_manager()
     
     # Try Key Vault first
-    if kv_manager.is_available():
-        value = kv_manager.get_secret(secret_name)
-        if value:
-            logger.debug(f"Retrieved {secret_name} from Key Vault")
-            return value
+    value = kv_manager.get_secret(secret_name) if kv_manager.is_available() else None
+    return _with_env_fallback(secret_name, value, fallback_env_var)
+
+def get_secrets(secrets: Dict[str, Optional[str]], warn_missing: bool = True) -> Dict[str, Optional[str]]:
+    """
+    Get several secrets concurrently, each with fallback to its environment variable.
     
-    # Fallback to environment variable
-    if fallback_env_var:
-        value = os.environ.get(fallback_env_var)
-        if value:
-            logger.debug(f"Retrieved {secret_name} from environment variable {fallback_env_var}")
-            return value
+    Args:
+        secrets: Mapping of Key Vault secret name to fallback environment variable name
+        warn_missing: Log a warning for each secret found in neither
     
-    logger.warning(f"Could not retrieve secret: {secret_name}")
-    return None
+    Returns:
+        Dictionary mapping secret names to values from Key Vault or the environment
+    """
+    kv_manager = get_key_vault_manager()
+    values = kv_manager.get_multiple_secrets(list(secrets)) if kv_manager.is_available() else {}
+    return {
+        secret_name: _with_env_fallback(secret_name, values.get(secret_name), fallback_env_var, warn_missing)
+        for secret_name, fallback_env_var in secrets.items()
+    }
 
-def get_application_config() -> Dict[str, Any]:
+def get_application_config(refresh: bool = False) -> Dict[str, Any]:
     """
     Get all application configuration from Key Vault with environment fallbacks.
     
+    The configuration is loaded on the first call and shared by every caller
+    in the process; concurrent first calls wait for a single load. Clients
+    built from it register with add_config_listener() to follow changes.
+    
+    Args:
+        refresh: Re-read the configuration now and notify the listeners if it changed
+    
     Returns:
         Dictionary with all configuration values
     """
-    config = {
-        # Azure OpenAI Configuration
-        'azure_openai_endpoint': get_secret('azure-openai-endpoint', 'AZURE_OPENAI_ENDPOINT'),
-        'azure_openai_api_key': get_secret('azure-openai-api-key', 'AZURE_OPENAI_API_KEY'),
-        'azure_openai_deployment_name': get_secret('azure-openai-deployment-name', 'AZURE_OPENAI_DEPLOYMENT_NAME'),
-        
-        # Azure Storage Configuration (if needed)
-        'azure_storage_connection_string': get_secret('azure-storage-connection-string', 'AZURE_STORAGE_CONNECTION_STRING'),
-        
-        # Application Insights (if needed)
-        'azure_application_insights_connection_string': get_secret('azure-application-insights-connection-string', 'AZURE_APPLICATION_INSIGHTS_CONNECTION_STRING'),
-        
-        # OpenAI Fallback
-        'openai_api_key': get_secret('openai-api-key', 'OPENAI_API_KEY'),
-    }
+    global _application_config
+    if refresh:
+        refresh_application_config()
+    elif _application_config is None:
+        with _application_config_lock:
+            if _application_config is None:
+                _application_config = _load_application_config()
+    return dict(_application_config)
+
+def refresh_application_config() -> bool:
+    """
+    Re-read the configuration through the secret cache and notify the listeners of a change.
+    
+    Returns:
+        True if a value changed
+    """
+    global _application_config
+    with _application_config_lock:
+        old_config = _application_config
+        _application_config = _load_application_config(quiet=old_config is not None)
+        new_config = dict(_application_config)
+        listeners = [listener for listener in (ref() for ref in _config_listeners) if listener is not None]
+    if old_config is None or new_config == old_config:
+        return False
+    
+    changed = [key for key in new_config if new_config[key] != old_config.get(key)]
+    logger.info(f"Application configuration changed: {', '.join(changed)}")
+    for listener in listeners:
+        try:
+            listener(dict(old_config), dict(new_config))
+        except Exception as e:
+            logger.error(f"Configuration listener failed: {e}")
+    return True
+
+def add_config_listener(listener: ConfigListener) -> None:
+    """
+    Call listener(old_config, new_config) whenever a re-read of the configuration finds a change.
+    
+    Bound methods are held weakly, so registering does not keep their object
+    alive. The first listener starts the background re-read.
+    """
+    global _config_watcher
+    if hasattr(listener, '__self__'):
+        ref = weakref.WeakMethod(listener)
+    else:
+        ref = lambda: listener
+    with _application_config_lock:
+        _config_listeners[:] = [existing for existing in _config_listeners if existing() is not None]
+        _config_listeners.append(ref)
+        if _config_watcher is None and KEYVAULT_CONFIG_REFRESH_SECONDS > 0:
+            _config_watcher = threading.Thread(target=_watch_application_config, name='keyvault-config', daemon=True)
+            _config_watcher.start()
+
+def _watch_application_config() -> None:
+    while True:
+        time.sleep(KEYVAULT_CONFIG_REFRESH_SECONDS)
+        try:
+            refresh_application_config()
+        except Exception as e:
+            logger.warning(f"Failed to re-read the application configuration: {e}")
+
+def _load_application_config(quiet: bool = False) -> Dict[str, Any]:
+    """Read every configuration value from Key Vault or the environment; quiet skips the summary logging."""
+    values = get_secrets(dict(APPLICATION_SECRETS.values()), warn_missing=not quiet)
+    config = {key: values[secret_name] for key, (secret_name, _) in APPLICATION_SECRETS.items()}
+    if quiet:
+        return config
     
     # Log which configurations were found
     found_configs = [k for k, v in config.items() if v is not None]
@@ -186,4 +490,4 @@ def get_application_config() -> Dict[str, Any]:
     if missing_configs:
         logger.warning(f"Missing configuration for: {', '.join(missing_configs)}")
     
-    return config
\ No newline at end of file
+    return config
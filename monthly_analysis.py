@@ -13,12 +13,11 @@ from collections import Counter, defaultdict
 from typing import Dict, List, Any, Tuple
 import logging
 from dataclasses import dataclass, asdict
-from azure.storage.blob import BlobServiceClient
-from azure.identity import DefaultAzureCredential
 
 # Import existing modules
 from ai_skills import ai_extractor
 from skills import tech_skills
+from blob_storage import get_container_client
 
 logger = logging.getLogger(__name__)
 
@@ -76,40 +75,25 @@ class MonthlySkillsAnalyzer:
         self.reports_blob_prefix = 'monthly_analysis_'
         self.historical_index_blob = 'historical_reports_index.json'
     
-    def _get_blob_service_client(self):
-        """Get Azure Blob Service Client for monthly reports storage."""
-        try:
-            # Try to get connection string from environment or Key Vault
-            connection_string = os.environ.get('AZURE_STORAGE_CONNECTION_STRING')
-            if connection_string:
-                return BlobServiceClient.from_connection_string(connection_string)
-            else:
-                # Use Managed Identity
-                credential = DefaultAzureCredential()
-                account_url = f"https://{os.environ.get('AZURE_STORAGE_ACCOUNT_NAME')}.blob.core.windows.net"
-                return BlobServiceClient(account_url=account_url, credential=credential)
-        except Exception as e:
-            logger.error(f"Error initializing blob service client for monthly reports: {e}")
-            return None
+    def _get_reports_container(self):
+        """Get the shared container client for monthly reports, or None if storage is not available."""
+        return get_container_client(self.reports_container)
     
     def _ensure_reports_container(self):
-        """Ensure the monthly reports container exists."""
+        """Ensure the monthly reports container exists (checked once per process)."""
         try:
-            blob_service_client = self._get_blob_service_client()
-            if blob_service_client:
-                blob_service_client.create_container(self.reports_container)
+            if get_container_client(self.reports_container, create=True):
                 logger.info(f"Monthly reports container '{self.reports_container}' ready")
         except Exception as e:
-            if "ContainerAlreadyExists" not in str(e):
-                logger.error(f"Error creating monthly reports container: {e}")
+            logger.error(f"Error creating monthly reports container: {e}")
     
     def _save_report_to_blob(self, report: 'MonthlyAnalysisReport'):
         """Save monthly report to Azure Blob Storage."""
         try:
             self._ensure_reports_container()
-            blob_service_client = self._get_blob_service_client()
+            container_client = self._get_reports_container()
             
-            if not blob_service_client:
+            if not container_client:
                 logger.warning("Azure Blob Storage not available, falling back to local storage")
                 return self._save_monthly_report_local(report)
             
@@ -119,10 +103,7 @@ class MonthlySkillsAnalyzer:
             
             # Save individual report
             blob_name = f"{self.reports_blob_prefix}{report.analysis_month}.json"
-            blob_client = blob_service_client.get_blob_client(
-                container=self.reports_container, 
-                blob=blob_name
-            )
+            blob_client = container_client.get_blob_client(blob_name)
             blob_client.upload_blob(report_json, overwrite=True)
             
             # Update historical index
@@ -138,14 +119,11 @@ class MonthlySkillsAnalyzer:
     def _update_historical_index(self, report: 'MonthlyAnalysisReport'):
         """Update the historical reports index."""
         try:
-            blob_service_client = self._get_blob_service_client()
-            if not blob_service_client:
+            container_client = self._get_reports_container()
+            if not container_client:
                 return
             
-            blob_client = blob_service_client.get_blob_client(
-                container=self.reports_container,
-                blob=self.historical_index_blob
-            )
+            blob_client = container_client.get_blob_client(self.historical_index_blob)
             
             # Try to get existing index
             historical_index = {}
@@ -270,31 +248,30 @@ class MonthlySkillsAnalyzer:
         
         # Import here to avoid circular imports
         try:
-            from app import processed_documents
+            from app import stats_store
+            documents = stats_store.documents_for_month(target_month)
         except ImportError:
-            # Fallback if processed_documents not available
-            processed_documents = {}
-        
-        # Analyze processed documents from pattern matching
-        for filename, doc_data in processed_documents.items():
-            doc_date = doc_data.get('file_date', doc_data.get('upload_date', ''))
-            if doc_date.startswith(target_month):
-                month_data['total_documents'] += 1
-                month_data['documents'].append(doc_data)
-                
-                # Categorize document type
-                if self._is_resume(filename):
-                    month_data['resumes_count'] += 1
-                else:
-                    month_data['job_descriptions_count'] += 1
-                
-                # Add pattern matching skills
-                for skill in doc_data.get('skills_found', []):
-                    month_data['pattern_skills'][skill] += 1
-                
-                # Add AI skills
-                for skill in doc_data.get('ai_skills_found', []):
-                    month_data['ai_skills'][skill] += 1
+            # Fallback if the stats store is not available
+            documents = []
+        
+        # Analyze the month's processed documents (indexed by month in the stats store)
+        for filename, doc_data in documents:
+            month_data['total_documents'] += 1
+            month_data['documents'].append(doc_data)
+            
+            # Categorize document type
+            if self._is_resume(filename):
+                month_data['resumes_count'] += 1
+            else:
+                month_data['job_descriptions_count'] += 1
+            
+            # Add pattern matching skills
+            for skill in doc_data.get('skills_found', []):
+                month_data['pattern_skills'][skill] += 1
+            
+            # Add AI skills
+            for skill in doc_data.get('ai_skills_found') or []:
+                month_data['ai_skills'][skill] += 1
         
         # Get AI extraction statistics
         month_data['ai_stats'] = {
@@ -482,17 +459,14 @@ class MonthlySkillsAnalyzer:
     def get_latest_report(self) -> Dict[str, Any]:
         """Get the most recent monthly report from Azure Blob Storage."""
         try:
-            blob_service_client = self._get_blob_service_client()
+            container_client = self._get_reports_container()
             
-            if not blob_service_client:
+            if not container_client:
                 logger.warning("Azure Blob Storage not available, trying local storage")
                 return self._get_latest_report_local()
             
             # Get historical index to find the latest report
-            blob_client = blob_service_client.get_blob_client(
-                container=self.reports_container,
-                blob=self.historical_index_blob
-            )
+            blob_client = container_client.get_blob_client(self.historical_index_blob)
             
             try:
                 index_data = blob_client.download_blob().readall()
@@ -506,10 +480,7 @@ class MonthlySkillsAnalyzer:
                 latest_info = historical_index[latest_month]
                 
                 # Download the latest report
-                report_blob_client = blob_service_client.get_blob_client(
-                    container=self.reports_container,
-                    blob=latest_info['blob_name']
-                )
+                report_blob_client = container_client.get_blob_client(latest_info['blob_name'])
                 
                 report_data = report_blob_client.download_blob().readall()
                 return json.loads(report_data.decode('utf-8'))
@@ -545,16 +516,13 @@ class MonthlySkillsAnalyzer:
     def get_historical_reports(self) -> Dict[str, Any]:
         """Get index of all historical monthly reports."""
         try:
-            blob_service_client = self._get_blob_service_client()
+            container_client = self._get_reports_container()
             
-            if not blob_service_client:
+            if not container_client:
                 logger.warning("Azure Blob Storage not available")
                 return {}
             
-            blob_client = blob_service_client.get_blob_client(
-                container=self.reports_container,
-                blob=self.historical_index_blob
-            )
+            blob_client = container_client.get_blob_client(self.historical_index_blob)
             
             try:
                 index_data = blob_client.download_blob().readall()
@@ -581,18 +549,15 @@ class MonthlySkillsAnalyzer:
     def get_report_by_month(self, target_month: str) -> Dict[str, Any]:
         """Get a specific monthly report by month (YYYY-MM format)."""
         try:
-            blob_service_client = self._get_blob_service_client()
+            container_client = self._get_reports_container()
             
-            if not blob_service_client:
+            if not container_client:
                 logger.warning("Azure Blob Storage not available")
                 return {}
             
             # Download the specific report
             blob_name = f"{self.reports_blob_prefix}{target_month}.json"
-            blob_client = blob_service_client.get_blob_client(
-                container=self.reports_container,
-                blob=blob_name
-            )
+            blob_client = container_client.get_blob_client(blob_name)
             
             report_data = blob_client.download_blob().readall()
             return json.loads(report_data.decode('utf-8'))
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Restore the skill statistics from the incremental backups.
+
+Rebuilds the stats from the newest backup snapshot at or before the restore
+point plus the deltas written after it, and writes them to the stats log (or
+the stats JSON) so the app loads them on its next start. Stop the app, or call
+/api/reload-stats afterwards, so it does not keep serving the old stats.
+
+Usage:
+    python restore_stats.py --list
+    python restore_stats.py [--until 2025-09-23T14:30:00] [--dry-run]
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--list', action='store_true', help='list the available backups and exit')
+    parser.add_argument('--until', type=datetime.fromisoformat,
+                        help='restore point as an ISO timestamp (default: the latest backup)')
+    parser.add_argument('--dry-run', action='store_true', help='rebuild the stats without saving them')
+    args = parser.parse_args()
+
+    # Importing the app loads the current stats and its storage configuration
+    import app as app_module
+
+    if app_module.stats_backup is None:
+        print("Stats backups are not configured (BACKUP_BACKEND)")
+        return 1
+    if args.list:
+        print(json.dumps(app_module.stats_backup.list_backups(), indent=2))
+        return 0
+
+    try:
+        summary = app_module.restore_stats_from_backup(args.until, persist=not args.dry_run)
+    except ValueError as e:
+        print(f"Restore failed: {e}")
+        return 1
+    if args.dry_run:
+        print("Dry run: the restored stats were not saved")
+    else:
+        app_module.stats_backup.flush(timeout=60)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Resume-to-job matching by IDF-weighted skill overlap.
+
+The resumes (documents ingestion.guess_document_type() takes for a resume) are
+kept as a sparse resume x skill incidence matrix in COO form: one (row, column)
+pair per resume skill, appended as documents are merged. A job description
+becomes a weight vector holding the inverse document frequency of each of its
+skills over the resumes, so scoring every resume is one sparse matrix-vector
+product, np.bincount(rows, weights=vector[columns]), with no Python loop over
+resumes:
+
+    score = sum of idf(skill) for job skills the resume has / sum of idf(skill) for all job skills
+    idf(skill) = ln((1 + resumes) / (1 + resumes with the skill)) + 1
+
+A score of 1.0 means the resume has every skill the job asks for, and rare
+skills count for more than the ones nearly every resume lists.
+
+A re-merged resume gets a new row and its old row is retired; the arrays are
+compacted once most rows are retired.
+"""
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Compact once retired rows outnumber live ones and there are at least this many
+COMPACT_MIN_RETIRED = 1024
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    """array with room for at least size items, doubling to keep appends amortized O(1)."""
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class ResumeMatcher:
+    """Sparse resume x skill matrix with document frequencies, updated per document."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._columns: Dict[str, int] = {}
+        self.skill_names: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._filenames: List[str] = []
+        self._link_rows = np.zeros(1024, dtype=np.intp)
+        self._link_columns = np.zeros(1024, dtype=np.intp)
+        self._links = 0
+        self._row_start = np.zeros(256, dtype=np.int64)
+        self._row_end = np.zeros(256, dtype=np.int64)
+        self._live = np.zeros(256, dtype=bool)
+        self._document_frequency = np.zeros(256, dtype=np.int64)
+        self._retired = 0
+    
+    @classmethod
+    def from_documents(cls, documents: Iterable[Tuple[str, Iterable[str]]]) -> 'ResumeMatcher':
+        """Build a matcher from (filename, skills) of the resumes."""
+        matcher = cls()
+        for filename, skills in documents:
+            matcher._add(filename, skills)
+        return matcher
+    
+    def __len__(self) -> int:
+        """Number of resumes."""
+        return len(self._rows)
+    
+    def _column(self, skill: str) -> int:
+        key = skill.lower()
+        column = self._columns.get(key)
+        if column is None:
+            column = self._columns[key] = len(self.skill_names)
+            self.skill_names.append(skill)
+            self._document_frequency = _grow(self._document_frequency, column + 1)
+        return column
+    
+    def _add(self, filename: str, skills: Iterable[str]) -> None:
+        old_row = self._rows.pop(filename, None)
+        if old_row is not None:
+            self._retire(old_row)
+        columns = np.unique(np.array([self._column(skill) for skill in skills], dtype=np.intp))
+        row = len(self._filenames)
+        self._filenames.append(filename)
+        self._rows[filename] = row
+        
+        start, end = self._links, self._links + len(columns)
+        self._link_rows = _grow(self._link_rows, end)
+        self._link_columns = _grow(self._link_columns, end)
+        self._link_rows[start:end] = row
+        self._link_columns[start:end] = columns
+        self._links = end
+        
+        self._row_start = _grow(self._row_start, row + 1)
+        self._row_end = _grow(self._row_end, row + 1)
+        self._live = _grow(self._live, row + 1)
+        self._row_start[row], self._row_end[row], self._live[row] = start, end, True
+        self._document_frequency[columns] += 1
+    
+    def _retire(self, row: int) -> None:
+        self._live[row] = False
+        self._document_frequency[self._link_columns[self._row_start[row]:self._row_end[row]]] -= 1
+        self._retired += 1
+    
+    def _compact(self) -> None:
+        """Drop retired rows and their links, renumbering the live rows in order."""
+        rows = len(self._filenames)
+        live = self._live[:rows]
+        kept = np.flatnonzero(live)
+        renumber = np.full(rows, -1, dtype=np.intp)
+        renumber[kept] = np.arange(len(kept), dtype=np.intp)
+        links = live[self._link_rows[:self._links]]
+        lengths = self._row_end[kept] - self._row_start[kept]
+        
+        self._link_rows = renumber[self._link_rows[:self._links][links]]
+        self._link_columns = self._link_columns[:self._links][links]
+        self._links = len(self._link_rows)
+        self._row_end = np.cumsum(lengths)
+        self._row_start = self._row_end - lengths
+        self._live = np.ones(len(kept), dtype=bool)
+        self._filenames = [self._filenames[row] for row in kept]
+        self._rows = {filename: row for row, filename in enumerate(self._filenames)}
+        self._retired = 0
+    
+    def add_document(self, filename: str, skills: Iterable[str]) -> None:
+        """Add a resume, replacing its skills if it was added before."""
+        with self._lock:
+            self._add(filename, skills)
+            if self._retired >= COMPACT_MIN_RETIRED and self._retired > len(self._rows):
+                self._compact()
+    
+    def match(self, skills: Iterable[str], top_k: int = 10, exclude: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Rank the resumes against a job's skills.
+        
+        Args:
+            skills: Skills the job asks for
+            top_k: Number of best matching resumes to return
+            exclude: Filename never returned (the job document itself)
+        
+        Returns:
+            job_skills with their idf weights, and the top_k matches with their
+            score, matched_skills and missing_skills (resumes with no job skill
+            are never returned)
+        """
+        job_skills = list({skill.lower(): skill for skill in skills}.values())
+        with self._lock:
+            resumes = len(self._rows)
+            rows = len(self._filenames)
+            columns = len(self.skill_names)
+            idf = np.log((1 + resumes) / (1 + self._document_frequency[:columns])) + 1
+            unseen_idf = float(np.log(1 + resumes) + 1)
+            job_columns = [self._columns.get(skill.lower()) for skill in job_skills]
+            weights = [float(idf[column]) if column is not None else unseen_idf for column in job_columns]
+            total_weight = sum(weights)
+            
+            matches = []
+            if job_skills and rows and top_k > 0:
+                vector = np.zeros(columns)
+                known = np.array([column for column in job_columns if column is not None], dtype=np.int64)
+                vector[known] = idf[known]
+                # The sparse matrix-vector product: one weighted sum per resume row
+                scores = np.bincount(self._link_rows[:self._links], weights=vector[self._link_columns[:self._links]],
+                                     minlength=rows) / total_weight
+                scores[~self._live[:rows]] = 0
+                if exclude is not None and exclude in self._rows:
+                    scores[self._rows[exclude]] = 0
+                candidates = np.flatnonzero(scores > 0)
+                if len(candidates) > top_k:
+                    # Keep everything tied with the top_k-th score so ties are broken below
+                    kth = len(candidates) - top_k
+                    threshold = np.partition(scores[candidates], kth)[kth]
+                    candidates = candidates[scores[candidates] >= threshold]
+                # Best score first, most recently added first among equal scores
+                ranked = candidates[np.lexsort((-candidates, -scores[candidates]))][:top_k]
+                
+                for row in ranked:
+                    resume_columns = self._link_columns[self._row_start[row]:self._row_end[row]]
+                    has = np.zeros(columns, dtype=bool)
+                    has[resume_columns] = True
+                    matched = [skill for skill, column in zip(job_skills, job_columns)
+                               if column is not None and has[column]]
+                    matched_keys = {skill.lower() for skill in matched}
+                    matches.append({
+                        'filename': self._filenames[row],
+                        'score': round(float(scores[row]), 4),
+                        'matched_skills': matched,
+                        'missing_skills': [skill for skill in job_skills if skill.lower() not in matched_keys]
+                    })
+        
+        return {
+            'resumes': resumes,
+            'job_skills': [
+                {'skill': skill, 'idf': round(weight, 4)} for skill, weight in zip(job_skills, weights)
+            ],
+            'matches': matches
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'resumes': len(self._rows),
+                'skills': len(self.skill_names),
+                'links': self._links,
+                'retired_rows': self._retired
+            }
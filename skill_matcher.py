@@ -0,0 +1,379 @@
+"""
+Single-pass skill matcher built on an Aho-Corasick automaton.
+
+The matcher is built once from the skill dictionary (and optional alias table)
+and scans the normalized document text a single time. It reproduces the result
+set of the original regex-per-skill extraction:
+
+- word-bounded matches on the normalized text, including the flexible
+  ".", "+" and "#" handling used for skills like "Node.js" and "C++"
+- substring matches on the whitespace-free text for fragmented PDF output
+- optional multi-word partial matching and alias lookups
+
+Text can also be fed incrementally (e.g. one PDF page at a time) through
+SkillMatcher.stream(); only a short overlap window of earlier text is kept so
+skills split across chunk boundaries are still found.
+"""
+
+import hashlib
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Characters that get a flexible gap in the word-bounded pattern
+FLEXIBLE_CHARS = {'.': r'[\.\s]*', '+': r'[\+\s]*', '#': r'[\#\s]*'}
+
+# Characters of earlier text kept when matching incrementally. Flexible
+# matches spanning more than this across a chunk boundary are not found.
+STREAM_OVERLAP = 256
+
+# Distinct texts whose results find_many() remembers; the oldest are dropped
+FIND_MANY_CACHE_SIZE = 1024
+
+
+def _is_word_char(ch: str) -> bool:
+    """Match the definition of a word character used by ``re``'s ``\\b``."""
+    return ch.isalnum() or ch == '_'
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    """Return True if ``re`` would see a word boundary before ``text[index]``."""
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < len(text) and _is_word_char(text[index])
+    return before != after
+
+
+def _flexible_pattern(skill_lower: str) -> str:
+    """Build the flexible word-bounded pattern for a skill."""
+    pattern = re.escape(skill_lower)
+    for char, gap in FLEXIBLE_CHARS.items():
+        pattern = pattern.replace(re.escape(char), gap)
+    pattern = pattern.replace(r'\s', r'\s*')
+    return r'\b' + pattern + r'\b'
+
+
+class _Automaton:
+    """Aho-Corasick automaton with lazily cached DFA transitions."""
+
+    def __init__(self):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[tuple] = [()]
+        self.delta: List[Dict[str, int]] = []
+        self.max_length = 0
+
+    def add(self, key: str, value) -> None:
+        state = 0
+        for ch in key:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append(())
+            state = nxt
+        self.outputs[state] = self.outputs[state] + ((len(key), value),)
+        self.max_length = max(self.max_length, len(key))
+
+    def build(self) -> None:
+        """Compute failure links and merge outputs along them."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.outputs[nxt] = self.outputs[nxt] + self.outputs[self.fail[nxt]]
+        self.delta = [dict(transitions) for transitions in self.goto]
+
+    def step(self, state: int, ch: str) -> int:
+        """Follow failure links for an uncached transition and cache the result."""
+        current = state
+        while True:
+            nxt = self.goto[current].get(ch)
+            if nxt is not None:
+                break
+            if current == 0:
+                nxt = 0
+                break
+            current = self.fail[current]
+        self.delta[state][ch] = nxt
+        return nxt
+
+
+# Output kinds stored in the normalized-text automaton
+_BOUNDED = 0
+_WORD = 1
+
+
+class SkillMatcher:
+    """Match a fixed skill dictionary against documents in a single pass."""
+
+    def __init__(self, skills: Iterable[str], aliases: Optional[Dict[str, str]] = None,
+                 partial_words: bool = False):
+        """
+        Build the matcher.
+
+        Args:
+            skills: Canonical skill names to look for
+            aliases: Optional mapping of alias -> canonical skill name
+            partial_words: Also report multi-word skills when all of their
+                longer words appear anywhere in the text
+        """
+        self.skills = list(dict.fromkeys(skills))
+        self.aliases = dict(aliases or {})
+        self.partial_words = partial_words
+
+        self._text_automaton = _Automaton()
+        self._compact_automaton = _Automaton()
+        self._unanchored: List[Tuple[str, 're.Pattern']] = []
+        self._partial_requirements: Dict[str, Set[str]] = {}
+        self._always_found: Set[str] = set()
+
+        for skill in self.skills:
+            self._add_skill(skill)
+        for alias, skill_name in self.aliases.items():
+            self._text_automaton.add(alias.lower(), (_BOUNDED, skill_name, None))
+
+        self._text_automaton.build()
+        self._compact_automaton.build()
+
+        # Column order for incidence matrices (skills.skill_incidence_matrix):
+        # dictionary skills, then alias targets
+        self.skill_names = list(dict.fromkeys(self.skills + list(self.aliases.values())))
+        self.skill_index = {skill: index for index, skill in enumerate(self.skill_names)}
+
+    def _add_skill(self, skill: str) -> None:
+        skill_lower = skill.lower()
+
+        # Word-bounded match, with flexible gaps for ".", "+" and "#"
+        if any(char in skill_lower for char in FLEXIBLE_CHARS):
+            verifier = re.compile(_flexible_pattern(skill_lower))
+            lead = re.split(r'[\.\+#]', skill_lower, maxsplit=1)[0]
+            if lead:
+                self._text_automaton.add(lead, (_BOUNDED, skill, verifier))
+            else:
+                self._unanchored.append((skill, verifier))
+        else:
+            self._text_automaton.add(skill_lower, (_BOUNDED, skill, None))
+
+        # Substring match on the whitespace-free text for fragmented PDFs
+        compact = re.sub(r'[\s\.\+\#-]', '', skill_lower)
+        if len(compact) > 2:
+            self._compact_automaton.add(compact, skill)
+
+        # Multi-word skills whose longer words all appear in the text
+        if self.partial_words and len(skill_lower) > 4:
+            words = skill_lower.split()
+            if len(words) > 1:
+                required = {word for word in words if len(word) > 2}
+                if not required:
+                    self._always_found.add(skill)
+                for word in required:
+                    self._text_automaton.add(word, (_WORD, word, None))
+                self._partial_requirements[skill] = required
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Collapse whitespace and lowercase, as the matcher expects."""
+        return ' '.join(text.split()).lower()
+
+    def find(self, text: str) -> Set[str]:
+        """Return the set of skills found in ``text``."""
+        return self.find_normalized(self.normalize(text))
+
+    def find_many(self, texts: Iterable[str], cache_size: int = FIND_MANY_CACHE_SIZE) -> List[Set[str]]:
+        """Return one skill set per text, matching repeated texts only once.
+        
+        Results are remembered by a digest of the normalized text for the last
+        ``cache_size`` distinct texts, so the texts themselves are not kept.
+        """
+        results = []
+        seen: Dict[bytes, Set[str]] = {}
+        for text in texts:
+            normalized = self.normalize(text)
+            key = hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).digest()
+            found = seen.get(key)
+            if found is None:
+                found = seen[key] = self.find_normalized(normalized)
+                if len(seen) > cache_size:
+                    del seen[next(iter(seen))]
+            results.append(set(found))
+        return results
+
+    def find_normalized(self, normalized: str) -> Set[str]:
+        """Return the set of skills found in already normalized text."""
+        stream = SkillStream(self)
+        stream.feed_normalized(normalized)
+        return stream.finish()
+
+    def stream(self, overlap: int = STREAM_OVERLAP) -> 'SkillStream':
+        """Start matching text that arrives in chunks."""
+        return SkillStream(self, overlap)
+
+    def find_iter(self, chunks: Iterable[str]) -> Set[str]:
+        """Return the set of skills found in a sequence of whitespace-separated chunks."""
+        stream = self.stream()
+        for chunk in chunks:
+            stream.feed(chunk)
+        return stream.finish()
+
+
+class SkillStream:
+    """
+    Incremental matching state for one document.
+
+    Chunks passed to ``feed`` are treated as separated by whitespace, so
+    feeding the pages of a document gives the same result as matching the
+    joined text. Memory is bounded by the chunk size plus the overlap window.
+    """
+
+    def __init__(self, matcher: SkillMatcher, overlap: int = STREAM_OVERLAP):
+        self.matcher = matcher
+        # Enough earlier text to check the word boundary before any key
+        self.overlap = max(overlap, matcher._text_automaton.max_length + 1)
+        self.found: Set[str] = set(matcher._always_found)
+        self._words_seen: Set[str] = set()
+        self._text_state = 0
+        self._compact_state = 0
+        self._buffer = ''
+        self._offset = 0
+        # Word-bounded candidates waiting for lookahead: (start, stop, name, verifier),
+        # with absolute positions in the normalized document
+        self._pending: List[tuple] = []
+        self._started = False
+
+    def feed(self, text: str) -> None:
+        """Match the next chunk of raw text."""
+        self.feed_normalized(self.matcher.normalize(text))
+
+    def feed_normalized(self, normalized: str) -> None:
+        """Match the next chunk of already normalized text."""
+        if not normalized:
+            return
+        if self._started:
+            normalized = ' ' + normalized
+        self._started = True
+
+        scan_from = len(self._buffer)
+        self._buffer += normalized
+        self._scan(scan_from)
+        self._resolve(final=False)
+        self._search_unanchored(max(0, scan_from - self.overlap), final=False)
+        self._trim()
+
+    def finish(self) -> Set[str]:
+        """Resolve the remaining candidates and return the skills found."""
+        self._resolve(final=True)
+        self._search_unanchored(max(0, len(self._buffer) - self.overlap), final=True)
+
+        for skill, required in self.matcher._partial_requirements.items():
+            if required and required <= self._words_seen:
+                self.found.add(skill)
+        return self.found
+
+    def _scan(self, scan_from: int) -> None:
+        buffer = self._buffer
+        offset = self._offset
+        found = self.found
+        pending = self._pending
+        words_seen = self._words_seen
+
+        text_delta = self.matcher._text_automaton.delta
+        text_outputs = self.matcher._text_automaton.outputs
+        text_step = self.matcher._text_automaton.step
+        compact_delta = self.matcher._compact_automaton.delta
+        compact_outputs = self.matcher._compact_automaton.outputs
+        compact_step = self.matcher._compact_automaton.step
+
+        end = len(buffer)
+        overlap = self.overlap
+        text_state = self._text_state
+        compact_state = self._compact_state
+        for index, ch in enumerate(buffer[scan_from:], scan_from):
+            nxt = text_delta[text_state].get(ch)
+            text_state = text_step(text_state, ch) if nxt is None else nxt
+            if text_outputs[text_state]:
+                for length, (kind, name, verifier) in text_outputs[text_state]:
+                    if kind == _WORD:
+                        words_seen.add(name)
+                        continue
+                    if name in found:
+                        continue
+                    start = index - length + 1
+                    if not _is_boundary(buffer, start):
+                        continue
+                    # Decide now when the lookahead is already buffered
+                    if verifier is None:
+                        if index + 1 < end:
+                            if _is_boundary(buffer, index + 1):
+                                found.add(name)
+                            continue
+                    elif end - start >= overlap:
+                        match = verifier.match(buffer, start)
+                        if match is None:
+                            continue
+                        if match.end() < end:
+                            found.add(name)
+                            continue
+                    pending.append((offset + start, offset + index + 1, name, verifier))
+
+            if ch != ' ':
+                nxt = compact_delta[compact_state].get(ch)
+                compact_state = compact_step(compact_state, ch) if nxt is None else nxt
+                for _, name in compact_outputs[compact_state]:
+                    found.add(name)
+
+        self._text_state = text_state
+        self._compact_state = compact_state
+
+    def _resolve(self, final: bool) -> None:
+        """Check candidates whose trailing boundary or flexible match can be decided."""
+        buffer = self._buffer
+        end = len(buffer)
+        found = self.found
+        waiting = []
+        for candidate in self._pending:
+            start_abs, stop_abs, name, verifier = candidate
+            if name in found:
+                continue
+            start = start_abs - self._offset
+            stop = stop_abs - self._offset
+            if verifier is None:
+                if stop < end or final:
+                    if _is_boundary(buffer, stop):
+                        found.add(name)
+                else:
+                    waiting.append(candidate)
+            elif final or end - start >= self.overlap:
+                match = verifier.match(buffer, start)
+                if match and (final or match.end() < end):
+                    found.add(name)
+                elif match:
+                    waiting.append(candidate)
+            else:
+                waiting.append(candidate)
+        self._pending = waiting
+
+    def _search_unanchored(self, pos: int, final: bool) -> None:
+        buffer = self._buffer
+        for skill, verifier in self.matcher._unanchored:
+            if skill in self.found:
+                continue
+            match = verifier.search(buffer, pos)
+            # A match touching the end may still be extended by the next chunk
+            if match and (final or match.end() < len(buffer)):
+                self.found.add(skill)
+
+    def _trim(self) -> None:
+        """Drop text that no pending candidate or boundary check can need."""
+        keep_from = len(self._buffer) - self.overlap
+        for start_abs, _, _, _ in self._pending:
+            keep_from = min(keep_from, start_abs - self._offset - 1)
+        if keep_from > 0:
+            self._buffer = self._buffer[keep_from:]
+            self._offset += keep_from
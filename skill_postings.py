@@ -0,0 +1,146 @@
+"""
+Compact skill -> document postings.
+
+The skill/document links used to be stored as one dict per skill per document
+({'filename', 'upload_date', 'file_date', 'file_type'}), so a document with 40
+skills carried its metadata 40 times in memory and in the stats JSON. Documents
+are now interned once to integer ids and each skill keeps a sorted array('I')
+of those ids; the document metadata stays in processed_documents.
+
+Serialized form (the 'skill_postings' key of the stats JSON and
+'ai_skill_documents' of the AI stats):
+
+    {"documents": ["a.pdf", "b.pdf", ...],
+     "postings": {"Python": "<base64 of little-endian uint32 ids>", ...}}
+
+skill_documents() rebuilds the legacy per-skill document dicts for consumers
+that still want them, and load() accepts the legacy list format.
+"""
+
+import base64
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# 'I' is 4 bytes on every platform we run on; fall back to 'L' where it is not
+_TYPECODE = 'I' if array('I').itemsize == 4 else 'L'
+
+
+def _encode(ids: array) -> str:
+    if sys.byteorder == 'big':
+        ids = array(_TYPECODE, ids)
+        ids.byteswap()
+    return base64.b64encode(ids.tobytes()).decode('ascii')
+
+
+def _decode(data: str) -> array:
+    ids = array(_TYPECODE)
+    ids.frombytes(base64.b64decode(data))
+    if sys.byteorder == 'big':
+        ids.byteswap()
+    return ids
+
+
+class DocumentPostings:
+    """Interned document ids and a sorted id array per skill."""
+    
+    def __init__(self):
+        self.filenames: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._postings: Dict[str, array] = {}
+    
+    def intern(self, filename: str) -> int:
+        """The id of filename, assigning the next id to a new document."""
+        doc_id = self._ids.get(filename)
+        if doc_id is None:
+            doc_id = self._ids[filename] = len(self.filenames)
+            self.filenames.append(filename)
+        return doc_id
+    
+    def add(self, skill: str, filename: str) -> None:
+        """Link filename to skill; adding the same link again is a no-op."""
+        doc_id = self.intern(filename)
+        ids = self._postings.get(skill)
+        if ids is None:
+            self._postings[skill] = array(_TYPECODE, [doc_id])
+        elif ids[-1] < doc_id:
+            # New documents get the highest id, so this is the common case
+            ids.append(doc_id)
+        else:
+            position = bisect_left(ids, doc_id)
+            if ids[position] != doc_id:
+                ids.insert(position, doc_id)
+    
+    def add_document(self, filename: str, skills: Iterable[str]) -> None:
+        for skill in skills:
+            self.add(skill, filename)
+    
+    def ids(self, skill: str) -> array:
+        """Sorted ids of the documents with skill (do not modify)."""
+        return self._postings.get(skill) or array(_TYPECODE)
+    
+    def documents(self, skill: str) -> List[str]:
+        """Filenames of the documents with skill, in the order they were first seen."""
+        filenames = self.filenames
+        return [filenames[doc_id] for doc_id in self.ids(skill)]
+    
+    def count(self, skill: str) -> int:
+        return len(self._postings.get(skill, ()))
+    
+    def skills(self) -> Iterator[str]:
+        return iter(self._postings)
+    
+    def clear(self) -> None:
+        self.filenames.clear()
+        self._ids.clear()
+        self._postings.clear()
+    
+    def __len__(self) -> int:
+        """Number of skills with at least one document."""
+        return len(self._postings)
+    
+    def __contains__(self, skill: str) -> bool:
+        return skill in self._postings
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'documents': list(self.filenames),
+            'postings': {skill: _encode(ids) for skill, ids in self._postings.items()}
+        }
+    
+    @classmethod
+    def load(cls, data: Optional[Dict[str, Any]]) -> 'DocumentPostings':
+        """Postings from to_dict() output, or from the legacy {skill: [documents]} format."""
+        postings = cls()
+        if not data:
+            return postings
+        if 'postings' in data and 'documents' in data:
+            postings.filenames = list(data['documents'])
+            postings._ids = {filename: doc_id for doc_id, filename in enumerate(postings.filenames)}
+            postings._postings = {skill: _decode(encoded) for skill, encoded in data['postings'].items()}
+            return postings
+        for skill, documents in data.items():
+            for document in documents:
+                postings.add(skill, document['filename'] if isinstance(document, dict) else document)
+        return postings
+
+
+def skill_documents(stats_data: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """The legacy {skill: [{'filename', 'upload_date', 'file_date', 'file_type'}]} view of a stats JSON."""
+    if 'skill_postings' not in stats_data:
+        return stats_data.get('skill_documents') or {}
+    postings = DocumentPostings.load(stats_data['skill_postings'])
+    processed_documents = stats_data.get('processed_documents') or {}
+    result = {}
+    for skill in postings.skills():
+        entries = result[skill] = []
+        for filename in postings.documents(skill):
+            doc_data = processed_documents.get(filename, {})
+            entries.append({
+                'filename': filename,
+                'upload_date': doc_data.get('upload_date'),
+                'file_date': doc_data.get('file_date'),
+                'file_type': doc_data.get('file_type')
+            })
+    return result
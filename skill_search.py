@@ -0,0 +1,286 @@
+"""
+Inverted skill index and boolean skill search over processed documents.
+
+Every document gets an integer id in the order it was stored, and each skill
+(pattern and AI skills alike, case-insensitive) and each month maps to a bitmap
+of document ids held in a Python int. AND / OR / NOT are then single big-int
+operations, a total count is int.bit_count(), and a bitmap costs one bit per
+document (12.5 KB per skill at 100k documents).
+
+The index is built from the stats store on first use and then kept up to date
+as documents are merged and their AI skills filled in (see app.py).
+
+Query syntax (skill names are case-insensitive, operators upper case):
+
+    Kubernetes AND (Go OR Rust) NOT Java
+    "Power BI" OR Tableau
+    NOT Java
+
+- NOT binds tightest, then AND, then OR; parentheses group
+- NOT after an operand means AND NOT, and an operand followed by '(' or NOT
+  is implicitly ANDed
+- a skill name is the run of words between operators, or a quoted string
+"""
+
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Query syntax tree nodes
+SKILL = 'skill'
+AND = 'AND'
+OR = 'OR'
+NOT = 'NOT'
+
+_TOKENS = re.compile(r'\s*(?:([()])|"([^"]*)"|([^\s()"]+))')
+
+
+class QueryError(ValueError):
+    """A search query that cannot be parsed."""
+
+
+def _tokenize(query: str) -> List[Tuple[str, str]]:
+    """(kind, text) tokens, with adjacent unquoted words merged into one skill name."""
+    tokens = []
+    position = 0
+    query = query.rstrip()
+    merge = False
+    while position < len(query):
+        match = _TOKENS.match(query, position)
+        if match is None:
+            raise QueryError(f"Unbalanced quote at position {position}")
+        position = match.end()
+        paren, quoted, word = match.groups()
+        if paren:
+            tokens.append((paren, paren))
+        elif quoted is not None:
+            tokens.append((SKILL, quoted.strip()))
+        elif word in (AND, OR, NOT):
+            tokens.append((word, word))
+        elif merge:
+            tokens[-1] = (SKILL, f"{tokens[-1][1]} {word}")
+        else:
+            tokens.append((SKILL, word))
+        merge = word is not None and word not in (AND, OR, NOT)
+    return tokens
+
+
+def parse_query(query: str) -> tuple:
+    """
+    Parse a boolean skill query into a syntax tree.
+    
+    Returns:
+        Nested tuples: (SKILL, name), (NOT, node), (AND, left, right) or (OR, left, right)
+    
+    Raises:
+        QueryError: if the query is empty or malformed
+    """
+    tokens = _tokenize(query or '')
+    if not tokens:
+        raise QueryError("Empty query")
+    position = 0
+    
+    def peek():
+        return tokens[position][0] if position < len(tokens) else None
+    
+    def take(kind):
+        nonlocal position
+        if peek() != kind:
+            found = tokens[position][1] if position < len(tokens) else 'end of query'
+            raise QueryError(f"Expected {'a skill' if kind == SKILL else kind} but found {found!r}")
+        position += 1
+        return tokens[position - 1][1]
+    
+    def parse_or():
+        node = parse_and()
+        while peek() == OR:
+            take(OR)
+            node = (OR, node, parse_and())
+        return node
+    
+    def parse_and():
+        node = parse_not()
+        while peek() in (AND, NOT, '(', SKILL):
+            if peek() == AND:
+                take(AND)
+            node = (AND, node, parse_not())
+        return node
+    
+    def parse_not():
+        if peek() == NOT:
+            take(NOT)
+            return (NOT, parse_not())
+        if peek() == '(':
+            take('(')
+            node = parse_or()
+            take(')')
+            return node
+        return (SKILL, take(SKILL))
+    
+    tree = parse_or()
+    if position < len(tokens):
+        raise QueryError(f"Unexpected {tokens[position][1]!r}")
+    return tree
+
+
+def _bitmap(ids: Iterable[int], size: int) -> int:
+    buffer = bytearray((size + 7) // 8)
+    for doc_id in ids:
+        buffer[doc_id >> 3] |= 1 << (doc_id & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+def _newest_ids(bitmap: int, offset: int, limit: int) -> List[int]:
+    """Ids set in bitmap from the highest down, skipping the first offset."""
+    words = memoryview(bitmap.to_bytes((bitmap.bit_length() + 63) // 64 * 8, 'little')).cast('Q')
+    ids = []
+    for index in range(len(words) - 1, -1, -1):
+        word = words[index]
+        if not word:
+            continue
+        if offset:
+            bits = word.bit_count()
+            if offset >= bits:
+                offset -= bits
+                continue
+        while word and len(ids) < limit:
+            high = word.bit_length() - 1
+            word ^= 1 << high
+            if offset:
+                offset -= 1
+            else:
+                ids.append(index * 64 + high)
+        if len(ids) >= limit:
+            break
+    return ids
+
+
+def document_skills(doc_data: Dict[str, Any]) -> List[str]:
+    """Skills a stored document is indexed under: its pattern and AI skills."""
+    return list(doc_data.get('skills_found') or []) + list(doc_data.get('ai_skills_found') or [])
+
+
+class SkillIndex:
+    """Skill and month bitmaps over interned document ids."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.filenames: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._skills: Dict[str, int] = {}
+        self._names: Dict[str, str] = {}
+        self._months: Dict[str, int] = {}
+        self._all = 0
+    
+    @classmethod
+    def from_links(cls, links: Iterable[Tuple[str, str, Optional[str]]]) -> 'SkillIndex':
+        """
+        Build an index in one pass over (filename, month, skill) rows.
+        
+        Rows of one document must be adjacent and documents in the order they
+        were stored; skill is None for a document without skills.
+        """
+        index = cls()
+        skill_ids: Dict[str, List[int]] = {}
+        month_ids: Dict[str, List[int]] = {}
+        for filename, month, skill in links:
+            doc_id = index._ids.get(filename)
+            if doc_id is None:
+                doc_id = index._intern(filename)
+                month_ids.setdefault(month, []).append(doc_id)
+            if skill:
+                key = skill.lower()
+                index._names.setdefault(key, skill)
+                skill_ids.setdefault(key, []).append(doc_id)
+        size = len(index.filenames)
+        index._skills = {key: _bitmap(ids, size) for key, ids in skill_ids.items()}
+        index._months = {month: _bitmap(ids, size) for month, ids in month_ids.items()}
+        index._all = (1 << size) - 1
+        return index
+    
+    def _intern(self, filename: str) -> int:
+        doc_id = self._ids[filename] = len(self.filenames)
+        self.filenames.append(filename)
+        return doc_id
+    
+    def add_document(self, filename: str, month: str, skills: Iterable[str]) -> None:
+        """Index a document, replacing its skills and month if it is already indexed."""
+        with self._lock:
+            doc_id = self._ids.get(filename)
+            if doc_id is None:
+                bit = 1 << self._intern(filename)
+            else:
+                # Re-indexed (re-processed, or its AI skills arrived): clear its old bits
+                bit = 1 << doc_id
+                for bitmaps in (self._skills, self._months):
+                    for key, bitmap in bitmaps.items():
+                        if bitmap & bit:
+                            bitmaps[key] = bitmap ^ bit
+            for skill in skills:
+                key = skill.lower()
+                self._names.setdefault(key, skill)
+                self._skills[key] = self._skills.get(key, 0) | bit
+            self._months[month] = self._months.get(month, 0) | bit
+            self._all |= bit
+    
+    def _evaluate(self, node: tuple, unknown: List[str]) -> int:
+        kind = node[0]
+        if kind == SKILL:
+            bitmap = self._skills.get(node[1].lower())
+            if bitmap is None:
+                unknown.append(node[1])
+                return 0
+            return bitmap
+        if kind == NOT:
+            return self._all & ~self._evaluate(node[1], unknown)
+        left = self._evaluate(node[1], unknown)
+        right = self._evaluate(node[2], unknown)
+        return left & right if kind == AND else left | right
+    
+    def search(self, query: str, month_from: Optional[str] = None, month_to: Optional[str] = None,
+               offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+        """
+        Documents matching a boolean skill query, most recently stored first.
+        
+        Args:
+            query: Query in the syntax described in the module docstring
+            month_from, month_to: Inclusive YYYY-MM range on the document month
+            offset, limit: Page of matching filenames to return
+        
+        Returns:
+            total (all matches), filenames (the page) and unknown_skills
+        
+        Raises:
+            QueryError: if the query cannot be parsed
+        """
+        tree = parse_query(query)
+        unknown = []
+        with self._lock:
+            matches = self._evaluate(tree, unknown)
+            if month_from or month_to:
+                in_range = 0
+                for month, bitmap in self._months.items():
+                    if (not month_from or month >= month_from) and (not month_to or month <= month_to):
+                        in_range |= bitmap
+                matches &= in_range
+            ids = _newest_ids(matches, offset, limit) if limit > 0 else []
+            filenames = [self.filenames[doc_id] for doc_id in ids]
+        return {
+            'total': matches.bit_count(),
+            'filenames': filenames,
+            'unknown_skills': unknown
+        }
+    
+    def skill_names(self) -> List[str]:
+        return sorted(self._names.values(), key=str.lower)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            bitmaps = list(self._skills.values()) + list(self._months.values())
+            return {
+                'documents': self._all.bit_count(),
+                'skills': len(self._skills),
+                'months': len(self._months),
+                'bitmap_bytes': sum((bitmap.bit_length() + 7) // 8 for bitmap in bitmaps)
+            }
+
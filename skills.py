@@ -68,69 +68,112 @@ tech_skills = [
 ]
 
 # Global skill tracking variables
-from collections import Counter, defaultdict
+from collections import Counter, defaultdict, namedtuple
+from skill_postings import DocumentPostings
 skill_counter = Counter()
 monthly_skill_data = defaultdict(lambda: defaultdict(int))
-skill_documents = defaultdict(list)
+skill_documents = DocumentPostings()
 processed_documents = {}
 
-# Skills extraction function
-import re
+# Additional skill variations and aliases
+skill_aliases = {
+    'js': 'JavaScript',
+    'ts': 'TypeScript', 
+    'nodejs': 'Node.js',
+    'reactjs': 'React',
+    'vuejs': 'Vue.js',
+    'nextjs': 'Next.js',
+    'nuxtjs': 'Nuxt.js',
+    'dotnet': 'ASP.NET',
+    '.net': 'ASP.NET',
+    'csharp': 'C#',
+    'cplusplus': 'C++',
+    'ai': 'Artificial Intelligence',
+    'ml': 'Machine Learning',
+    'dl': 'Deep Learning',
+    'k8s': 'Kubernetes',
+    'aws': 'AWS',
+    'gcp': 'Google Cloud',
+    'azure': 'Azure',
+    'vscode': 'Visual Studio Code',
+    'vs code': 'Visual Studio Code',
+    'sql server': 'SQL Server',
+    'postgresql': 'PostgreSQL',
+    'mongo': 'MongoDB',
+    'redis': 'Redis',
+    'docker': 'Docker',
+    'git': 'Git',
+    'github': 'GitHub',
+    'gitlab': 'GitLab',
+    'rest': 'REST API',
+    'api': 'API Development',
+    'ci/cd': 'CI/CD',
+    'cicd': 'CI/CD'
+}
+
+# Skill matchers are built once at import and scan each document in a single pass
+from skill_matcher import SkillMatcher
+skill_matcher = SkillMatcher(tech_skills, partial_words=True)
+alias_skill_matcher = SkillMatcher(tech_skills, aliases=skill_aliases)
 
 def extract_skills(text):
     """Extract technology skills from text using improved pattern matching.
     Handles PDF text fragmentation and skill variations."""
-    found_skills = set()  # Use set to ensure uniqueness
-    
-    # Normalize text: remove excessive whitespace and line breaks
-    normalized_text = ' '.join(text.split()).lower()
-    
-    # Also create a version without spaces for compound skills
-    no_spaces_text = re.sub(r'\s+', '', text.lower())
-    
-    for skill in tech_skills:
-        skill_lower = skill.lower()
-        skill_found = False
-        
-        # Method 1: Standard word boundary matching (for simple skills)
-        pattern = r'\b' + re.escape(skill_lower) + r'\b'
-        if re.search(pattern, normalized_text):
-            skill_found = True
-        
-        # Method 2: Flexible matching for compound skills (allows spaces/dots)
-        # Handle skills like "Node.js", "Vue.js", "C++", "C#", etc.
-        flexible_pattern = re.escape(skill_lower)
-        flexible_pattern = flexible_pattern.replace(r'\.', r'[\.\s]*')  # . or spaces
-        flexible_pattern = flexible_pattern.replace(r'\+', r'[\+\s]*')  # + or spaces  
-        flexible_pattern = flexible_pattern.replace(r'\#', r'[\#\s]*')  # # or spaces
-        flexible_pattern = flexible_pattern.replace(r'\s', r'\s*')      # flexible spaces
-        
-        if re.search(r'\b' + flexible_pattern + r'\b', normalized_text):
-            skill_found = True
-        
-        # Method 3: No-spaces matching for fragmented text
-        skill_no_spaces = re.sub(r'[\s\.\+\#-]', '', skill_lower)
-        if len(skill_no_spaces) > 2 and skill_no_spaces in no_spaces_text:
-            skill_found = True
-        
-        # Method 4: Partial matching for longer skills (be more careful here)
-        if len(skill_lower) > 4:
-            # Split longer skills and check if major parts are present
-            words = skill_lower.split()
-            if len(words) > 1:
-                # For multi-word skills, check if all words are present nearby
-                all_words_found = True
-                for word in words:
-                    if len(word) > 2 and word not in normalized_text:
-                        all_words_found = False
-                        break
-                if all_words_found:
-                    skill_found = True
-        
-        if skill_found:
-            found_skills.add(skill)
-    
-    return list(found_skills)
+    return list(skill_matcher.find(text))
+
+def extract_skills_many(texts, matcher=None, return_matrix=False, sparse=False):
+    """Extract skills from many texts with one shared, prebuilt matcher.
+
+    Args:
+        texts: Iterable of document texts
+        matcher: SkillMatcher to use (defaults to the one behind extract_skills)
+        return_matrix: Also return a document x skill incidence matrix
+        sparse: Return the matrix as CSRIncidence arrays instead of a NumPy bool array
+
+    Returns:
+        List of skill sets, or (skill_sets, matrix, skill_names) when
+        return_matrix is set. Matrix columns follow skill_names.
+    """
+    matcher = matcher or skill_matcher
+    skill_sets = matcher.find_many(texts)
+    if not return_matrix:
+        return skill_sets
+    matrix = skill_incidence_matrix(skill_sets, matcher.skill_names, sparse=sparse,
+                                    column_index=matcher.skill_index)
+    return skill_sets, matrix, matcher.skill_names
+
+# Compressed sparse row arrays of an incidence matrix, in the argument order of
+# scipy.sparse.csr_matrix((data, indices, indptr), shape=shape)
+CSRIncidence = namedtuple('CSRIncidence', ['data', 'indices', 'indptr', 'shape'])
+
+def skill_incidence_matrix(skill_sets, skill_names, sparse=False, column_index=None):
+    """Build a document x skill boolean incidence matrix from skill sets.
+    
+    Args:
+        skill_sets: One set of skill names per document (row)
+        skill_names: Skill name of each column
+        sparse: Return CSRIncidence arrays instead of a dense NumPy bool array
+        column_index: Prebuilt {skill: column} for skill_names, such as SkillMatcher.skill_index
+    """
+    import numpy as np
+    
+    if column_index is None:
+        column_index = {skill: index for index, skill in enumerate(skill_names)}
+    indices = []
+    indptr = [0]
+    for skills in skill_sets:
+        indices.extend(sorted(column_index[skill] for skill in skills if skill in column_index))
+        indptr.append(len(indices))
+    
+    shape = (len(skill_sets), len(skill_names))
+    indices = np.asarray(indices, dtype=np.intp)
+    indptr = np.asarray(indptr, dtype=np.intp)
+    if sparse:
+        return CSRIncidence(np.ones(len(indices), dtype=bool), indices, indptr, shape)
+    
+    matrix = np.zeros(shape, dtype=bool)
+    matrix[np.repeat(np.arange(shape[0], dtype=np.intp), np.diff(indptr)), indices] = True
+    return matrix
 
 def categorize_skills(skills_list):
     """Categorize skills into technical and soft skills."""
@@ -185,7 +228,7 @@ def update_skill_tracking(document_name, skills):
     # Update counters
     for skill in skills:
         skill_counter[skill] += 1
-        skill_documents[skill].append(document_name)
+        skill_documents.add(skill, document_name)
     
     # Track document
     processed_documents[document_name] = {
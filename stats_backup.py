@@ -0,0 +1,362 @@
+"""
+Incremental, rotated backups of the skill statistics.
+
+Every upload batch used to write a full copy of skill_counter and
+processed_documents to backups/. Instead, the changes merged by each batch are
+written as a small delta (the same events the stats log records), and a full
+snapshot is only taken every BACKUP_SNAPSHOT_INTERVAL_SECONDS. Backups are
+written by a background thread, so the request path only queues them.
+Snapshots older than BACKUP_RETENTION_DAYS are pruned (the newest
+BACKUP_MIN_SNAPSHOTS are always kept), together with the deltas that no
+remaining snapshot needs.
+
+Snapshots and deltas are named by a nanosecond timestamp taken while the
+stats lock is held, so their order matches the order the changes were merged.
+restore() rebuilds the state from the newest snapshot at or before a point in
+time plus the deltas written after it; restore_stats.py is the command line
+entry point.
+
+Configuration (environment variables):
+- BACKUP_BACKEND: auto (default; blob when storage is configured, otherwise disabled), blob, local or none
+- BACKUP_DIR: directory of the local backend (default backups)
+- BACKUP_PREFIX: blob name prefix of the blob backend (default backups/)
+- BACKUP_SNAPSHOT_INTERVAL_SECONDS: time between full snapshots (default 86400)
+- BACKUP_RETENTION_DAYS: age after which snapshots are pruned (default 30)
+- BACKUP_MIN_SNAPSHOTS: newest snapshots kept regardless of age (default 3)
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from blob_storage import get_container_client
+
+logger = logging.getLogger(__name__)
+
+BACKUP_BACKEND = os.environ.get('BACKUP_BACKEND', 'auto').lower()
+BACKUP_DIR = os.environ.get('BACKUP_DIR', 'backups')
+BACKUP_PREFIX = os.environ.get('BACKUP_PREFIX', 'backups/')
+BACKUP_SNAPSHOT_INTERVAL_SECONDS = float(os.environ.get('BACKUP_SNAPSHOT_INTERVAL_SECONDS', 86400))
+BACKUP_RETENTION_DAYS = float(os.environ.get('BACKUP_RETENTION_DAYS', 30))
+BACKUP_MIN_SNAPSHOTS = int(os.environ.get('BACKUP_MIN_SNAPSHOTS', 3))
+
+SNAPSHOTS = 'snapshots'
+DELTAS = 'deltas'
+_EXTENSIONS = {SNAPSHOTS: '.json', DELTAS: '.jsonl'}
+
+# How often the worker wakes up to check whether a snapshot is due
+_WAKE_SECONDS = 60
+# Queued by request_snapshot() to wake the worker
+_SNAPSHOT = object()
+
+
+def backup_name(kind: str, stamp: int) -> str:
+    # Zero-padded so names sort in stamp order
+    return f"{kind}/{stamp:020d}{_EXTENSIONS[kind]}"
+
+
+def stamp_time(stamp: int) -> datetime:
+    return datetime.fromtimestamp(stamp / 1e9)
+
+
+class LocalBackupStore:
+    """Backups as files under a local directory."""
+    
+    name = 'local'
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        for kind in (SNAPSHOTS, DELTAS):
+            os.makedirs(os.path.join(directory, kind), exist_ok=True)
+    
+    def put(self, name: str, data: bytes) -> None:
+        path = os.path.join(self.directory, name)
+        with open(f"{path}.tmp", 'wb') as f:
+            f.write(data)
+        os.replace(f"{path}.tmp", path)
+    
+    def get(self, name: str) -> bytes:
+        with open(os.path.join(self.directory, name), 'rb') as f:
+            return f.read()
+    
+    def list(self, kind: str) -> List[str]:
+        return [f"{kind}/{entry}" for entry in os.listdir(os.path.join(self.directory, kind))
+                if entry.endswith(_EXTENSIONS[kind])]
+    
+    def delete(self, name: str) -> None:
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+
+class BlobBackupStore:
+    """Backups as blobs under a prefix."""
+    
+    name = 'blob'
+    
+    def __init__(self, container_client, prefix: str = BACKUP_PREFIX):
+        # A container name is looked up on each use, so the store follows rotated storage credentials
+        self._container_client = container_client
+        self.prefix = prefix
+    
+    @property
+    def container_client(self):
+        if isinstance(self._container_client, str):
+            return get_container_client(self._container_client)
+        return self._container_client
+    
+    def put(self, name: str, data: bytes) -> None:
+        self.container_client.get_blob_client(self.prefix + name).upload_blob(data, overwrite=True)
+    
+    def get(self, name: str) -> bytes:
+        return self.container_client.get_blob_client(self.prefix + name).download_blob().readall()
+    
+    def list(self, kind: str) -> List[str]:
+        return [blob.name[len(self.prefix):]
+                for blob in self.container_client.list_blobs(name_starts_with=f"{self.prefix}{kind}/")
+                if blob.name.endswith(_EXTENSIONS[kind])]
+    
+    def delete(self, name: str) -> None:
+        from azure.core.exceptions import ResourceNotFoundError
+        try:
+            self.container_client.delete_blob(self.prefix + name)
+        except ResourceNotFoundError:
+            pass
+
+
+def _stamps(store, kind: str) -> List[int]:
+    stamps = []
+    for name in store.list(kind):
+        try:
+            stamps.append(int(name.rsplit('/', 1)[-1].split('.', 1)[0]))
+        except ValueError:
+            continue
+    return sorted(stamps)
+
+
+class StatsBackupManager:
+    """Writes delta and snapshot backups of the stats from a background thread.
+    
+    Args:
+        store: LocalBackupStore or BlobBackupStore
+        snapshot_provider: Returns the full stats state; called while holding lock
+        lock: The lock that guards the stats (the app's stats_lock)
+        snapshot_interval: Seconds between full snapshots
+        retention_days: Snapshots older than this are pruned
+        min_snapshots: Newest snapshots kept regardless of age
+    """
+    
+    def __init__(self, store, snapshot_provider: Callable[[], Dict[str, Any]], lock,
+                 snapshot_interval: float = BACKUP_SNAPSHOT_INTERVAL_SECONDS,
+                 retention_days: float = BACKUP_RETENTION_DAYS, min_snapshots: int = BACKUP_MIN_SNAPSHOTS):
+        self.store = store
+        self.snapshot_provider = snapshot_provider
+        self.lock = lock
+        self.snapshot_interval = snapshot_interval
+        self.retention_days = retention_days
+        self.min_snapshots = max(1, min_snapshots)
+        self.counters = Counter()
+        self._queue = queue.Queue()
+        self._last_stamp = 0
+        # Stamp of the newest snapshot; None until the worker has listed the store
+        self._last_snapshot_stamp = None
+        self._snapshot_requested = False
+        self._thread = None
+        self._thread_lock = threading.Lock()
+    
+    def _stamp(self) -> int:
+        # Strictly increasing, even if the clock does not advance between calls
+        self._last_stamp = max(time.time_ns(), self._last_stamp + 1)
+        return self._last_stamp
+    
+    def record(self, events: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """Queue a delta backup of merged events. Callers must hold the stats lock."""
+        events = list(events)
+        if events:
+            self._queue.put((self._stamp(), events))
+            self._ensure_worker()
+    
+    def request_snapshot(self) -> None:
+        """Take a full snapshot on the worker's next pass, e.g. after the stats were replaced."""
+        self._snapshot_requested = True
+        self._queue.put(_SNAPSHOT)
+        self._ensure_worker()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the queued backups are written. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+    
+    def _ensure_worker(self) -> None:
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stats-backup', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush, 10)
+    
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=_WAKE_SECONDS)
+            except queue.Empty:
+                item = None
+            try:
+                if item not in (None, _SNAPSHOT):
+                    self._write_delta(*item)
+                if self._snapshot_due():
+                    self.take_snapshot()
+                    self.prune()
+            except Exception as e:
+                logger.error(f"Stats backup failed: {e}")
+            finally:
+                if item is not None:
+                    self._queue.task_done()
+    
+    def _write_delta(self, stamp: int, events: List[Tuple[str, Dict[str, Any]]]) -> None:
+        payload = '\n'.join(
+            json.dumps({'type': event_type, 'data': data}, separators=(',', ':'), ensure_ascii=False, default=str)
+            for event_type, data in events
+        ) + '\n'
+        try:
+            self.store.put(backup_name(DELTAS, stamp), payload.encode('utf-8'))
+        except Exception:
+            # The delta chain is broken; a fresh snapshot makes later backups restorable again
+            self.counters['delta_failures'] += 1
+            self._snapshot_requested = True
+            raise
+        self.counters['deltas'] += 1
+        self.counters['delta_bytes'] += len(payload)
+    
+    def _snapshot_due(self) -> bool:
+        if self._last_snapshot_stamp is None:
+            stamps = _stamps(self.store, SNAPSHOTS)
+            self._last_snapshot_stamp = stamps[-1] if stamps else 0
+        if self._snapshot_requested or not self._last_snapshot_stamp:
+            return True
+        return time.time_ns() - self._last_snapshot_stamp >= self.snapshot_interval * 1e9
+    
+    def take_snapshot(self) -> int:
+        """Write a full snapshot of the stats now and return its stamp."""
+        self._snapshot_requested = False
+        # Serialized under the lock: the state refers to the live stats
+        with self.lock:
+            stamp = self._stamp()
+            data = json.dumps(self.snapshot_provider(), separators=(',', ':'), ensure_ascii=False,
+                              default=str).encode('utf-8')
+        try:
+            self.store.put(backup_name(SNAPSHOTS, stamp), data)
+        except Exception:
+            self.counters['snapshot_failures'] += 1
+            self._snapshot_requested = True
+            raise
+        self._last_snapshot_stamp = stamp
+        self.counters['snapshots'] += 1
+        self.counters['snapshot_bytes'] += len(data)
+        logger.info(f"Stats backup snapshot written ({len(data)} bytes)")
+        return stamp
+    
+    def prune(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Delete snapshots past retention and the deltas older than the oldest snapshot kept."""
+        cutoff = ((now or time.time()) - self.retention_days * 86400) * 1e9
+        snapshots = _stamps(self.store, SNAPSHOTS)
+        keep = set(snapshots[-self.min_snapshots:]) | {stamp for stamp in snapshots if stamp >= cutoff}
+        pruned = {'snapshots': 0, 'deltas': 0}
+        for stamp in snapshots:
+            if stamp not in keep:
+                self.store.delete(backup_name(SNAPSHOTS, stamp))
+                pruned['snapshots'] += 1
+        if keep:
+            oldest_kept = min(keep)
+            for stamp in _stamps(self.store, DELTAS):
+                if stamp < oldest_kept:
+                    self.store.delete(backup_name(DELTAS, stamp))
+                    pruned['deltas'] += 1
+        self.counters['pruned_snapshots'] += pruned['snapshots']
+        self.counters['pruned_deltas'] += pruned['deltas']
+        return pruned
+    
+    def list_backups(self) -> Dict[str, Any]:
+        """Describe the snapshots and deltas available for restore."""
+        snapshots = _stamps(self.store, SNAPSHOTS)
+        deltas = _stamps(self.store, DELTAS)
+        return {
+            'snapshots': [stamp_time(stamp).isoformat() for stamp in snapshots],
+            'deltas': len(deltas),
+            'deltas_since_last_snapshot': sum(1 for stamp in deltas if not snapshots or stamp > snapshots[-1]),
+            'oldest_restore_point': stamp_time(snapshots[0]).isoformat() if snapshots else None,
+            'latest_restore_point': stamp_time(max(snapshots[-1:] + deltas[-1:])).isoformat() if snapshots else None
+        }
+    
+    def restore(self, restore_snapshot: Callable[[Dict[str, Any]], None],
+                apply_event: Callable[[Dict[str, Any]], None], until: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Rebuild the stats from the newest snapshot at or before ``until`` plus the deltas after it.
+        
+        Args:
+            restore_snapshot: Replaces the current stats with a snapshot's state
+            apply_event: Applies one delta event ({'type', 'data'}) to the stats
+            until: Restore point (default: everything backed up)
+        
+        Returns:
+            The snapshot time and the number of deltas and events applied
+        """
+        limit = int(until.timestamp() * 1e9) if until else None
+        snapshots = [stamp for stamp in _stamps(self.store, SNAPSHOTS) if limit is None or stamp <= limit]
+        if not snapshots:
+            raise ValueError("No backup snapshot at or before the requested restore point")
+        snapshot_stamp = snapshots[-1]
+        restore_snapshot(json.loads(self.store.get(backup_name(SNAPSHOTS, snapshot_stamp)).decode('utf-8')))
+        
+        deltas = [stamp for stamp in _stamps(self.store, DELTAS)
+                  if stamp > snapshot_stamp and (limit is None or stamp <= limit)]
+        events = 0
+        for stamp in deltas:
+            for line in self.store.get(backup_name(DELTAS, stamp)).decode('utf-8').splitlines():
+                if line.strip():
+                    apply_event(json.loads(line))
+                    events += 1
+        return {
+            'snapshot': stamp_time(snapshot_stamp).isoformat(),
+            'deltas': len(deltas),
+            'events': events
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'backend': self.store.name,
+            'queued': self._queue.qsize(),
+            'last_snapshot': stamp_time(self._last_snapshot_stamp).isoformat() if self._last_snapshot_stamp else None,
+            'snapshot_interval_seconds': self.snapshot_interval,
+            'retention_days': self.retention_days,
+            **self.counters
+        }
+
+
+def create_stats_backup(container_name: str, snapshot_provider: Callable[[], Dict[str, Any]], lock,
+                        backend: str = BACKUP_BACKEND) -> Optional[StatsBackupManager]:
+    """Create the backup manager for the configured backend, or None if backups are disabled."""
+    backend = (backend or 'none').lower()
+    try:
+        if backend in ('auto', 'blob'):
+            if get_container_client(container_name) is not None:
+                return StatsBackupManager(BlobBackupStore(container_name), snapshot_provider, lock)
+            if backend == 'blob':
+                logger.warning("Blob backups requested but Azure Blob Storage is not configured; falling back to local")
+                backend = 'local'
+        if backend == 'local':
+            return StatsBackupManager(LocalBackupStore(BACKUP_DIR), snapshot_provider, lock)
+    except Exception as e:
+        logger.error(f"Failed to initialize stats backups: {e}")
+    return None
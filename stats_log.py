@@ -0,0 +1,331 @@
+"""
+Append-only event log for the skill statistics.
+
+Rewriting the whole statistics JSON after every upload costs time in
+proportion to every document ever processed. Instead, each change merged into
+the statistics is appended as a compact delta record (one JSON object per
+line) to the current log segment. Every STATS_LOG_COMPACT_EVERY events the
+full state is written as a snapshot and the segments it covers are deleted.
+On startup the snapshot is loaded and the events after it are replayed.
+
+Segments are append blobs in Azure Blob Storage or files in a local directory.
+Every record carries a sequence number and the snapshot stores the last one
+it includes, so events left behind by a crash between writing a snapshot and
+deleting the old segments are skipped on replay. A torn last line of a local
+segment is ignored.
+
+Configuration (environment variables):
+- STATS_LOG_BACKEND: auto (default; blob when storage is configured, otherwise disabled), blob, local or none
+- STATS_LOG_DIR: directory of the local backend (default stats_log)
+- STATS_LOG_PREFIX: blob name prefix of the blob backend (default stats/log/)
+- STATS_LOG_COMPACT_EVERY: events appended between snapshots (default 500)
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from blob_storage import get_container_client
+
+logger = logging.getLogger(__name__)
+
+STATS_LOG_BACKEND = os.environ.get('STATS_LOG_BACKEND', 'auto').lower()
+STATS_LOG_DIR = os.environ.get('STATS_LOG_DIR', 'stats_log')
+STATS_LOG_PREFIX = os.environ.get('STATS_LOG_PREFIX', 'stats/log/')
+STATS_LOG_COMPACT_EVERY = int(os.environ.get('STATS_LOG_COMPACT_EVERY', 500))
+
+SNAPSHOT_NAME = 'snapshot.json'
+SEGMENT_PREFIX = 'segment-'
+SEGMENT_SUFFIX = '.jsonl'
+
+# (event type, event data) as passed to StatsEventLog.append()
+StatsEvent = Tuple[str, Dict[str, Any]]
+
+
+def _segment_name(segment_id: int) -> str:
+    # Zero-padded so segments sort by name in the order they were written
+    return f"{SEGMENT_PREFIX}{segment_id:012d}{SEGMENT_SUFFIX}"
+
+
+def _segment_id(name: str) -> Optional[int]:
+    name = name.rsplit('/', 1)[-1]
+    if not (name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)):
+        return None
+    try:
+        return int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+    except ValueError:
+        return None
+
+
+class LocalSegmentStore:
+    """Snapshot and log segments as files in a local directory."""
+    
+    name = 'local'
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+    
+    def read_snapshot(self) -> Optional[bytes]:
+        try:
+            with open(os.path.join(self.directory, SNAPSHOT_NAME), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    
+    def write_snapshot(self, data: bytes) -> None:
+        # Replace atomically so a crash never leaves a partial snapshot
+        path = os.path.join(self.directory, SNAPSHOT_NAME)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    def list_segments(self) -> List[int]:
+        return sorted(segment_id for segment_id in map(_segment_id, os.listdir(self.directory))
+                      if segment_id is not None)
+    
+    def read_segment(self, segment_id: int) -> bytes:
+        with open(os.path.join(self.directory, _segment_name(segment_id)), 'rb') as f:
+            return f.read()
+    
+    def append(self, segment_id: int, data: bytes) -> None:
+        with open(os.path.join(self.directory, _segment_name(segment_id)), 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def delete_segment(self, segment_id: int) -> None:
+        try:
+            os.remove(os.path.join(self.directory, _segment_name(segment_id)))
+        except FileNotFoundError:
+            pass
+
+
+class AppendBlobSegmentStore:
+    """Snapshot as a block blob and log segments as append blobs under a prefix."""
+    
+    name = 'blob'
+    
+    # Largest block an append blob accepts in one append_block call
+    MAX_APPEND_BYTES = 4 * 1024 * 1024
+    
+    def __init__(self, container_client, prefix: str = STATS_LOG_PREFIX):
+        # A container name is looked up on each use, so the store follows rotated storage credentials
+        self._container_client = container_client
+        self.prefix = prefix
+        self._created_segments = set()
+    
+    @property
+    def container_client(self):
+        if isinstance(self._container_client, str):
+            return get_container_client(self._container_client)
+        return self._container_client
+    
+    def read_snapshot(self) -> Optional[bytes]:
+        from azure.core.exceptions import ResourceNotFoundError
+        try:
+            return self.container_client.get_blob_client(self.prefix + SNAPSHOT_NAME).download_blob().readall()
+        except ResourceNotFoundError:
+            return None
+    
+    def write_snapshot(self, data: bytes) -> None:
+        # Block blob uploads replace the previous snapshot atomically
+        self.container_client.get_blob_client(self.prefix + SNAPSHOT_NAME).upload_blob(data, overwrite=True)
+    
+    def list_segments(self) -> List[int]:
+        blobs = self.container_client.list_blobs(name_starts_with=self.prefix + SEGMENT_PREFIX)
+        return sorted(segment_id for segment_id in (_segment_id(blob.name) for blob in blobs)
+                      if segment_id is not None)
+    
+    def read_segment(self, segment_id: int) -> bytes:
+        return self.container_client.get_blob_client(self.prefix + _segment_name(segment_id)).download_blob().readall()
+    
+    def append(self, segment_id: int, data: bytes) -> None:
+        blob_client = self.container_client.get_blob_client(self.prefix + _segment_name(segment_id))
+        if segment_id not in self._created_segments:
+            if not blob_client.exists():
+                blob_client.create_append_blob()
+            self._created_segments.add(segment_id)
+        for block in self._blocks(data):
+            blob_client.append_block(block)
+    
+    def _blocks(self, data: bytes) -> Iterator[bytes]:
+        """Split data into append blocks, cutting at line ends so every block holds whole records."""
+        while len(data) > self.MAX_APPEND_BYTES:
+            cut = data.rfind(b'\n', 0, self.MAX_APPEND_BYTES) + 1 or self.MAX_APPEND_BYTES
+            yield data[:cut]
+            data = data[cut:]
+        if data:
+            yield data
+    
+    def delete_segment(self, segment_id: int) -> None:
+        from azure.core.exceptions import ResourceNotFoundError
+        try:
+            self.container_client.delete_blob(self.prefix + _segment_name(segment_id))
+        except ResourceNotFoundError:
+            pass
+        self._created_segments.discard(segment_id)
+
+
+class StatsEventLog:
+    """Append-only log of statistics events with snapshot compaction.
+    
+    The caller serializes append(), compact() and the state they describe
+    (the app holds stats_lock), so a snapshot always matches the sequence
+    number it is stored with.
+    """
+    
+    def __init__(self, store, compact_every: int = STATS_LOG_COMPACT_EVERY):
+        self.store = store
+        self.compact_every = compact_every
+        # Sequence number of the last event written and of the last event in the snapshot
+        self.seq = 0
+        self.snapshot_seq = 0
+        # Segment appended to; a new one starts after each compaction
+        self.segment_id = None
+        self.counters = Counter()
+        self._lock = threading.Lock()
+    
+    def read_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Return the latest snapshot, or None if the log has never been compacted."""
+        data = self.store.read_snapshot()
+        if data is None:
+            return None
+        snapshot = json.loads(data.decode('utf-8'))
+        with self._lock:
+            self.snapshot_seq = snapshot.get('log_seq', 0)
+            self.seq = max(self.seq, self.snapshot_seq)
+        return snapshot
+    
+    def replay(self, apply_event: Callable[[Dict[str, Any]], None]) -> int:
+        """Apply the events after the snapshot in order and return how many were applied.
+        
+        Call read_snapshot() first; without a snapshot every event is replayed.
+        """
+        replayed = self._scan(apply_event)
+        self.counters['replayed'] += replayed
+        return replayed
+    
+    def seek_end(self) -> None:
+        """Continue after the snapshot and the logged events without applying them.
+        
+        For a process whose state is already loaded from elsewhere (the local
+        stats store): its new events must still be numbered after every event
+        in the log, or replay() on a fresh instance skips them as compacted.
+        """
+        self.read_snapshot()
+        self._scan(None)
+    
+    def _scan(self, apply_event: Optional[Callable[[Dict[str, Any]], None]]) -> int:
+        """Move seq and segment_id past the logged events, applying those after the snapshot."""
+        applied = 0
+        for segment_id in self.store.list_segments():
+            for event in self._read_events(segment_id):
+                if event['seq'] <= self.snapshot_seq:
+                    continue
+                if apply_event is not None:
+                    apply_event(event)
+                    applied += 1
+                self.seq = max(self.seq, event['seq'])
+            # New events go to the newest segment
+            self.segment_id = segment_id
+        return applied
+    
+    def _read_events(self, segment_id: int) -> Iterator[Dict[str, Any]]:
+        lines = self.store.read_segment(segment_id).split(b'\n')
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line.decode('utf-8'))
+            except ValueError:
+                # A crash mid-write leaves a torn last line; anything else is corruption
+                if number < len(lines) - 1:
+                    logger.error(f"Skipping corrupt record {number} in stats log segment {segment_id}")
+                else:
+                    logger.warning(f"Ignoring incomplete last record in stats log segment {segment_id}")
+    
+    def append(self, events: Iterable[StatsEvent]) -> bool:
+        """Append events as one write. Returns False if the write failed."""
+        with self._lock:
+            records = []
+            seq = self.seq
+            for event_type, data in events:
+                seq += 1
+                records.append(json.dumps({'seq': seq, 'type': event_type, 'data': data},
+                                          separators=(',', ':'), ensure_ascii=False, default=str))
+            if not records:
+                return True
+            payload = ('\n'.join(records) + '\n').encode('utf-8')
+            segment_id = self.segment_id if self.segment_id is not None else self.seq + 1
+            try:
+                self.store.append(segment_id, payload)
+            except Exception as e:
+                logger.error(f"Failed to append {len(records)} event(s) to the stats log: {e}")
+                self.counters['append_failures'] += 1
+                return False
+            self.segment_id = segment_id
+            self.seq = seq
+            self.counters['appends'] += 1
+            self.counters['events'] += len(records)
+            self.counters['bytes_appended'] += len(payload)
+            return True
+    
+    def needs_compaction(self) -> bool:
+        return self.seq - self.snapshot_seq >= self.compact_every
+    
+    def compact(self, snapshot: Dict[str, Any]) -> bool:
+        """Write snapshot (the state after the last appended event) and drop the segments it covers."""
+        with self._lock:
+            snapshot = dict(snapshot, log_seq=self.seq, compacted_at=datetime.now().isoformat())
+            try:
+                self.store.write_snapshot(json.dumps(snapshot, separators=(',', ':'), ensure_ascii=False,
+                                                     default=str).encode('utf-8'))
+            except Exception as e:
+                logger.error(f"Failed to write stats snapshot: {e}")
+                self.counters['compaction_failures'] += 1
+                return False
+            self.snapshot_seq = self.seq
+            self.segment_id = None
+            self.counters['compactions'] += 1
+            try:
+                for segment_id in self.store.list_segments():
+                    self.store.delete_segment(segment_id)
+            except Exception as e:
+                # The snapshot's log_seq makes replay skip the leftover events
+                logger.warning(f"Failed to delete compacted stats log segments: {e}")
+            return True
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'backend': self.store.name,
+            'seq': self.seq,
+            'snapshot_seq': self.snapshot_seq,
+            'events_since_snapshot': self.seq - self.snapshot_seq,
+            'compact_every': self.compact_every,
+            **self.counters
+        }
+
+
+def create_stats_log(container_name: str, backend: str = STATS_LOG_BACKEND) -> Optional[StatsEventLog]:
+    """Create the stats event log for the configured backend, or None if it is disabled."""
+    backend = (backend or 'none').lower()
+    try:
+        if backend in ('auto', 'blob'):
+            if get_container_client(container_name) is not None:
+                return StatsEventLog(AppendBlobSegmentStore(container_name))
+            if backend == 'blob':
+                logger.warning("Blob stats log requested but Azure Blob Storage is not configured; falling back to local")
+                backend = 'local'
+        if backend == 'local':
+            return StatsEventLog(LocalSegmentStore(STATS_LOG_DIR))
+    except Exception as e:
+        logger.error(f"Failed to initialize the stats event log: {e}")
+    return None
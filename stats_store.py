@@ -0,0 +1,491 @@
+"""
+SQLite store for processed documents, their skills and the monthly skill rollups.
+
+The statistics used to live in module-level dicts in app.py that were loaded
+from one JSON blob at startup, so memory use and startup time grew with every
+document ever processed. They now live in a local SQLite database in WAL mode
+(pages read while an upload is merged), and the pages run indexed aggregate
+queries instead of walking the dicts:
+
+- documents: one row per document with its full record as JSON, and indexed
+  columns for the content hash, the month and pending AI extraction
+- document_skills: the pattern and AI skills of each document, indexed by skill
+- monthly_skill_counts: pattern skill occurrences per month, behind the skill
+  totals and the charts
+- skill_pairs: the sparse skill x skill co-occurrence counts of the stored
+  documents' pattern skills, both (a, b) and (b, a), with the number of
+  documents per skill on the diagonal; kept up to date as each document is
+  written, so related skills and the heatmap are read without touching the
+  documents
+
+Like the counters they replace, the rollups count every merge: a document
+re-processed under the same name adds its skills again, while documents and
+document_skills only hold its latest version.
+
+The stats JSON (the stats blob and the stats log snapshots) remains the
+export/import format, see export_stats() and import_stats(). Its skill ->
+document links are exported as compact postings (see skill_postings.py).
+
+Configuration (environment variables):
+- STATS_DB_PATH: SQLite database file (default stats.db)
+"""
+
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+from collections import Counter
+from itertools import groupby
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from skill_postings import DocumentPostings
+
+logger = logging.getLogger(__name__)
+
+STATS_DB_PATH = os.environ.get('STATS_DB_PATH', 'stats.db')
+
+# Skill sources in document_skills
+PATTERN = 'pattern'
+AI = 'ai'
+
+# counters row holding the number of stored documents
+DOCUMENTS_COUNTER = 'documents'
+
+SkillCount = Tuple[str, int]
+StoredDocument = Tuple[str, Dict[str, Any]]
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS documents ("
+    "filename TEXT PRIMARY KEY, content_hash TEXT, upload_date TEXT NOT NULL, month TEXT NOT NULL, "
+    "ai_pending INTEGER NOT NULL DEFAULT 0, ai_gate INTEGER, gate_tokens INTEGER NOT NULL DEFAULT 0, "
+    "data TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS documents_content_hash ON documents (content_hash)",
+    "CREATE INDEX IF NOT EXISTS documents_month ON documents (month)",
+    "CREATE INDEX IF NOT EXISTS documents_upload_date ON documents (upload_date)",
+    "CREATE INDEX IF NOT EXISTS documents_ai_pending ON documents (ai_pending) WHERE ai_pending = 1",
+    "CREATE TABLE IF NOT EXISTS document_skills ("
+    "filename TEXT NOT NULL, source TEXT NOT NULL, skill TEXT NOT NULL, "
+    "PRIMARY KEY (filename, source, skill))",
+    "CREATE INDEX IF NOT EXISTS document_skills_skill ON document_skills (skill, source)",
+    "CREATE TABLE IF NOT EXISTS monthly_skill_counts ("
+    "skill TEXT NOT NULL, month TEXT NOT NULL, count INTEGER NOT NULL, "
+    "PRIMARY KEY (skill, month))",
+    "CREATE INDEX IF NOT EXISTS monthly_skill_counts_month ON monthly_skill_counts (month)",
+    "CREATE TABLE IF NOT EXISTS skill_pairs ("
+    "skill_a TEXT NOT NULL, skill_b TEXT NOT NULL, count INTEGER NOT NULL, "
+    "PRIMARY KEY (skill_a, skill_b)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS skill_pairs_diagonal ON skill_pairs (count) WHERE skill_a = skill_b",
+    "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+)
+
+
+def _pair_deltas(old_skills: Iterable[str], new_skills: Iterable[str]) -> Counter:
+    """Changes to the co-occurrence counts when a document's skills go from old to new."""
+    deltas = Counter()
+    for skills, change in ((set(old_skills), -1), (set(new_skills), 1)):
+        for skill_a in skills:
+            for skill_b in skills:
+                deltas[skill_a, skill_b] += change
+    return deltas
+
+
+def _lift(count: int, documents_a: int, documents_b: int, documents: int) -> float:
+    """How much more often two skills occur together than if they were independent."""
+    return count * documents / (documents_a * documents_b) if documents_a and documents_b else 0.0
+
+
+def document_month(doc_data: Dict[str, Any]) -> str:
+    """YYYY-MM a document is counted in: its file date, or its upload date without one."""
+    date = doc_data.get('file_date') or (doc_data.get('upload_date') or '').split(' ')[0]
+    return date[:7]
+
+
+def _document_row(filename: str, doc_data: Dict[str, Any]) -> tuple:
+    ai_metadata = doc_data.get('ai_metadata') or {}
+    gate = ai_metadata.get('gate')
+    ai_gate = gate_tokens = None
+    if gate:
+        ai_gate = 1 if gate.get('route_to_ai') else 0
+        gate_tokens = 0 if ai_gate else gate.get('signals', {}).get('estimated_tokens', 0)
+    return (
+        filename,
+        doc_data.get('content_hash'),
+        doc_data.get('upload_date') or '',
+        document_month(doc_data),
+        1 if ai_metadata.get('ai_pending') else 0,
+        ai_gate,
+        gate_tokens or 0,
+        json.dumps(doc_data, separators=(',', ':'), ensure_ascii=False, default=str)
+    )
+
+
+class StatsStore:
+    """SQLite storage and queries for the skill statistics.
+    
+    Writers are serialized by the store; the app additionally holds stats_lock
+    so a merge and its stats log event stay in order.
+    """
+    
+    def __init__(self, db_path: str = STATS_DB_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            # Stored in the database file, so it only needs to be set once
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            # Databases created before skill_pairs existed start without co-occurrence counts
+            if conn.execute("SELECT 1 FROM counters WHERE name = ?", (DOCUMENTS_COUNTER,)).fetchone() is None:
+                self._rebuild_skill_pairs(conn)
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        # With WAL, NORMAL only syncs at checkpoints and still never corrupts the database
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    def _write_document(self, conn: sqlite3.Connection, filename: str, doc_data: Dict[str, Any],
+                        update_pairs: bool = True) -> None:
+        if update_pairs:
+            old_skills = [skill for (skill,) in conn.execute(
+                "SELECT skill FROM document_skills WHERE filename = ? AND source = ?", (filename, PATTERN)
+            )]
+            if conn.execute("SELECT 1 FROM documents WHERE filename = ?", (filename,)).fetchone() is None:
+                conn.execute("UPDATE counters SET value = value + 1 WHERE name = ?", (DOCUMENTS_COUNTER,))
+            self._update_skill_pairs(conn, _pair_deltas(old_skills, doc_data.get('skills_found') or []))
+        conn.execute(
+            "INSERT OR REPLACE INTO documents "
+            "(filename, content_hash, upload_date, month, ai_pending, ai_gate, gate_tokens, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            _document_row(filename, doc_data)
+        )
+        conn.execute("DELETE FROM document_skills WHERE filename = ?", (filename,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO document_skills (filename, source, skill) VALUES (?, ?, ?)",
+            [(filename, PATTERN, skill) for skill in doc_data.get('skills_found') or []]
+            + [(filename, AI, skill) for skill in doc_data.get('ai_skills_found') or []]
+        )
+    
+    def _update_skill_pairs(self, conn: sqlite3.Connection, deltas: Counter) -> None:
+        changes = [(skill_a, skill_b, change) for (skill_a, skill_b), change in deltas.items() if change]
+        conn.executemany(
+            "INSERT INTO skill_pairs (skill_a, skill_b, count) VALUES (?, ?, ?) "
+            "ON CONFLICT (skill_a, skill_b) DO UPDATE SET count = count + excluded.count",
+            changes
+        )
+        conn.executemany(
+            "DELETE FROM skill_pairs WHERE skill_a = ? AND skill_b = ? AND count <= 0",
+            [(skill_a, skill_b) for skill_a, skill_b, change in changes if change < 0]
+        )
+    
+    def _rebuild_skill_pairs(self, conn: sqlite3.Connection) -> None:
+        """Recount the co-occurrences and the document counter from the stored documents."""
+        conn.execute("DELETE FROM skill_pairs")
+        deltas = Counter()
+        links = conn.execute(
+            "SELECT filename, skill FROM document_skills WHERE source = ? ORDER BY filename", (PATTERN,)
+        )
+        for _, rows in groupby(links, key=lambda link: link[0]):
+            deltas.update(_pair_deltas((), [skill for _, skill in rows]))
+        self._update_skill_pairs(conn, deltas)
+        documents = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = excluded.value",
+            (DOCUMENTS_COUNTER, documents)
+        )
+    
+    def add_document(self, filename: str, doc_data: Dict[str, Any]) -> None:
+        """Store a processed document and add its pattern skills to the monthly rollups."""
+        month = document_month(doc_data)
+        with self._lock, self._connect() as conn:
+            self._write_document(conn, filename, doc_data)
+            conn.executemany(
+                "INSERT INTO monthly_skill_counts (skill, month, count) VALUES (?, ?, 1) "
+                "ON CONFLICT (skill, month) DO UPDATE SET count = count + 1",
+                [(skill, month) for skill in doc_data.get('skills_found') or []]
+            )
+    
+    def update_document(self, filename: str, doc_data: Dict[str, Any]) -> None:
+        """Replace a document's record and skills without counting its pattern skills again."""
+        with self._lock, self._connect() as conn:
+            self._write_document(conn, filename, doc_data)
+    
+    def import_stats(self, stats_data: Dict[str, Any]) -> None:
+        """Replace the stored stats with stats in the JSON export format."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM documents")
+            conn.execute("DELETE FROM document_skills")
+            conn.execute("DELETE FROM monthly_skill_counts")
+            for filename, doc_data in (stats_data.get('processed_documents') or {}).items():
+                self._write_document(conn, filename, doc_data, update_pairs=False)
+            # Derived from the documents rather than exported, so counted once at the end
+            self._rebuild_skill_pairs(conn)
+            conn.executemany(
+                "INSERT INTO monthly_skill_counts (skill, month, count) VALUES (?, ?, ?)",
+                [
+                    (skill, month, count)
+                    for skill, months in (stats_data.get('monthly_skill_data') or {}).items()
+                    for month, count in months.items() if count
+                ]
+            )
+    
+    def export_stats(self) -> Dict[str, Any]:
+        """The stored stats in the JSON export format."""
+        processed_documents = dict(self.iter_documents())
+        monthly_skill_data = {}
+        with self._connect() as conn:
+            for skill, month, count in conn.execute(
+                "SELECT skill, month, count FROM monthly_skill_counts ORDER BY skill, month"
+            ):
+                monthly_skill_data.setdefault(skill, {})[month] = count
+        skill_counter = dict(self.skill_counts())
+        skill_postings = DocumentPostings()
+        for filename, doc_data in processed_documents.items():
+            skill_postings.add_document(filename, doc_data.get('skills_found') or [])
+        return {
+            'skill_counter': skill_counter,
+            'skill_postings': skill_postings.to_dict(),
+            'processed_documents': processed_documents,
+            'monthly_skill_data': monthly_skill_data
+        }
+    
+    def get_document(self, filename: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM documents WHERE filename = ?", (filename,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def find_by_hash(self, content_hash: str) -> Optional[StoredDocument]:
+        """The document most recently stored with this content hash, as (filename, record)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT filename, data FROM documents WHERE content_hash = ? ORDER BY rowid DESC LIMIT 1",
+                (content_hash,)
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+    
+    def document_count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+    
+    def list_documents(self, limit: Optional[int] = None, offset: int = 0) -> List[StoredDocument]:
+        """Documents, most recently uploaded first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT filename, data FROM documents ORDER BY upload_date DESC, filename LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset)
+            ).fetchall()
+        return [(filename, json.loads(data)) for filename, data in rows]
+    
+    def iter_documents(self) -> Iterator[StoredDocument]:
+        """All documents in the order they were stored, read row by row."""
+        with self._connect() as conn:
+            for filename, data in conn.execute("SELECT filename, data FROM documents ORDER BY rowid"):
+                yield filename, json.loads(data)
+    
+    def get_documents(self, filenames: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Records of the given documents that exist, by filename."""
+        filenames = list(filenames)
+        if not filenames:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT filename, data FROM documents WHERE filename IN ({','.join('?' * len(filenames))})",
+                filenames
+            ).fetchall()
+        return {filename: json.loads(data) for filename, data in rows}
+    
+    def skill_links(self) -> Iterator[Tuple[str, str, Optional[str]]]:
+        """
+        (filename, month, skill) for every document skill, pattern and AI, without
+        decoding the records. Documents come in the order they were stored, and
+        a document without skills has one row with skill None.
+        """
+        with self._connect() as conn:
+            yield from conn.execute(
+                "SELECT d.filename, d.month, s.skill FROM documents d "
+                "LEFT JOIN document_skills s ON s.filename = d.filename ORDER BY d.rowid"
+            )
+    
+    def documents_for_month(self, month: str) -> List[StoredDocument]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT filename, data FROM documents WHERE month = ?", (month,)).fetchall()
+        return [(filename, json.loads(data)) for filename, data in rows]
+    
+    def pending_ai_documents(self, limit: Optional[int] = None) -> List[StoredDocument]:
+        """Documents whose AI extraction was deferred, oldest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT filename, data FROM documents WHERE ai_pending = 1 ORDER BY rowid LIMIT ?",
+                (-1 if limit is None else limit,)
+            ).fetchall()
+        return [(filename, json.loads(data)) for filename, data in rows]
+    
+    def skill_counts(self, limit: Optional[int] = None) -> List[SkillCount]:
+        """Pattern skill occurrences, most common first."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT skill, SUM(count) AS total FROM monthly_skill_counts GROUP BY skill "
+                "ORDER BY total DESC, skill LIMIT ?",
+                (-1 if limit is None else limit,)
+            ).fetchall()
+    
+    def skill_count(self, skill: str) -> int:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COALESCE(SUM(count), 0) FROM monthly_skill_counts WHERE skill = ?", (skill,)
+            ).fetchone()[0]
+    
+    def distinct_skill_count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(DISTINCT skill) FROM monthly_skill_counts").fetchone()[0]
+    
+    def total_skill_occurrences(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(SUM(count), 0) FROM monthly_skill_counts").fetchone()[0]
+    
+    def monthly_counts(self, skills: Iterable[str], months: Iterable[str]) -> Dict[str, Dict[str, int]]:
+        """Occurrences of each skill per month, for the given skills and months."""
+        skills, months = list(skills), list(months)
+        counts = {skill: {} for skill in skills}
+        if not skills or not months:
+            return counts
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT skill, month, count FROM monthly_skill_counts "
+                f"WHERE skill IN ({','.join('?' * len(skills))}) AND month IN ({','.join('?' * len(months))})",
+                skills + months
+            ).fetchall()
+        for skill, month, count in rows:
+            counts[skill][month] = count
+        return counts
+    
+    def documents_with_skills(self, source: str) -> int:
+        """Number of documents with at least one skill from source (PATTERN or AI)."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(DISTINCT filename) FROM document_skills WHERE source = ?", (source,)
+            ).fetchone()[0]
+    
+    def gate_counts(self) -> Tuple[int, int, int]:
+        """(documents gated, documents sent to AI, estimated tokens saved) over all documents."""
+        with self._connect() as conn:
+            gated, sent, tokens_saved = conn.execute(
+                "SELECT COUNT(ai_gate), COALESCE(SUM(ai_gate), 0), COALESCE(SUM(gate_tokens), 0) FROM documents"
+            ).fetchone()
+        return gated, sent, tokens_saved
+    
+    def related_skills(self, skill: str, limit: int = 20, min_count: int = 1,
+                       sort: str = 'lift') -> Optional[Dict[str, Any]]:
+        """
+        Pattern skills that occur in the same documents as skill.
+        
+        Each related skill comes with the number of documents with both (count),
+        with it (documents), P(related | skill) (confidence), lift and PMI
+        (log2 of lift). Reads only skill's row of the co-occurrence matrix.
+        
+        Args:
+            skill: Skill name (case-insensitive)
+            limit: Number of related skills to return
+            min_count: Leave out skills found together in fewer documents
+            sort: 'lift' (same order as PMI) or 'count'
+        
+        Returns:
+            None if no stored document has the skill
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT skill_a, count FROM skill_pairs WHERE skill_a = skill_b AND skill_a = ? COLLATE NOCASE "
+                "ORDER BY skill_a = ? DESC LIMIT 1",
+                (skill, skill)
+            ).fetchone()
+            if row is None:
+                return None
+            name, skill_documents = row
+            documents = self._counter(conn, DOCUMENTS_COUNTER)
+            rows = conn.execute(
+                "SELECT p.skill_b, p.count, d.count FROM skill_pairs p "
+                "JOIN skill_pairs d ON d.skill_a = p.skill_b AND d.skill_b = p.skill_b "
+                "WHERE p.skill_a = ? AND p.skill_b != p.skill_a AND p.count >= ?",
+                (name, min_count)
+            ).fetchall()
+        related = []
+        for other, count, other_documents in rows:
+            lift = _lift(count, skill_documents, other_documents, documents)
+            related.append({
+                'skill': other,
+                'count': count,
+                'documents': other_documents,
+                'confidence': round(count / skill_documents, 4),
+                'lift': round(lift, 4),
+                'pmi': round(math.log2(lift), 4) if lift else None
+            })
+        if sort == 'count':
+            related.sort(key=lambda entry: (-entry['count'], -entry['lift'], entry['skill']))
+        else:
+            related.sort(key=lambda entry: (-entry['lift'], -entry['count'], entry['skill']))
+        return {
+            'skill': name,
+            'documents': skill_documents,
+            'total_documents': documents,
+            'related': related[:limit]
+        }
+    
+    def cooccurrence_matrix(self, top_n: int = 15) -> Dict[str, Any]:
+        """Co-occurrence counts and lift among the top_n pattern skills by number of documents."""
+        with self._connect() as conn:
+            top = conn.execute(
+                "SELECT skill_a, count FROM skill_pairs WHERE skill_a = skill_b ORDER BY count DESC, skill_a LIMIT ?",
+                (top_n,)
+            ).fetchall()
+            documents = self._counter(conn, DOCUMENTS_COUNTER)
+            skills = [skill for skill, _ in top]
+            position = {skill: index for index, skill in enumerate(skills)}
+            counts = [[0] * len(skills) for _ in skills]
+            if skills:
+                placeholders = ','.join('?' * len(skills))
+                for skill_a, skill_b, count in conn.execute(
+                    f"SELECT skill_a, skill_b, count FROM skill_pairs "
+                    f"WHERE skill_a IN ({placeholders}) AND skill_b IN ({placeholders})",
+                    skills + skills
+                ):
+                    counts[position[skill_a]][position[skill_b]] = count
+        skill_documents = [count for _, count in top]
+        return {
+            'skills': skills,
+            'documents': skill_documents,
+            'total_documents': documents,
+            'counts': counts,
+            'lift': [
+                [round(_lift(counts[i][j], skill_documents[i], skill_documents[j], documents), 3) if i != j else None
+                 for j in range(len(skills))]
+                for i in range(len(skills))
+            ],
+            'max_count': max((counts[i][j] for i in range(len(skills)) for j in range(len(skills)) if i != j), default=0)
+        }
+    
+    def skill_pair_count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM skill_pairs WHERE skill_a < skill_b").fetchone()[0]
+    
+    def _counter(self, conn: sqlite3.Connection, name: str) -> int:
+        row = conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        try:
+            size = sum(os.path.getsize(self.db_path + suffix) for suffix in ('', '-wal')
+                       if os.path.exists(self.db_path + suffix))
+        except OSError:
+            size = None
+        return {
+            'path': self.db_path,
+            'documents': self.document_count(),
+            'skills': self.distinct_skill_count(),
+            'skill_pairs': self.skill_pair_count(),
+            'bytes': size
+        }
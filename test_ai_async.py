@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Tests for concurrent AI extraction against a local stub of the chat-completions endpoint.
+"""
+
+import asyncio
+import json
+import re
+import sys
+import os
+import threading
+import time
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from openai import AsyncOpenAI
+
+from ai_skills import AISkillExtractor, AsyncAISkillExtractor, RateLimiter, CircuitBreaker
+
+
+class StubCompletionsServer:
+    """Serves /v1/chat/completions, answering with the Skill_* words found in the prompt.
+
+    Multi-document prompts get a JSON object mapping each document id to the
+    Skill_* words of that document, leaving out documents that mention a
+    skill in ``omit_from_batch``.
+    """
+
+    def __init__(self, delay=0.2, fail_first=(), throttle_first=(), retry_after_ms=300, omit_from_batch=()):
+        self.delay = delay
+        self.omit_from_batch = set(omit_from_batch)
+        self.fail_first = set(fail_first)
+        self.throttle_first = set(throttle_first)
+        self.retry_after_ms = retry_after_ms
+        self.request_times = []
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                prompt = body['messages'][-1]['content']
+                skills = re.findall(r'Skill_\w+', prompt)
+                with stub.lock:
+                    stub.requests += 1
+                    stub.request_times.append(time.monotonic())
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    fail = bool(stub.fail_first.intersection(skills))
+                    stub.fail_first.difference_update(skills)
+                    throttle = bool(stub.throttle_first.intersection(skills))
+                    stub.throttle_first.difference_update(skills)
+                time.sleep(stub.delay)
+                with stub.lock:
+                    stub.in_flight -= 1
+
+                if fail:
+                    self._send(503, {'error': {'message': 'overloaded', 'type': 'server_error'}})
+                    return
+                if throttle:
+                    self._send(429, {'error': {'message': 'rate limited', 'type': 'rate_limit'}},
+                               {'retry-after-ms': str(stub.retry_after_ms)})
+                    return
+                documents = re.findall(r'<document id="(\w+)">(.*?)</document>', prompt, re.S)
+                if documents:
+                    answer = {doc_id: re.findall(r'Skill_\w+', text) for doc_id, text in documents
+                              if not stub.omit_from_batch.intersection(re.findall(r'Skill_\w+', text))}
+                else:
+                    answer = skills
+                self._send(200, {
+                    'id': 'chatcmpl-stub', 'object': 'chat.completion', 'created': 0,
+                    'model': body['model'],
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': json.dumps(answer)}}],
+                    'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}
+                })
+
+            def _send(self, status, payload, headers=None):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def _async_extractor(server, max_concurrency, rate_limiter=None, batch_max_tokens=0):
+    """Build an async extractor talking to the stub server, without Key Vault or the cache."""
+    extractor = AISkillExtractor.__new__(AISkillExtractor)
+    extractor.model_name = 'stub-model'
+    extractor.service_type = 'OpenAI'
+    extractor.response_cache = None
+    extractor.rate_limiter = rate_limiter or RateLimiter()
+    extractor.circuit_breaker = CircuitBreaker()
+    client_factory = partial(AsyncOpenAI, api_key='test', base_url=server.base_url, max_retries=0)
+    return AsyncAISkillExtractor(extractor, max_concurrency=max_concurrency, client_factory=client_factory,
+                                 batch_max_tokens=batch_max_tokens)
+
+
+def test_extract_skills_many_runs_concurrently_in_order():
+    """Calls overlap up to the semaphore limit and results keep the input order."""
+    with StubCompletionsServer(delay=0.2) as server:
+        async_extractor = _async_extractor(server, max_concurrency=3)
+        docs = [(f"Experienced with Skill_{i}", 'resume') for i in range(9)]
+        finished = []
+
+        start = time.perf_counter()
+        results = asyncio.run(async_extractor.extract_skills_many(
+            docs, track=False, on_result=lambda index, result: finished.append(index)))
+        elapsed = time.perf_counter() - start
+
+    assert [skills for skills, _ in results] == [[f"Skill_{i}"] for i in range(9)]
+    assert all(metadata['cached'] is False for _, metadata in results)
+    assert sorted(finished) == list(range(9))
+    assert server.max_in_flight == 3
+    # Nine serial calls would take at least 1.8 s
+    assert elapsed < 1.5
+
+
+def test_extract_skills_many_retries_failed_calls():
+    """A failing call is retried with backoff without holding up the others."""
+    with StubCompletionsServer(delay=0.05, fail_first={'Skill_B'}) as server:
+        async_extractor = _async_extractor(server, max_concurrency=2)
+        docs = [("Skill_A", 'resume'), ("Skill_B", 'job_description'), ("Skill_C", 'resume')]
+        results = asyncio.run(async_extractor.extract_skills_many(docs, track=False))
+
+    assert [skills for skills, _ in results] == [['Skill_A'], ['Skill_B'], ['Skill_C']]
+    assert results[1][1]['document_type'] == 'job_description'
+    assert server.requests == 4
+
+
+def test_throttled_call_honors_retry_after():
+    """A 429 pauses every caller for Retry-After and is retried without using up attempts."""
+    with StubCompletionsServer(delay=0.05, throttle_first={'Skill_A'}, retry_after_ms=400) as server:
+        rate_limiter = RateLimiter()
+        async_extractor = _async_extractor(server, max_concurrency=1, rate_limiter=rate_limiter)
+        docs = [("Skill_A", 'resume'), ("Skill_B", 'resume')]
+        results = asyncio.run(async_extractor.extract_skills_many(docs, track=False))
+
+    assert [skills for skills, _ in results] == [['Skill_A'], ['Skill_B']]
+    assert server.requests == 3
+    assert server.request_times[1] - server.request_times[0] >= 0.4
+    stats = rate_limiter.get_stats()
+    assert stats['throttle_events'] == 1
+    assert stats['throttle_seconds'] == 0.4
+    assert stats['delayed_requests'] == 1
+
+
+def test_extract_skills_many_without_client():
+    """Without a configured client every document gets an empty result."""
+    extractor = AISkillExtractor.__new__(AISkillExtractor)
+    extractor.async_client_factory = None
+    async_extractor = AsyncAISkillExtractor(extractor)
+    assert asyncio.run(async_extractor.extract_skills_many([("Python", 'resume')] * 2)) == [([], {}), ([], {})]
+    assert asyncio.run(async_extractor.extract_skills_many([])) == []
+
+
+if __name__ == "__main__":
+    test_extract_skills_many_runs_concurrently_in_order()
+    test_extract_skills_many_retries_failed_calls()
+    test_throttled_call_honors_retry_after()
+    test_extract_skills_many_without_client()
+    print("✅ Async AI extraction tests passed")
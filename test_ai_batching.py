@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for packing short documents into multi-document AI requests.
+"""
+
+import asyncio
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_skills import AISkillExtractor, AIResponseCache, SQLiteResponseStore
+from test_ai_async import StubCompletionsServer, _async_extractor
+
+
+def test_short_documents_share_one_request():
+    """Short documents of one type go in one request; other documents are extracted alone."""
+    docs = [(f"Job ad asking for Skill_J{i}.", 'job_description') for i in range(6)]
+    docs.insert(2, ("CV listing Skill_R0.", 'resume'))
+    docs.append(("Long CV with Skill_Long. " + 'Filler text. ' * 150, 'resume'))
+
+    with StubCompletionsServer(delay=0.05) as server:
+        async_extractor = _async_extractor(server, max_concurrency=4, batch_max_tokens=3000)
+        finished = []
+        results = asyncio.run(async_extractor.extract_skills_many(
+            docs, track=False, on_result=lambda index, result: finished.append(index)))
+
+    assert [skills for skills, _ in results] == [
+        ['Skill_J0'], ['Skill_J1'], ['Skill_R0'], ['Skill_J2'], ['Skill_J3'], ['Skill_J4'], ['Skill_J5'],
+        ['Skill_Long']
+    ]
+    assert sorted(finished) == list(range(len(docs)))
+    # One batch for the job ads, one call for the lone short CV and one for the long CV
+    assert server.requests == 3
+    assert results[0][1]['batch_size'] == 6
+    assert 'batch_size' not in results[2][1]
+    assert results[0][1]['token_usage']['total_tokens'] >= 0
+    stats = async_extractor.get_batch_stats()
+    assert stats['batch_calls'] == 1
+    assert stats['batched_documents'] == 6
+    assert stats['calls_saved'] == 5
+
+
+def test_missing_documents_fall_back_to_single_calls():
+    """A document id missing from the batched answer is extracted on its own."""
+    docs = [(f"Job ad asking for Skill_J{i}.", 'job_description') for i in range(3)]
+    with StubCompletionsServer(delay=0.05, omit_from_batch={'Skill_J1'}) as server:
+        async_extractor = _async_extractor(server, max_concurrency=2, batch_max_tokens=3000)
+        results = asyncio.run(async_extractor.extract_skills_many(docs, track=False))
+
+    assert [skills for skills, _ in results] == [['Skill_J0'], ['Skill_J1'], ['Skill_J2']]
+    assert server.requests == 2
+    stats = async_extractor.get_batch_stats()
+    assert stats['fallback_documents'] == 1
+    assert stats['calls_saved'] == 1
+
+
+def test_unanswered_batch_saves_no_calls():
+    """A batch that answers no document does not count negative savings."""
+    docs = [(f"Job ad asking for Skill_J{i}.", 'job_description') for i in range(2)]
+    with StubCompletionsServer(delay=0.05, omit_from_batch={'Skill_J0', 'Skill_J1'}) as server:
+        async_extractor = _async_extractor(server, max_concurrency=2, batch_max_tokens=3000)
+        results = asyncio.run(async_extractor.extract_skills_many(docs, track=False))
+
+    assert [skills for skills, _ in results] == [['Skill_J0'], ['Skill_J1']]
+    assert server.requests == 3
+    stats = async_extractor.get_batch_stats()
+    assert stats['batched_documents'] == 0
+    assert stats['fallback_documents'] == 2
+    assert stats['calls_saved'] == 0
+
+
+def test_batches_respect_token_ceiling_and_type():
+    """Batches stay under the token ceiling and never mix document types."""
+    extractor = AISkillExtractor.__new__(AISkillExtractor)
+    documents = [(0, 'a' * 400, 'resume'), (1, 'b' * 400, 'job_description'),
+                 (2, 'c' * 400, 'resume'), (3, 'd' * 400, 'resume')]
+    batches = extractor._plan_batches(documents, max_tokens=200)
+    assert [[index for index, _, _ in batch] for batch in batches] == [[0, 2], [1], [3]]
+
+
+def test_batched_answers_are_cached_per_document():
+    """Documents answered in a batch are served from the cache next time."""
+    docs = [(f"Job ad asking for Skill_J{i}.", 'job_description') for i in range(3)]
+    with tempfile.TemporaryDirectory() as tmp, StubCompletionsServer(delay=0.05) as server:
+        async_extractor = _async_extractor(server, max_concurrency=2, batch_max_tokens=3000)
+        extractor = async_extractor.extractor
+        extractor.response_cache = AIResponseCache(
+            SQLiteResponseStore(os.path.join(tmp, 'cache.db'), max_bytes=1024 * 1024))
+        asyncio.run(async_extractor.extract_skills_many(docs, track=False))
+        results = asyncio.run(async_extractor.extract_skills_many(docs, track=False))
+
+        # Batched answers are kept apart from single-document ones
+        text, document_type = docs[0]
+        single_key = AIResponseCache.make_key(extractor.service_type, extractor.model_name, document_type, text)
+        batch_key = AIResponseCache.make_key(extractor.service_type, extractor.model_name, document_type, text,
+                                             batched=True)
+        assert single_key != batch_key
+        assert extractor.response_cache.store.get(single_key) is None
+        assert extractor.response_cache.store.get(batch_key) is not None
+
+    assert [skills for skills, _ in results] == [['Skill_J0'], ['Skill_J1'], ['Skill_J2']]
+    assert all(metadata['cached'] for _, metadata in results)
+    assert server.requests == 1
+
+if __name__ == "__main__":
+    test_short_documents_share_one_request()
+    test_missing_documents_fall_back_to_single_calls()
+    test_unanswered_batch_saves_no_calls()
+    test_batches_respect_token_ceiling_and_type()
+    test_batched_answers_are_cached_per_document()
+    print("✅ AI batching tests passed")
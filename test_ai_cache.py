@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent AI response cache.
+"""
+
+import sys
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_skills import AISkillExtractor, AIResponseCache, SQLiteResponseStore, RateLimiter, CircuitBreaker
+
+
+class FakeCompletions:
+    """Stand-in for client.chat.completions that counts API calls."""
+
+    def __init__(self, content):
+        self.content = content
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _extractor(cache_path, model='test-model'):
+    """Build an extractor with a fake client, bypassing Key Vault configuration."""
+    extractor = AISkillExtractor.__new__(AISkillExtractor)
+    extractor.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions('["Python", "Docker"]')))
+    extractor.model_name = model
+    extractor.service_type = 'OpenAI'
+    extractor.response_cache = AIResponseCache(SQLiteResponseStore(cache_path, max_bytes=1024 * 1024))
+    extractor.rate_limiter = RateLimiter()
+    extractor.circuit_breaker = CircuitBreaker()
+    return extractor
+
+
+def test_repeated_text_is_served_from_cache():
+    """The second extraction of the same text makes no API call, even after a restart."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, 'cache.db')
+        extractor = _extractor(cache_path)
+        completions = extractor.client.chat.completions
+
+        skills, metadata = extractor.extract_skills_from_text('Python developer', 'resume', track=False)
+        assert skills == ['Python', 'Docker']
+        assert metadata['cached'] is False
+        skills, metadata = extractor.extract_skills_from_text('Python developer', 'resume', track=False)
+        assert skills == ['Python', 'Docker']
+        assert metadata['cached'] is True
+        assert completions.calls == 1
+
+        # Long documents are cached per chunk, so changing the last page reuses the first
+        first_page = 'Python developer. ' * 200
+        _, metadata = extractor.extract_skills_from_text(first_page + 'Docker engineer. ' * 50, 'resume', track=False,
+                                                         page_offsets=[0, len(first_page)])
+        assert metadata['chunks'] == 2
+        assert completions.calls == 3
+        _, metadata = extractor.extract_skills_from_text(first_page + 'Kubernetes engineer. ' * 50, 'resume', track=False,
+                                                         page_offsets=[0, len(first_page)])
+        assert metadata['cached'] is False
+        assert metadata['chunks_cached'] == 1
+        assert completions.calls == 4
+
+        # A different document type or model uses a different prompt
+        extractor.extract_skills_from_text('Python developer', 'job_description', track=False)
+        assert completions.calls == 5
+
+        restarted = _extractor(cache_path, model='other-model')
+        restarted.extract_skills_from_text('Python developer', 'resume', track=False)
+        assert restarted.client.chat.completions.calls == 1
+        restarted.model_name = 'test-model'
+        _, metadata = restarted.extract_skills_from_text('Python developer', 'resume', track=False)
+        assert metadata['cached'] is True
+
+        stats = extractor.response_cache.get_stats()
+        assert stats['hits'] == 2
+        assert stats['misses'] == 5
+        assert stats['entries'] == 6
+
+
+def test_bypass_skips_cache():
+    """use_cache=False always calls the API and leaves the cache untouched."""
+    with tempfile.TemporaryDirectory() as tmp:
+        extractor = _extractor(os.path.join(tmp, 'cache.db'))
+
+        for _ in range(2):
+            _, metadata = extractor.extract_skills_from_text('Go engineer', 'resume', track=False, use_cache=False)
+            assert metadata['cached'] is False
+        assert extractor.client.chat.completions.calls == 2
+
+        stats = extractor.response_cache.get_stats()
+        assert stats['hits'] == stats['misses'] == stats['stores'] == 0
+        assert stats['entries'] == 0
+
+
+def test_ttl_and_lru_eviction():
+    """Expired entries are misses and the least recently used entries are evicted first."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteResponseStore(os.path.join(tmp, 'cache.db'), max_bytes=250)
+        cache = AIResponseCache(store, ttl_seconds=3600)
+
+        cache.put('a', 'A' * 100)
+        time.sleep(0.01)
+        cache.put('b', 'B' * 100)
+        time.sleep(0.01)
+        assert cache.get('a') == 'A' * 100  # 'a' is now more recent than 'b'
+        time.sleep(0.01)
+        cache.put('c', 'C' * 100)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 'A' * 100
+        assert cache.get('c') == 'C' * 100
+        assert cache.get_stats()['evictions'] == 1
+
+        expired = AIResponseCache(store, ttl_seconds=0)
+        time.sleep(0.01)
+        assert expired.get('a') is None
+        assert store.usage()['entries'] == 1
+
+
+def test_cache_errors_do_not_break_extraction():
+    """A failing cache backend is counted and extraction still calls the API."""
+    class BrokenStore:
+        max_bytes = 0
+
+        def get(self, key):
+            raise OSError('disk full')
+
+        def put(self, key, response):
+            raise OSError('disk full')
+
+        def usage(self):
+            raise OSError('disk full')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        extractor = _extractor(os.path.join(tmp, 'cache.db'))
+        extractor.response_cache = AIResponseCache(BrokenStore())
+
+        skills, metadata = extractor.extract_skills_from_text('Rust developer', 'resume', track=False)
+        assert skills == ['Python', 'Docker']
+        assert metadata['cached'] is False
+        assert extractor.response_cache.get_stats()['errors'] == 2
+
+
+if __name__ == "__main__":
+    test_repeated_text_is_served_from_cache()
+    test_bypass_skips_cache()
+    test_ttl_and_lru_eviction()
+    test_cache_errors_do_not_break_extraction()
+    print("✅ AI response cache tests passed")
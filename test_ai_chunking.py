@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for chunked AI extraction of long documents.
+"""
+
+import asyncio
+import sys
+import os
+from unittest import mock
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ai_skills
+from ai_skills import chunk_document, CHARS_PER_TOKEN
+from test_ai_async import StubCompletionsServer, _async_extractor
+
+
+def test_chunks_prefer_page_boundaries():
+    """Chunks end at the last page start that fits, then at sentence ends."""
+    pages = ['Page one text. ' * 10, 'Page two text. ' * 10, 'Page three text. ' * 10]
+    text = ' '.join(pages)
+    offsets = [0, len(pages[0]) + 1, len(pages[0]) + len(pages[1]) + 2]
+
+    # Two pages fit in one chunk, the third starts a new one
+    chunks = chunk_document(text, max_tokens=(offsets[2] + 10) // CHARS_PER_TOKEN, page_offsets=offsets)
+    assert chunks == [' '.join(pages[:2]).strip(), pages[2].strip()]
+
+    # Without page offsets the split falls on a sentence end
+    chunks = chunk_document(text, max_tokens=50)
+    assert all(len(chunk) <= 50 * CHARS_PER_TOKEN for chunk in chunks)
+    assert all(chunk.endswith('.') for chunk in chunks)
+    assert ' '.join(chunks).split() == text.split()
+
+
+def test_chunks_drop_contact_details():
+    """E-mail addresses, URLs and phone numbers are not sent to the model."""
+    text = "Ola Nordmann, ola@example.no, +47 912 34 567, https://github.com/ola. Python 2015 - 2020."
+    chunks = chunk_document(text)
+    assert chunks[0].split() == ['Ola', 'Nordmann,', ',', ',', 'Python', '2015', '-', '2020.']
+    assert chunk_document('') == []
+
+
+def test_long_document_chunks_run_concurrently_and_merge():
+    """Chunks are extracted in parallel, skills merged in order and capped by AI_MAX_CHUNKS."""
+    pages = [f"Worked with Skill_{i} and Skill_Common. " + 'Filler text. ' * 20 for i in range(6)]
+    text = ''
+    offsets = []
+    for page in pages:
+        offsets.append(len(text))
+        text += page
+    max_tokens = len(pages[0]) // CHARS_PER_TOKEN + 1
+
+    with mock.patch.object(ai_skills, 'AI_CHUNK_TOKENS', max_tokens), \
+            mock.patch.object(ai_skills, 'AI_MAX_CHUNKS', 4), \
+            StubCompletionsServer(delay=0.2) as server:
+        async_extractor = _async_extractor(server, max_concurrency=4)
+        [(skills, metadata)] = asyncio.run(async_extractor.extract_skills_many(
+            [(text, 'resume', offsets)], track=False))
+
+    assert skills == ['Skill_0', 'Skill_Common', 'Skill_1', 'Skill_2', 'Skill_3']
+    assert metadata['chunks'] == 4
+    assert metadata['chunks_total'] == 6
+    assert metadata['chunks_failed'] == 0
+    assert server.requests == 4
+    assert server.max_in_flight == 4
+    # The stub reports 2 tokens per call
+    assert metadata['token_usage']['total_tokens'] == 8
+    assert metadata['token_usage']['estimated_tokens'] > 4 * ai_skills.MAX_COMPLETION_TOKENS
+    # Four serial calls would take at least 0.8 s
+    assert 200 <= metadata['latency_ms'] < 700
+
+
+if __name__ == "__main__":
+    test_chunks_prefer_page_boundaries()
+    test_chunks_drop_contact_details()
+    test_long_document_chunks_run_concurrently_and_merge()
+    print("✅ AI chunking tests passed")
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Tests for the AI circuit breaker and the re-drive of pending AI extraction.
+"""
+
+import sys
+import os
+import time
+import uuid
+from functools import partial
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_gating import decide_ai_extraction
+from ai_skills import (AISkillExtractor, AIServiceUnavailable, CircuitBreaker, RateLimiter, RetryState,
+                       BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN, RETRY_BACKOFF, RETRY_THROTTLED)
+from test_deduplication import _upload
+from test_ingestion import _make_excel
+
+
+class FlakyCompletions:
+    """client.chat.completions stand-in that fails while ``down`` is set."""
+
+    def __init__(self, content):
+        self.content = content
+        self.down = True
+        self.calls = 0
+
+    def _respond(self):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("connection refused")
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    def create(self, **kwargs):
+        return self._respond()
+
+
+class FakeAsyncClient:
+    """Async client stand-in usable as ``async with client_factory() as client``."""
+
+    def __init__(self, completions):
+        self.chat = SimpleNamespace(completions=self)
+        self.completions = completions
+
+    async def create(self, **kwargs):
+        return self.completions._respond()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+def test_breaker_opens_probes_and_closes():
+    """Consecutive failures open the breaker; one probe is allowed after the reset time."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.2)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == BREAKER_OPEN
+    assert not breaker.allow()
+    assert not breaker.ready()
+
+    time.sleep(0.25)
+    assert breaker.ready()
+    assert breaker.allow()
+    assert breaker.state == BREAKER_HALF_OPEN
+    assert not breaker.allow()  # only one probe at a time
+
+    breaker.record_failure()
+    assert breaker.state == BREAKER_OPEN
+    time.sleep(0.25)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == BREAKER_CLOSED
+    assert breaker.get_stats()['times_opened'] == 1
+
+
+def test_retry_state_actions():
+    """Throttles pause without using attempts; outages back off and finally raise."""
+    class ApiError(Exception):
+        def __init__(self, status_code, headers=None):
+            super().__init__(f"HTTP {status_code}")
+            self.status_code = status_code
+            self.response = SimpleNamespace(headers=headers or {})
+
+    breaker = CircuitBreaker(failure_threshold=10, reset_seconds=3600)
+    retry = RetryState(breaker, max_retries=2)
+    assert retry.next_attempt()
+    assert retry.failed(ApiError(429, {'retry-after': '3'})) == (RETRY_THROTTLED, 3.0)
+    assert retry.attempt == 0
+    assert breaker.consecutive_failures == 0
+
+    assert retry.failed(ApiError(503)) == (RETRY_BACKOFF, 1.0)
+    assert breaker.consecutive_failures == 1
+    assert retry.next_attempt()
+    try:
+        retry.failed(ConnectionError("connection refused"))
+        assert False, "expected AIServiceUnavailable"
+    except AIServiceUnavailable:
+        pass
+    assert not retry.next_attempt()
+
+    # A rejected request is not an outage: give up without raising
+    retry = RetryState(breaker, max_retries=1)
+    assert retry.failed(ApiError(400)) == (None, 0.0)
+    assert breaker.consecutive_failures == 0
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=3600)
+    breaker.record_failure()
+    try:
+        RetryState(breaker).next_attempt()
+        assert False, "expected AIServiceUnavailable"
+    except AIServiceUnavailable as e:
+        assert str(e) == 'AI circuit breaker is open'
+
+
+def test_open_breaker_skips_ai_and_marks_pending():
+    """Once open, extraction returns immediately with ai_pending instead of retrying."""
+    extractor = AISkillExtractor.__new__(AISkillExtractor)
+    completions = FlakyCompletions('["Python"]')
+    extractor.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    extractor.model_name = 'test-model'
+    extractor.service_type = 'OpenAI'
+    extractor.response_cache = None
+    extractor.rate_limiter = RateLimiter()
+    extractor.circuit_breaker = CircuitBreaker(failure_threshold=1, reset_seconds=3600)
+
+    skills, metadata = extractor.extract_skills_from_text('Python developer', 'resume', track=False)
+    assert skills == []
+    assert metadata['ai_pending'] is True
+    assert completions.calls == 1
+
+    start = time.perf_counter()
+    skills, metadata = extractor.extract_skills_from_text('Go developer', 'resume', track=False)
+    assert time.perf_counter() - start < 0.1
+    assert metadata['ai_pending'] is True
+    assert metadata['pending_reason'] == 'AI circuit breaker is open'
+    assert completions.calls == 1
+
+
+def test_pending_upload_is_redriven(app_module):
+    """Uploads made while the breaker is open get their AI skills from the re-drive."""
+    extractor = app_module.ai_extractor
+    async_extractor = app_module.async_ai_extractor
+    originals = (extractor.circuit_breaker, async_extractor.client_factory, app_module.decide_ai_extraction)
+    completions = FlakyCompletions('["Stakeholder Management"]')
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=3600)
+    breaker.record_failure()
+    extractor.circuit_breaker = breaker
+    async_extractor.client_factory = lambda: FakeAsyncClient(completions)
+    app_module.decide_ai_extraction = partial(decide_ai_extraction, policy='always')
+    try:
+        client = app_module.app.test_client()
+        marker = uuid.uuid4().hex
+        filename = f'cv_{marker}.xlsx'
+        result = _upload(client, [(filename, _make_excel(f"Python {marker}"))])
+
+        assert result['summary']['ai_pending_files'] == 1
+        assert result['processed_files'][0]['ai_pending'] is True
+        assert completions.calls == 0
+        assert filename in app_module.find_ai_pending_documents()
+
+        # Nothing is re-driven while the breaker is open
+        assert app_module.redrive_pending_ai_extraction() == 0
+
+        breaker.reset_seconds = 0
+        completions.down = False
+        count = extractor.ai_skill_counter['Stakeholder Management']
+        assert app_module.redrive_pending_ai_extraction() >= 1
+
+        doc_data = app_module.stats_store.get_document(filename)
+        assert doc_data['ai_skills_found'] == ['Stakeholder Management']
+        assert not doc_data['ai_metadata'].get('ai_pending')
+        assert filename not in app_module.find_ai_pending_documents()
+        assert extractor.ai_skill_counter['Stakeholder Management'] > count
+        assert breaker.state == BREAKER_CLOSED
+    finally:
+        extractor.circuit_breaker, async_extractor.client_factory, app_module.decide_ai_extraction = originals
+
+
+if __name__ == "__main__":
+    test_breaker_opens_probes_and_closes()
+    test_retry_state_actions()
+    test_open_breaker_skips_ai_and_marks_pending()
+    from conftest import isolated_app
+    with isolated_app() as app_module:
+        test_pending_upload_is_redriven(app_module)
+    print("✅ AI circuit breaker tests passed")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for confidence gating of AI skill extraction.
+"""
+
+import sys
+import os
+from functools import partial
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_gating import TextSignals, decide_ai_extraction, score_document, summarize_gate_decisions
+from benchmark_document_parsing import build_pdf
+from ingestion import IngestionPool, parse_and_match
+from test_ingestion import RecordingStore, _make_excel
+
+CLEAN_CV = ("Senior software engineer with ten years of experience in the development of web services. "
+            "I have worked with Python, Django and PostgreSQL, and our team used Docker and Kubernetes "
+            "for all deployments. Responsible for the design of REST APIs and the mentoring of new developers.")
+CLEAN_SKILLS = ['Python', 'Django', 'PostgreSQL', 'Docker', 'Kubernetes', 'REST API']
+NORWEGIAN_AD = ("Vi søker en erfaren utvikler som har god kunnskap om Java og Spring. Du vil jobbe med "
+                "utvikling av løsninger for våre kunder, og det er en fordel med erfaring fra skyløsninger.")
+NORWEGIAN_CV = ("Jeg er en erfaren utvikler med god kunnskap om Python, Django og PostgreSQL. Jeg har jobbet "
+                "med utvikling av løsninger i Docker og Kubernetes, og har ansvar for samarbeid i teamet.")
+CORRUPTED_CV = "Snr bckend dvlpr jvscrp pyhon kbernes dokr mysq grphq scrm knbn xprnc wth sprng"
+
+
+def test_clean_english_document_skips_ai():
+    """A clean English document with good pattern coverage stays with pattern matching."""
+    decision = decide_ai_extraction(CLEAN_CV, CLEAN_SKILLS, policy='gated')
+    assert decision['route_to_ai'] is False
+    assert decision['reason'] == 'pattern results confident'
+    assert decision['confidence'] >= decision['threshold']
+    assert decision['signals']['norwegian_share'] == 0
+    assert decision['signals']['estimated_tokens'] > 0
+
+
+def test_norwegian_and_corrupted_documents_go_to_ai():
+    """Norwegian text, corrupted extraction and thin pattern results lower the confidence."""
+    norwegian = decide_ai_extraction(NORWEGIAN_AD, ['Java', 'Spring'], policy='gated')
+    corrupted = decide_ai_extraction(CORRUPTED_CV, [], policy='gated')
+    assert norwegian['route_to_ai'] is True
+    assert norwegian['signals']['norwegian_share'] > 0.8
+    assert corrupted['route_to_ai'] is True
+    assert corrupted['signals']['corrupted_ratio'] > 0.5
+    assert score_document(CLEAN_CV, [])['confidence'] < score_document(CLEAN_CV, CLEAN_SKILLS)['confidence']
+
+
+def test_mostly_norwegian_document_goes_to_ai():
+    """Norwegian text alone routes a document to AI, even with good pattern coverage."""
+    decision = decide_ai_extraction(NORWEGIAN_CV, CLEAN_SKILLS, policy='gated')
+    assert decision['signals']['norwegian_share'] > 0.9
+    assert decision['signals']['corrupted_ratio'] == 0
+    assert decision['confidence'] < decision['threshold']
+    assert decision['route_to_ai'] is True
+
+
+def test_links_and_vowelless_terms_are_not_corruption():
+    """URLs, e-mail addresses and terms such as html do not count as corrupted text."""
+    text = (CLEAN_CV + " Portfolio at https://www.example.com/jnsmth/prjcts and http://gthb.io, "
+            "mail jnsmth@xmpl.no. Built html and xhtml pages served over https.")
+    assert score_document(text, CLEAN_SKILLS)['corrupted_ratio'] == 0
+    assert decide_ai_extraction(text, CLEAN_SKILLS, policy='gated')['route_to_ai'] is False
+
+
+def test_signals_cover_text_beyond_the_kept_start():
+    """Page-by-page signals match the whole text, including pages past the kept text."""
+    pages = [CLEAN_CV, NORWEGIAN_AD, CORRUPTED_CV]
+    signals = TextSignals()
+    for page in pages:
+        signals.feed(page)
+    whole = ' '.join(pages)
+    assert score_document(CLEAN_CV, CLEAN_SKILLS, signals) == score_document(whole, CLEAN_SKILLS)
+
+    content = build_pdf(6)
+    full = parse_and_match('resume.pdf', content, max_text_chars=None)
+    clipped = parse_and_match('resume.pdf', content, max_text_chars=200)
+    assert len(clipped.text) == 200 and len(full.text) > 200
+    assert clipped.skills == full.skills
+    assert vars(clipped.signals) == vars(TextSignals(full.text))
+    assert decide_ai_extraction(clipped.text, clipped.skills, signals=clipped.signals) == \
+        decide_ai_extraction(full.text, full.skills)
+
+
+def test_policies_override_the_score():
+    """always and never ignore the confidence score."""
+    assert decide_ai_extraction(CLEAN_CV, CLEAN_SKILLS, policy='always')['route_to_ai'] is True
+    assert decide_ai_extraction(CORRUPTED_CV, [], policy='never')['route_to_ai'] is False
+    assert decide_ai_extraction(CLEAN_CV, CLEAN_SKILLS, policy='bogus')['policy'] == 'gated'
+
+
+def test_ingestion_sends_only_gated_documents_to_ai():
+    """Skipped documents never reach extract_ai_many and every result records its decision."""
+    pool = IngestionPool(process_workers=0, io_workers=2)
+    batches = []
+
+    def extract_ai_many(documents, on_result):
+        batches.append([filename for _, filename, _ in documents])
+        return [(['Spring Boot'], {'extraction_method': 'ai'}) for _ in documents]
+
+    uploads = [("cv.xlsx", _make_excel(CLEAN_CV)), ("utvikler.xlsx", _make_excel(NORWEGIAN_AD))]
+    try:
+        results = pool.process_files(uploads, store_file=RecordingStore(), extract_ai_many=extract_ai_many,
+                                     ai_gate=partial(decide_ai_extraction, policy='gated'))
+    finally:
+        pool.shutdown()
+
+    assert batches == [['utvikler.xlsx']]
+    assert results[0].ai_skills == []
+    assert results[0].ai_metadata['ai_skipped'] is True
+    assert results[0].ai_metadata['gate']['route_to_ai'] is False
+    assert results[1].ai_skills == ['Spring Boot']
+    assert results[1].ai_metadata['extraction_method'] == 'ai'
+    assert results[1].ai_metadata['gate']['route_to_ai'] is True
+
+    summary = summarize_gate_decisions([{'ai_metadata': result.ai_metadata} for result in results] + [{}])
+    assert summary['documents_gated'] == 2
+    assert summary['ai_skipped'] == 1
+    assert summary['skip_rate'] == 0.5
+    assert summary['estimated_tokens_saved'] == results[0].ai_metadata['gate']['signals']['estimated_tokens']
+
+
+if __name__ == "__main__":
+    test_clean_english_document_skips_ai()
+    test_norwegian_and_corrupted_documents_go_to_ai()
+    test_mostly_norwegian_document_goes_to_ai()
+    test_links_and_vowelless_terms_are_not_corruption()
+    test_signals_cover_text_beyond_the_kept_start()
+    test_policies_override_the_score()
+    test_ingestion_sends_only_gated_documents_to_ai()
+    print("✅ AI gating tests passed")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the client-side AI rate limiter.
+"""
+
+import sys
+import os
+import threading
+import time
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_skills import RateLimiter, estimate_request_tokens, retry_after_seconds
+
+
+def test_token_budget_delays_callers_in_arrival_order():
+    """Once the token budget is spent, callers wait for refill one after another."""
+    limiter = RateLimiter(tokens_per_minute=6000)  # refills 100 tokens per second
+    assert limiter.acquire(6000) == 0.0
+
+    waits = {}
+
+    def call(name):
+        waits[name] = limiter.acquire(50)
+
+    first = threading.Thread(target=call, args=('first',))
+    first.start()
+    time.sleep(0.05)
+    second = threading.Thread(target=call, args=('second',))
+    second.start()
+    first.join()
+    second.join()
+
+    assert 0.4 <= waits['first'] < 0.7
+    assert 0.85 <= waits['second'] + 0.05 < 1.25
+    stats = limiter.get_stats()
+    assert stats['requests'] == 3
+    assert stats['delayed_requests'] == 2
+    assert stats['waiting'] == 0
+    assert stats['max_wait_ms'] >= 400
+
+
+def test_request_budget_and_throttle_pause():
+    """The request budget and a throttle pause both hold new callers."""
+    limiter = RateLimiter(requests_per_minute=600)  # refills 10 requests per second
+    for _ in range(600):
+        limiter.acquire(1)
+    start = time.monotonic()
+    limiter.acquire(1)
+    assert 0.05 <= time.monotonic() - start < 0.3
+
+    unlimited = RateLimiter()
+    unlimited.throttle(0.3)
+    start = time.monotonic()
+    unlimited.acquire(10 ** 6)
+    assert time.monotonic() - start >= 0.3
+    assert unlimited.get_stats()['throttle_events'] == 1
+
+
+def test_retry_after_and_token_estimates():
+    """Retry-After is read from error responses and prompts are costed with the completion budget."""
+    def error(headers):
+        return SimpleNamespace(response=SimpleNamespace(headers=headers), status_code=429)
+
+    assert retry_after_seconds(error({'retry-after-ms': '1500'})) == 1.5
+    assert retry_after_seconds(error({'retry-after': '7'})) == 7.0
+    assert retry_after_seconds(error({})) is None
+    assert retry_after_seconds(RuntimeError('no response')) is None
+    assert retry_after_seconds(error({'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'})) == 0.0
+
+    params = {'messages': [{'content': 'x' * 400}, {'content': 'y' * 401}], 'max_tokens': 1000}
+    assert estimate_request_tokens(params) == 1201
+
+
+if __name__ == "__main__":
+    test_token_budget_delays_callers_in_arrival_order()
+    test_request_budget_and_throttle_pause()
+    test_retry_after_and_token_estimates()
+    print("✅ AI rate limiter tests passed")
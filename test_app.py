@@ -6,13 +6,20 @@ This script demonstrates the core functionality without requiring a PDF file.
 
 import sys
 import os
+import tempfile
 from datetime import datetime
 
 # Add the current directory to the path to import our modules
 sys.path.insert(0, os.path.dirname(__file__))
 
-from app import extract_skills, skill_counter, skill_documents, processed_documents, monthly_skill_data, get_monthly_chart_data
+import app as app_module
+from app import extract_skills, get_monthly_chart_data
 from skills import tech_skills
+from skill_postings import skill_documents
+from stats_store import StatsStore
+
+# Simulated documents go to a throwaway stats store instead of the application's
+app_module.stats_store = StatsStore(os.path.join(tempfile.mkdtemp(), 'stats.db'))
 
 def test_skill_extraction():
     """Test the skill extraction functionality with sample text."""
@@ -69,10 +76,12 @@ def test_document_tracking():
     print("DOCUMENT TRACKING TEST:")
     print("-" * 25)
     
+    stats_store = app_module.stats_store
+    
     # Check if we already have data to avoid resetting
-    existing_data = len(processed_documents) > 0
+    existing_data = stats_store.document_count() > 0
     if existing_data:
-        print(f"Found existing data: {len(processed_documents)} documents, {len(skill_counter)} skills")
+        print(f"Found existing data: {stats_store.document_count()} documents, {stats_store.distinct_skill_count()} skills")
         print("Skipping data generation to preserve existing chart data...")
         return
     
@@ -102,33 +111,20 @@ def test_document_tracking():
         print(f"  File date: {file_date}")
         print(f"  Skills: {skills}")
         
-        # Get month key for tracking
-        month_key = file_date[:7]  # Get YYYY-MM format
-        
-        # Update counters and tracking
-        for skill in skills:
-            skill_counter[skill] += 1
-            
-            # Track monthly data
-            monthly_skill_data[skill][month_key] += 1
-            
-            # Track which document contains this skill
-            skill_documents[skill].append({
-                'filename': filename,
-                'upload_date': upload_date,
-                'file_date': file_date
-            })
-        
-        # Track processed document
-        processed_documents[filename] = {
+        # Store the document; its skills are counted in the month of file_date
+        stats_store.add_document(filename, {
             'upload_date': upload_date,
             'file_date': file_date,
             'skills_found': skills
-        }
+        })
         print()
     
+    assert stats_store.document_count() == len(sample_documents)
+    assert stats_store.skill_count('Python') == 3
+    
     print("MONTHLY SKILL DATA SAMPLE:")
     print("-" * 27)
+    monthly_skill_data = stats_store.export_stats()['monthly_skill_data']
     for skill in ["Python", "JavaScript", "React"][:3]:
         if skill in monthly_skill_data:
             print(f"{skill}:")
@@ -142,10 +138,11 @@ def test_api_format():
     print("API RESPONSE FORMAT:")
     print("-" * 20)
     
+    skill_counts = app_module.stats_store.skill_counts()
     api_response = {
-        'total_skills': len(skill_counter),
-        'skills': dict(skill_counter),
-        'top_skills': skill_counter.most_common(20)
+        'total_skills': len(skill_counts),
+        'skills': dict(skill_counts),
+        'top_skills': skill_counts[:20]
     }
     
     print(f"Total unique skills: {api_response['total_skills']}")
@@ -159,9 +156,10 @@ def test_new_features():
     print("-" * 18)
     
     # Test skill details structure
+    stats_data = app_module.stats_store.export_stats()
     skills_with_docs = []
-    for skill, count in skill_counter.most_common():
-        documents = skill_documents.get(skill, [])
+    for skill, count in app_module.stats_store.skill_counts():
+        documents = skill_documents(stats_data).get(skill, [])
         skills_with_docs.append({
             'skill': skill,
             'count': count,
@@ -173,7 +171,7 @@ def test_new_features():
         sample_skill = skills_with_docs[0]
         print(f"Sample: {sample_skill['skill']} found {sample_skill['count']} times in {len(sample_skill['documents'])} documents")
     
-    print(f"Total processed documents: {len(processed_documents)}")
+    print(f"Total processed documents: {app_module.stats_store.document_count()}")
     print("✅ Document metadata tracking: Working")
     print("✅ File date extraction: Simulated (PDF date extraction available)")
     print("✅ Skill-document relationships: Working")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared, pooled Azure Blob Storage client.
+"""
+
+import base64
+import sys
+import os
+import threading
+import time
+from unittest import mock
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from azure.core.exceptions import ResourceExistsError
+
+import blob_storage
+
+CONNECTION_STRING = ('DefaultEndpointsProtocol=https;AccountName=test;AccountKey='
+                     + base64.b64encode(b'k' * 32).decode('ascii') + ';EndpointSuffix=core.windows.net')
+
+
+class FakeContainerClient:
+    def __init__(self, name):
+        self.name = name
+        self.create_calls = 0
+
+    def create_container(self):
+        self.create_calls += 1
+        raise ResourceExistsError("ContainerAlreadyExists")
+
+
+class FakeServiceClient:
+    def get_container_client(self, name):
+        return FakeContainerClient(name)
+
+    def close(self):
+        pass
+
+
+def test_client_is_created_once_per_process():
+    """Concurrent callers share one client, and container clients are cached."""
+    created = []
+
+    def slow_create(connection_string):
+        created.append(connection_string)
+        time.sleep(0.01)
+        return FakeServiceClient()
+
+    blob_storage.reset_blob_clients()
+    try:
+        with mock.patch.object(blob_storage, 'get_application_config',
+                               return_value={'azure_storage_connection_string': CONNECTION_STRING}), \
+                mock.patch.object(blob_storage, 'create_blob_service_client', side_effect=slow_create):
+            threads = [threading.Thread(target=blob_storage.get_blob_service_client) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert created == [CONNECTION_STRING]
+
+            reports = blob_storage.get_container_client('reports', create=True)
+            assert blob_storage.get_container_client('reports', create=True) is reports
+            assert reports.create_calls == 1
+            assert blob_storage.get_container_client('uploads') is not reports
+    finally:
+        blob_storage.reset_blob_clients()
+
+
+def test_unconfigured_storage_is_retried():
+    """Without storage configuration no client is cached, so a later call can still create one."""
+    blob_storage.reset_blob_clients()
+    try:
+        with mock.patch.object(blob_storage, 'get_application_config', return_value={}), \
+                mock.patch.dict(os.environ, {'AZURE_STORAGE_ACCOUNT_NAME': ''}):
+            assert blob_storage.get_blob_service_client() is None
+            assert blob_storage.get_container_client('uploads') is None
+        with mock.patch.object(blob_storage, 'get_application_config',
+                               return_value={'azure_storage_connection_string': CONNECTION_STRING}):
+            assert blob_storage.get_blob_service_client() is not None
+    finally:
+        blob_storage.reset_blob_clients()
+
+
+def test_client_uses_a_pooled_transport():
+    """The client and its container clients share one pooled requests session."""
+    client = blob_storage.create_blob_service_client(CONNECTION_STRING, pool_maxsize=7)
+    transport = client._pipeline._transport
+    assert transport.session.get_adapter('https://test.blob.core.windows.net')._pool_maxsize == 7
+    assert client.get_container_client('uploads')._pipeline._transport._transport is transport
+    client.close()
+
+
+if __name__ == "__main__":
+    test_client_is_created_once_per_process()
+    test_unconfigured_storage_is_retried()
+    test_client_uses_a_pooled_transport()
+    print("✅ Blob storage client tests passed")
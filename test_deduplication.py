@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for content-hash deduplication of uploaded documents.
+"""
+
+import io
+import sys
+import os
+import uuid
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_ingestion import _make_excel
+
+
+def _upload(client, files, query=''):
+    data = {'files': [(io.BytesIO(content), name) for name, content in files]}
+    response = client.post('/upload' + query, data=data, content_type='multipart/form-data')
+    return response.get_json()
+
+
+def test_duplicate_upload_reuses_stored_result(app_module):
+    """Re-uploading the same bytes under another name does not inflate the counters."""
+    client = app_module.app.test_client()
+    marker = uuid.uuid4().hex
+    content = _make_excel(f"Python and Docker {marker}")
+
+    first = _upload(client, [(f'cv_{marker}.xlsx', content)])
+    assert first['summary']['duplicate_files'] == 0
+    store = app_module.stats_store
+    counts = (store.skill_count('Python'), store.skill_count('Docker'))
+    documents = store.document_count()
+
+    second = _upload(client, [
+        (f'renamed_{marker}.xlsx', content),
+        (f'other_{marker}.xlsx', _make_excel(f"Kubernetes {marker}")),
+    ])
+    assert second['success']
+    assert second['summary']['duplicate_files'] == 1
+    assert second['summary']['dedup_hit_rate'] == 0.5
+    duplicate = second['processed_files'][0]
+    assert duplicate['duplicate_of'] == f'cv_{marker}.xlsx'
+    assert duplicate['pattern_skills'] == first['processed_files'][0]['pattern_skills']
+
+    assert (store.skill_count('Python'), store.skill_count('Docker')) == counts
+    assert store.get_document(f'renamed_{marker}.xlsx') is None
+    assert store.document_count() == documents + 1
+
+
+def test_duplicates_within_one_upload_and_force(app_module):
+    """Identical files in one upload are processed once; force=1 reprocesses."""
+    client = app_module.app.test_client()
+    marker = uuid.uuid4().hex
+    content = _make_excel(f"Terraform {marker}")
+
+    result = _upload(client, [(f'a_{marker}.xlsx', content), (f'b_{marker}.xlsx', content)])
+    assert result['summary']['processed_files'] == 2
+    assert result['summary']['duplicate_files'] == 1
+    assert result['processed_files'][1]['duplicate_of'] == f'a_{marker}.xlsx'
+    count = app_module.stats_store.skill_count('Terraform')
+
+    forced = _upload(client, [(f'c_{marker}.xlsx', content)], query='?force=1')
+    assert forced['summary']['duplicate_files'] == 0
+    assert app_module.stats_store.skill_count('Terraform') == count + 1
+    assert app_module.stats_store.find_by_hash(app_module.document_hash(content))[0] == f'c_{marker}.xlsx'
+
+
+if __name__ == "__main__":
+    from conftest import isolated_app
+    with isolated_app() as app_module:
+        test_duplicate_upload_reuses_stored_result(app_module)
+    with isolated_app() as app_module:
+        test_duplicates_within_one_upload_and_force(app_module)
+    print("✅ Deduplication tests passed")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for single-pass document parsing.
+"""
+
+import struct
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import document_parsing
+from document_parsing import (
+    parse_document, iter_pdf_page_text, extract_text_from_pdf, get_pdf_creation_date,
+    extract_text_from_excel, get_excel_creation_date
+)
+from skills import alias_skill_matcher
+from benchmark_document_parsing import build_pdf, build_xlsx
+
+
+def _record(kind, data=b''):
+    return struct.pack('<HH', kind, len(data)) + data
+
+
+def _build_xls(rows):
+    """Build a minimal BIFF8 .xls stream with one sheet of text cells."""
+    def bof(kind):
+        return _record(0x0809, struct.pack('<HHHHII', 0x0600, kind, 0, 1997, 0, 6))
+
+    def workbook_globals(sheet_offset):
+        name = b'Sheet1'
+        boundsheet = struct.pack('<IBBBB', sheet_offset, 0, 0, len(name), 0) + name
+        return bof(0x0005) + _record(0x0085, boundsheet) + _record(0x000A)
+
+    cells = b''.join(
+        _record(0x0204, struct.pack('<HHHHB', row, col, 0, len(value), 0) + value.encode('latin-1'))
+        for row, values in enumerate(rows) for col, value in enumerate(values)
+    )
+    sheet = bof(0x0010) + cells + _record(0x000A)
+    return workbook_globals(len(workbook_globals(0))) + sheet
+
+
+def test_parse_pdf_once():
+    """A PDF yields text, page count, creation date and stage timings."""
+    content = build_pdf(3, creation_date='20240612083000')
+    document = parse_document(content, 'resume.pdf')
+
+    assert document.file_type == 'pdf'
+    assert document.page_count == 3
+    assert document.creation_date == '2024-06-12'
+    assert document.text == extract_text_from_pdf(content)
+    assert document.creation_date == get_pdf_creation_date(content)
+    assert {'open', 'text', 'metadata', 'total'} <= set(document.timings)
+
+
+def test_parse_excel_once():
+    """An .xlsx workbook yields the same text and date as the separate helpers."""
+    content = build_xlsx(2, rows_per_sheet=10)
+    document = parse_document(content, 'resume.xlsx')
+
+    assert document.file_type == 'excel'
+    assert document.page_count == 2
+    assert document.text and document.text == extract_text_from_excel(content, 'resume.xlsx')
+    assert document.creation_date == get_excel_creation_date(content, 'resume.xlsx')
+
+
+def test_parse_legacy_xls():
+    """A legacy .xls workbook is read with xlrd."""
+    content = _build_xls([['Python', 'SQL'], ['Kubernetes']])
+    document = parse_document(content, 'resume.xls')
+
+    assert document.file_type == 'excel'
+    assert document.page_count == 1
+    assert document.text == 'Python SQL Kubernetes'
+    assert extract_text_from_excel(content, 'resume.xls') == document.text
+
+
+def test_pdf_page_cap():
+    """The page cap limits the pages read and reports truncation."""
+    content = build_pdf(5)
+    document = parse_document(content, 'resume.pdf', max_pages=2)
+    assert document.page_count == 5
+    assert document.pages_parsed == 2
+    assert document.truncated
+    assert document.text == ' '.join(list(iter_pdf_page_text(content, max_pages=0))[:2])
+
+    full = parse_document(content, 'resume.pdf', max_pages=0)
+    assert not full.truncated and full.pages_parsed == 5
+    assert full.text == extract_text_from_pdf(content)
+
+
+def test_legacy_pdf_helper_reads_every_page():
+    """extract_text_from_pdf is not limited by PDF_MAX_PAGES."""
+    content = build_pdf(5)
+    saved = document_parsing.PDF_MAX_PAGES
+    document_parsing.PDF_MAX_PAGES = 2
+    try:
+        assert parse_document(content, 'resume.pdf').pages_parsed == 2
+        assert extract_text_from_pdf(content) == ' '.join(iter_pdf_page_text(content, max_pages=0))
+    finally:
+        document_parsing.PDF_MAX_PAGES = saved
+
+
+def test_retained_text_budget():
+    """max_text_chars keeps only the start of the text while on_text still sees every page."""
+    content = build_pdf(5)
+    full = parse_document(content, 'resume.pdf', max_pages=0)
+    first_page = next(iter_pdf_page_text(content))
+    budget = len(first_page) + 10
+
+    pages = []
+    document = parse_document(content, 'resume.pdf', max_pages=0, on_text=pages.append, max_text_chars=budget)
+    assert len(pages) == 5
+    assert document.text == full.text[:budget]
+    assert document.page_offsets == [0, len(first_page) + 1]
+    assert document.text_chars == full.text_chars == len(full.text)
+
+
+def test_pages_stream_into_skill_matching():
+    """Each page is handed to on_text, and streamed matching equals whole-text matching."""
+    content = build_pdf(4)
+    pages = []
+    document = parse_document(content, 'resume.pdf', on_text=pages.append)
+    assert len(pages) == 4
+    assert ' '.join(pages) == document.text
+    assert alias_skill_matcher.find_iter(iter_pdf_page_text(content)) == alias_skill_matcher.find(document.text)
+
+
+def test_parse_invalid_documents():
+    """Unreadable or unsupported files give an empty result instead of raising."""
+    corrupt = parse_document(b'not a pdf', 'broken.pdf')
+    assert corrupt.file_type == 'pdf'
+    assert corrupt.text == '' and corrupt.creation_date is None and corrupt.page_count == 0
+
+    unknown = parse_document(b'plain text', 'notes.txt')
+    assert unknown.file_type == 'unknown'
+    assert unknown.text == ''
+    assert 'total' in unknown.timings
+
+
+if __name__ == "__main__":
+    test_parse_pdf_once()
+    test_parse_excel_once()
+    test_parse_legacy_xls()
+    test_pdf_page_cap()
+    test_legacy_pdf_helper_reads_every_page()
+    test_retained_text_budget()
+    test_pages_stream_into_skill_matching()
+    test_parse_invalid_documents()
+    print("✅ Document parsing tests passed")
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Tests that parsers and Azure/OpenAI SDKs are imported on first use, not at import time.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_import_time import measure_import, parse_importtime, top_imports
+
+
+def test_modules_import_without_deferred_dependencies():
+    """Importing the library modules loads none of the slow optional dependencies."""
+    for module in ('document_parsing', 'ingestion', 'keyvault_manager', 'ai_skills', 'monthly_analysis'):
+        _, rows, loaded = measure_import(module)
+        assert loaded == [], f"{module} loads {loaded}"
+        assert any(name == module for _, _, _, name in rows)
+
+
+def test_parse_importtime_output():
+    """Rows keep their nesting depth, and top_imports only reports the module's own dependencies."""
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       100 |        300 |   certifi.core\n"
+        "import time:       200 |        500 | certifi\n"
+        "import time:      1000 |       1000 |     openpyxl.cell\n"
+        "import time:       500 |       1500 |   openpyxl\n"
+        "import time:       300 |        300 |   re\n"
+        "import time:       700 |       2500 | document_parsing\n"
+    )
+    rows = parse_importtime(stderr)
+    assert rows[0] == (100, 300, 1, 'certifi.core')
+    assert rows[2] == (1000, 1000, 2, 'openpyxl.cell')
+    assert top_imports(rows, 'document_parsing', 5) == [('openpyxl', 1.5), ('re', 0.3)]
+
+
+if __name__ == "__main__":
+    test_modules_import_without_deferred_dependencies()
+    test_parse_importtime_output()
+    print("✅ Import time tests passed")
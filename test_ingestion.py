@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Tests for the concurrent ingestion pipeline used by multi-file uploads.
+"""
+
+import io
+import sys
+import os
+import threading
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import openpyxl
+
+from ingestion import IngestionPool, parse_and_match, guess_document_type
+
+
+def _make_excel(*cells):
+    """Build an in-memory .xlsx file with one value per row."""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for value in cells:
+        sheet.append([value])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+class RecordingStore:
+    """store_file stand-in that records calls and reports local storage."""
+
+    def __init__(self, fail_for=()):
+        self.fail_for = set(fail_for)
+        self.stored = []
+        self.lock = threading.Lock()
+
+    def __call__(self, file_content, filename):
+        if filename in self.fail_for:
+            raise IOError("disk full")
+        with self.lock:
+            self.stored.append(filename)
+        return False
+
+
+def _fake_ai(text, filename):
+    if 'broken' in filename:
+        raise RuntimeError("AI service unavailable")
+    return ['Communication'], {'extraction_method': 'ai'}
+
+
+def test_parse_and_match_excel():
+    """The CPU stage extracts text and pattern skills from an Excel file."""
+    content = _make_excel("Python developer", "Docker and Kubernetes")
+    parsed = parse_and_match("resume.xlsx", content)
+    assert parsed.file_type == 'excel'
+    assert 'Python developer' in parsed.text
+    assert {'Python', 'Docker', 'Kubernetes'} <= set(parsed.skills)
+
+
+def test_process_files_isolates_errors_and_keeps_order():
+    """Each file gets its own result, in input order, with errors isolated."""
+    pool = IngestionPool(process_workers=0, io_workers=4)
+    store = RecordingStore(fail_for={'locked_cv.xlsx'})
+    uploads = [
+        ("good_cv.xlsx", _make_excel("Python and React")),
+        ("corrupt.pdf", b"not really a pdf"),
+        ("locked_cv.xlsx", _make_excel("Java")),
+        ("broken_job.xlsx", _make_excel("Terraform on Azure")),
+    ]
+    try:
+        results = pool.process_files(uploads, store_file=store, extract_ai=_fake_ai)
+    finally:
+        pool.shutdown()
+
+    assert [r.filename for r in results] == [name for name, _ in uploads]
+
+    good, corrupt, locked, broken = results
+    assert good.error is None
+    assert {'Python', 'React'} <= set(good.skills)
+    assert good.ai_skills == ['Communication']
+    assert good.upload_date
+
+    assert corrupt.error == 'Could not extract text from PDF file'
+    assert locked.error == 'Error processing file: disk full'
+
+    # AI failures do not fail the file
+    assert broken.error is None
+    assert broken.ai_skills == []
+    assert broken.ai_metadata == {'error': 'AI service unavailable'}
+
+    assert sorted(store.stored) == ['broken_job.xlsx', 'corrupt.pdf', 'good_cv.xlsx']
+
+
+def test_process_files_with_worker_processes():
+    """Parsing runs in worker processes and returns the same results."""
+    pool = IngestionPool(process_workers=2, io_workers=2)
+    # Workers are never forked from the multithreaded app process
+    assert pool.start_method in ('forkserver', 'spawn')
+    uploads = [(f"cv_{i}.xlsx", _make_excel(f"Python {i}", "PostgreSQL")) for i in range(4)]
+    try:
+        results = pool.process_files(uploads, store_file=RecordingStore())
+    finally:
+        pool.shutdown()
+
+    for result in results:
+        assert result.error is None
+        assert {'Python', 'PostgreSQL'} <= set(result.skills)
+        assert result.ai_skills == []
+
+
+def test_process_files_reports_progress():
+    """Successful files report each stage; failed files stop before AI extraction."""
+    pool = IngestionPool(process_workers=0, io_workers=2)
+    events = []
+    lock = threading.Lock()
+
+    def on_progress(index, stage):
+        with lock:
+            events.append((index, stage))
+        if index == 1:
+            raise RuntimeError("status store unavailable")
+
+    uploads = [("cv.xlsx", _make_excel("Python")), ("job.xlsx", _make_excel("Docker")),
+               ("corrupt.pdf", b"not a pdf")]
+    try:
+        results = pool.process_files(uploads, store_file=RecordingStore(),
+                                     extract_ai=_fake_ai, on_progress=on_progress)
+    finally:
+        pool.shutdown()
+
+    stages = ['parsed', 'pattern_extracted', 'ai_extracted']
+    assert [stage for index, stage in events if index == 0] == stages
+    # A failing callback does not fail the file
+    assert [stage for index, stage in events if index == 1] == stages
+    assert results[1].error is None
+    assert not [stage for index, stage in events if index == 2]
+
+
+def test_process_files_batches_ai_extraction():
+    """extract_ai_many gets every parsed file in one call and results map back in order."""
+    pool = IngestionPool(process_workers=0, io_workers=2)
+    batches = []
+    events = []
+    lock = threading.Lock()
+
+    def extract_ai_many(documents, on_result):
+        batches.append([filename for _, filename, _ in documents])
+        results = [([filename.split('.')[0]], {'extraction_method': 'ai'}) for _, filename, _ in documents]
+        for index in reversed(range(len(results))):
+            on_result(index, results[index])
+        return results
+
+    def on_progress(index, stage):
+        with lock:
+            events.append((index, stage))
+
+    uploads = [("cv.xlsx", _make_excel("Python")), ("corrupt.pdf", b"not a pdf"),
+               ("job.xlsx", _make_excel("Docker"))]
+    try:
+        results = pool.process_files(uploads, store_file=RecordingStore(), extract_ai=_fake_ai,
+                                     on_progress=on_progress, extract_ai_many=extract_ai_many)
+    finally:
+        pool.shutdown()
+
+    assert batches == [['cv.xlsx', 'job.xlsx']]
+    assert results[0].ai_skills == ['cv']
+    assert results[1].ai_skills == []
+    assert results[2].ai_skills == ['job']
+    assert [stage for index, stage in events if index == 2] == ['parsed', 'pattern_extracted', 'ai_extracted']
+    assert not [stage for index, stage in events if index == 1]
+
+
+def test_guess_document_type():
+    """Document type guessing matches the upload route's filename rules."""
+    assert guess_document_type("Jane_CV.pdf") == "resume"
+    assert guess_document_type("my-resume.xlsx") == "resume"
+    assert guess_document_type("Senior backend-utvikler.pdf") == "job_description"
+
+
+if __name__ == "__main__":
+    test_parse_and_match_excel()
+    test_process_files_isolates_errors_and_keeps_order()
+    test_process_files_with_worker_processes()
+    test_process_files_reports_progress()
+    test_process_files_batches_ai_extraction()
+    test_guess_document_type()
+    print("✅ Ingestion tests passed")
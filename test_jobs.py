@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tests for background ingestion jobs used by asynchronous uploads.
+"""
+
+import sqlite3
+import sys
+import os
+import tempfile
+import threading
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jobs import JobManager, JobStore, JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, FILE_PERSISTED, FILE_FAILED
+
+
+def _handler(entries, on_progress):
+    """Stand-in for app.ingest_uploads that reports every stage."""
+    processed = []
+    for position, entry in enumerate(entries):
+        if isinstance(entry, dict):
+            continue
+        filename, content = entry
+        if content == b'bad':
+            on_progress(position, FILE_FAILED, 'Could not extract text from PDF file')
+            continue
+        for stage in ('parsed', 'pattern_extracted', 'ai_extracted', FILE_PERSISTED):
+            on_progress(position, stage)
+        processed.append(filename)
+    return {'success': bool(processed), 'processed_files': processed}
+
+
+def test_job_reports_file_stages_and_result():
+    """A job tracks each file's stage and keeps the final summary."""
+    manager = JobManager(_handler, workers=2, db_path='')
+    job_id = manager.submit([
+        ('cv.pdf', b'%PDF'),
+        {'filename': 'notes.txt', 'error': 'Unsupported file type. Please upload PDF or Excel files.'},
+        ('broken.pdf', b'bad'),
+    ])
+    manager.wait()
+
+    job = manager.get_job(job_id)
+    assert job['status'] == JOB_COMPLETED
+    assert [f['stage'] for f in job['files']] == [FILE_PERSISTED, FILE_FAILED, FILE_FAILED]
+    assert job['files'][2]['error'] == 'Could not extract text from PDF file'
+    assert job['result'] == {'success': True, 'processed_files': ['cv.pdf']}
+    assert job['started_at'] and job['finished_at']
+    assert manager.get_job('missing') is None
+
+
+def test_handler_error_fails_job():
+    """An exception in the handler marks the job failed instead of killing the worker."""
+    def explode(entries, on_progress):
+        raise RuntimeError("storage offline")
+
+    manager = JobManager(explode, workers=1, db_path='')
+    first = manager.submit([('cv.pdf', b'%PDF')])
+    second = manager.submit([('cv2.pdf', b'%PDF')])
+    manager.wait()
+
+    for job_id in (first, second):
+        job = manager.get_job(job_id)
+        assert job['status'] == JOB_FAILED
+        assert job['error'] == 'storage offline'
+
+
+def test_finished_jobs_are_evicted():
+    """Only the most recent finished jobs are kept."""
+    manager = JobManager(_handler, workers=1, db_path='', max_retained=2)
+    job_ids = [manager.submit([(f'cv{i}.pdf', b'%PDF')]) for i in range(4)]
+    manager.wait()
+    assert [manager.get_job(job_id) is not None for job_id in job_ids] == [False, False, True, True]
+
+
+def test_durable_queue_recovers_unfinished_jobs():
+    """Jobs persisted in SQLite but never run are re-queued by a new manager."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'jobs.db')
+
+        # Simulate a process that queued a job and stopped before running it
+        store = JobStore(db_path)
+        entries = [('cv.pdf', b'%PDF'), {'filename': 'notes.txt', 'error': 'Unsupported'}]
+        store.add_job({
+            'job_id': 'abc123', 'status': JOB_QUEUED, 'created_at': '2025-01-01 00:00:00',
+            'started_at': None, 'finished_at': None, 'result': None, 'error': None,
+            'files': [
+                {'filename': 'cv.pdf', 'stage': 'queued', 'error': None},
+                {'filename': 'notes.txt', 'stage': FILE_FAILED, 'error': 'Unsupported'},
+            ]
+        }, entries)
+
+        seen = []
+
+        def handler(job_entries, on_progress):
+            seen.append(job_entries)
+            result = _handler(job_entries, on_progress)
+            return result
+
+        manager = JobManager(handler, workers=1, db_path=db_path)
+        assert manager.recover() == 1
+        manager.wait()
+
+        assert seen == [entries]
+        job = manager.get_job('abc123')
+        assert job['status'] == JOB_COMPLETED
+        assert job['files'][0]['stage'] == FILE_PERSISTED
+
+        # The final state survives a restart and the file contents are released
+        restarted = JobManager(_handler, workers=1, db_path=db_path)
+        assert restarted.recover() == 0
+        assert restarted.get_job('abc123')['result'] == {'success': True, 'processed_files': ['cv.pdf']}
+        assert store.load_entries(job)[0] == {'filename': 'cv.pdf', 'error': 'File content was not persisted'}
+
+
+def test_shared_queue_runs_each_job_once():
+    """Managers sharing a database leave each other's live jobs alone and claim an orphan once."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'jobs.db')
+        handled = []
+        release = threading.Event()
+
+        def handler(job_entries, on_progress):
+            handled.append(job_entries[0][0])
+            if job_entries[0][0] == 'running.pdf':
+                release.wait(5)
+            return _handler(job_entries, on_progress)
+
+        # A live worker process with a job in progress
+        first = JobManager(handler, workers=1, db_path=db_path)
+        running = first.submit([('running.pdf', b'%PDF')])
+
+        # A job left by a worker process that stopped long ago
+        store = JobStore(db_path)
+        store.add_job({
+            'job_id': 'orphan', 'status': JOB_QUEUED, 'created_at': '2025-01-01 00:00:00',
+            'started_at': None, 'finished_at': None, 'result': None, 'error': None,
+            'files': [{'filename': 'orphan.pdf', 'stage': 'queued', 'error': None}]
+        }, [('orphan.pdf', b'%PDF')], owner='stopped-worker')
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("UPDATE jobs SET heartbeat = 0 WHERE job_id = 'orphan'")
+
+        second = JobManager(handler, workers=1, db_path=db_path)
+        third = JobManager(handler, workers=1, db_path=db_path)
+        assert sorted([second.recover(), third.recover()]) == [0, 1]
+        assert first.recover() == 0
+
+        release.set()
+        for manager in (first, second, third):
+            manager.wait()
+        assert sorted(handled) == ['orphan.pdf', 'running.pdf']
+        assert store.get_job(running)['status'] == JOB_COMPLETED
+        assert store.get_job('orphan')['status'] == JOB_COMPLETED
+
+
+if __name__ == "__main__":
+    test_job_reports_file_stages_and_result()
+    test_handler_error_fails_job()
+    test_finished_jobs_are_evicted()
+    test_durable_queue_recovers_unfinished_jobs()
+    test_shared_queue_runs_each_job_once()
+    print("✅ Job queue tests passed")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for concurrent, TTL-cached Key Vault secret retrieval.
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cryptography.fernet import Fernet
+
+import keyvault_manager
+from keyvault_manager import KeyVaultManager
+
+
+class FakeSecretClient:
+    """SecretClient stand-in with a fixed latency that versions every fetch."""
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.fetches = []
+        self.fail = False
+        self.lock = threading.Lock()
+
+    def get_secret(self, name):
+        time.sleep(self.delay)
+        with self.lock:
+            if self.fail:
+                raise ConnectionError("vault unreachable")
+            self.fetches.append(name)
+            version = self.fetches.count(name)
+        return SimpleNamespace(value=f"{name}-v{version}")
+
+    def list_properties_of_secrets(self):
+        raise AssertionError("secrets must not be listed")
+
+
+def _manager(client, **kwargs):
+    kwargs.setdefault('snapshot_path', '')
+    return KeyVaultManager(vault_url='https://test.vault.azure.net/', client=client, **kwargs)
+
+
+def test_multiple_secrets_are_fetched_concurrently():
+    """Uncached secrets are fetched in parallel and then served from the cache."""
+    client = FakeSecretClient(delay=0.1)
+    manager = _manager(client, max_workers=6)
+    names = [f"secret-{i}" for i in range(6)]
+
+    start = time.perf_counter()
+    values = manager.get_multiple_secrets(names)
+    elapsed = time.perf_counter() - start
+
+    assert values == {name: f"{name}-v1" for name in names}
+    assert list(values) == names
+    # Six serial fetches would take at least 0.6 s
+    assert elapsed < 0.4
+    assert manager.get_multiple_secrets(names + ['secret-0']) == values
+    assert len(client.fetches) == 6
+
+
+def test_secrets_refresh_ahead_of_expiry():
+    """Near expiry the cached value is served while a background refresh fetches the new one."""
+    client = FakeSecretClient(delay=0.05)
+    manager = _manager(client, ttl_seconds=0.6, refresh_ahead_seconds=0.4)
+    assert manager.get_secret('api-key') == 'api-key-v1'
+
+    time.sleep(0.3)
+    start = time.perf_counter()
+    assert manager.get_secret('api-key') == 'api-key-v1'
+    assert time.perf_counter() - start < 0.04
+    time.sleep(0.15)
+    assert manager.get_secret('api-key') == 'api-key-v2'
+
+    # An expired secret is fetched again; if that fails the last value is still used
+    client.fail = True
+    time.sleep(0.65)
+    assert manager.get_secret('api-key') == 'api-key-v2'
+    assert manager.get_secret('missing-key') is None
+
+
+def test_encrypted_snapshot_speeds_up_restart():
+    """A new manager serves secrets from the encrypted snapshot without fetching them."""
+    key = Fernet.generate_key().decode('utf-8')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'secrets.snapshot')
+        _manager(FakeSecretClient(delay=0), snapshot_path=path, snapshot_key=key).get_multiple_secrets(['a', 'b'])
+        with open(path, 'rb') as f:
+            assert b'a-v1' not in f.read()
+
+        client = FakeSecretClient(delay=0)
+        restarted = _manager(client, snapshot_path=path, snapshot_key=key)
+        assert restarted.get_multiple_secrets(['a', 'b']) == {'a': 'a-v1', 'b': 'b-v1'}
+        assert client.fetches == []
+
+        # A snapshot encrypted with another key is ignored
+        other = _manager(client, snapshot_path=path, snapshot_key=Fernet.generate_key().decode('utf-8'))
+        assert other.get_secret('a') == 'a-v1'
+        assert client.fetches == ['a']
+
+
+def test_connection_probe_acquires_a_token_instead_of_listing_secrets():
+    """The connectivity check asks for a Key Vault token and never enumerates secrets."""
+    credential = mock.Mock()
+    with mock.patch('azure.identity.ChainedTokenCredential', return_value=credential), \
+            mock.patch('azure.keyvault.secrets.SecretClient', return_value=FakeSecretClient()):
+        manager = KeyVaultManager(vault_url='https://test.vault.azure.net/', snapshot_path='')
+    credential.get_token.assert_called_once_with(keyvault_manager.KEY_VAULT_SCOPE)
+    assert manager.is_available()
+
+
+if __name__ == "__main__":
+    test_multiple_secrets_are_fetched_concurrently()
+    test_secrets_refresh_ahead_of_expiry()
+    test_encrypted_snapshot_speeds_up_restart()
+    test_connection_probe_acquires_a_token_instead_of_listing_secrets()
+    print("✅ Key Vault manager tests passed")
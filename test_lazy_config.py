@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tests for lazy, process-wide Key Vault configuration and AI extractor setup.
+"""
+
+import subprocess
+import sys
+import os
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ai_skills
+import blob_storage
+import keyvault_manager
+from ai_skills import AISkillExtractor, AsyncAISkillExtractor
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _run_threads(target, count=8):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_application_config_is_loaded_once():
+    """Concurrent first calls share one load; refresh reloads."""
+    calls = []
+
+    def slow_secrets(secrets, warn_missing=True):
+        calls.append(sorted(secrets))
+        time.sleep(0.01)
+        return {secret_name: None for secret_name in secrets}
+
+    original = keyvault_manager._application_config
+    keyvault_manager._application_config = None
+    try:
+        with mock.patch.object(keyvault_manager, 'get_secrets', side_effect=slow_secrets):
+            _run_threads(keyvault_manager.get_application_config)
+            assert len(calls) == 1
+            assert len(calls[0]) == 6
+
+            config = keyvault_manager.get_application_config()
+            config['openai_api_key'] = 'changed'
+            assert keyvault_manager.get_application_config()['openai_api_key'] is None
+
+            keyvault_manager.get_application_config(refresh=True)
+            assert len(calls) == 2
+    finally:
+        keyvault_manager._application_config = original
+
+
+def test_extractor_configures_on_first_use():
+    """Creating the extractor reads no config; the first attribute access does, once."""
+    config_calls = []
+
+    def fake_config():
+        config_calls.append(1)
+        time.sleep(0.01)
+        return {}
+
+    with mock.patch.object(ai_skills, 'get_application_config', side_effect=fake_config), \
+            mock.patch.object(ai_skills, 'OPENAI_AVAILABLE', True):
+        extractor = AISkillExtractor()
+        async_extractor = AsyncAISkillExtractor(extractor)
+        assert config_calls == []
+        assert 'client' not in extractor.__dict__
+
+        _run_threads(lambda: extractor.client)
+        assert config_calls == [1]
+        assert extractor.client is None
+        assert extractor.service_type == "None"
+        assert async_extractor.client_factory is None
+
+    try:
+        extractor.no_such_attribute
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("unknown attributes must still raise AttributeError")
+
+
+def test_rotated_secrets_reach_the_clients():
+    """A re-read that finds rotated secrets rebuilds the AI client and the shared blob clients."""
+    current = {
+        'openai-api-key': 'key-1',
+        'azure-storage-connection-string': 'connection-1',
+    }
+
+    def rotating_secrets(secrets, warn_missing=True):
+        return {secret_name: current.get(secret_name) for secret_name in secrets}
+
+    def fake_blob_client(connection_string):
+        return SimpleNamespace(connection_string=connection_string, close=lambda: None)
+
+    original = keyvault_manager._application_config
+    keyvault_manager._application_config = None
+    try:
+        with mock.patch.object(keyvault_manager, 'get_secrets', side_effect=rotating_secrets), \
+                mock.patch.object(keyvault_manager, 'KEYVAULT_CONFIG_REFRESH_SECONDS', 0), \
+                mock.patch.object(ai_skills, 'create_response_cache', return_value=None), \
+                mock.patch.object(blob_storage, 'create_blob_service_client', side_effect=fake_blob_client), \
+                mock.patch.object(blob_storage, '_blob_service_client', None):
+            extractor = AISkillExtractor()
+            assert extractor.client.api_key == 'key-1'
+            assert blob_storage.get_blob_service_client().connection_string == 'connection-1'
+
+            assert not keyvault_manager.refresh_application_config()
+            assert extractor.client.api_key == 'key-1'
+
+            current['openai-api-key'] = 'key-2'
+            current['azure-storage-connection-string'] = 'connection-2'
+            assert keyvault_manager.refresh_application_config()
+            assert extractor.client.api_key == 'key-2'
+            assert extractor.async_client_factory.keywords['api_key'] == 'key-2'
+            assert blob_storage.get_blob_service_client().connection_string == 'connection-2'
+            blob_storage.reset_blob_clients()
+    finally:
+        keyvault_manager._application_config = original
+
+
+def test_monthly_analysis_import_does_no_key_vault_io():
+    """The Azure Function can import monthly_analysis without touching Key Vault."""
+    script = (
+        "import keyvault_manager\n"
+        "def fail(*args, **kwargs):\n"
+        "    raise SystemExit('Key Vault accessed at import')\n"
+        "keyvault_manager.KeyVaultManager.__init__ = fail\n"
+        "keyvault_manager._load_application_config = fail\n"
+        "import monthly_analysis\n"
+        "print('imported')\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=REPO_DIR, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert 'imported' in result.stdout
+
+
+if __name__ == "__main__":
+    test_application_config_is_loaded_once()
+    test_extractor_configures_on_first_use()
+    test_rotated_secrets_reach_the_clients()
+    test_monthly_analysis_import_does_no_key_vault_io()
+    print("✅ Lazy configuration tests passed")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for resume-to-job matching and /api/match.
+"""
+
+import io
+import math
+import sys
+import os
+import uuid
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import resume_matching
+from resume_matching import ResumeMatcher
+
+RESUMES = [
+    ('cv_anna.pdf', ['Python', 'Kubernetes', 'Go']),
+    ('cv_bo.pdf', ['Python', 'Java']),
+    ('cv_cleo.pdf', ['python', 'Kubernetes']),
+    ('cv_dag.pdf', ['Excel']),
+]
+
+
+def _idf(resumes, with_skill):
+    return math.log((1 + resumes) / (1 + with_skill)) + 1
+
+
+def test_idf_weighted_ranking():
+    """Rare skills weigh more, unknown job skills count as missing, ties go to the newest resume."""
+    matcher = ResumeMatcher.from_documents(RESUMES)
+    result = matcher.match(['Kubernetes', 'Go', 'PYTHON', 'Rust'], top_k=10)
+
+    weights = {'Kubernetes': _idf(4, 2), 'Go': _idf(4, 1), 'PYTHON': _idf(4, 3), 'Rust': _idf(4, 0)}
+    assert [(entry['skill'], entry['idf']) for entry in result['job_skills']] == [
+        (skill, round(weight, 4)) for skill, weight in weights.items()
+    ]
+    total = sum(weights.values())
+    assert result['resumes'] == 4
+    assert [match['filename'] for match in result['matches']] == ['cv_anna.pdf', 'cv_cleo.pdf', 'cv_bo.pdf']
+    best = result['matches'][0]
+    assert best['score'] == round((total - weights['Rust']) / total, 4)
+    assert best['matched_skills'] == ['Kubernetes', 'Go', 'PYTHON'] and best['missing_skills'] == ['Rust']
+    assert result['matches'][2]['missing_skills'] == ['Kubernetes', 'Go', 'Rust']
+
+    assert [match['filename'] for match in matcher.match(['Python'], top_k=2)['matches']] == ['cv_cleo.pdf', 'cv_bo.pdf']
+    assert [match['filename'] for match in matcher.match(['Python'], exclude='cv_cleo.pdf')['matches']][0] == 'cv_bo.pdf'
+    assert matcher.match([], top_k=10)['matches'] == []
+    assert ResumeMatcher().match(['Python'])['matches'] == []
+
+
+def test_updates_and_compaction():
+    """Re-adding a resume replaces its skills and document frequencies, also across compaction."""
+    original = resume_matching.COMPACT_MIN_RETIRED
+    resume_matching.COMPACT_MIN_RETIRED = 2
+    try:
+        matcher = ResumeMatcher.from_documents(RESUMES)
+        matcher.add_document('cv_bo.pdf', ['Rust'])
+        assert [match['filename'] for match in matcher.match(['Java'])['matches']] == []
+        assert matcher.get_stats()['retired_rows'] == 1
+        matcher.add_document('cv_dag.pdf', ['Go', 'Rust'])
+        matcher.add_document('cv_anna.pdf', ['Go'])
+        matcher.add_document('cv_cleo.pdf', ['Kubernetes'])
+        # As many retired rows as live ones: not compacted yet
+        assert matcher.get_stats()['retired_rows'] == 4
+        matcher.add_document('cv_bo.pdf', ['Rust', 'Go'])
+        stats = matcher.get_stats()
+        assert stats['retired_rows'] == 0 and stats['resumes'] == 4 and stats['links'] == 6
+
+        fresh = ResumeMatcher.from_documents([
+            ('cv_dag.pdf', ['Go', 'Rust']), ('cv_anna.pdf', ['Go']),
+            ('cv_cleo.pdf', ['Kubernetes']), ('cv_bo.pdf', ['Rust', 'Go']),
+        ])
+        for job in (['Go', 'Rust'], ['Kubernetes', 'Python']):
+            assert matcher.match(job) == fresh.match(job)
+    finally:
+        resume_matching.COMPACT_MIN_RETIRED = original
+
+
+def test_api_match(app_module):
+    """The endpoint ranks the stored resumes against a job description and follows new uploads."""
+    from test_ingestion import _make_excel
+
+    client = app_module.app.test_client()
+    marker = uuid.uuid4().hex
+    for filename, skills in RESUMES + [('jobs/backend_engineer.pdf', ['Kubernetes', 'Go', 'Terraform'])]:
+        app_module.stats_store.add_document(filename, {
+            'upload_date': '2025-09-23 14:30:00', 'file_date': '2025-09-01',
+            'skills_found': skills, 'ai_skills_found': [], 'file_type': 'pdf'
+        })
+
+    result = client.get('/api/match/jobs/backend_engineer.pdf?k=2').get_json()
+    assert result['success'] and result['document_type'] == 'job_description'
+    assert result['resumes'] == 4
+    assert [match['filename'] for match in result['matches']] == ['cv_anna.pdf', 'cv_cleo.pdf']
+    assert result['matches'][0]['missing_skills'] == ['Terraform']
+
+    data = {'files': [(io.BytesIO(_make_excel(f"Kubernetes Go Terraform {marker}")), f'cv_{marker}.xlsx')]}
+    assert client.post('/upload', data=data, content_type='multipart/form-data').get_json()['success']
+    result = client.get('/api/match/jobs/backend_engineer.pdf').get_json()
+    assert result['resumes'] == 5
+    assert result['matches'][0] == {
+        'filename': f'cv_{marker}.xlsx', 'score': 1.0,
+        'matched_skills': ['Kubernetes', 'Go', 'Terraform'], 'missing_skills': []
+    }
+
+    assert client.get('/api/match/missing.pdf').status_code == 404
+
+
+if __name__ == "__main__":
+    test_idf_weighted_ranking()
+    test_updates_and_compaction()
+    from conftest import isolated_app
+    with isolated_app() as app_module:
+        test_api_match(app_module)
+    print("✅ Resume matching tests passed")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for the skill co-occurrence matrix, /api/skills/<skill>/related and
+/api/skills/cooccurrence.
+"""
+
+import math
+import sqlite3
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stats_store import StatsStore
+
+DOCUMENTS = [
+    ('a.pdf', ['Python', 'Django', 'SQL']),
+    ('b.pdf', ['Python', 'Django']),
+    ('c.pdf', ['Python', 'SQL', 'Excel']),
+    ('d.pdf', ['Excel']),
+    ('e.pdf', []),
+]
+
+
+def _doc(skills):
+    return {
+        'upload_date': '2025-09-23 14:30:00', 'file_date': '2025-09-01',
+        'skills_found': skills, 'ai_skills_found': ['Leadership'], 'file_type': 'pdf'
+    }
+
+
+def _pairs(store):
+    with store._connect() as conn:
+        return sorted(conn.execute("SELECT skill_a, skill_b, count FROM skill_pairs"))
+
+
+def _store(tmp, documents=DOCUMENTS):
+    store = StatsStore(os.path.join(tmp, 'stats.db'))
+    for filename, skills in documents:
+        store.add_document(filename, _doc(skills))
+    return store
+
+
+def test_incremental_pairs():
+    """Counts follow new and re-processed documents and match a rebuild from an import."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _store(tmp)
+        matrix = store.cooccurrence_matrix(top_n=3)
+        # Ties on the number of documents go by name
+        assert matrix['skills'] == ['Python', 'Django', 'Excel']
+        assert matrix['documents'] == [3, 2, 2] and matrix['total_documents'] == 5
+        assert matrix['counts'] == [[3, 2, 1], [2, 2, 0], [1, 0, 2]]
+        assert matrix['max_count'] == 2
+        assert matrix['lift'][0][0] is None and matrix['lift'][0][1] == round(2 * 5 / (3 * 2), 3)
+        assert matrix['lift'][1][2] == 0
+
+        # Re-processing a document replaces its pairs without counting it twice
+        store.add_document('a.pdf', _doc(['Python', 'Excel']))
+        matrix = store.cooccurrence_matrix(top_n=10)
+        assert matrix['total_documents'] == 5
+        assert dict(zip(matrix['skills'], matrix['documents'])) == {'Python': 3, 'Excel': 3, 'Django': 1, 'SQL': 1}
+        python, excel = matrix['skills'].index('Python'), matrix['skills'].index('Excel')
+        assert matrix['counts'][python][excel] == matrix['counts'][excel][python] == 2
+
+        imported = StatsStore(os.path.join(tmp, 'imported.db'))
+        imported.import_stats(store.export_stats())
+        assert _pairs(imported) == _pairs(store)
+        assert imported.cooccurrence_matrix() == store.cooccurrence_matrix()
+
+
+def test_backfill_existing_database():
+    """A database written before skill_pairs existed gets its counts on open."""
+    with tempfile.TemporaryDirectory() as tmp:
+        expected = _pairs(_store(tmp))
+        db_path = os.path.join(tmp, 'stats.db')
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("DROP TABLE skill_pairs")
+            conn.execute("DROP TABLE counters")
+        store = StatsStore(db_path)
+        assert _pairs(store) == expected
+        assert store.related_skills('Python')['total_documents'] == 5
+
+
+def test_related_skills():
+    """Lift, PMI and confidence from one row of the matrix; lookups are case-insensitive."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _store(tmp)
+        result = store.related_skills('python')
+        assert result['skill'] == 'Python' and result['documents'] == 3 and result['total_documents'] == 5
+        related = {entry['skill']: entry for entry in result['related']}
+        assert set(related) == {'Django', 'SQL', 'Excel'}
+        assert related['Django'] == {
+            'skill': 'Django', 'count': 2, 'documents': 2, 'confidence': round(2 / 3, 4),
+            'lift': round(2 * 5 / (3 * 2), 4), 'pmi': round(math.log2(2 * 5 / (3 * 2)), 4)
+        }
+        assert related['Excel']['lift'] == round(5 / 6, 4) and related['Excel']['pmi'] < 0
+        assert [entry['skill'] for entry in result['related']] == ['Django', 'SQL', 'Excel']
+
+        assert [entry['skill'] for entry in store.related_skills('Python', min_count=2)['related']] == ['Django', 'SQL']
+        assert len(store.related_skills('Python', limit=1)['related']) == 1
+        assert [entry['skill'] for entry in store.related_skills('Excel')['related']] == ['SQL', 'Python']
+        assert [entry['count'] for entry in store.related_skills('Python', sort='count')['related']] == [2, 2, 1]
+        assert store.related_skills('Cobol') is None
+        assert store.related_skills('Leadership') is None
+
+
+def test_api_cooccurrence(app_module):
+    """The endpoints read the store and the comparison page renders the heatmap."""
+    client = app_module.app.test_client()
+    for filename, skills in DOCUMENTS:
+        app_module.stats_store.add_document(filename, _doc(skills))
+
+    result = client.get('/api/skills/Python/related?min_count=1&sort=pmi').get_json()
+    assert result['success'] and result['skill'] == 'Python'
+    assert [entry['skill'] for entry in result['related']] == ['Django', 'SQL', 'Excel']
+    result = client.get('/api/skills/Python/related').get_json()
+    assert [entry['skill'] for entry in result['related']] == ['Django', 'SQL']
+    assert client.get('/api/skills/Python/related?sort=support').status_code == 400
+    assert client.get('/api/skills/Cobol/related').status_code == 404
+
+    result = client.get('/api/skills/cooccurrence?top=2').get_json()
+    assert result['success'] and result['skills'] == ['Python', 'Django']
+    assert result['counts'] == [[3, 2], [2, 2]]
+
+    page = client.get('/comparison').get_data(as_text=True)
+    assert 'Skill Co-occurrence' in page and 'Python + Django: 2 documents' in page
+
+
+if __name__ == "__main__":
+    test_incremental_pairs()
+    test_backfill_existing_database()
+    test_related_skills()
+    from conftest import isolated_app
+    with isolated_app() as app_module:
+        test_api_cooccurrence(app_module)
+    print("✅ Skill co-occurrence tests passed")
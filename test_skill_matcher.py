@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Parity tests for the single-pass skill matcher against the original
+regex-per-skill extraction.
+"""
+
+import random
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from skills import (
+    tech_skills, skill_aliases, skill_matcher, alias_skill_matcher, extract_skills,
+    extract_skills_many, skill_incidence_matrix
+)
+from skill_matcher import SkillMatcher
+from benchmark_skill_matching import (
+    legacy_extract_skills, legacy_extract_skills_with_aliases, generate_resume
+)
+
+SAMPLE_TEXTS = [
+    """
+    TECHNICAL SKILLS:
+    • Programming Languages: Python, JavaScript, Java, C++, C#, F#, Objective-C
+    • Web Technologies: React, Node.js, node js, Vue .js, ASP.NET, .NET Core, Next.js
+    • Cloud: AWS, Azure, Google Cloud, GCP, k8s, CI/CD, cicd
+    """,
+    "Erfaring med utvikling i C og R, kjennskap til Go og Power BI-rapporter.",
+    "P y t h o n  K u b e r n e t e s  Sp ring Bo ot  Post gre SQL",
+    "Worked with javascript frameworks (reactjs, vuejs) and c + + / c # on unix.",
+    "",
+    "c",
+    "node.js.",
+    "dotnet_core vscode vs code red-hat REST-api",
+]
+
+
+def _fragment(text, rng):
+    """Simulate PDF extraction artifacts by splitting and joining words."""
+    out = []
+    for ch in text:
+        roll = rng.random()
+        if roll < 0.05:
+            out.append(ch + ' ')
+        elif roll < 0.08:
+            out.append(ch.upper())
+        else:
+            out.append(ch)
+    return ''.join(out)
+
+
+def test_parity_on_samples():
+    """Matcher results equal the regex implementation on hand-written samples."""
+    for text in SAMPLE_TEXTS:
+        assert skill_matcher.find(text) == set(legacy_extract_skills(text))
+        assert alias_skill_matcher.find(text) == set(legacy_extract_skills_with_aliases(text))
+
+
+def test_parity_on_fuzzed_text():
+    """Matcher results equal the regex implementation on fragmented random text."""
+    rng = random.Random(1234)
+    vocabulary = tech_skills + list(skill_aliases) + ['and', 'med', 'x', '+', '#', '.', '-', '/']
+    for _ in range(200):
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(1, 30))]
+        separators = [rng.choice([' ', '', '.', ', ', '\n', '-', '_', '+']) for _ in words]
+        text = _fragment(''.join(w + s for w, s in zip(words, separators)), rng)
+        assert skill_matcher.find(text) == set(legacy_extract_skills(text)), text
+        assert alias_skill_matcher.find(text) == set(legacy_extract_skills_with_aliases(text)), text
+
+
+def test_parity_on_long_resumes():
+    """Matcher results equal the regex implementation on 5 and 50 page resumes."""
+    for pages in (5, 50):
+        text = generate_resume(pages, seed=pages)
+        assert skill_matcher.find(text) == set(legacy_extract_skills(text))
+        assert alias_skill_matcher.find(text) == set(legacy_extract_skills_with_aliases(text))
+
+
+def _split_on_whitespace(text, rng, pieces):
+    """Split text into chunks at whitespace, as PDF pages would be."""
+    words = text.split()
+    cuts = sorted(rng.sample(range(1, len(words)), min(pieces, len(words) - 1))) if len(words) > 1 else []
+    return [' '.join(words[start:end]) for start, end in zip([0] + cuts, cuts + [len(words)])]
+
+
+def test_stream_matches_whole_text():
+    """Feeding chunks gives the same skills as matching the joined text."""
+    rng = random.Random(99)
+    texts = SAMPLE_TEXTS + [generate_resume(pages, seed=pages) for pages in (1, 5, 20)]
+    for text in texts:
+        for matcher in (skill_matcher, alias_skill_matcher):
+            chunks = _split_on_whitespace(text, rng, rng.randint(1, 40))
+            assert matcher.find_iter(chunks) == matcher.find(text), text[:80]
+
+
+def test_stream_finds_skills_split_across_chunks():
+    """Skills and flexible spellings spanning a chunk boundary are found."""
+    pages = ["Built services in node.", "js and Spring", "Boot, then C +", "+ tooling"]
+    found = alias_skill_matcher.find_iter(pages)
+    assert {'Node.js', 'Spring Boot', 'C++'} <= found
+    assert found == alias_skill_matcher.find(' '.join(pages))
+
+    # Chunks are whitespace separated, so a word is never joined across them
+    assert alias_skill_matcher.find_iter(["Python develop", "er"]) == alias_skill_matcher.find("Python develop er")
+
+
+def test_stream_memory_is_bounded():
+    """The stream keeps only the current chunk plus the overlap window."""
+    stream = skill_matcher.stream()
+    page = generate_resume(1, seed=7)
+    for _ in range(50):
+        stream.feed(page)
+        assert len(stream._buffer) <= stream.overlap
+    assert stream.finish() == skill_matcher.find(page)
+
+
+def test_extract_skills_returns_unique_list():
+    """extract_skills keeps returning a list with each skill once."""
+    found = extract_skills("Python python PYTHON Docker docker")
+    assert isinstance(found, list)
+    assert sorted(found) == sorted(set(found))
+    assert {'Python', 'Docker'} <= set(found)
+
+
+def test_custom_dictionary():
+    """A matcher can be built for an arbitrary dictionary and alias table."""
+    matcher = SkillMatcher(["Terraform", "C++"], aliases={"tf": "Terraform"})
+    assert matcher.find("Wrote TF modules") == {"Terraform"}
+    assert matcher.find("Modern C++ development") == {"C++"}
+    assert matcher.find("nothing relevant") == set()
+
+
+def test_extract_skills_many_matches_single_calls():
+    """Batch extraction returns the same sets as per-document calls, in order."""
+    texts = SAMPLE_TEXTS + [SAMPLE_TEXTS[0]]
+    results = extract_skills_many(texts)
+    assert results == [set(extract_skills(text)) for text in texts]
+
+    alias_results = extract_skills_many(iter(texts), matcher=alias_skill_matcher)
+    assert alias_results == [alias_skill_matcher.find(text) for text in texts]
+
+    # Duplicate documents get independent sets
+    results[0].add('Not A Skill')
+    assert 'Not A Skill' not in results[-1]
+
+
+def test_extract_skills_many_incidence_matrix():
+    """The incidence matrix has one row per document and one column per skill."""
+    texts = ["Python and Docker", "k8s and Deep Learning via dl", "no skills here"]
+    skill_sets, matrix, skill_names = extract_skills_many(
+        texts, matcher=alias_skill_matcher, return_matrix=True
+    )
+    assert matrix.shape == (3, len(skill_names))
+    assert matrix.dtype == bool
+    for row, skills in enumerate(skill_sets):
+        assert {skill_names[col] for col in matrix[row].nonzero()[0]} == skills
+    assert not matrix[2].any()
+    assert 'Deep Learning' in skill_names
+
+
+def test_extract_skills_many_sparse_matrix():
+    """The sparse matrix holds CSR arrays for the same incidences as the dense one."""
+    texts = ["Python and Docker", "no skills here", "k8s and Deep Learning via dl", "Docker"]
+    _, dense, _ = extract_skills_many(texts, matcher=alias_skill_matcher, return_matrix=True)
+    _, sparse, skill_names = extract_skills_many(texts, matcher=alias_skill_matcher, return_matrix=True,
+                                                 sparse=True)
+    assert sparse.shape == dense.shape == (4, len(skill_names))
+    assert sparse.indptr.tolist()[:3] == [0, 2, 2]
+    assert len(sparse.data) == len(sparse.indices) == sparse.indptr[-1] == dense.sum()
+    for row in range(len(texts)):
+        columns = sparse.indices[sparse.indptr[row]:sparse.indptr[row + 1]].tolist()
+        assert columns == dense[row].nonzero()[0].tolist()
+    assert skill_incidence_matrix([{'Python', 'Not A Skill'}], skill_names).sum() == 1
+
+
+def test_find_many_cache_is_bounded():
+    """find_many gives the same results when its cache only holds one text."""
+    texts = (SAMPLE_TEXTS[i % 2] for i in range(6))
+    assert alias_skill_matcher.find_many(texts, cache_size=1) == \
+        [alias_skill_matcher.find(SAMPLE_TEXTS[i % 2]) for i in range(6)]
+
+
+if __name__ == "__main__":
+    test_parity_on_samples()
+    test_parity_on_fuzzed_text()
+    test_parity_on_long_resumes()
+    test_stream_matches_whole_text()
+    test_stream_finds_skills_split_across_chunks()
+    test_stream_memory_is_bounded()
+    test_extract_skills_returns_unique_list()
+    test_custom_dictionary()
+    test_extract_skills_many_matches_single_calls()
+    test_extract_skills_many_incidence_matrix()
+    test_extract_skills_many_sparse_matrix()
+    test_find_many_cache_is_bounded()
+    print("✅ Skill matcher parity tests passed")
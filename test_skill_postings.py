@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the interned skill -> document postings.
+"""
+
+import json
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from skill_postings import DocumentPostings, skill_documents
+from benchmark_skill_postings import build_legacy, build_postings, generate_documents
+
+
+def test_postings_are_interned_sorted_and_idempotent():
+    """Documents get one id each and postings stay sorted without duplicates."""
+    postings = DocumentPostings()
+    postings.add_document('a.pdf', ['Python', 'Docker'])
+    postings.add_document('b.pdf', ['Python'])
+    postings.add('Docker', 'c.pdf')
+    # Re-adding a link, and linking an older document to a skill later on
+    postings.add('Python', 'a.pdf')
+    postings.add('Docker', 'b.pdf')
+
+    assert postings.filenames == ['a.pdf', 'b.pdf', 'c.pdf']
+    assert list(postings.ids('Docker')) == [0, 1, 2]
+    assert postings.documents('Python') == ['a.pdf', 'b.pdf']
+    assert postings.count('Docker') == 3 and postings.count('Rust') == 0
+    assert len(postings) == 2 and 'Python' in postings and postings.documents('Rust') == []
+
+
+def test_serialization_round_trip_and_legacy_format():
+    """to_dict() survives JSON and load() also reads the older per-skill lists."""
+    documents = generate_documents(200, 8)
+    postings = build_postings(documents)
+    data = json.loads(json.dumps(postings.to_dict()))
+    loaded = DocumentPostings.load(data)
+    for skill in postings.skills():
+        assert loaded.documents(skill) == postings.documents(skill)
+    loaded.add('Python', 'new.pdf')
+    assert loaded.documents('Python')[-1] == 'new.pdf'
+
+    legacy = DocumentPostings.load({'Go': ['a.pdf', 'b.pdf'], 'SQL': [{'filename': 'b.pdf'}]})
+    assert legacy.documents('Go') == ['a.pdf', 'b.pdf'] and legacy.documents('SQL') == ['b.pdf']
+    assert DocumentPostings.load(None).count('Go') == 0
+
+
+def test_skill_documents_accessor():
+    """Consumers get the legacy per-skill document dicts from either stats format."""
+    documents = generate_documents(50, 6)
+    expected = build_legacy(documents)
+    stats_data = {'processed_documents': documents, 'skill_postings': build_postings(documents).to_dict()}
+    assert skill_documents(stats_data) == expected
+    assert skill_documents({'skill_documents': expected}) == expected
+    assert skill_documents({}) == {}
+
+
+def test_ai_stats_use_postings():
+    """The AI extractor saves compact postings and still loads saved per-skill lists."""
+    from ai_skills import AISkillExtractor
+
+    extractor = AISkillExtractor()
+    extractor.load_ai_stats_data({
+        'ai_skill_counter': {'Leadership': 2},
+        'ai_skill_documents': {'Leadership': ['a.pdf', 'b.pdf']}
+    })
+    assert extractor.get_ai_skills_stats() == [{'skill': 'Leadership', 'count': 2, 'documents': 2}]
+    saved = extractor.get_ai_stats_data()['ai_skill_documents']
+    assert set(saved) == {'documents', 'postings'}
+    extractor.load_ai_stats_data({'ai_skill_documents': saved})
+    assert extractor.ai_skill_documents.documents('Leadership') == ['a.pdf', 'b.pdf']
+
+
+if __name__ == "__main__":
+    test_postings_are_interned_sorted_and_idempotent()
+    test_serialization_round_trip_and_legacy_format()
+    test_skill_documents_accessor()
+    test_ai_stats_use_postings()
+    print("✅ Skill postings tests passed")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the boolean skill search index and /api/search.
+"""
+
+import io
+import sys
+import os
+import uuid
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from skill_search import SkillIndex, QueryError, parse_query, AND, OR, NOT, SKILL
+
+DOCUMENTS = [
+    ('a.pdf', '2025-01', ['Kubernetes', 'Go']),
+    ('b.pdf', '2025-02', ['Kubernetes', 'Rust', 'Java']),
+    ('c.pdf', '2025-03', ['Kubernetes', 'Rust']),
+    ('d.pdf', '2025-03', ['Power BI']),
+    ('e.pdf', '2025-04', []),
+]
+
+
+def _links():
+    for filename, month, skills in DOCUMENTS:
+        for skill in skills or [None]:
+            yield filename, month, skill
+
+
+def test_parse_query():
+    """Operators, precedence, implicit AND, multi-word and quoted skill names."""
+    assert parse_query('Kubernetes AND (Go OR Rust) NOT Java') == (
+        AND, (AND, (SKILL, 'Kubernetes'), (OR, (SKILL, 'Go'), (SKILL, 'Rust'))), (NOT, (SKILL, 'Java'))
+    )
+    assert parse_query('A OR B AND C') == (OR, (SKILL, 'A'), (AND, (SKILL, 'B'), (SKILL, 'C')))
+    assert parse_query('Power BI OR "Google Cloud"') == (OR, (SKILL, 'Power BI'), (SKILL, 'Google Cloud'))
+    assert parse_query('NOT NOT C#') == (NOT, (NOT, (SKILL, 'C#')))
+    for query in ['', '   ', 'A AND', '(A OR B', 'A)', '"A', 'OR A', 'A NOT']:
+        try:
+            parse_query(query)
+            assert False, f"{query!r} should not parse"
+        except QueryError:
+            pass
+
+
+def test_search_index():
+    """Boolean queries, month ranges, pagination and incremental updates agree with a bulk build."""
+    index = SkillIndex.from_links(_links())
+    incremental = SkillIndex()
+    for filename, month, skills in DOCUMENTS:
+        incremental.add_document(filename, month, skills)
+
+    for built in (index, incremental):
+        assert built.search('Kubernetes AND (Go OR Rust) NOT Java')['filenames'] == ['c.pdf', 'a.pdf']
+        assert built.search('kubernetes')['total'] == 3
+        assert built.search('NOT Kubernetes')['filenames'] == ['e.pdf', 'd.pdf']
+        assert built.search('power bi OR Rust', month_from='2025-03')['filenames'] == ['d.pdf', 'c.pdf']
+        assert built.search('Kubernetes', month_from='2025-02', month_to='2025-02')['filenames'] == ['b.pdf']
+        page = built.search('NOT Cobol', offset=1, limit=2)
+        assert page['total'] == 5 and page['filenames'] == ['d.pdf', 'c.pdf']
+        assert built.search('Cobol OR Go') == {'total': 1, 'filenames': ['a.pdf'], 'unknown_skills': ['Cobol']}
+
+    # Re-indexing a document replaces its skills and month
+    index.add_document('a.pdf', '2025-05', ['Rust'])
+    assert index.search('Go')['total'] == 0
+    assert index.search('Rust', month_from='2025-05')['filenames'] == ['a.pdf']
+    assert index.get_stats()['documents'] == 5
+
+
+def test_api_search(app_module):
+    """The endpoint builds the index from the store and picks up new uploads."""
+    from test_ingestion import _make_excel
+
+    client = app_module.app.test_client()
+    marker = uuid.uuid4().hex
+    for filename, month, skills in DOCUMENTS:
+        app_module.stats_store.add_document(filename, {
+            'upload_date': f'{month}-10 12:00:00', 'file_date': f'{month}-01',
+            'skills_found': skills, 'ai_skills_found': [], 'file_type': 'pdf'
+        })
+
+    result = client.get('/api/search', query_string={'q': 'Kubernetes NOT Java', 'per_page': 1}).get_json()
+    assert result['success'] and result['total'] == 2 and result['total_pages'] == 2
+    assert [doc['filename'] for doc in result['documents']] == ['c.pdf']
+    assert result['documents'][0]['skills_found'] == ['Kubernetes', 'Rust']
+    result = client.get('/api/search', query_string={'q': 'Kubernetes', 'from': '2025-02', 'to': '2025-03'}).get_json()
+    assert [doc['filename'] for doc in result['documents']] == ['c.pdf', 'b.pdf']
+
+    data = {'files': [(io.BytesIO(_make_excel(f"Kubernetes and Terraform {marker}")), f'search_{marker}.xlsx')]}
+    assert client.post('/upload', data=data, content_type='multipart/form-data').get_json()['success']
+    result = client.get('/api/search', query_string={'q': 'Terraform AND Kubernetes'}).get_json()
+    assert [doc['filename'] for doc in result['documents']] == [f'search_{marker}.xlsx']
+    assert client.get('/api/health').get_json()['skill_index']['documents'] == 6
+
+    assert client.get('/api/search', query_string={'q': 'Kubernetes AND'}).status_code == 400
+    assert client.get('/api/search', query_string={'q': 'Go', 'from': '2025'}).status_code == 400
+
+
+if __name__ == "__main__":
+    test_parse_query()
+    test_search_index()
+    from conftest import isolated_app
+    with isolated_app() as app_module:
+        test_api_search(app_module)
+    print("✅ Skill search tests passed")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental, rotated stats backups and restoring from them.
+"""
+
+import io
+import sys
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stats_backup import DELTAS, SNAPSHOTS, LocalBackupStore, StatsBackupManager, backup_name
+from stats_store import StatsStore
+
+MS_NS = 10**6
+DAY_NS = 86400 * 10**9
+
+
+def _manager(tmp, state, **kwargs):
+    lock = threading.Lock()
+    return lock, StatsBackupManager(LocalBackupStore(tmp), lambda: {'state': dict(state)}, lock, **kwargs)
+
+
+def _set(state, key, value):
+    state[key] = value
+    return ('set', {'key': key, 'value': value})
+
+
+def _restore(manager, until=None):
+    state = {}
+    summary = manager.restore(lambda snapshot: state.update(snapshot['state']),
+                              lambda event: state.__setitem__(event['data']['key'], event['data']['value']),
+                              until)
+    return state, summary
+
+
+def test_deltas_between_scheduled_snapshots():
+    """Each batch writes a small delta; a full snapshot is only taken when none exists or one is due."""
+    with tempfile.TemporaryDirectory() as tmp:
+        state = {}
+        lock, manager = _manager(tmp, state, snapshot_interval=3600)
+        for i in range(4):
+            with lock:
+                manager.record([_set(state, f'k{i}', i), _set(state, f'k{i}_copy', i)])
+            assert manager.flush(timeout=10)
+
+        stats = manager.get_stats()
+        assert stats['snapshots'] == 1 and stats['deltas'] == 4
+        # The first delta is covered by the snapshot taken right after it and pruned
+        assert len(manager.store.list(SNAPSHOTS)) == 1 and len(manager.store.list(DELTAS)) == 3
+        delta = manager.store.get(sorted(manager.store.list(DELTAS))[-1])
+        assert delta.count(b'\n') == 2 and b'k3_copy' in delta and b'k0' not in delta
+
+        restored, summary = _restore(manager)
+        assert restored == state
+        assert summary['deltas'] == 3 and summary['events'] == 6
+
+        manager.request_snapshot()
+        assert manager.flush(timeout=10)
+        assert manager.get_stats()['snapshots'] == 2
+        assert _restore(manager)[1]['deltas'] == 0
+
+
+def test_point_in_time_restore():
+    """A restore point uses the newest snapshot before it and only the deltas up to it."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LocalBackupStore(tmp)
+        base = time.time_ns()
+        store.put(backup_name(SNAPSHOTS, base), b'{"state": {"a": 1}}')
+        store.put(backup_name(DELTAS, base + 10 * MS_NS), b'{"type":"set","data":{"key":"b","value":2}}\n')
+        store.put(backup_name(DELTAS, base + 20 * MS_NS), b'{"type":"set","data":{"key":"a","value":3}}\n')
+        store.put(backup_name(SNAPSHOTS, base + DAY_NS), b'{"state": {"a": 3, "b": 2, "c": 4}}')
+        manager = StatsBackupManager(store, dict, threading.Lock())
+
+        until = datetime.fromtimestamp((base + 15 * MS_NS) / 1e9)
+        assert _restore(manager, until)[0] == {'a': 1, 'b': 2}
+        assert _restore(manager)[0] == {'a': 3, 'b': 2, 'c': 4}
+        try:
+            _restore(manager, datetime.fromtimestamp((base - MS_NS) / 1e9))
+            assert False, "restoring before the first snapshot should fail"
+        except ValueError:
+            pass
+
+
+def test_prune_keeps_retention_window_and_minimum():
+    """Old snapshots are pruned down to the minimum, with the deltas no kept snapshot needs."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LocalBackupStore(tmp)
+        now = time.time_ns()
+        snapshot_stamps = [now - days * DAY_NS for days in (40, 35, 31, 20, 1)]
+        for stamp in snapshot_stamps:
+            store.put(backup_name(SNAPSHOTS, stamp), b'{}')
+            store.put(backup_name(DELTAS, stamp + 1), b'')
+        manager = StatsBackupManager(store, dict, threading.Lock(), retention_days=30, min_snapshots=3)
+
+        assert manager.prune(now / 1e9) == {'snapshots': 2, 'deltas': 2}
+        remaining = sorted(store.list(SNAPSHOTS))
+        assert remaining == [backup_name(SNAPSHOTS, stamp) for stamp in snapshot_stamps[2:]]
+        assert sorted(store.list(DELTAS))[0] == backup_name(DELTAS, snapshot_stamps[2] + 1)
+
+        manager.retention_days = 0
+        assert manager.prune(now / 1e9) == {'snapshots': 0, 'deltas': 0}
+
+
+def test_app_backs_up_uploads_and_restores(app_module, tmp_path):
+    """Uploads are backed up off the request path, and a restore rebuilds the stats."""
+    from test_ingestion import _make_excel
+
+    client = app_module.app.test_client()
+    marker = uuid.uuid4().hex
+    app_module.stats_backup = StatsBackupManager(LocalBackupStore(os.path.join(tmp_path, 'backups')),
+                                                 app_module.stats_snapshot, app_module.stats_lock)
+    for i, skill in enumerate(['Python', 'Terraform']):
+        data = {'files': [(io.BytesIO(_make_excel(f"{skill} {marker} {i}")), f'backup_{marker}_{i}.xlsx')]}
+        assert client.post('/upload', data=data, content_type='multipart/form-data').get_json()['success']
+    assert app_module.stats_backup.flush(timeout=30)
+    assert app_module.stats_backup.get_stats()['deltas'] == 2
+
+    expected = app_module.stats_store.export_stats()
+    app_module.stats_store = StatsStore(os.path.join(tmp_path, 'restored.db'))
+    assert app_module.stats_store.document_count() == 0
+
+    summary = app_module.restore_stats_from_backup(persist=False)
+    assert summary['events'] == 1
+    restored = app_module.stats_store.export_stats()
+    assert restored['skill_counter'] == expected['skill_counter']
+    assert restored['processed_documents'].keys() == expected['processed_documents'].keys()
+
+
+if __name__ == "__main__":
+    test_deltas_between_scheduled_snapshots()
+    test_point_in_time_restore()
+    test_prune_keeps_retention_window_and_minimum()
+    from conftest import isolated_app
+    with tempfile.TemporaryDirectory() as tmp, isolated_app(tmp) as app_module:
+        test_app_backs_up_uploads_and_restores(app_module, tmp)
+    print("✅ Stats backup tests passed")
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Tests for the append-only stats event log, its compaction and replay.
+"""
+
+import io
+import json
+import sys
+import os
+import tempfile
+import uuid
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stats_log import AppendBlobSegmentStore, LocalSegmentStore, StatsEventLog
+from stats_store import StatsStore
+
+
+def _replay_into(log):
+    state = {}
+    snapshot = log.read_snapshot()
+    if snapshot:
+        state.update(snapshot['state'])
+    log.replay(lambda event: state.__setitem__(event['data']['key'], event['data']['value']))
+    return state
+
+
+def test_snapshot_and_tail_replay():
+    """Compaction writes a snapshot and drops segments; a new log replays only the tail."""
+    with tempfile.TemporaryDirectory() as tmp:
+        log = StatsEventLog(LocalSegmentStore(tmp), compact_every=3)
+        state = {}
+        for i in range(5):
+            state[f'k{i}'] = i
+            assert log.append([('set', {'key': f'k{i}', 'value': i})])
+            if log.needs_compaction():
+                assert log.compact({'state': dict(state)})
+        assert log.get_stats()['compactions'] == 1
+        assert log.snapshot_seq == 3
+        assert len(log.store.list_segments()) == 1
+
+        # Records are compact JSON lines
+        segment = log.store.read_segment(log.store.list_segments()[0])
+        assert segment.count(b'\n') == 2 and b', ' not in segment
+
+        restarted = StatsEventLog(LocalSegmentStore(tmp), compact_every=3)
+        assert _replay_into(restarted) == state
+        assert restarted.get_stats()['replayed'] == 2
+        assert restarted.append([('set', {'key': 'k5', 'value': 5})])
+        assert restarted.seq == 6
+
+
+def test_replay_skips_compacted_events_and_torn_lines():
+    """Events already in the snapshot and a torn last line are not replayed."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LocalSegmentStore(tmp)
+        log = StatsEventLog(store)
+        log.append([('set', {'key': 'a', 'value': 1}), ('set', {'key': 'b', 'value': 2})])
+        # Simulate a crash after the snapshot was written but before the segment was deleted
+        segment_id = store.list_segments()[0]
+        leftover = store.read_segment(segment_id)
+        log.compact({'state': {'a': 1, 'b': 2}})
+        store.append(segment_id, leftover)
+        store.append(segment_id, b'{"seq":3,"type":"set","data":{"key":"c","value":3}}\n{"seq":4,"ty')
+
+        assert _replay_into(StatsEventLog(store)) == {'a': 1, 'b': 2, 'c': 3}
+
+
+def test_append_blocks_hold_whole_records():
+    """Append blob writes are split at record boundaries below the block size limit."""
+    store = AppendBlobSegmentStore(container_client=None)
+    store.MAX_APPEND_BYTES = 10
+    blocks = list(store._blocks(b'aaaa\nbbbb\ncccccccccccc\nd\n'))
+    assert blocks[:2] == [b'aaaa\nbbbb\n', b'cccccccccc']
+    assert b''.join(blocks) == b'aaaa\nbbbb\ncccccccccccc\nd\n'
+
+
+def test_app_restores_stats_from_snapshot_and_log(app_module, tmp_path):
+    """Uploads are appended as events, and loading the log reproduces the stats."""
+    from test_ingestion import _make_excel
+
+    client = app_module.app.test_client()
+    marker = uuid.uuid4().hex
+    log_dir = os.path.join(tmp_path, 'stats_log')
+    app_module.stats_log = StatsEventLog(LocalSegmentStore(log_dir), compact_every=2)
+    for i, skill in enumerate(['Python', 'Docker', 'Kubernetes']):
+        data = {'files': [(io.BytesIO(_make_excel(f"{skill} {marker} {i}")), f'log_{marker}_{i}.xlsx')]}
+        assert client.post('/upload', data=data, content_type='multipart/form-data').get_json()['success']
+
+    stats = app_module.stats_log.get_stats()
+    assert stats['events'] == 3 and stats['compactions'] == 1
+    assert stats['events_since_snapshot'] == 1
+    with open(os.path.join(log_dir, 'snapshot.json')) as f:
+        assert f'log_{marker}_0.xlsx' in json.load(f)['processed_documents']
+
+    expected = app_module.stats_store.export_stats()
+    app_module.stats_log = StatsEventLog(LocalSegmentStore(log_dir), compact_every=2)
+    app_module.stats_store = StatsStore(os.path.join(tmp_path, 'restored.db'))
+    assert app_module.load_stats_from_log()
+    assert app_module.stats_log.get_stats()['replayed'] == 1
+    restored = app_module.stats_store.export_stats()
+    assert restored['skill_counter'] == expected['skill_counter']
+    assert restored['processed_documents'].keys() == expected['processed_documents'].keys()
+    content_hash = restored['processed_documents'][f'log_{marker}_2.xlsx']['content_hash']
+    assert app_module.stats_store.find_by_hash(content_hash)[0] == f'log_{marker}_2.xlsx'
+
+
+def test_restart_with_loaded_store_continues_log(app_module, tmp_path):
+    """A restart that keeps its stats store numbers new events after the log, so a fresh instance replays them."""
+    from test_ingestion import _make_excel
+
+    client = app_module.app.test_client()
+    marker = uuid.uuid4().hex
+
+    def upload(i):
+        data = {'files': [(io.BytesIO(_make_excel(f"Python {marker} {i}")), f'restart_{marker}_{i}.xlsx')]}
+        assert client.post('/upload', data=data, content_type='multipart/form-data').get_json()['success']
+
+    log_dir = os.path.join(tmp_path, 'stats_log')
+    app_module.stats_log = StatsEventLog(LocalSegmentStore(log_dir), compact_every=3)
+    for i in range(4):
+        upload(i)
+    assert app_module.stats_log.snapshot_seq == 3 and app_module.stats_log.seq == 4
+
+    # Restart on the same stats store: the log is not replayed but continues after event 4
+    app_module.stats_log = StatsEventLog(LocalSegmentStore(log_dir), compact_every=100)
+    app_module.resume_stats_log()
+    assert app_module.stats_log.seq == 4 and app_module.stats_log.counters['replayed'] == 0
+    for i in range(4, 6):
+        upload(i)
+    assert app_module.stats_log.seq == 6
+    assert len(app_module.stats_log.store.list_segments()) == 1
+
+    # A new instance with an empty store sees all six uploads
+    app_module.stats_log = StatsEventLog(LocalSegmentStore(log_dir), compact_every=100)
+    app_module.stats_store = StatsStore(os.path.join(tmp_path, 'fresh.db'))
+    assert app_module.load_stats_from_log()
+    assert app_module.stats_log.get_stats()['replayed'] == 3
+    assert app_module.stats_store.document_count() == 6
+
+
+def test_start_from_log_without_snapshot(app_module, tmp_path):
+    """Events logged before the first compaction are replayed over the legacy stats and the log continues after them."""
+    from test_ingestion import _make_excel
+
+    client = app_module.app.test_client()
+    marker = uuid.uuid4().hex
+
+    def upload(i):
+        data = {'files': [(io.BytesIO(_make_excel(f"Python {marker} {i}")), f'early_{marker}_{i}.xlsx')]}
+        assert client.post('/upload', data=data, content_type='multipart/form-data').get_json()['success']
+
+    log_dir = os.path.join(tmp_path, 'stats_log')
+    app_module.stats_log = StatsEventLog(LocalSegmentStore(log_dir), compact_every=100)
+    for i in range(2):
+        upload(i)
+    assert app_module.stats_log.store.read_snapshot() is None
+
+    # A new instance with an empty store: no snapshot, so the segments are replayed
+    app_module.stats_log = StatsEventLog(LocalSegmentStore(log_dir), compact_every=100)
+    app_module.stats_store = StatsStore(os.path.join(tmp_path, 'fresh.db'))
+    assert not app_module.load_stats_from_log()
+    assert app_module.replay_stats_log_over_legacy()
+    assert app_module.stats_store.document_count() == 2
+    assert app_module.stats_log.seq == 2 and app_module.stats_log.snapshot_seq == 2
+
+    upload(2)
+    assert app_module.stats_log.seq == 3
+    seqs = [event['seq'] for segment_id in app_module.stats_log.store.list_segments()
+            for event in app_module.stats_log._read_events(segment_id)]
+    assert seqs == [3]
+
+    # The next instance restores all three uploads from the snapshot and the tail
+    app_module.stats_log = StatsEventLog(LocalSegmentStore(log_dir), compact_every=100)
+    app_module.stats_store = StatsStore(os.path.join(tmp_path, 'next.db'))
+    assert app_module.load_stats_from_log()
+    assert app_module.stats_store.document_count() == 3
+
+
+if __name__ == "__main__":
+    from conftest import isolated_app
+    test_snapshot_and_tail_replay()
+    test_replay_skips_compacted_events_and_torn_lines()
+    test_append_blocks_hold_whole_records()
+    for test in (test_app_restores_stats_from_snapshot_and_log, test_restart_with_loaded_store_continues_log,
+                 test_start_from_log_without_snapshot):
+        with tempfile.TemporaryDirectory() as tmp, isolated_app(tmp) as app_module:
+            test(app_module, tmp)
+    print("✅ Stats log tests passed")
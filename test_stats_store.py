@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite stats store and the pages that query it.
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from skill_postings import skill_documents
+from stats_store import AI, PATTERN, StatsStore
+
+
+def _document(skills, ai_skills=(), file_date='2025-03-04', content_hash=None, **extra):
+    return {
+        'upload_date': '2025-09-23 14:30:00',
+        'file_date': file_date,
+        'skills_found': list(skills),
+        'ai_skills_found': list(ai_skills),
+        'file_type': 'pdf',
+        'content_hash': content_hash,
+        **extra
+    }
+
+
+def test_documents_skills_and_rollups():
+    """Documents are indexed by hash and month, and every merge is counted in the rollups."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = StatsStore(os.path.join(tmp, 'stats.db'))
+        store.add_document('a.pdf', _document(['Python', 'Docker'], ['Leadership'], content_hash='h1'))
+        store.add_document('b.pdf', _document(['Python'], file_date='2025-04-01', content_hash='h2'))
+        # Re-processing a.pdf replaces the document but counts its skills again
+        store.add_document('a.pdf', _document(['Python'], content_hash='h3'))
+
+        assert store.document_count() == 2
+        assert store.skill_counts() == [('Python', 3), ('Docker', 1)]
+        assert store.skill_counts(1) == [('Python', 3)]
+        assert store.distinct_skill_count() == 2 and store.total_skill_occurrences() == 4
+        assert store.monthly_counts(['Python', 'Docker'], ['2025-03', '2025-04']) == {
+            'Python': {'2025-03': 2, '2025-04': 1}, 'Docker': {'2025-03': 1}
+        }
+        assert store.find_by_hash('h3')[0] == 'a.pdf' and store.find_by_hash('h1') is None
+        assert [filename for filename, _ in store.documents_for_month('2025-04')] == ['b.pdf']
+        assert store.documents_with_skills(PATTERN) == 2 and store.documents_with_skills(AI) == 0
+
+        # WAL mode is kept in the database file
+        with sqlite3.connect(store.db_path) as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+
+def test_pending_ai_and_gate_counts():
+    """Pending AI documents and gate decisions are answered from indexed columns."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = StatsStore(os.path.join(tmp, 'stats.db'))
+        skipped_gate = {'route_to_ai': False, 'signals': {'estimated_tokens': 700}}
+        store.add_document('pending.pdf', _document(['Python'], ai_metadata={'ai_pending': True}))
+        store.add_document('skipped.pdf', _document(['Java'], ai_metadata={'ai_skipped': True, 'gate': skipped_gate}))
+        store.add_document('sent.pdf', _document(['Go'], ['Go'], ai_metadata={'gate': {'route_to_ai': True}}))
+
+        assert [filename for filename, _ in store.pending_ai_documents()] == ['pending.pdf']
+        assert store.gate_counts() == (2, 1, 700)
+
+        doc_data = store.get_document('pending.pdf')
+        doc_data['ai_skills_found'] = ['Mentoring']
+        doc_data['ai_metadata'] = {}
+        store.update_document('pending.pdf', doc_data)
+        assert store.pending_ai_documents() == []
+        assert store.documents_with_skills(AI) == 2
+        assert store.skill_count('Python') == 1
+
+
+def test_export_import_round_trip():
+    """The stats JSON format is imported and exported unchanged."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = StatsStore(os.path.join(tmp, 'stats.db'))
+        store.add_document('a.pdf', _document(['Python', 'SQL'], content_hash='h1'))
+        store.add_document('b.pdf', _document(['SQL'], file_date='2025-05-02'))
+        exported = store.export_stats()
+        assert exported['skill_counter'] == {'SQL': 2, 'Python': 1}
+        assert exported['monthly_skill_data'] == {'Python': {'2025-03': 1}, 'SQL': {'2025-03': 1, '2025-05': 1}}
+        assert [entry['filename'] for entry in skill_documents(exported)['SQL']] == ['a.pdf', 'b.pdf']
+
+        imported = StatsStore(os.path.join(tmp, 'imported.db'))
+        imported.add_document('stale.pdf', _document(['Cobol']))
+        imported.import_stats(exported)
+        assert imported.export_stats() == exported
+        assert imported.find_by_hash('h1')[0] == 'a.pdf'
+
+
+def test_pages_query_the_store():
+    """The skills API, comparison and the paginated documents page read from the store."""
+    import app as app_module
+
+    client = app_module.app.test_client()
+    original_store, original_page_size = app_module.stats_store, app_module.DOCUMENTS_PAGE_SIZE
+    with tempfile.TemporaryDirectory() as tmp:
+        app_module.stats_store = StatsStore(os.path.join(tmp, 'stats.db'))
+        app_module.DOCUMENTS_PAGE_SIZE = 2
+        try:
+            for i in range(3):
+                app_module.stats_store.add_document(
+                    f'doc{i}.pdf', _document(['Python'] + (['Rust'] if i else []), upload_date=f'2025-09-2{i} 10:00:00')
+                )
+
+            skills = client.get('/api/skills').get_json()
+            assert skills['total_skills'] == 2 and skills['top_skills'][0] == ['Python', 3]
+            comparison = client.get('/api/comparison').get_json()
+            assert comparison['pattern_matching']['total_documents'] == 3
+            assert comparison['ai_gating']['documents_gated'] == 0
+
+            first_page = client.get('/documents').get_data(as_text=True)
+            assert '3 Documents' in first_page and 'Page 1 of 2' in first_page
+            assert 'doc2.pdf' in first_page and 'doc0.pdf' not in first_page
+            second_page = client.get('/documents?page=2').get_data(as_text=True)
+            assert 'doc0.pdf' in second_page and 'doc2.pdf' not in second_page
+        finally:
+            app_module.stats_store, app_module.DOCUMENTS_PAGE_SIZE = original_store, original_page_size
+
+
+if __name__ == "__main__":
+    test_documents_skills_and_rollups()
+    test_pending_ai_and_gate_counts()
+    test_export_import_round_trip()
+    test_pages_query_the_store()
+    print("✅ Stats store tests passed")